@@ -0,0 +1 @@
+"""Benchmark suite for the PDF analysis tools (run with python -m benchmarks.<name>)."""
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Compare converter backends on a corpus of PDFs: throughput, memory, agreement.
+
+Each backend runs in a fresh interpreter so its peak memory (including any
+subprocesses it starts, e.g. marker) is measured in isolation. One warm-up
+conversion per backend is not timed. Section-detection agreement is
+measured against the baseline backend (default "pymupdf4llm") the same way
+as in bench_profiles. Backends whose tools are not installed are skipped.
+
+Usage:
+    python -m benchmarks.bench_backends --pdf-dir pdfs
+    python -m benchmarks.bench_backends --pdf-dir pdfs --profile fast-text --json backends.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.bench_profiles import agreement
+from conversion import BACKENDS, DEFAULT_BACKEND, DEFAULT_PROFILE, PROFILES
+from extract_sections import PaperExtractor, found_section_keys
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process and its children, in MB."""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak_kb / 1024
+
+
+def run_backend(pdfs: List[Path], backend: str, profile: str) -> Dict:
+    """Convert and extract every PDF with one backend (run in a child process)."""
+    import pymupdf
+
+    extractor = PaperExtractor(profile=profile, backend=backend)
+    extractor.convert(str(pdfs[0]))  # Warm-up: loads models and caches
+
+    papers: Dict[str, Dict[str, str]] = {}
+    errors: Dict[str, str] = {}
+    pages = 0
+    total = 0.0
+    for pdf in pdfs:
+        with pymupdf.open(pdf) as doc:
+            pages += doc.page_count
+        start = time.perf_counter()
+        try:
+            md_text = extractor.convert(str(pdf))
+        except Exception as e:
+            errors[pdf.name] = str(e)
+            papers[pdf.name] = {}
+            continue
+        finally:
+            total += time.perf_counter() - start
+        data = extractor.extract_markdown(md_text, pdf.name)
+        papers[pdf.name] = {key: data[key] for key in found_section_keys(data)}
+    return {
+        "backend": backend,
+        "seconds": total,
+        "pages": pages,
+        "peak_rss_mb": peak_rss_mb(),
+        "papers": papers,
+        "errors": errors,
+    }
+
+
+def measure(pdf_dir: str, backend: str, profile: str) -> Dict:
+    """Run one backend in a fresh interpreter and return its measurements."""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_backends",
+            "--pdf-dir",
+            pdf_dir,
+            "--profile",
+            profile,
+            "--run-backend",
+            backend,
+        ],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@"):
+            result: Dict = json.loads(line[2:])
+            return result
+    raise RuntimeError(f"{backend} benchmark failed:\n{proc.stderr.strip()}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run every available backend over the corpus and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdf-dir", default="pdfs", help="Directory of sample PDFs.")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=list(BACKENDS),
+        default=list(BACKENDS),
+        help="Backends to compare.",
+    )
+    parser.add_argument(
+        "--baseline",
+        choices=list(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help="Backend whose sections count as the reference.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default=DEFAULT_PROFILE,
+        help="Conversion profile for backends that use one.",
+    )
+    parser.add_argument("--json", help="Also write results to this JSON file.")
+    parser.add_argument("--run-backend", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    pdfs = sorted(Path(args.pdf_dir).resolve().glob("*.pdf"))
+    if not pdfs:
+        print(f"No PDF files found in {args.pdf_dir}")
+        return 1
+
+    if args.run_backend:
+        result = run_backend(pdfs, args.run_backend, args.profile)
+        print("@@" + json.dumps(result))
+        return 0
+
+    names = list(dict.fromkeys([args.baseline, *args.backends]))
+    runs = {}
+    for name in names:
+        if not BACKENDS[name]().available():
+            print(f"⚠ Skipping {name}: not installed")
+            continue
+        runs[name] = measure(str(Path(args.pdf_dir).resolve()), name, args.profile)
+    if args.baseline not in runs:
+        print(f"Baseline backend {args.baseline} is not available")
+        return 1
+    baseline = runs[args.baseline]
+
+    rows = []
+    for name in args.backends:
+        if name not in runs:
+            continue
+        run = runs[name]
+        rows.append(
+            {
+                "backend": name,
+                "seconds": run["seconds"],
+                "pdfs_per_second": len(pdfs) / run["seconds"],
+                "pages_per_second": run["pages"] / run["seconds"],
+                "peak_rss_mb": run["peak_rss_mb"],
+                "errors": len(run["errors"]),
+                **agreement(run, baseline),
+            }
+        )
+
+    print(
+        f"{len(pdfs)} PDF(s), profile '{args.profile}', "
+        f"agreement measured against '{args.baseline}'\n"
+    )
+    print(
+        f"{'backend':<13} {'time':>8} {'PDF/s':>7} {'pages/s':>8} {'peak MB':>8}"
+        f" {'errors':>6} {'exact':>6} {'jaccard':>8} {'text':>6}"
+    )
+    for row in rows:
+        text = row["text_similarity"]
+        memory = row["peak_rss_mb"]
+        print(
+            f"{row['backend']:<13} {row['seconds']:>7.2f}s"
+            f" {row['pdfs_per_second']:>7.2f} {row['pages_per_second']:>8.1f}"
+            f" {'-' if memory is None else f'{memory:.0f}':>8} {row['errors']:>6}"
+            f" {row['exact_match']:>6.0%} {row['mean_jaccard']:>8.2f}"
+            f" {'-' if text is None else f'{text:.2f}':>6}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "pdfs": len(pdfs),
+                    "profile": args.profile,
+                    "baseline": args.baseline,
+                    "backends": rows,
+                },
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
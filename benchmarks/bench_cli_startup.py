@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start time of each pdf-analysis subcommand.
+
+Every subcommand is started in a fresh interpreter with --help, which
+imports the subcommand module and builds its parser but does no work. The
+report lists the median wall time and which heavy dependencies were loaded.
+
+Usage:
+    python -m benchmarks.bench_cli_startup
+    python -m benchmarks.bench_cli_startup --repeat 10 --json startup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ["pymupdf4llm", "pymupdf", "rapidfuzz", "requests", "dotenv"]
+
+# Imports the CLI, runs "<command> --help" and reports heavy modules loaded
+PROBE = """
+import json, sys
+import pdf_analysis_cli
+try:
+    pdf_analysis_cli.main([{command!r}, "--help"])
+except SystemExit:
+    pass
+heavy = {heavy!r}
+print("@@" + json.dumps([m for m in heavy if m in sys.modules]), file=sys.stderr)
+"""
+
+
+def time_command(command: str, repeat: int) -> Dict:
+    """Start a subcommand repeat times and collect timing statistics."""
+    timings: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                PROBE.format(command=command, heavy=HEAVY_MODULES),
+            ],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        timings.append(time.perf_counter() - start)
+        for line in proc.stderr.splitlines():
+            if line.startswith("@@"):
+                loaded = json.loads(line[2:])
+    return {
+        "command": command,
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "heavy_imports": loaded,
+    }
+
+
+def baseline(repeat: int) -> float:
+    """Median time to start a bare interpreter, for reference."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=False)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Run the startup benchmark and print a table."""
+    from pdf_analysis_cli import COMMANDS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command.")
+    parser.add_argument("--json", help="Also write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    base_ms = baseline(args.repeat)
+    rows = [time_command(command, args.repeat) for command in COMMANDS]
+
+    print(f"Bare interpreter: {base_ms:.0f} ms\n")
+    print(f"{'command':<10} {'median':>9} {'min':>9}  heavy imports")
+    for row in rows:
+        print(
+            f"{row['command']:<10} {row['median_ms']:>7.0f}ms {row['min_ms']:>7.0f}ms"
+            f"  {', '.join(row['heavy_imports']) or '-'}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"baseline_ms": base_ms, "commands": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
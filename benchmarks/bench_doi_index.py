@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Compare loading the library as a dict with opening the DOI index.
+
+A library cache is filled with synthetic documents (six authors each,
+about what group libraries hold), then the library is made available for
+checking in two ways:
+
+- "dict": LibraryCache.library_docs(), what the pipeline loaded before
+- "index": LibraryCache.doi_index(), a memory-mapped DoiIndex (written
+  once, then opened on every later run)
+
+For each, the time to get ready, the Python memory it holds (tracemalloc)
+and the median time for a batch of lookups, half of them hits, are
+reported.
+
+Usage:
+    python -m benchmarks.bench_doi_index
+    python -m benchmarks.bench_doi_index --documents 500000 --json index.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Mapping, Optional
+
+from check_mendeley_dois_v2 import check_dois
+from doi_index import index_path
+from mendeley_library_cache import LibraryCache
+
+BATCH = 1000
+REPEAT = 5
+
+
+def synthetic_documents(count: int) -> Iterator[List[Dict]]:
+    """Pages of documents shaped like the documents API returns them."""
+    page: List[Dict] = []
+    for number in range(count):
+        page.append(
+            {
+                "id": f"{number:08x}-0000-4000-8000-000000000000",
+                "title": f"Synthetic paper number {number} on phase change composites",
+                "year": 2000 + number % 25,
+                "authors": [
+                    {"first_name": f"Author{a}", "last_name": f"Surname{number}-{a}"}
+                    for a in range(6)
+                ],
+                "identifiers": {"doi": f"10.5555/Synthetic.{number}"},
+            }
+        )
+        if len(page) == 500:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def measure(load: Callable[[], Mapping[str, Dict]], dois: List[str]) -> Dict:
+    """Time a load and a batch of lookups, and the memory the load holds."""
+    started = time.perf_counter()
+    library = load()
+    ready = time.perf_counter() - started
+
+    # Loaded again for the memory figure: tracing slows the load down
+    del library
+    tracemalloc.start()
+    library = load()
+    held, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # The first batch after a large load can be skewed by the allocator
+    # settling, so the median of several batches is reported
+    lookups = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        found, _missing = check_dois(dois, library)
+        lookups.append(time.perf_counter() - started)
+    return {
+        "ready_seconds": ready,
+        "held_mb": held / 1e6,
+        "lookup_ms": statistics.median(lookups) * 1000,
+        "found": len(found),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Fill a synthetic cache and compare the two ways of loading it."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=300000)
+    parser.add_argument("--json", help="Also write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    dois = [
+        f"10.5555/synthetic.{rng.randrange(args.documents)}"
+        if number % 2
+        else f"10.9999/missing.{number}"
+        for number in range(BATCH)
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="doi-index-") as tmp_dir:
+        path = os.path.join(tmp_dir, "library.sqlite")
+        with LibraryCache(path) as cache:
+            cache.conn.execute("BEGIN")
+            for page in synthetic_documents(args.documents):
+                cache._store(page)
+            cache._new_revision()
+            cache.conn.execute("COMMIT")
+
+            started = time.perf_counter()
+            cache.doi_index().close()
+            written = time.perf_counter() - started
+            index_mb = os.path.getsize(index_path(path)) / 1e6
+
+            rows = {
+                "dict": measure(cache.library_docs, dois),
+                "index": measure(cache.doi_index, dois),
+            }
+
+    print(
+        f"{args.documents} documents; index written once in {written:.2f}s "
+        f"({index_mb:.1f} MB on disk); {BATCH} lookups, half hits\n"
+    )
+    print(f"{'mode':<6} {'ready s':>8} {'held MB':>8} {'lookups ms':>11}")
+    for mode, row in rows.items():
+        assert row["found"] == BATCH // 2, (mode, row)
+        print(
+            f"{mode:<6} {row['ready_seconds']:>8.3f} {row['held_mb']:>8.1f} "
+            f"{row['lookup_ms']:>11.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "documents": args.documents,
+                    "index_write_seconds": written,
+                    "index_mb": index_mb,
+                    "modes": rows,
+                },
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Time parsing and indexing of large library exports.
+
+A synthetic library is written as BibTeX, RIS and CSL-JSON, in the shape
+Mendeley Desktop exports them (abstracts, keywords, five authors), and
+each export is parsed and written to a DOI index. Reported per format:
+file size, the time to stream-parse every entry, the time for parse plus
+index write (the first check against a new export), and the time to open
+the index again (every later check).
+
+Usage:
+    python -m benchmarks.bench_library_exports
+    python -m benchmarks.bench_library_exports --entries 200000 --json ex.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from library_exports import EXPORT_FORMATS, export_index, iter_export
+
+ABSTRACT = (
+    "We report a scalable route to phase change composites with enhanced "
+    "thermal conductivity, using {graphene} networks to stabilise the shape "
+    "of the composite above the melting point. "
+) * 3
+
+
+def entries(count: int) -> Iterator[Dict]:
+    """Synthetic references with the fields exports carry."""
+    for number in range(count):
+        yield {
+            "key": f"Author{number}2020",
+            "doi": f"10.5555/synthetic.{number}" if number % 10 else "",
+            "title": f"Synthetic paper number {number} on phase change composites",
+            "year": 2000 + number % 25,
+            "authors": [(f"Surname{number}-{a}", f"Given{a}") for a in range(5)],
+        }
+
+
+def write_bibtex(f: TextIO, count: int) -> None:
+    for entry in entries(count):
+        authors = " and ".join(f"{last}, {first}" for last, first in entry["authors"])
+        f.write(
+            f"@article{{{entry['key']},\n"
+            f"abstract = {{{ABSTRACT}}},\n"
+            f"author = {{{authors}}},\n"
+            f"doi = {{{entry['doi']}}},\n"
+            f"journal = {{Journal of Synthetic Results}},\n"
+            f"keywords = {{graphene,phase change,composites}},\n"
+            f"title = {{{{{entry['title']}}}}},\n"
+            f"year = {{{entry['year']}}}\n"
+            "}\n\n"
+        )
+
+
+def write_ris(f: TextIO, count: int) -> None:
+    for entry in entries(count):
+        f.write("TY  - JOUR\n")
+        f.write(f"AB  - {ABSTRACT}\n")
+        for last, first in entry["authors"]:
+            f.write(f"AU  - {last}, {first}\n")
+        if entry["doi"]:
+            f.write(f"DO  - {entry['doi']}\n")
+        f.write(f"ID  - {entry['key']}\n")
+        f.write("JF  - Journal of Synthetic Results\n")
+        f.write(f"PY  - {entry['year']}\n")
+        f.write(f"TI  - {entry['title']}\n")
+        f.write("ER  - \n\n")
+
+
+def write_csl_json(f: TextIO, count: int) -> None:
+    f.write("[\n")
+    for number, entry in enumerate(entries(count)):
+        item = {
+            "id": entry["key"],
+            "type": "article-journal",
+            "abstract": ABSTRACT,
+            "author": [
+                {"family": last, "given": first} for last, first in entry["authors"]
+            ],
+            "container-title": "Journal of Synthetic Results",
+            "DOI": entry["doi"] or None,
+            "issued": {"date-parts": [[entry["year"]]]},
+            "title": entry["title"],
+        }
+        f.write(("," if number else "") + json.dumps(item) + "\n")
+    f.write("]\n")
+
+
+WRITERS = {"bibtex": write_bibtex, "ris": write_ris, "csl-json": write_csl_json}
+EXTENSIONS = {"bibtex": ".bib", "ris": ".ris", "csl-json": ".json"}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Write synthetic exports and time parsing and indexing each one."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--json", help="Also write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    rows: List[Dict] = []
+    print(f"{args.entries} entries, 90% with a DOI\n")
+    print(f"{'format':<9} {'MB':>6} {'parse s':>8} {'index s':>8} {'reopen ms':>10}")
+    with tempfile.TemporaryDirectory(prefix="library-exports-") as tmp_dir:
+        for export_format in EXPORT_FORMATS:
+            path = os.path.join(tmp_dir, "library" + EXTENSIONS[export_format])
+            with open(path, "w", encoding="utf-8") as f:
+                WRITERS[export_format](f, args.entries)
+
+            started = time.perf_counter()
+            parsed = sum(1 for _ in iter_export(path))
+            parse = time.perf_counter() - started
+            assert parsed == args.entries, (export_format, parsed)
+
+            with redirect_stdout(io.StringIO()):  # export_index reports progress
+                started = time.perf_counter()
+                with export_index(path) as index:
+                    assert len(index) == args.entries - -(-args.entries // 10)
+                indexed = time.perf_counter() - started
+
+                started = time.perf_counter()
+                export_index(path).close()
+                reopen = time.perf_counter() - started
+
+            row = {
+                "format": export_format,
+                "mb": os.path.getsize(path) / 1e6,
+                "parse_seconds": parse,
+                "index_seconds": indexed,
+                "reopen_ms": reopen * 1000,
+            }
+            rows.append(row)
+            print(
+                f"{export_format:<9} {row['mb']:>6.1f} {parse:>8.2f} "
+                f"{indexed:>8.2f} {row['reopen_ms']:>10.1f}",
+                flush=True,
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"entries": args.entries, "formats": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
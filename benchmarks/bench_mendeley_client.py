@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Compare library sync through the pooled Mendeley client with the old loop.
+
+A local stand-in for the documents API serves a synthetic library with
+marker pagination and Link headers, gzip-compressed when asked. Because it
+has no TLS, it can charge a fixed delay for every new connection
+(--handshake-ms, roughly a TLS handshake to api.mendeley.com) and for every
+request (--latency-ms). Two ways of syncing the library are timed:
+
+- "unpooled": requests.get per page, 100 documents per page (the loop
+  fetch_library_dois used before)
+- "pooled": iter_document_pages through a MendeleyClient, largest pages
+
+Usage:
+    python -m benchmarks.bench_mendeley_client
+    python -m benchmarks.bench_mendeley_client --documents 20000 --json sync.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+
+from check_mendeley_dois_v2 import iter_document_pages
+from mendeley_client import MAX_PAGE_SIZE, MendeleyClient
+
+
+def synthetic_library(count: int) -> List[bytes]:
+    """Documents of roughly the size the API returns, pre-serialised."""
+    return [
+        json.dumps(
+            {
+                "id": f"{number:08x}-0000-4000-8000-000000000000",
+                "title": f"Synthetic paper number {number} on phase change composites",
+                "type": "journal",
+                "year": 2000 + number % 25,
+                "source": "Journal of Synthetic Results",
+                "authors": [
+                    {"first_name": "Ada", "last_name": f"Author{number}"},
+                    {"first_name": "Grace", "last_name": "Coauthor"},
+                ],
+                "identifiers": {"doi": f"10.5555/synthetic.{number}"},
+                "created": "2024-01-01T00:00:00.000Z",
+                "last_modified": "2024-01-01T00:00:00.000Z",
+            }
+        ).encode()
+        for number in range(count)
+    ]
+
+
+class StandInServer:
+    """Threaded HTTP/1.1 server paging through a synthetic library."""
+
+    def __init__(self, documents: List[bytes], handshake: float, latency: float):
+        self.documents = documents
+        self.connections = 0
+        self.bytes_sent = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive
+            disable_nagle_algorithm = True  # Headers and body are sent apart
+
+            def setup(self) -> None:
+                super().setup()
+                server.connections += 1
+                time.sleep(handshake)
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                time.sleep(latency)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                limit = min(int(query.get("limit", ["20"])[0]), MAX_PAGE_SIZE)
+                start = int(query.get("marker", ["0"])[0])
+                page = server.documents[start : start + limit]
+                body = b"[" + b",".join(page) + b"]"
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=5)
+                    self.send_header("Content-Encoding", "gzip")
+                if start + limit < len(server.documents):
+                    next_query = urlencode({"limit": limit, "marker": start + limit})
+                    next_url = f"http://{self.headers['Host']}{url.path}?{next_query}"
+                    self.send_header("Link", f'<{next_url}>; rel="next"')
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.bytes_sent += len(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/documents"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StandInServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def sync_unpooled(url: str) -> int:
+    """Page through the library the way fetch_library_dois used to."""
+    headers = {"Authorization": "Bearer token"}
+    total = 0
+    next_url: Optional[str] = url
+    while next_url:
+        response = requests.get(
+            next_url, headers=headers, params={"limit": 100}, timeout=30
+        )
+        response.raise_for_status()
+        total += len(response.json())
+        next_url = response.links.get("next", {}).get("url")
+    return total
+
+
+def sync_pooled(url: str) -> int:
+    """Page through the library with the pooled client."""
+    with MendeleyClient() as client:
+        return sum(
+            len(page) for page in iter_document_pages("token", client=client, url=url)
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Time both sync loops against the stand-in server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=60.0,
+        help="Delay charged for every new connection (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=20.0,
+        help="Delay charged for every request (default: %(default)s).",
+    )
+    parser.add_argument("--json", help="Also write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    documents = synthetic_library(args.documents)
+    rows: List[Dict] = []
+    print(
+        f"{args.documents} documents, {args.handshake_ms:.0f} ms per connection, "
+        f"{args.latency_ms:.0f} ms per request\n"
+    )
+    print(
+        f"{'mode':<10} {'requests':>8} {'conns':>6} {'MB sent':>8} "
+        f"{'req/s':>7} {'sync s':>7}"
+    )
+    for mode, sync in (("unpooled", sync_unpooled), ("pooled", sync_pooled)):
+        with StandInServer(
+            documents, args.handshake_ms / 1000, args.latency_ms / 1000
+        ) as server:
+            started = time.perf_counter()
+            fetched = sync(server.url)
+            seconds = time.perf_counter() - started
+        page_size = 100 if mode == "unpooled" else MAX_PAGE_SIZE
+        request_count = -(-args.documents // page_size)
+        assert fetched == args.documents, (mode, fetched)
+        row = {
+            "mode": mode,
+            "requests": request_count,
+            "connections": server.connections,
+            "mb_sent": server.bytes_sent / 1e6,
+            "requests_per_second": request_count / seconds,
+            "sync_seconds": seconds,
+        }
+        rows.append(row)
+        print(
+            f"{mode:<10} {request_count:>8} {server.connections:>6} "
+            f"{row['mb_sent']:>8.1f} {row['requests_per_second']:>7.1f} "
+            f"{seconds:>7.2f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"documents": args.documents, "modes": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
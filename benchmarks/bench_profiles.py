@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Compare conversion profiles on a corpus of PDFs: speed and section agreement.
+
+Every PDF is converted with each profile (after one warm-up conversion per
+profile, so model loading is not counted) and run through section
+extraction. Agreement is measured against the baseline profile (default
+"full"): the share of papers with exactly the same sections detected, the
+mean Jaccard overlap of the detected sections and the mean text similarity
+of the sections both profiles found.
+
+Usage:
+    python -m benchmarks.bench_profiles --pdf-dir pdfs
+    python -m benchmarks.bench_profiles --pdf-dir pdfs --repeat 3 --json profiles.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from conversion import PROFILES
+from extract_sections import PaperExtractor, found_section_keys
+
+
+def convert_corpus(pdfs: List[Path], profile_name: str, repeat: int) -> Dict:
+    """Convert and extract every PDF with one profile, timing the conversions."""
+    extractor = PaperExtractor(profile=profile_name)
+    extractor.convert(str(pdfs[0]))  # Warm-up: loads models and caches
+
+    papers = {}
+    total = 0.0
+    for pdf in pdfs:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            md_text = extractor.convert(str(pdf))
+            timings.append(time.perf_counter() - start)
+        total += min(timings)
+        data = extractor.extract_markdown(md_text, pdf.name)
+        papers[pdf.name] = {key: data[key] for key in found_section_keys(data)}
+    return {"profile": profile_name, "seconds": total, "papers": papers}
+
+
+def agreement(run: Dict, baseline: Dict) -> Dict:
+    """Compare a profile's detected sections with the baseline profile's."""
+    from rapidfuzz import fuzz
+
+    exact = 0
+    jaccards = []
+    similarities = []
+    for name, sections in run["papers"].items():
+        expected = baseline["papers"][name]
+        found, wanted = set(sections), set(expected)
+        exact += found == wanted
+        union = found | wanted
+        jaccards.append(len(found & wanted) / len(union) if union else 1.0)
+        for key in found & wanted:
+            similarities.append(fuzz.ratio(sections[key], expected[key]) / 100)
+    return {
+        "exact_match": exact / len(run["papers"]),
+        "mean_jaccard": statistics.mean(jaccards),
+        "text_similarity": statistics.mean(similarities) if similarities else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run every profile over the corpus and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdf-dir", default="pdfs", help="Directory of sample PDFs.")
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=list(PROFILES),
+        default=list(PROFILES),
+        help="Profiles to compare.",
+    )
+    parser.add_argument(
+        "--baseline",
+        choices=list(PROFILES),
+        default="full",
+        help="Profile whose sections count as the reference.",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per PDF.")
+    parser.add_argument("--json", help="Also write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    pdfs = sorted(Path(args.pdf_dir).glob("*.pdf"))
+    if not pdfs:
+        print(f"No PDF files found in {args.pdf_dir}")
+        return 1
+
+    names = list(dict.fromkeys([args.baseline, *args.profiles]))
+    runs = {name: convert_corpus(pdfs, name, args.repeat) for name in names}
+    baseline = runs[args.baseline]
+
+    rows = []
+    for name in args.profiles:
+        run = runs[name]
+        rows.append(
+            {
+                "profile": name,
+                "seconds": run["seconds"],
+                "pdfs_per_second": len(pdfs) / run["seconds"],
+                "speedup": baseline["seconds"] / run["seconds"],
+                **agreement(run, baseline),
+            }
+        )
+
+    print(f"{len(pdfs)} PDF(s), agreement measured against '{args.baseline}'\n")
+    print(
+        f"{'profile':<10} {'time':>8} {'PDF/s':>7} {'speedup':>8}"
+        f" {'exact':>7} {'jaccard':>8} {'text':>6}"
+    )
+    for row in rows:
+        text = row["text_similarity"]
+        print(
+            f"{row['profile']:<10} {row['seconds']:>7.2f}s {row['pdfs_per_second']:>7.2f}"
+            f" {row['speedup']:>7.1f}x {row['exact_match']:>7.0%}"
+            f" {row['mean_jaccard']:>8.2f} {'-' if text is None else f'{text:.2f}':>6}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"pdfs": len(pdfs), "baseline": args.baseline, "profiles": rows},
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Measure SQLite section store writes and full-text queries at scale.
+
+Synthetic papers (four sections each, drawn from a fixed vocabulary with a
+few rare marker words) are written to a fresh store, then a set of queries
+is run repeatedly and the median latency reported. For comparison the same
+queries are answered by loading extracted_sections.json and scanning it.
+
+Usage:
+    python -m benchmarks.bench_section_store
+    python -m benchmarks.bench_section_store --papers 50000 --json store.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from section_store import SectionStore
+
+SECTIONS = ("introduction", "results", "discussion", "conclusion")
+VOCABULARY = (
+    "model data method sample energy surface layer network climate protein "
+    "membrane catalyst temperature pressure signal response rate growth cell "
+    "structure analysis measurement simulation experiment theory"
+).split()
+QUERIES = ["catalyst", "climate model", '"surface layer"', "graphene", "perovsk*"]
+RARE_WORDS = ("graphene", "perovskite")
+
+
+def synthetic_papers(count: int, seed: int = 0) -> Iterator[Tuple[str, dict]]:
+    """Yield (key, result) pairs resembling extract_sections output."""
+    rng = random.Random(seed)
+    for number in range(count):
+        paper: Dict[str, object] = {}
+        for section in SECTIONS:
+            words = rng.choices(VOCABULARY, k=rng.randint(150, 400))
+            if rng.random() < 0.01:
+                words.insert(rng.randrange(len(words)), rng.choice(RARE_WORDS))
+            paper[section] = " ".join(words).capitalize() + "."
+        paper["filename"] = f"paper{number:06d}.pdf"
+        paper["doi"] = f"10.1234/synthetic.{number}"
+        yield f"/corpus/paper{number:06d}.pdf", paper
+
+
+def scan_json(path: str, query: str) -> int:
+    """Answer a query the old way: load the JSON and scan every section."""
+    words = [w.strip('"*').lower() for w in query.split()]
+    with open(path, "r", encoding="utf-8") as f:
+        papers = json.load(f)
+    return sum(
+        1
+        for paper in papers
+        for section in SECTIONS
+        if all(w in paper.get(section, "").lower() for w in words)
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Build a synthetic store and time writes and queries."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, default=20000, help="Papers to store.")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query.")
+    parser.add_argument("--json", help="Also write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="section-store-") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "sections.sqlite")
+        json_path = os.path.join(tmp_dir, "sections.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump([paper for _key, paper in synthetic_papers(args.papers)], f)
+
+        started = time.perf_counter()
+        with SectionStore(db_path) as store:
+            store.add_many(synthetic_papers(args.papers))
+        write_seconds = time.perf_counter() - started
+        print(
+            f"Wrote {args.papers} papers in {write_seconds:.1f}s "
+            f"({args.papers / write_seconds:.0f} papers/s, "
+            f"{os.path.getsize(db_path) / 1e6:.0f} MB)\n"
+        )
+
+        rows = []
+        print(f"{'query':<18} {'matches':>8} {'sqlite ms':>10} {'json scan ms':>13}")
+        with SectionStore(db_path) as store:
+            for query in QUERIES:
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    matches = store.query(query, limit=20)
+                    timings.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                scan_json(json_path, query)
+                scan_ms = (time.perf_counter() - start) * 1000
+                median = statistics.median(timings)
+                rows.append(
+                    {
+                        "query": query,
+                        "matches": len(matches),
+                        "sqlite_ms": median,
+                        "json_scan_ms": scan_ms,
+                    }
+                )
+                print(f"{query:<18} {len(matches):>8} {median:>10.2f} {scan_ms:>13.0f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "papers": args.papers,
+                    "write_seconds": write_seconds,
+                    "queries": rows,
+                },
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
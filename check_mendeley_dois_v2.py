@@ -9,227 +9,85 @@ Usage:
     python check_mendeley_dois_v2.py --dois "10.1038/nature12345,10.1126/science.abc123"
     python check_mendeley_dois_v2.py --file dois.txt
     python check_mendeley_dois_v2.py --interactive
-"""
-
-import argparse
-import json
-import os
-from typing import Dict, List, Tuple
-from urllib.parse import parse_qs, urlencode, urlparse
-
-import requests
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Configuration
-CLIENT_ID = os.getenv("MENDELEY_CLIENT_ID")
-CLIENT_SECRET = os.getenv("MENDELEY_CLIENT_SECRET")
-REDIRECT_URI = "http://localhost:8080"
-TOKEN_FILE = "mendeley_token.json"
 
-# API endpoints
-AUTH_URL = "https://api.mendeley.com/oauth/authorize"
-TOKEN_URL = "https://api.mendeley.com/oauth/token"
-DOCUMENTS_URL = "https://api.mendeley.com/documents"
+It can also be used as a library: check_library(dois) logs in with the
+saved token, looks the DOIs up and returns the same results dictionary
+that --output writes.
 
+Without network access, check against a BibTeX, RIS or CSL-JSON export of
+the library instead:
+    python check_mendeley_dois_v2.py --file dois.txt --export library.bib
 
-def get_access_token() -> str:
-    """
-    Get access token using OAuth 2.0 Authorization Code Flow
-
-    Returns:
-        Access token string
-    """
-    if not CLIENT_ID or not CLIENT_SECRET:
-        raise ValueError(
-            "Mendeley credentials not found. "
-            "Please set MENDELEY_CLIENT_ID and MENDELEY_CLIENT_SECRET in .env file. "
-            "See mendeley_setup_guide.md for instructions."
-        )
-
-    # Try to load saved token
-    if os.path.exists(TOKEN_FILE):
-        try:
-            with open(TOKEN_FILE, "r") as f:
-                token_data = json.load(f)
-
-            # Try to refresh the token
-            if "refresh_token" in token_data:
-                print("Attempting to refresh saved token...")
-                response = requests.post(
-                    TOKEN_URL,
-                    data={
-                        "grant_type": "refresh_token",
-                        "refresh_token": token_data["refresh_token"],
-                        "client_id": CLIENT_ID,
-                        "client_secret": CLIENT_SECRET,
-                        "redirect_uri": REDIRECT_URI,
-                    },
-                    timeout=30,
-                )
-
-                if response.status_code == 200:
-                    new_token_data = response.json()
-                    # Preserve refresh_token if not returned by API
-                    if "refresh_token" not in new_token_data:
-                        new_token_data["refresh_token"] = token_data["refresh_token"]
-                    # Save new token with secure permissions
-                    with open(TOKEN_FILE, "w") as f:
-                        json.dump(new_token_data, f)
-                    if os.name != "nt":  # Not Windows
-                        os.chmod(TOKEN_FILE, 0o600)
-                    print("✓ Token refreshed successfully\n")
-                    return new_token_data["access_token"]  # type: ignore[no-any-return]
-                else:
-                    print("⚠ Token refresh failed, re-authenticating...")
-                    os.remove(TOKEN_FILE)
-            else:
-                # Old token format, try to use it
-                if "expires_at" not in token_data or token_data.get("expired", False):
-                    print("⚠ Saved token expired, re-authenticating...")
-                    os.remove(TOKEN_FILE)
-                else:
-                    print("✓ Using saved token")
-                    return token_data["access_token"]  # type: ignore[no-any-return]
-        except Exception as e:
-            print(f"⚠ Error with saved token: {e}, re-authenticating...")
-            if os.path.exists(TOKEN_FILE):
-                os.remove(TOKEN_FILE)
-
-    # Perform new OAuth flow
-    print("\n=== Mendeley Authentication ===")
-
-    # Build authorization URL
-    auth_params = {
-        "client_id": CLIENT_ID,
-        "redirect_uri": REDIRECT_URI,
-        "response_type": "code",
-        "scope": "all",
-    }
-    login_url = f"{AUTH_URL}?{urlencode(auth_params)}"
-
-    print("\n1. Open this URL in your browser:")
-    print(f"\n   {login_url}\n")
-    print("2. Log in to Mendeley and authorize the app")
-    print("3. After authorization, you'll be redirected to a page that may not load")
-    print("4. Copy the ENTIRE URL from your browser's address bar")
-    print("   (it will look like: http://localhost:8080?code=XXXXX...)")
-    print("\nPaste the redirect URL here and press Enter:")
-
-    redirect_url = input("> ").strip()
-
-    # Extract auth code from URL
-    query = urlparse(redirect_url).query
-    params = parse_qs(query)
-
-    if "code" not in params:
-        raise ValueError(
-            "Could not find 'code' parameter in the URL. Please try again."
-        )
-
-    auth_code = params["code"][0]
-
-    # Exchange code for token
-    print("\nExchanging authorization code for access token...")
-    token_response = requests.post(
-        TOKEN_URL,
-        data={
-            "grant_type": "authorization_code",
-            "code": auth_code,
-            "redirect_uri": REDIRECT_URI,
-            "client_id": CLIENT_ID,
-            "client_secret": CLIENT_SECRET,
-        },
-        timeout=30,
-    )
-
-    if token_response.status_code != 200:
-        raise requests.exceptions.RequestException(
-            f"Token exchange failed: {token_response.text}"
-        )
-
-    token_data = token_response.json()
-
-    # Save token for future use with secure permissions
-    with open(TOKEN_FILE, "w") as f:
-        json.dump(token_data, f)
-    if os.name != "nt":  # Not Windows
-        os.chmod(TOKEN_FILE, 0o600)
-
-    print("✓ Authentication successful! Token saved for future use.\n")
-
-    return token_data["access_token"]  # type: ignore[no-any-return]
-
-
-def fetch_library_dois(access_token: str) -> Dict[str, Dict]:
-    """
-    Fetch all documents from Mendeley library and extract DOIs
-
-    Args:
-        access_token: OAuth access token
-
-    Returns:
-        Dictionary mapping DOI (lowercase) to document info
-    """
-    print("Fetching documents from your Mendeley library...")
-
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.mendeley-document.1+json",
-    }
-
-    library_docs = {}
-    total_docs = 0
-    url = DOCUMENTS_URL
-
-    # Paginate through all documents
-    while url:
-        response = requests.get(url, headers=headers, params={"limit": 100}, timeout=30)
-
-        if response.status_code != 200:
-            raise requests.exceptions.RequestException(
-                f"Failed to fetch documents: {response.text}"
-            )
-
-        documents = response.json()
-
-        for doc in documents:
-            total_docs += 1
-
-            # Check if document has identifiers
-            identifiers = doc.get("identifiers", {})
-            doi = identifiers.get("doi", "").strip()
-
-            if doi:
-                # Store with lowercase DOI as key for case-insensitive matching
-                library_docs[doi.lower()] = {
-                    "doi": doi,  # Original case
-                    "title": doc.get("title", "Untitled"),
-                    "year": doc.get("year"),
-                    "authors": doc.get("authors", []),
-                    "id": doc.get("id"),
-                }
-
-        # Check for next page using response.links for robustness
-        url = response.links.get("next", {}).get("url")
-
-    print(f"✓ Found {total_docs} total documents in library")
-    print(f"✓ {len(library_docs)} documents have DOIs\n")
+To check group libraries as well as your own (see mendeley_libraries.py):
+    python check_mendeley_dois_v2.py --file dois.txt --all-groups
+"""
 
-    return library_docs
+import argparse
+import json
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from library_exports import EXPORT_FORMATS, export_index
+from mendeley_api import (
+    AUTH_URL,
+    CLIENT_ID,
+    CLIENT_SECRET,
+    DOCUMENTS_URL,
+    REDIRECT_URI,
+    TOKEN_FILE,
+    TOKEN_URL,
+    document_info,
+    fetch_library_dois,
+    get_access_token,
+    iter_document_page_links,
+    iter_document_pages,
+    print_fetch_progress,
+    refresh_saved_token,
+)
+from mendeley_client import get_client
+from mendeley_libraries import resolve_libraries, sync_libraries
+from mendeley_library_cache import LIBRARY_CACHE_FILE
+from mendeley_lookup import STRATEGIES, lookup_dois
+
+# Re-exported: the API helpers used to live in this script
+__all__ = [
+    "AUTH_URL",
+    "CLIENT_ID",
+    "CLIENT_SECRET",
+    "DOCUMENTS_URL",
+    "REDIRECT_URI",
+    "TOKEN_FILE",
+    "TOKEN_URL",
+    "check_dois",
+    "check_library",
+    "document_info",
+    "fetch_library_dois",
+    "get_access_token",
+    "iter_document_page_links",
+    "iter_document_pages",
+    "main",
+    "print_fetch_progress",
+    "refresh_saved_token",
+]
 
 
 def check_dois(
-    dois_to_check: List[str], library_docs: Dict[str, Dict]
+    dois_to_check: List[str], library_docs: Mapping[str, Dict]
 ) -> Tuple[List[Dict], List[str]]:
     """
     Check which DOIs are in the library
 
     Args:
         dois_to_check: List of DOIs to check
-        library_docs: Dictionary of library documents with DOIs
+        library_docs: Library documents by lowercase DOI (a dict or a
+            DoiIndex)
 
     Returns:
         Tuple of (found_docs, missing_dois)
@@ -268,7 +126,8 @@ def print_results(
                     authors += " et al."
 
             year = f" ({doc['year']})" if doc.get("year") else ""
-            print(f"  • {doc['doi']}")
+            library = f"  [{doc['library']}]" if doc.get("library") else ""
+            print(f"  • {doc['doi']}{library}")
             print(f"    {doc['title']}{authors}{year}")
             print()
 
@@ -285,34 +144,133 @@ def save_results(
     found_docs: List[Dict],
     missing_dois: List[str],
     output_file: str,
+    api: Optional[Dict] = None,
 ):
     """Save results to JSON file"""
 
+    results = build_results(dois_checked, found_docs, missing_dois, api)
+
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"✓ Results saved to {output_file}")
+
+
+def build_results(
+    dois_checked: List[str],
+    found_docs: List[Dict],
+    missing_dois: List[str],
+    api: Optional[Dict] = None,
+) -> Dict:
+    """
+    Build the results dictionary written by save_results
+
+    Args:
+        api: API request statistics (requests, retries, throttled,
+            wait_seconds) to include under "api"
+
+    Hits from a check of several libraries keep the name of the library
+    they were found in under "library".
+    """
+
+    in_library = []
+    for doc in found_docs:
+        entry = {
+            "doi": doc["doi"],
+            "title": doc["title"],
+            "year": doc.get("year"),
+            "mendeley_id": doc["id"],
+        }
+        if doc.get("library"):
+            entry["library"] = doc["library"]
+        in_library.append(entry)
+
     results = {
         "summary": {
             "total_checked": len(dois_checked),
             "found_in_library": len(found_docs),
             "not_in_library": len(missing_dois),
         },
-        "in_library": [
-            {
-                "doi": doc["doi"],
-                "title": doc["title"],
-                "year": doc.get("year"),
-                "mendeley_id": doc["id"],
-            }
-            for doc in found_docs
-        ],
+        "in_library": in_library,
         "not_in_library": missing_dois,
     }
+    if api is not None:
+        results["api"] = api
+    return results
+
+
+def check_library(
+    dois: List[str],
+    strategy: str = "auto",
+    cache_path: str = LIBRARY_CACHE_FILE,
+    max_age: float = 0,
+    use_cache: bool = True,
+    full_sync: bool = False,
+    interactive: bool = False,
+    progress: Optional[Callable[[int], None]] = print_fetch_progress,
+    export: Optional[str] = None,
+    export_format: Optional[str] = None,
+    groups: Sequence[str] = (),
+    all_groups: bool = False,
+) -> Dict:
+    """
+    Check DOIs against the Mendeley library in this process
 
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2)
+    Uses the saved token (prompting for a login only if interactive) and
+    the cheapest lookup strategy, as the command line does. There is no
+    overall time limit; each request has the client's own timeouts.
 
-    print(f"✓ Results saved to {output_file}")
+    Args:
+        dois: DOIs to check
+        strategy, cache_path, max_age, use_cache, full_sync: As for
+            lookup_dois
+        interactive: Whether a browser login may be prompted for
+        progress: Called after each downloaded page (None for no output)
+        export: Library export file to check against instead of the API
+            (no token or network needed)
+        export_format: Format of the export (default: detected)
+        groups: Group libraries (ids or names) to check as well as your
+            own; every library is synced into its own cache and hits are
+            tagged with their library
+        all_groups: Check every group library you belong to
 
+    Returns:
+        Results dictionary as built by build_results, including "api"
+        unless the DOIs were checked against an export
+    """
+    if export:
+        with export_index(export, export_format) as index:
+            found_docs, missing_dois = check_dois(dois, index)
+        return build_results(dois, found_docs, missing_dois)
+
+    access_token = get_access_token(interactive=interactive)
+    if groups or all_groups:
+        libraries = resolve_libraries(access_token, groups, all_groups)
+        with sync_libraries(
+            access_token, libraries, cache_path, full=full_sync, max_age=max_age
+        ) as index:
+            found_docs, missing_dois = check_dois(dois, index)
+        return build_results(
+            dois, found_docs, missing_dois, api=get_client().stats.as_dict()
+        )
 
-def main():
+    library_docs = lookup_dois(
+        access_token,
+        dois,
+        strategy=strategy,
+        cache_path=cache_path,
+        max_age=max_age,
+        use_cache=use_cache,
+        full_sync=full_sync,
+        progress=progress,
+    ).library_docs
+    found_docs, missing_dois = check_dois(dois, library_docs)
+    return build_results(
+        dois, found_docs, missing_dois, api=get_client().stats.as_dict()
+    )
+
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         description="Check DOIs against your Mendeley library",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -329,6 +287,15 @@ Examples:
   
   # Save results to JSON
   python check_mendeley_dois_v2.py --file dois.txt --output results.json
+
+  # Download the whole library into the local cache again
+  python check_mendeley_dois_v2.py --file dois.txt --full-sync
+
+  # Check offline against a library export (BibTeX, RIS or CSL-JSON)
+  python check_mendeley_dois_v2.py --file dois.txt --export library.bib
+
+  # Check your library and every group library you belong to
+  python check_mendeley_dois_v2.py --file dois.txt --all-groups
         """,
     )
 
@@ -338,8 +305,63 @@ Examples:
     group.add_argument("--interactive", action="store_true", help="Interactive mode")
 
     parser.add_argument("--output", type=str, help="Save results to JSON file")
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=LIBRARY_CACHE_FILE,
+        help="Local library cache, synced incrementally (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Fetch the whole library from the API instead of using the cache",
+    )
+    parser.add_argument(
+        "--full-sync",
+        action="store_true",
+        help="Download the whole library into the cache again",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=0,
+        help="Skip syncing if the cache was synced less than this many "
+        "seconds ago (default: always sync changes)",
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=("auto",) + STRATEGIES,
+        default="auto",
+        help="How to look DOIs up: search each DOI, sync or use the cache, "
+        "or scan the whole library (default: chosen from the batch size, "
+        "library size and cache age)",
+    )
+    parser.add_argument(
+        "--export",
+        type=str,
+        help="Check against this BibTeX, RIS or CSL-JSON library export "
+        "instead of the Mendeley API (works offline)",
+    )
+    parser.add_argument(
+        "--export-format",
+        choices=EXPORT_FORMATS,
+        help="Format of --export (default: from the extension or contents)",
+    )
+    parser.add_argument(
+        "--group",
+        action="append",
+        default=[],
+        metavar="ID_OR_NAME",
+        help="Also check this group library (repeat for several); every "
+        "library is synced into its own cache",
+    )
+    parser.add_argument(
+        "--all-groups",
+        action="store_true",
+        help="Also check every group library you belong to",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Collect DOIs to check
     dois_to_check = []
@@ -363,29 +385,64 @@ Examples:
 
     print(f"\nPreparing to check {len(dois_to_check)} DOI(s)...\n")
 
-    # Authenticate
-    try:
-        access_token = get_access_token()
-    except Exception as e:
-        print(f"❌ Authentication failed: {e}")
-        return
-
-    # Fetch library
-    try:
-        library_docs = fetch_library_dois(access_token)
-    except Exception as e:
-        print(f"❌ Failed to fetch library: {e}")
-        return
+    if args.export:
+        # Offline: the export is the library, so no login or API calls
+        try:
+            index = export_index(args.export, args.export_format)
+        except (OSError, ValueError) as e:
+            print(f"❌ Failed to read library export: {e}")
+            return
+        with index:
+            found_docs, missing_dois = check_dois(dois_to_check, index)
+    else:
+        # Authenticate
+        try:
+            access_token = get_access_token()
+        except Exception as e:
+            print(f"❌ Authentication failed: {e}")
+            return
 
-    # Check DOIs
-    found_docs, missing_dois = check_dois(dois_to_check, library_docs)
+        # Look the DOIs up by whichever strategy is cheapest for this batch,
+        # or in the caches of every library when groups are checked too
+        try:
+            if args.group or args.all_groups:
+                index = sync_libraries(
+                    access_token,
+                    resolve_libraries(access_token, args.group, args.all_groups),
+                    args.cache,
+                    full=args.full_sync,
+                    max_age=args.max_age,
+                )
+                with index:
+                    found_docs, missing_dois = check_dois(dois_to_check, index)
+            else:
+                library_docs = lookup_dois(
+                    access_token,
+                    dois_to_check,
+                    strategy=args.strategy,
+                    cache_path=args.cache,
+                    max_age=args.max_age,
+                    use_cache=not args.no_cache,
+                    full_sync=args.full_sync,
+                    progress=print_fetch_progress,
+                ).library_docs
+                found_docs, missing_dois = check_dois(dois_to_check, library_docs)
+        except Exception as e:
+            print(f"❌ Failed to fetch library: {e}")
+            return
 
     # Print results
     print_results(dois_to_check, found_docs, missing_dois)
 
     # Save results if requested
     if args.output:
-        save_results(dois_to_check, found_docs, missing_dois, args.output)
+        save_results(
+            dois_to_check,
+            found_docs,
+            missing_dois,
+            args.output,
+            api=None if args.export else get_client().stats.as_dict(),
+        )
 
 
 if __name__ == "__main__":
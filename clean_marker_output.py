@@ -111,7 +111,7 @@ def clean_markdown(text: str) -> str:
     return "\n".join(lines) + "\n"
 
 
-def main() -> int:
+def main(argv: List[str] | None = None) -> int:
     """Entry point for cleaning markdown files in place."""
     parser = argparse.ArgumentParser(
         description="Remove common publisher footers and references from Markdown."
@@ -122,7 +122,7 @@ def main() -> int:
         type=Path,
         help="Markdown file(s) or directories to clean.",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     files = iter_markdown_files(args.paths)
     if not files:
@@ -0,0 +1,336 @@
+"""
+PDF-to-Markdown converter backends and named conversion profiles.
+
+Backends (see BACKENDS) share one interface, so process_pdfs and the
+converter script can switch between them:
+
+- "pymupdf4llm": pymupdf4llm.to_markdown, tuned by the conversion profile
+- "pymupdf-text": raw page text from pymupdf; fastest, but no Markdown
+  headers, so sections are found by content only
+- "marker": the marker CLI; marker_single once per PDF for single
+  conversions, or one marker run over a whole batch (convert_batch), so its
+  models are loaded once
+
+Section extraction only needs the text of a paper, but pymupdf4llm's
+defaults also analyse images, vector graphics and tables, run OCR on pages
+without text and (when pymupdf-layout is installed) run layout analysis.
+On figure-heavy papers that work dominates conversion time. A profile
+bundles the options for one trade-off:
+
+- "fast-text": text only. No images, graphics, tables, OCR or layout
+  analysis; uses pymupdf4llm's classic text path.
+- "balanced": layout analysis kept, ruled tables only, no images or OCR.
+- "full": pymupdf4llm defaults (the behaviour before profiles existed).
+
+pymupdf4llm has two code paths: layout analysis (used when pymupdf-layout
+is installed) and the classic text path. The layout path ignores classic
+options silently, while the classic path warns about layout-only options,
+so those are kept separately and passed only when layout analysis runs.
+Telling the paths apart relies on pymupdf4llm internals (the _use_layout
+flag and the helpers.pymupdf_rag module), so pyproject.toml pins the
+pymupdf4llm releases they were checked against, and a test fails if they
+disappear.
+The conversion key (backend, profile name and options) is recorded in
+outputs and in cache keys so results converted differently are never mixed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Sequence, Tuple, Type
+
+from pdf_sources import ArchiveMember, PdfInput, input_filename, open_pdf_document
+
+DEFAULT_PROFILE = "full"
+DEFAULT_BACKEND = "pymupdf4llm"
+
+
+class ConversionProfile(NamedTuple):
+    """A named set of pymupdf4llm.to_markdown options."""
+
+    name: str
+    description: str
+    options: Dict[str, object]
+    layout_options: Dict[str, object]
+    layout: bool = True  # Use layout analysis when pymupdf-layout is installed
+
+    def key(self, extra_options: Optional[dict] = None) -> str:
+        """
+        Return a stable key for this profile and any extra options, e.g.
+        'fast-text' or 'fast-text+3f2a9c1e' when options were overridden.
+        """
+        if not extra_options:
+            return self.name
+        encoded = json.dumps(extra_options, sort_keys=True, default=str)
+        return f"{self.name}+{hashlib.sha256(encoded.encode()).hexdigest()[:8]}"
+
+
+PROFILES: Dict[str, ConversionProfile] = {
+    "fast-text": ConversionProfile(
+        "fast-text",
+        "Text only: no images, graphics, tables, OCR or layout analysis",
+        {
+            "ignore_images": True,
+            "ignore_graphics": True,
+            "table_strategy": None,
+        },
+        {},
+        layout=False,
+    ),
+    "balanced": ConversionProfile(
+        "balanced",
+        "Layout analysis and ruled tables, no images or OCR",
+        {
+            "ignore_images": True,
+            "table_strategy": "lines",
+        },
+        {"use_ocr": False},
+    ),
+    "full": ConversionProfile(
+        "full",
+        "pymupdf4llm defaults: images, graphics, tables and OCR",
+        {},
+        {},
+    ),
+}
+
+
+def get_profile(name: str) -> ConversionProfile:
+    """Look up a profile by name, raising ValueError for unknown names."""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        choices = ", ".join(PROFILES)
+        raise ValueError(
+            f"Unknown conversion profile: {name!r} (choose from {choices})"
+        ) from None
+
+
+def to_markdown(doc, profile: ConversionProfile, extra_options=None) -> str:
+    """
+    Convert a path or pymupdf Document to Markdown with a profile's options.
+    extra_options override the profile's options.
+    """
+    import pymupdf4llm
+
+    convert = pymupdf4llm.to_markdown
+    layout = getattr(pymupdf4llm, "_use_layout", False)
+    if layout and not profile.layout:
+        helpers = getattr(pymupdf4llm, "helpers", None)
+        classic = getattr(helpers, "pymupdf_rag", None)
+        if classic is not None:
+            convert = classic.to_markdown
+            layout = False
+
+    options = dict(profile.options)
+    if layout:
+        options.update(profile.layout_options)
+    options.update(extra_options or {})
+    markdown: str = convert(doc, **options)
+    return markdown
+
+
+class ConverterBackend:
+    """
+    Base class for PDF-to-Markdown backends.
+
+    Subclasses set name and description, implement convert() and, if they
+    need an external tool, available(). Register them with register_backend.
+    """
+
+    name = ""
+    description = ""
+    uses_profiles = False  # Whether the conversion profile changes the output
+    batch = False  # Whether convert_batch converts many PDFs in one run
+
+    def available(self) -> bool:
+        """Return True if the backend's dependencies are installed."""
+        return True
+
+    def key(self, profile: ConversionProfile, extra_options=None) -> str:
+        """Return the conversion key recorded in outputs and cache keys."""
+        if not self.uses_profiles:
+            return self.name
+        profile_key = profile.key(extra_options)
+        if self.name == DEFAULT_BACKEND:
+            return profile_key  # Keys from before backends existed stay valid
+        return f"{self.name}:{profile_key}"
+
+    def convert(
+        self, source: PdfInput, profile: ConversionProfile, extra_options=None
+    ) -> str:
+        """Convert a path or ArchiveMember to Markdown."""
+        raise NotImplementedError
+
+    def convert_batch(
+        self, sources: Sequence[PdfInput], profile: ConversionProfile, workers: int = 1
+    ) -> Iterator[Tuple[PdfInput, Optional[str], Optional[BaseException]]]:
+        """
+        Convert many PDFs, yielding (source, markdown, error) for each.
+        Backends with batch = True do this in one run of their tool.
+        """
+        for source in sources:
+            try:
+                yield source, self.convert(source, profile), None
+            except Exception as e:
+                yield source, None, e
+
+
+BACKENDS: Dict[str, Type[ConverterBackend]] = {}
+
+
+def register_backend(cls: Type[ConverterBackend]) -> Type[ConverterBackend]:
+    """Class decorator adding a backend to BACKENDS under its name."""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def get_backend(name: str) -> ConverterBackend:
+    """Create a backend by name, raising ValueError for unknown names."""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        choices = ", ".join(BACKENDS)
+        raise ValueError(
+            f"Unknown converter backend: {name!r} (choose from {choices})"
+        ) from None
+
+
+@register_backend
+class Pymupdf4llmBackend(ConverterBackend):
+    """pymupdf4llm.to_markdown with the conversion profile's options."""
+
+    name = "pymupdf4llm"
+    description = "pymupdf4llm Markdown, tuned by --profile"
+    uses_profiles = True
+
+    def convert(self, source, profile, extra_options=None):
+        if isinstance(source, ArchiveMember):
+            doc = open_pdf_document(source)
+            try:
+                return to_markdown(doc, profile, extra_options)
+            finally:
+                doc.close()
+        return to_markdown(os.fspath(source), profile, extra_options)
+
+
+@register_backend
+class PymupdfTextBackend(ConverterBackend):
+    """Plain page text from pymupdf, one block per page."""
+
+    name = "pymupdf-text"
+    description = "Raw pymupdf page text, no Markdown structure"
+
+    def convert(self, source, profile, extra_options=None):
+        doc = open_pdf_document(source)
+        try:
+            return "\n\n".join(page.get_text("text") for page in doc)
+        finally:
+            doc.close()
+
+
+@register_backend
+class MarkerBackend(ConverterBackend):
+    """
+    The marker CLI. convert runs marker_single on one PDF in a subprocess
+    (archive members are written to a temporary file first), so marker's
+    models are loaded for that PDF alone; convert_batch runs marker once
+    over a folder of links to every PDF, loading the models once.
+    """
+
+    name = "marker"
+    description = "marker CLI (slow, model-based)"
+    command = "marker_single"
+    batch_command = "marker"
+    batch = True
+
+    def available(self) -> bool:
+        return shutil.which(self.command) is not None
+
+    @staticmethod
+    def _run(args, name: str) -> None:
+        proc = subprocess.run(args, capture_output=True, text=True, check=False)
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines() or ["no output"]
+            raise RuntimeError(f"{name} exited with {proc.returncode}: {lines[-1]}")
+
+    def convert_batch(self, sources, profile, workers=1):
+        if not sources:
+            return
+        if shutil.which(self.batch_command) is None:
+            error = RuntimeError(f"{self.batch_command} was not found in PATH")
+            for source in sources:
+                yield source, None, error
+            return
+        with tempfile.TemporaryDirectory(prefix="marker-") as tmp_dir:
+            in_dir = Path(tmp_dir) / "in"
+            out_dir = Path(tmp_dir) / "out"
+            in_dir.mkdir()
+            # Numbered names keep same-named PDFs from different folders apart
+            stems = {}
+            for number, source in enumerate(sources):
+                link = in_dir / f"{number:06d}-{input_filename(source)}"
+                if isinstance(source, ArchiveMember):
+                    link.write_bytes(source.read())
+                else:
+                    link.symlink_to(Path(os.fspath(source)).resolve())
+                stems[link.stem] = source
+
+            args = [self.batch_command, str(in_dir), "--output_dir", str(out_dir)]
+            args += ["--output_format", "markdown"]
+            if workers > 1:
+                args += ["--workers", str(workers)]
+            run_error: Optional[BaseException] = None
+            try:
+                self._run(args, self.batch_command)
+            except RuntimeError as e:
+                run_error = e  # PDFs converted before the failure are kept
+
+            for stem, source in stems.items():
+                # Not out_dir.glob(stem): file names may contain [ or *
+                outputs = sorted((out_dir / stem).glob("*.md"))
+                if not outputs and (out_dir / f"{stem}.md").is_file():
+                    outputs = [out_dir / f"{stem}.md"]
+                if outputs:
+                    yield source, outputs[0].read_text(encoding="utf-8"), None
+                else:
+                    yield (
+                        source,
+                        None,
+                        run_error
+                        or RuntimeError(
+                            f"marker wrote no Markdown for {input_filename(source)}"
+                        ),
+                    )
+
+    def convert(self, source, profile, extra_options=None):
+        if not self.available():
+            raise RuntimeError(f"{self.command} was not found in PATH")
+        with tempfile.TemporaryDirectory(prefix="marker-") as tmp_dir:
+            if isinstance(source, ArchiveMember):
+                pdf_path = Path(tmp_dir) / input_filename(source)
+                pdf_path.write_bytes(source.read())
+            else:
+                pdf_path = Path(os.fspath(source))
+            out_dir = Path(tmp_dir) / "out"
+            self._run(
+                [
+                    self.command,
+                    str(pdf_path),
+                    "--output_dir",
+                    str(out_dir),
+                    "--output_format",
+                    "markdown",
+                ],
+                self.command,
+            )
+            outputs = sorted(out_dir.rglob("*.md"))
+            if not outputs:
+                raise RuntimeError(f"marker wrote no Markdown for {pdf_path.name}")
+            return outputs[0].read_text(encoding="utf-8")
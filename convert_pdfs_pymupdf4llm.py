@@ -1,55 +1,356 @@
 #!/usr/bin/env python3
 """
-Convert PDFs to cleaned Markdown using pymupdf4llm.
+Convert PDFs to cleaned Markdown using pymupdf4llm (or another backend from
+conversion.BACKENDS, selected with --backend).
 """
 
 from __future__ import annotations
 
 import argparse
+import re
 import sys
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from pathlib import Path
-
-import pymupdf4llm
+from typing import Iterable, Iterator, Optional, Union
 
 from clean_marker_output import clean_markdown
+from conversion import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    DEFAULT_PROFILE,
+    PROFILES,
+    get_backend,
+    get_profile,
+)
+from pdf_failures import (
+    Quarantine,
+    check_text_layer,
+    picklable_error,
+    run_isolating_crashes,
+    time_limit,
+)
+from pdf_sources import (
+    ArchiveMember,
+    PdfDiscovery,
+    add_discovery_arguments,
+    input_filename,
+    input_label,
+    is_archive,
+    iter_archive_pdfs,
+)
+from pdf_triage import TriageRouter
 
+ConvertInput = Union[Path, ArchiveMember]
 
-def iter_pdf_files(pdf_dir: Path) -> list[Path]:
-    """Collect PDF files from a directory."""
-    return sorted(
-        [
-            path
-            for path in pdf_dir.iterdir()
-            if path.is_file() and path.suffix.lower() == ".pdf"
-        ]
-    )
+# Failed conversions and withheld scanned PDFs are listed here, inside --out-dir
+QUARANTINE_FILENAME = "quarantine.json"
+SCANNED_QUEUE_FILENAME = "scanned.json"
 
+# The conversion key of each output is kept beside it in this hidden
+# directory, so the Markdown files hold only the cleaned text
+PROFILE_DIRNAME = ".conversion-profiles"
 
-def convert_pdf(pdf_path: Path, out_dir: Path, overwrite: bool) -> None:
-    """Convert a single PDF to cleaned Markdown."""
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / f"{pdf_path.stem}.md"
+# First line of outputs written by earlier versions, still read when skipping
+LEGACY_PROFILE_MARKER = re.compile(r"<!-- conversion-profile: (\S+) -->")
 
-    if out_path.exists() and not overwrite:
-        print(f"Skipping existing {out_path}")
+
+def iter_pdf_files(
+    pdf_dir: Path, discovery: Optional[PdfDiscovery] = None
+) -> Iterator[Path]:
+    """Yield PDF files from a directory as they are found (see PdfDiscovery)."""
+    for path in (discovery or PdfDiscovery()).iter_paths(str(pdf_dir)):
+        yield Path(path)
+
+
+def iter_inputs(
+    pdf_dir: Path, discovery: Optional[PdfDiscovery] = None
+) -> Iterable[ConvertInput]:
+    """Collect PDFs from a directory, or the PDF members of a ZIP/TAR archive."""
+    if is_archive(str(pdf_dir)):
+        return iter_archive_pdfs(str(pdf_dir))
+    return iter_pdf_files(pdf_dir, discovery)
+
+
+def output_dir_for(
+    pdf_path: ConvertInput, out_dir: Path, pdf_root: Optional[Path]
+) -> Path:
+    """
+    Return the directory a PDF's Markdown is written to: out_dir, or with
+    pdf_root given, the PDF's subdirectory of pdf_root mirrored under out_dir.
+    """
+    if pdf_root is None or isinstance(pdf_path, ArchiveMember):
+        return out_dir
+    return out_dir / pdf_path.parent.relative_to(pdf_root)
+
+
+def profile_path(out_path: Path) -> Path:
+    """Return the file recording the conversion key of a Markdown output."""
+    return out_path.parent / PROFILE_DIRNAME / f"{out_path.stem}.key"
+
+
+def existing_profile(out_path: Path) -> str:
+    """
+    Return the conversion key recorded for an existing Markdown file.
+    Files written before profiles existed were converted with the defaults.
+    """
+    try:
+        return profile_path(out_path).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        pass
+    with out_path.open("r", encoding="utf-8") as f:
+        match = LEGACY_PROFILE_MARKER.match(f.readline())
+    return match.group(1) if match else DEFAULT_PROFILE
+
+
+def record_profile(out_path: Path, key: str) -> None:
+    """Record the conversion key a Markdown output was written with."""
+    path = profile_path(out_path)
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(f"{key}\n", encoding="utf-8")
+
+
+def convert_pdf(
+    pdf_path: ConvertInput,
+    out_dir: Path,
+    overwrite: bool,
+    timeout: Optional[float] = None,
+    profile: str = DEFAULT_PROFILE,
+    backend: str = DEFAULT_BACKEND,
+) -> None:
+    """Convert a single PDF (file or archive member) to cleaned Markdown.
+
+    Every backend's output goes through the same cleaning step. The
+    conversion key (backend and profile) is recorded beside the output (see
+    profile_path), and an existing file converted another way is replaced
+    even without overwrite.
+    Raises TimeoutError after timeout seconds and EmptyTextLayerError if the
+    PDF has no text, without writing an output file.
+    """
+    out_path = output_path_for(pdf_path, out_dir)
+    converter = get_backend(backend)
+    conversion_profile = get_profile(profile)
+    key = converter.key(conversion_profile)
+    if is_converted(out_path, key, overwrite):
         return
 
-    md_text = pymupdf4llm.to_markdown(str(pdf_path))
-    cleaned = clean_markdown(md_text)
-    out_path.write_text(cleaned, encoding="utf-8")
+    with time_limit(timeout):
+        md_text = converter.convert(pdf_path, conversion_profile)
+    write_markdown(pdf_path, out_path, md_text, key)
+
+
+def output_path_for(pdf_path: ConvertInput, out_dir: Path) -> Path:
+    """Return the Markdown file a PDF is converted to inside out_dir."""
+    return out_dir / f"{Path(input_filename(pdf_path)).stem}.md"
+
+
+def is_converted(out_path: Path, key: str, overwrite: bool) -> bool:
+    """Return True (and say so) if out_path was already converted with key."""
+    if out_path.exists() and not overwrite and existing_profile(out_path) == key:
+        print(f"Skipping existing {out_path}")
+        return True
+    return False
+
+
+def write_markdown(pdf_path: ConvertInput, out_path: Path, md_text: str, key: str):
+    """
+    Clean converted Markdown and write it with its conversion key. Raises
+    EmptyTextLayerError, without writing anything, if it has no text.
+    """
+    check_text_layer(md_text, pdf_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(clean_markdown(md_text), encoding="utf-8")
+    record_profile(out_path, key)
     print(f"Wrote {out_path}")
 
 
-def main() -> int:
+def _convert_in_worker(
+    pdf_path: ConvertInput,
+    out_dir: Path,
+    overwrite: bool,
+    timeout: Optional[float],
+    profile: str,
+    backend: str,
+) -> None:
+    try:
+        convert_pdf(pdf_path, out_dir, overwrite, timeout, profile, backend)
+    except Exception as exc:
+        raise picklable_error(exc) from None
+
+
+def record_failure(
+    pdf_path: ConvertInput,
+    error: BaseException,
+    quarantine: Optional[Quarantine],
+    **context,
+) -> None:
+    """Report a failed conversion and add it to the quarantine list."""
+    label = input_label(pdf_path)
+    if quarantine is None:
+        print(f"Error converting {label}: {error}", file=sys.stderr)
+        return
+    entry = quarantine.add(pdf_path, error, **context)
+    print(
+        f"Error converting {label} [{entry['error_class']}]: {error}",
+        file=sys.stderr,
+    )
+
+
+def convert_all(
+    inputs: Iterable[ConvertInput],
+    out_dir: Path,
+    overwrite: bool,
+    workers: int,
+    quarantine: Optional[Quarantine] = None,
+    timeout: Optional[float] = None,
+    profile: str = DEFAULT_PROFILE,
+    backend: str = DEFAULT_BACKEND,
+    pdf_root: Optional[Path] = None,
+) -> tuple[int, bool]:
+    """Convert every input, in parallel when workers > 1.
+
+    Failures are classified into the quarantine list, if one is given, and
+    inputs that convert successfully are removed from it. With pdf_root
+    given, outputs mirror the inputs' subdirectories of pdf_root, so
+    same-named PDFs in different folders do not overwrite each other.
+
+    Backends that convert in batches (marker) get every input in one run
+    instead, see convert_batch.
+
+    Returns (number of inputs seen, whether any conversion failed).
+    """
+    if get_backend(backend).batch:
+        return convert_batch(
+            inputs, out_dir, overwrite, workers, quarantine, profile, backend, pdf_root
+        )
+
+    seen = 0
+    had_errors = False
+
+    # With a timeout, even one worker runs in a pool of its own so that a
+    # PDF hanging in C code can be killed (see run_isolating_crashes)
+    if workers <= 1 and not timeout:
+        for pdf_path in inputs:
+            seen += 1
+            try:
+                convert_pdf(
+                    pdf_path,
+                    output_dir_for(pdf_path, out_dir, pdf_root),
+                    overwrite,
+                    timeout,
+                    profile,
+                    backend,
+                )
+            except Exception as exc:
+                record_failure(
+                    pdf_path, exc, quarantine, profile=profile, backend=backend
+                )
+                had_errors = True
+            else:
+                if quarantine is not None:
+                    quarantine.remove(pdf_path)
+        return seen, had_errors
+
+    def submit(executor: Executor, pdf_path: ConvertInput) -> Future:
+        return executor.submit(
+            _convert_in_worker,
+            pdf_path,
+            output_dir_for(pdf_path, out_dir, pdf_root),
+            overwrite,
+            timeout,
+            profile,
+            backend,
+        )
+
+    def counted(paths: Iterable[ConvertInput]) -> Iterator[ConvertInput]:
+        nonlocal seen
+        for pdf_path in paths:
+            seen += 1
+            yield pdf_path
+
+    # Archive members may carry their bytes, so only a few are kept in flight;
+    # a PDF that kills its worker fails alone (see run_isolating_crashes)
+    for pdf_path, _outcome, error in run_isolating_crashes(
+        lambda size: ProcessPoolExecutor(max_workers=size),
+        submit,
+        counted(inputs),
+        max(workers, 1),
+        timeout,
+    ):
+        if error is not None:
+            record_failure(
+                pdf_path, error, quarantine, profile=profile, backend=backend
+            )
+            had_errors = True
+        elif quarantine is not None:
+            quarantine.remove(pdf_path)
+    return seen, had_errors
+
+
+def convert_batch(
+    inputs: Iterable[ConvertInput],
+    out_dir: Path,
+    overwrite: bool,
+    workers: int,
+    quarantine: Optional[Quarantine] = None,
+    profile: str = DEFAULT_PROFILE,
+    backend: str = DEFAULT_BACKEND,
+    pdf_root: Optional[Path] = None,
+) -> tuple[int, bool]:
+    """Convert every input not converted yet in one run of a batch backend.
+
+    A model-based tool such as marker loads its models once for the whole
+    batch instead of once per PDF. The outputs get the same cleaning,
+    conversion key and quarantine as in convert_all; there is no per-PDF
+    timeout, since the PDFs are converted in one process.
+
+    Returns (number of inputs seen, whether any conversion failed).
+    """
+    converter = get_backend(backend)
+    key = converter.key(get_profile(profile))
+    seen = 0
+    pending: list[ConvertInput] = []
+    targets: dict[str, tuple[ConvertInput, Path]] = {}
+    for pdf_path in inputs:
+        seen += 1
+        out_path = output_path_for(
+            pdf_path, output_dir_for(pdf_path, out_dir, pdf_root)
+        )
+        if not is_converted(out_path, key, overwrite):
+            pending.append(pdf_path)
+            targets[input_label(pdf_path)] = (pdf_path, out_path)
+
+    had_errors = False
+    if pending:
+        print(f"Converting {len(pending)} PDF(s) in one {converter.name} run...")
+    results = converter.convert_batch(pending, get_profile(profile), workers)
+    for source, md_text, error in results:
+        pdf_path, out_path = targets[input_label(source)]
+        if error is None:
+            assert md_text is not None
+            try:
+                write_markdown(pdf_path, out_path, md_text, key)
+            except Exception as exc:
+                error = exc
+        if error is not None:
+            record_failure(
+                pdf_path, error, quarantine, profile=profile, backend=backend
+            )
+            had_errors = True
+        elif quarantine is not None:
+            quarantine.remove(pdf_path)
+    return seen, had_errors
+
+
+def main(argv: list[str] | None = None) -> int:
     """Entry point for converting PDFs to Markdown."""
     parser = argparse.ArgumentParser(
-        description="Convert PDFs to cleaned Markdown with pymupdf4llm."
+        description="Convert PDFs to cleaned Markdown with pymupdf4llm or another backend."
     )
     parser.add_argument(
         "--pdf-dir",
         type=Path,
         default=Path("pdfs"),
-        help="Directory containing PDFs to convert.",
+        help="Directory containing PDFs, or a ZIP/TAR archive of PDFs.",
     )
     parser.add_argument(
         "--out-dir",
@@ -62,25 +363,89 @@ def main() -> int:
         action="store_true",
         help="Overwrite existing Markdown files.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default=DEFAULT_PROFILE,
+        help="Conversion profile: fast-text skips images, tables, OCR and layout "
+        "analysis (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=list(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help="Converter backend (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--triage",
+        choices=["skip", "queue"],
+        help="Sample each PDF's text layer first and do not convert scanned PDFs "
+        f"(queue lists them in <out-dir>/{SCANNED_QUEUE_FILENAME}).",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Convert only the PDFs quarantined by a previous run.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Give up on a PDF after this many seconds of conversion.",
+    )
+    add_discovery_arguments(parser)
+    args = parser.parse_args(argv)
+    discovery = PdfDiscovery.from_args(args)
 
-    if not args.pdf_dir.is_dir():
+    if not args.pdf_dir.is_dir() and not is_archive(str(args.pdf_dir)):
         print(f"PDF directory not found: {args.pdf_dir}")
         return 1
 
-    pdf_files = iter_pdf_files(args.pdf_dir)
-    if not pdf_files:
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    quarantine = Quarantine(str(args.out_dir / QUARANTINE_FILENAME))
+    quarantine.load()
+    inputs = iter_inputs(args.pdf_dir, discovery)
+    if args.retry_failed:
+        if not quarantine:
+            print(f"No quarantined PDFs to retry in {quarantine.path}")
+            return 0
+        print(f"Retrying {quarantine.summary()}")
+        inputs = quarantine.select(inputs)
+    router = TriageRouter(args.triage) if args.triage else None
+    if router:
+        inputs = router.route(inputs)
+
+    seen, had_errors = convert_all(
+        inputs,
+        args.out_dir,
+        args.overwrite,
+        args.workers,
+        quarantine=quarantine,
+        timeout=args.timeout,
+        profile=args.profile,
+        backend=args.backend,
+        pdf_root=args.pdf_dir if discovery.recursive else None,
+    )
+    if router:
+        for entry in router.scanned:
+            print(f"Not converting scanned PDF {entry['key']}")
+        summary = router.summary()
+        if args.triage == "queue":
+            queue_path = args.out_dir / SCANNED_QUEUE_FILENAME
+            router.write_queue(str(queue_path))
+            summary += f", scanned PDFs queued in {queue_path}"
+        print(summary)
+    if not seen and not (router and router.scanned):
         print("No PDF files found.")
         return 1
 
-    had_errors = False
-    for pdf_path in pdf_files:
-        try:
-            convert_pdf(pdf_path, args.out_dir, args.overwrite)
-        except Exception as exc:
-            print(f"Error converting {pdf_path}: {exc}", file=sys.stderr)
-            had_errors = True
-
+    if quarantine:
+        print(f"⚠ {quarantine.summary()}, see {quarantine.path}")
     return 1 if had_errors else 0
 
 
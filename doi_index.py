@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Compact, memory-mapped DOI membership index.
+
+fetch_library_dois and LibraryCache.library_docs build a dict holding every
+document's full author list, although check_dois only needs to know whether
+a DOI is present plus a few display fields for the hits. For group
+libraries with hundreds of thousands of documents that dict costs hundreds
+of megabytes and seconds to build before the first check.
+
+A DoiIndex file holds the normalised DOI keys (strip().lower(), as
+check_dois uses) sorted as UTF-8 bytes, with an offset table, and the
+display fields of each document in a separate section. Opening it maps the
+file and reads a fixed-size header, so startup does not depend on the
+library size; membership is a binary search over the mapped keys, and a
+document's metadata (a small JSON object) is decoded only when it is hit.
+Pages of the file are loaded by the operating system as lookups touch them.
+
+Layout (little-endian):
+
+    header       magic, version, count, revision, section offsets
+    key offsets  count + 1 u64 offsets into the key section
+    keys         sorted UTF-8 keys, back to back
+    meta offsets count + 1 u64 offsets into the metadata section
+    metadata     one compact JSON object per key, in key order
+
+A DoiIndex is a read-only Mapping from DOI key to document info, so it can
+be passed to check_dois in place of the library_docs dict.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+INDEX_SUFFIX = ".doidx"
+
+MAGIC = b"DOIX"
+VERSION = 1
+
+# magic, version, count, revision, keys, meta offsets, meta
+HEADER = struct.Struct("<4sIQQQQQ")
+OFFSET = struct.Struct("<Q")
+OFFSET_PAIR = struct.Struct("<QQ")
+
+# Authors kept per document: print_results shows two and "et al." for more
+MAX_AUTHORS = 3
+
+
+def index_path(source_path: str) -> str:
+    """Index file kept next to a library source, e.g. the library cache"""
+    return os.path.splitext(source_path)[0] + INDEX_SUFFIX
+
+
+def doi_key(doi: str) -> str:
+    """Normalise a DOI the way check_dois does"""
+    return doi.strip().lower()
+
+
+def display_info(info: Dict) -> Dict:
+    """
+    Reduce document info to the fields shown for a hit: doi, title, year,
+    id, the last names of the first MAX_AUTHORS authors and, for indexes
+    merged from several libraries, the library the document is in.
+    """
+    trimmed = {
+        "doi": info.get("doi"),
+        "title": info.get("title"),
+        "year": info.get("year"),
+        "authors": [
+            {"last_name": author.get("last_name", "")}
+            for author in (info.get("authors") or [])[:MAX_AUTHORS]
+        ],
+        "id": info.get("id"),
+    }
+    if info.get("library"):
+        trimmed["library"] = info["library"]
+    return trimmed
+
+
+def write_index(path: str, docs: Iterable[Dict], revision: int = 0) -> int:
+    """
+    Write a DOI index for documents in document_info form.
+
+    Documents without a DOI are skipped; for a DOI listed twice the last
+    document wins, as in fetch_library_dois. The file is written next to
+    path and moved into place, so readers never see a partial index.
+
+    Args:
+        path: Index file to write
+        docs: Document info dictionaries
+        revision: Number identifying the source data, stored in the header
+            so callers can tell whether the index is current
+
+    Returns:
+        Number of DOIs in the index
+    """
+    entries: Dict[bytes, bytes] = {}
+    for info in docs:
+        key = doi_key(info.get("doi") or "")
+        if key:
+            entries[key.encode("utf-8")] = json.dumps(
+                display_info(info), ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+    keys = sorted(entries)
+
+    def offsets(blobs: List[bytes]) -> Tuple[bytes, int]:
+        table = bytearray(OFFSET.size * (len(blobs) + 1))
+        position = 0
+        for number, blob in enumerate(blobs):
+            OFFSET.pack_into(table, OFFSET.size * number, position)
+            position += len(blob)
+        OFFSET.pack_into(table, OFFSET.size * len(blobs), position)
+        return bytes(table), position
+
+    metadata = [entries[key] for key in keys]
+    key_table, keys_size = offsets(keys)
+    meta_table, _meta_size = offsets(metadata)
+    keys_pos = HEADER.size + len(key_table)
+    meta_offsets_pos = keys_pos + keys_size
+    meta_pos = meta_offsets_pos + len(meta_table)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    len(keys),
+                    revision,
+                    keys_pos,
+                    meta_offsets_pos,
+                    meta_pos,
+                )
+            )
+            f.write(key_table)
+            f.writelines(keys)
+            f.write(meta_table)
+            f.writelines(metadata)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(keys)
+
+
+class DoiIndex(Mapping):
+    """
+    Read-only, memory-mapped DOI index written by write_index. Maps DOI
+    keys to display info; use as a context manager (or call close()) to
+    unmap the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # Empty file
+                raise ValueError(f"{path} is not a DOI index") from e
+        try:
+            if len(self._map) < HEADER.size:
+                raise ValueError(f"{path} is not a DOI index")
+            (
+                magic,
+                version,
+                self._count,
+                self.revision,
+                self._keys_pos,
+                self._meta_offsets_pos,
+                self._meta_pos,
+            ) = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} DOI index")
+        except BaseException:
+            self._map.close()
+            raise
+
+    def __enter__(self) -> "DoiIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the index file."""
+        self._map.close()
+
+    def __len__(self) -> int:
+        return int(self._count)
+
+    def _key(self, number: int) -> bytes:
+        start, end = OFFSET_PAIR.unpack_from(
+            self._map, HEADER.size + OFFSET.size * number
+        )
+        return self._map[self._keys_pos + start : self._keys_pos + end]
+
+    def _position(self, doi: object) -> Optional[int]:
+        """Binary search for a DOI; returns its position or None."""
+        if not isinstance(doi, str):
+            return None
+        key = doi_key(doi).encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key(low) == key:
+            return low
+        return None
+
+    def __contains__(self, doi: object) -> bool:
+        return self._position(doi) is not None
+
+    def __getitem__(self, doi: str) -> Dict:
+        number = self._position(doi)
+        if number is None:
+            raise KeyError(doi)
+        start, end = OFFSET_PAIR.unpack_from(
+            self._map, self._meta_offsets_pos + OFFSET.size * number
+        )
+        info: Dict = json.loads(
+            self._map[self._meta_pos + start : self._meta_pos + end]
+        )
+        return info
+
+    def __iter__(self) -> Iterator[str]:
+        for number in range(self._count):
+            yield self._key(number).decode("utf-8")
+
+    def find(self, dois: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Look up DOIs, as LibraryCache.find does.
+
+        Returns:
+            Dictionary mapping each found DOI (lowercase) to display info
+        """
+        found = {}
+        for doi in dois:
+            key = doi_key(doi)
+            if key and key not in found and key in self:
+                found[key] = self[key]
+        return found
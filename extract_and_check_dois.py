@@ -3,6 +3,7 @@
 Extract DOIs from markdown file and check against Mendeley library
 """
 
+import argparse
 import html
 import json
 import re
@@ -18,7 +19,11 @@ def extract_dois_from_markdown(md_file: str) -> list:
     """Extract all DOIs from markdown file"""
     with open(md_file, "r", encoding="utf-8") as f:
         content = f.read()
+    return extract_dois_from_text(content)
 
+
+def extract_dois_from_text(content: str) -> list:
+    """Extract all DOIs from markdown text, sorted and without duplicates"""
     # Pattern to match DOIs in markdown links and plain text
     # Matches: [10.xxxx/yyyy](https://doi.org/10.xxxx/yyyy) or just 10.xxxx/yyyy
     doi_patterns = [
@@ -38,8 +43,45 @@ def extract_dois_from_markdown(md_file: str) -> list:
     return sorted(list(dois))
 
 
-def run_mendeley_check(dois: list) -> Optional[dict]:
-    """Run the Mendeley check script and return results"""
+def print_missing_token() -> None:
+    """Explain how to create the Mendeley token the check needs"""
+    print("\n" + "!" * 80)
+    print("ERROR: Mendeley authentication token missing!")
+    print(
+        "The check script needs to be authenticated before it can run in the background."
+    )
+    print("\nPlease run this command manually in your terminal once to authenticate:")
+    print(f"\n   {sys.executable} check_mendeley_dois_v2.py --interactive")
+    print("\n" + "!" * 80 + "\n")
+
+
+def run_mendeley_check(dois: list, **options) -> Optional[dict]:
+    """
+    Check DOIs against the Mendeley library in this process and return the
+    results, or None if there is no saved token or the check fails.
+    Keyword options are passed to check_mendeley_dois_v2.check_library;
+    with export=<file> the check runs offline and needs no token.
+    """
+    import check_mendeley_dois_v2 as mendeley
+
+    if not options.get("export") and not Path(mendeley.TOKEN_FILE).exists():
+        print_missing_token()
+        return None
+
+    try:
+        return mendeley.check_library(dois, **options)
+    except Exception as e:
+        print(f"❌ Mendeley check failed: {e}", file=sys.stderr)
+        return None
+
+
+def run_mendeley_check_subprocess(
+    dois: list, timeout: Optional[float] = 120
+) -> Optional[dict]:
+    """
+    Run the Mendeley check script in a separate interpreter and return
+    results (the behaviour before the check ran in-process)
+    """
     # Create temporary files safely
     temp_file = None
     output_file = None
@@ -47,16 +89,7 @@ def run_mendeley_check(dois: list) -> Optional[dict]:
     # Check if authentication token exists
     token_file = Path(__file__).resolve().parent / "mendeley_token.json"
     if not token_file.exists():
-        print("\n" + "!" * 80)
-        print("ERROR: Mendeley authentication token missing!")
-        print(
-            "The check script needs to be authenticated before it can run in the background."
-        )
-        print(
-            "\nPlease run this command manually in your terminal once to authenticate:"
-        )
-        print(f"\n   {sys.executable} check_mendeley_dois_v2.py --interactive")
-        print("\n" + "!" * 80 + "\n")
+        print_missing_token()
         return None
 
     try:
@@ -86,10 +119,10 @@ def run_mendeley_check(dois: list) -> Optional[dict]:
                 capture_output=True,
                 text=True,
                 check=False,
-                timeout=120,  # 2 minute timeout
+                timeout=timeout,
             )
         except subprocess.TimeoutExpired:
-            print("\nError: Mendeley check script timed out after 120 seconds.")
+            print(f"\nError: Mendeley check script timed out after {timeout} seconds.")
             print("This usually happens if the script is waiting for user input.")
             print(
                 "Please run the script manually to ensure it's not prompting for something."
@@ -243,6 +276,8 @@ def generate_html_table(results: dict, output_html: str):
             title_escaped = html.escape(doc["title"])
             doi_url = f"https://doi.org/{url_quote(doc['doi'], safe='')}"
             year_str = f" ({html.escape(str(doc['year']))})" if doc.get("year") else ""
+            if doc.get("library"):
+                year_str += f" · {html.escape(doc['library'])}"
             html_content += f'''                    <li class="doi-item">
                         <a href="{doi_url}" class="doi-link" target="_blank" rel="noopener noreferrer">{doi_escaped}</a>
                         <div class="doi-title">{title_escaped}</div>
@@ -445,12 +480,43 @@ def generate_html_table(results: dict, output_html: str):
     print(f"\n✓ HTML table generated: {output_html}")
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python extract_and_check_dois.py <markdown_file>")
-        sys.exit(1)
-
-    md_file = Path(sys.argv[1])
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(
+        description="Extract DOIs from a markdown file and check them against Mendeley"
+    )
+    parser.add_argument("markdown_file", help="Markdown file to scan for DOIs")
+    parser.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="Run check_mendeley_dois_v2.py in a separate process instead of "
+        "in this one",
+    )
+    parser.add_argument(
+        "--export",
+        help="Check against this BibTeX, RIS or CSL-JSON library export "
+        "instead of the Mendeley API (works offline)",
+    )
+    parser.add_argument(
+        "--group",
+        action="append",
+        default=[],
+        metavar="ID_OR_NAME",
+        help="Also check this Mendeley group library (repeat for several)",
+    )
+    parser.add_argument(
+        "--all-groups",
+        action="store_true",
+        help="Also check every Mendeley group library you belong to",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=120,
+        help="Seconds to wait for the --subprocess check (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    md_file = Path(args.markdown_file)
 
     # Validate file exists
     if not md_file.exists():
@@ -468,7 +534,14 @@ def main():
 
     # Check against Mendeley
     print("Checking DOIs against Mendeley library...\n")
-    results = run_mendeley_check(dois)
+    if args.export:
+        results = run_mendeley_check(dois, export=args.export)
+    elif args.subprocess:
+        results = run_mendeley_check_subprocess(dois, timeout=args.timeout)
+    else:
+        results = run_mendeley_check(
+            dois, groups=args.group, all_groups=args.all_groups
+        )
 
     if not results:
         print("⚠ Mendeley check failed (likely due to missing authentication).")
@@ -1,9 +1,38 @@
+import argparse
 import json
 import os
 import re
-
-import pymupdf4llm
-from rapidfuzz import fuzz
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+
+from conversion import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    DEFAULT_PROFILE,
+    PROFILES,
+    get_backend,
+    get_profile,
+)
+from pdf_dedup import DEDUPE_MODES, DuplicateFilter, fan_out
+from pdf_failures import (
+    Quarantine,
+    check_text_layer,
+    picklable_error,
+    run_isolating_crashes,
+    time_limit,
+)
+from pdf_sources import (
+    ArchiveMember,
+    PdfDiscovery,
+    PdfInput,
+    add_discovery_arguments,
+    input_filename,
+    is_archive,
+    iter_archive_pdfs,
+)
+from pdf_triage import TRIAGE_POLICIES, TriageRouter, scanned_queue_path_for
+from run_journal import JournalWriter, RunJournal
 
 # =============================================================================
 # SECTION KEYWORDS FOR FUZZY MATCHING
@@ -109,17 +138,142 @@ NOISE_PATTERNS = [
     r"^\[BY-NC-ND\s+license.*$",  # License lines
 ]
 
+# Compiled once; matched line by line in clean_content
+COMPILED_NOISE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in NOISE_PATTERNS]
+
 # DOI extraction pattern
 DOI_PATTERN = re.compile(
     r"(?:doi\s*[:/]?\s*|https?://(?:dx\.)?doi\.org/)?(10\.\d{4,}/[^\s]+)", re.IGNORECASE
 )
 
 
+# =============================================================================
+# SECTION HEADER PATTERNS
+# =============================================================================
+TARGET_HEADER_PATTERNS = {
+    "introduction": re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
+        r"(?:Introduction|Background(?:\s+and\s+Motivation)?|Overview|Preface|Motivation)"
+        r"(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    "conclusion": re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
+        r"(?:Conclusions?|Concluding\s+Remarks?|Summary(?:\s+and\s+Conclusions?)?|"
+        r"Final\s+Remarks?|Closing\s+Remarks?|General\s+Conclusions?|"
+        r"Conclusions?\s+and\s+(?:Outlook|Future\s+(?:Work|Directions?))|"
+        r"Summary\s+and\s+(?:Outlook|Perspectives?))"
+        r"(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    "future_outlook": re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
+        r"(?:Future\s+(?:Works?|Outlook|Directions?|Research|Perspectives?|Studies)|"
+        r"Outlook(?:\s+and\s+(?:Perspectives?|Future\s+(?:Work|Directions?)))?|"
+        r"Perspectives?(?:\s+and\s+(?:Outlook|Future\s+(?:Work|Directions?)))?|"
+        r"(?:Open\s+)?(?:Questions|Challenges)(?:\s+and\s+(?:Outlook|Future\s+Directions?))?|"
+        r"Implications(?:\s+and\s+Future\s+(?:Work|Directions?))?|Road\s*map|"
+        r"What\'?s\s+Next|Looking\s+(?:Ahead|Forward))"
+        r"(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    "results": re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
+        r"(?:Results?|Findings|Experimental\s+Results?)"
+        r"(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    "discussion": re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
+        r"(?:Discussion|Analysis|Results?\s+and\s+Discussion)"
+        r"(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+}
+
+# Patterns for end-of-paper sections that should act as boundaries
+# (we don't extract these, but they terminate other sections)
+END_SECTION_PATTERNS = [
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})References?(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})Bibliography(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})Acknowledg(?:e)?ments?(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})Author\s+Contributions?(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})Declaration\s+of\s+(?:Competing\s+)?Interests?(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})Conflicts?\s+of\s+Interest(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})Funding(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})Supplementary\s+(?:Materials?|Information)(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    re.compile(
+        r"^(?:#+\s*)?(?:\*{0,2})Appendix(?:\*{0,2})\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+]
+
+
+# Generic section pattern: "2. Graphene Properties" or "2.1. Synthesis"
+# Match numbered sections more broadly, then filter out false positives
+GENERIC_SECTION_PATTERN = re.compile(
+    r"^(\d+\.)\s+([A-Z].{5,60})$",  # "2. Section Title" - starts with capital, 5-60 chars
+    re.MULTILINE,
+)
+
+# Standard markdown headers, used as boundaries after aggressive filtering
+MARKDOWN_HEADER_PATTERN = re.compile(r"^#+\s*.+$", re.MULTILINE)
+
+SECTIONS_TO_EXTRACT = [
+    "introduction",
+    "conclusion",
+    "future_outlook",
+    "results",
+    "discussion",
+]
+
+# Result keys that describe the paper rather than hold section text
+METADATA_KEYS = {
+    "filename",
+    "doi",
+    "source",
+    "duplicate_of",
+    "conversion_profile",
+    "triage",
+    "offsets",
+}
+
+# Upper bound on cached fuzzy header matches held by a PaperExtractor
+FUZZY_CACHE_SIZE = 4096
+
+
 def fuzzy_match_section(header_text, threshold=80):
     """
     Match header text to section type using fuzzy matching.
     Returns the section type if a match is found above threshold, else None.
     """
+    # Imported lazily so commands that only re-export results stay fast
+    from rapidfuzz import fuzz
+
     # Clean the header text
     cleaned = re.sub(r"^[\d\.IVX]+\s*", "", header_text)  # Remove numbering
     cleaned = re.sub(r"[#*]+", "", cleaned).strip().lower()  # Remove markdown
@@ -152,16 +306,11 @@ def clean_content(text):
     email addresses, and other non-essential metadata.
     """
     lines = text.split("\n")
-    cleaned_lines = []
-
-    for line in lines:
-        is_noise = False
-        for pattern in NOISE_PATTERNS:
-            if re.match(pattern, line, re.IGNORECASE | re.MULTILINE):
-                is_noise = True
-                break
-        if not is_noise:
-            cleaned_lines.append(line)
+    cleaned_lines = [
+        line
+        for line in lines
+        if not any(pattern.match(line) for pattern in COMPILED_NOISE_PATTERNS)
+    ]
 
     # Join and clean up excessive blank lines
     result = "\n".join(cleaned_lines)
@@ -188,346 +337,535 @@ def detect_section_by_content(text, section_type="conclusion"):
     return matches >= 2
 
 
-def extract_sections_from_markdown(markdown_text):
-    """
-    Parses markdown text to find specific sections like Introduction, Conclusion, etc.
-    Returns a dictionary of section names and their content.
+class ExtractionResult(NamedTuple):
+    """Outcome of extracting one PDF: either data or the error raised."""
 
-    Uses a three-pronged approach:
-    1. Exact regex pattern matching (primary)
-    2. Fuzzy matching fallback for non-standard headers
-    3. Content-based detection for edge cases
-    """
-    sections = {}
-
-    # =========================================================================
-    # EXPANDED REGEX PATTERNS
-    # =========================================================================
-    target_headers = {
-        "introduction": re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
-            r"(?:Introduction|Background(?:\s+and\s+Motivation)?|Overview|Preface|Motivation)"
-            r"(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        "conclusion": re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
-            r"(?:Conclusions?|Concluding\s+Remarks?|Summary(?:\s+and\s+Conclusions?)?|"
-            r"Final\s+Remarks?|Closing\s+Remarks?|General\s+Conclusions?|"
-            r"Conclusions?\s+and\s+(?:Outlook|Future\s+(?:Work|Directions?))|"
-            r"Summary\s+and\s+(?:Outlook|Perspectives?))"
-            r"(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        "future_outlook": re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
-            r"(?:Future\s+(?:Works?|Outlook|Directions?|Research|Perspectives?|Studies)|"
-            r"Outlook(?:\s+and\s+(?:Perspectives?|Future\s+(?:Work|Directions?)))?|"
-            r"Perspectives?(?:\s+and\s+(?:Outlook|Future\s+(?:Work|Directions?)))?|"
-            r"(?:Open\s+)?(?:Questions|Challenges)(?:\s+and\s+(?:Outlook|Future\s+Directions?))?|"
-            r"Implications(?:\s+and\s+Future\s+(?:Work|Directions?))?|Road\s*map|"
-            r"What\'?s\s+Next|Looking\s+(?:Ahead|Forward))"
-            r"(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        "results": re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
-            r"(?:Results?|Findings|Experimental\s+Results?)"
-            r"(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        "discussion": re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})(?:(?:\d+\.?|[IVX]+\.?)\s*)?"
-            r"(?:Discussion|Analysis|Results?\s+and\s+Discussion)"
-            r"(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-    }
+    path: PdfInput
+    data: Optional[dict]
+    error: Optional[BaseException]
+    seconds: float = 0.0
 
-    # Patterns for end-of-paper sections that should act as boundaries
-    # (we don't extract these, but they terminate other sections)
-    end_section_patterns = [
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})References?(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})Bibliography(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})Acknowledg(?:e)?ments?(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})Author\s+Contributions?(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})Declaration\s+of\s+(?:Competing\s+)?Interests?(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})Conflicts?\s+of\s+Interest(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})Funding(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})Supplementary\s+(?:Materials?|Information)(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-        re.compile(
-            r"^(?:#+\s*)?(?:\*{0,2})Appendix(?:\*{0,2})\s*$",
-            re.IGNORECASE | re.MULTILINE,
-        ),
-    ]
 
-    # =========================================================================
-    # FIND ALL BOUNDARIES (headers that delimit sections)
-    # =========================================================================
-    extracted_boundaries = []
+class Boundary:
+    """A header delimiting sections: its [start, end) range and kind."""
 
-    # Generic section pattern: "2. Graphene Properties" or "2.1. Synthesis"
-    # Match numbered sections more broadly, then filter out false positives
-    generic_section_pattern = re.compile(
-        r"^(\d+\.)\s+([A-Z].{5,60})$",  # "2. Section Title" - starts with capital, 5-60 chars
-        re.MULTILINE,
-    )
-    for match in generic_section_pattern.finditer(markdown_text):
-        header = match.group(0)
-        # Skip if it looks like a citation (contains "et al." or dates/journal info)
-        if "et al" in header.lower():
-            continue
-        if re.search(r"\(\d{4}\)", header):  # Year in parentheses like (2024)
-            continue
-        if re.search(r"\d+[-–]\d+", header):  # Page ranges like 115-138
-            continue
-        # Skip if it's too short (likely false positive)
-        if len(header.split()) < 2:
-            continue
-        extracted_boundaries.append((match.start(), "generic_section", header))
-
-    for key, pattern in target_headers.items():
-        for match in pattern.finditer(markdown_text):
-            extracted_boundaries.append((match.start(), key, match.group()))
-
-    # Also include standard markdown headers as boundaries, but filter aggressively
-    header_pattern = re.compile(r"^#+\s*.+$", re.MULTILINE)
-    for match in header_pattern.finditer(markdown_text):
-        header_text = match.group()
-
-        # Skip false positives
-        header_content = re.sub(r"^#+\s*", "", header_text)  # Remove leading #'s
-
-        # Skip if header starts with numbers (addresses like #08-03, page refs)
-        if re.match(r"^\d", header_content):
-            continue
-        # Skip very short headers (likely noise)
-        if len(header_content.strip()) < 4:
-            continue
-        # Skip headers that look like metadata (contain @, mailto:, http)
-        if (
-            "@" in header_content
-            or "mailto:" in header_content
-            or "http" in header_content
-        ):
-            continue
+    __slots__ = ("start", "end", "kind")
 
-        # Try fuzzy matching on headers not captured by regex
-        fuzzy_section = fuzzy_match_section(header_text)
-        boundary_type = fuzzy_section if fuzzy_section else "markdown_header"
-        extracted_boundaries.append((match.start(), boundary_type, header_text))
+    def __init__(self, start: int, end: int, kind: str) -> None:
+        self.start = start
+        self.end = end
+        self.kind = kind
 
-    # Add end-of-paper sections as boundaries (References, Acknowledgments, etc.)
-    for pattern in end_section_patterns:
-        for match in pattern.finditer(markdown_text):
-            extracted_boundaries.append((match.start(), "end_section", match.group()))
+    def __repr__(self) -> str:
+        return f"Boundary({self.start}, {self.end}, {self.kind!r})"
 
-    # Sort boundaries by position
-    extracted_boundaries.sort(key=lambda x: x[0])
 
-    # =========================================================================
-    # EXTRACT CONTENT FOR EACH TARGET SECTION
-    # =========================================================================
-    sections_to_extract = [
-        "introduction",
-        "conclusion",
-        "future_outlook",
-        "results",
-        "discussion",
-    ]
+class SectionSpan:
+    """A section's [start, end) character range in its paper's Markdown."""
+
+    __slots__ = ("start", "end", "note")
+
+    def __init__(self, start: int, end: int, note: Optional[str] = None) -> None:
+        self.start = start
+        self.end = end
+        self.note = note  # How the section was found, if not by its header
+
+    def __repr__(self) -> str:
+        return f"SectionSpan({self.start}, {self.end})"
+
 
-    for key in sections_to_extract:
-        pattern = target_headers[key]
-        match = pattern.search(markdown_text)
-
-        # If no regex match, try to find via fuzzy-matched boundaries
-        if not match:
-            for boundary_start, boundary_type, boundary_text in extracted_boundaries:
-                if boundary_type == key:
-                    # Create a pseudo-match using the boundary info
-                    match_start = boundary_start
-                    match_end = boundary_start + len(boundary_text)
+def strip_span(text: str, start: int, end: int) -> SectionSpan:
+    """Return the span of text[start:end].strip() without copying the slice."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return SectionSpan(start, end)
+
+
+class PaperRecord:
+    """
+    The sections of one paper as character ranges into its Markdown.
+
+    Sections are found without copying any text; text() slices and cleans
+    one section and to_dict() all of them. A record holds the whole
+    Markdown, so extract() exports it with to_dict() straight away, in the
+    worker, and only the dictionary is passed on.
+    """
+
+    __slots__ = ("markdown", "filename", "doi", "spans")
+
+    def __init__(
+        self,
+        markdown: str,
+        filename: str,
+        spans: Dict[str, SectionSpan],
+        doi: Optional[str] = None,
+    ) -> None:
+        self.markdown = markdown
+        self.filename = filename
+        self.spans = spans
+        self.doi = doi
+
+    def text(self, key: str) -> str:
+        """Return the cleaned text of one section."""
+        span = self.spans[key]
+        text: str = clean_content(self.markdown[span.start : span.end])
+        return text
+
+    def to_dict(self) -> dict:
+        """
+        Return the result dictionary written to JSON: cleaned section text,
+        filename, DOI and, under "offsets", each section's [start, end)
+        range in the Markdown it was extracted from.
+        """
+        data: Dict[str, object] = {}
+        for key, span in self.spans.items():
+            data[key] = self.text(key)
+            if span.note:
+                data[f"_{key}_note"] = span.note
+        data["filename"] = self.filename
+        if self.doi:
+            data["doi"] = self.doi
+        data["offsets"] = {
+            key: [span.start, span.end] for key, span in self.spans.items()
+        }
+        return data
+
+
+class PaperExtractor:
+    """
+    Reusable section extractor for academic papers.
+
+    Holds the compiled header and noise patterns, a cache of fuzzy header
+    matches and the pymupdf4llm conversion options, so repeated calls do not
+    rebuild any state. Use extract() for a single PDF and iter_extract() to
+    process many PDFs, optionally across worker processes.
+    """
+
+    def __init__(
+        self,
+        fuzzy_threshold: int = 80,
+        conversion_options: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        profile: str = DEFAULT_PROFILE,
+        backend: str = DEFAULT_BACKEND,
+    ) -> None:
+        self.fuzzy_threshold = fuzzy_threshold
+        self.profile = get_profile(profile)
+        self.backend = get_backend(backend)
+        self.conversion_options = dict(conversion_options or {})
+        self.conversion_key = self.backend.key(self.profile, self.conversion_options)
+        self.timeout = timeout
+        self.target_headers = TARGET_HEADER_PATTERNS
+        self.end_section_patterns = END_SECTION_PATTERNS
+        self._fuzzy_cache: Dict[str, Optional[str]] = {}
+
+    def match_section(self, header_text):
+        """Fuzzy-match a header to a section type, caching the result."""
+        try:
+            return self._fuzzy_cache[header_text]
+        except KeyError:
+            pass
+        if len(self._fuzzy_cache) >= FUZZY_CACHE_SIZE:
+            self._fuzzy_cache.clear()
+        section = fuzzy_match_section(header_text, self.fuzzy_threshold)
+        self._fuzzy_cache[header_text] = section
+        return section
+
+    def find_boundaries(self, markdown_text):
+        """
+        Find all headers that delimit sections.
+        Returns a list of Boundary records sorted by position.
+        """
+        extracted_boundaries = []
+
+        for match in GENERIC_SECTION_PATTERN.finditer(markdown_text):
+            header = match.group(0)
+            # Skip if it looks like a citation (contains "et al." or dates/journal info)
+            if "et al" in header.lower():
+                continue
+            if re.search(r"\(\d{4}\)", header):  # Year in parentheses like (2024)
+                continue
+            if re.search(r"\d+[-–]\d+", header):  # Page ranges like 115-138
+                continue
+            # Skip if it's too short (likely false positive)
+            if len(header.split()) < 2:
+                continue
+            extracted_boundaries.append(
+                Boundary(match.start(), match.end(), "generic_section")
+            )
+
+        for key, pattern in self.target_headers.items():
+            for match in pattern.finditer(markdown_text):
+                extracted_boundaries.append(Boundary(match.start(), match.end(), key))
+
+        # Also include standard markdown headers as boundaries, but filter aggressively
+        for match in MARKDOWN_HEADER_PATTERN.finditer(markdown_text):
+            header_text = match.group()
+
+            # Skip false positives
+            header_content = re.sub(r"^#+\s*", "", header_text)  # Remove leading #'s
+
+            # Skip if header starts with numbers (addresses like #08-03, page refs)
+            if re.match(r"^\d", header_content):
+                continue
+            # Skip very short headers (likely noise)
+            if len(header_content.strip()) < 4:
+                continue
+            # Skip headers that look like metadata (contain @, mailto:, http)
+            if (
+                "@" in header_content
+                or "mailto:" in header_content
+                or "http" in header_content
+            ):
+                continue
+
+            # Try fuzzy matching on headers not captured by regex
+            fuzzy_section = self.match_section(header_text)
+            boundary_type = fuzzy_section if fuzzy_section else "markdown_header"
+            extracted_boundaries.append(
+                Boundary(match.start(), match.end(), boundary_type)
+            )
+
+        # Add end-of-paper sections as boundaries (References, Acknowledgments, etc.)
+        for pattern in self.end_section_patterns:
+            for match in pattern.finditer(markdown_text):
+                extracted_boundaries.append(
+                    Boundary(match.start(), match.end(), "end_section")
+                )
+
+        # Sort boundaries by position
+        extracted_boundaries.sort(key=lambda boundary: boundary.start)
+        return extracted_boundaries
+
+    def find_sections(self, markdown_text):
+        """
+        Locate sections like Introduction, Conclusion, etc. in markdown text.
+        Returns a dictionary of section names and their SectionSpans; no
+        section text is copied.
+
+        Uses a three-pronged approach:
+        1. Exact regex pattern matching (primary)
+        2. Fuzzy matching fallback for non-standard headers
+        3. Content-based detection for edge cases
+        """
+        sections = {}
+        extracted_boundaries = self.find_boundaries(markdown_text)
+
+        for key in SECTIONS_TO_EXTRACT:
+            pattern = self.target_headers[key]
+            match = pattern.search(markdown_text)
+
+            if match:
+                match_start = match.start()
+                content_start = match.end()
+            else:
+                # If no regex match, try to find via fuzzy-matched boundaries
+                for boundary in extracted_boundaries:
+                    if boundary.kind == key:
+                        match_start = content_start = boundary.start
+                        break
+                else:
+                    continue  # No match found for this section
+
+            # Find the next boundary after this match
+            end_index = len(markdown_text)
+
+            for boundary in extracted_boundaries:
+                if boundary.start > match_start + 10:  # Buffer to avoid self-match
+                    end_index = boundary.start
                     break
+
+            span = strip_span(markdown_text, content_start, end_index)
+
+            # Filter out very short content (likely false positives)
+            if span.end - span.start > 50:
+                sections[key] = span
+
+        # If we didn't find a conclusion, check the last part of the document
+        if "conclusion" not in sections:
+            # Get the last ~2000 characters
+            last_portion = (
+                markdown_text[-2000:] if len(markdown_text) > 2000 else markdown_text
+            )
+            if detect_section_by_content(last_portion, "conclusion"):
+                # Extract from the last major paragraph break
+                paragraphs = markdown_text.split("\n\n")
+                if len(paragraphs) >= 3:
+                    tail = sum(len(p) for p in paragraphs[-3:]) + 2 * len("\n\n")
+                    span = strip_span(
+                        markdown_text, len(markdown_text) - tail, len(markdown_text)
+                    )
+                    span.note = (
+                        "Detected by content analysis (no explicit header found)"
+                    )
+                    sections["conclusion"] = span
+
+        return sections
+
+    def extract_sections(self, markdown_text):
+        """
+        Parses markdown text to find specific sections like Introduction, Conclusion, etc.
+        Returns a dictionary of section names and their content; sections
+        found by content analysis come with a _<name>_note entry.
+        """
+        sections = {}
+        for key, span in self.find_sections(markdown_text).items():
+            sections[key] = markdown_text[span.start : span.end]
+            if span.note:
+                sections[f"_{key}_note"] = span.note
+        return sections
+
+    def convert(self, source):
+        """
+        Convert a PDF to Markdown with the extractor's backend and conversion
+        profile; conversion_options override the profile's options.
+        source is a file path or an ArchiveMember, which is opened from memory.
+        """
+        return self.backend.convert(source, self.profile, self.conversion_options)
+
+    def convert_checked(self, source):
+        """
+        Convert a PDF to Markdown within the extractor's timeout.
+
+        Raises TimeoutError if conversion takes longer than the timeout and
+        EmptyTextLayerError if the PDF yields no text.
+        """
+        with time_limit(self.timeout):
+            md_text = self.convert(source)
+        check_text_layer(md_text, source)
+        return md_text
+
+    def extract_record(self, md_text, filename):
+        """
+        Locate the sections of converted Markdown and return a PaperRecord
+        holding md_text and one SectionSpan per section.
+        """
+        # Extract DOI from the full text (usually in first pages)
+        doi = extract_doi(md_text[:5000])  # Check first ~5000 chars
+        return PaperRecord(md_text, filename, self.find_sections(md_text), doi)
+
+    def extract_markdown(self, md_text, filename):
+        """
+        Extract and clean sections from converted Markdown.
+        Returns the extracted data dictionary including filename, DOI and
+        section offsets.
+        """
+        return self.extract_record(md_text, filename).to_dict()
+
+    def extract(self, source):
+        """
+        Convert a single PDF (path or ArchiveMember) to Markdown and extract
+        its sections. Returns the extracted data dictionary including
+        filename and DOI metadata.
+
+        Raises TimeoutError if conversion takes longer than the extractor's
+        timeout and EmptyTextLayerError if the PDF yields no text.
+        """
+        md_text = self.convert_checked(source)
+        extracted_data = self.extract_markdown(md_text, input_filename(source))
+        extracted_data["conversion_profile"] = self.conversion_key
+        if isinstance(source, ArchiveMember):
+            extracted_data["source"] = source.source
+        return extracted_data
+
+    def iter_extract(
+        self, paths: Iterable[PdfInput], workers: int = 1
+    ) -> Iterator[ExtractionResult]:
+        """
+        Extract sections from many PDFs, yielding an ExtractionResult per file
+        as soon as it completes. With workers > 1 the PDFs are converted in a
+        process pool and results arrive in completion order; paths are
+        consumed lazily so at most a few files per worker are in flight, and
+        only a PDF that crashes a worker by itself fails with
+        BrokenProcessPool. With a timeout the PDFs always run in worker
+        processes, so the parent can kill one that hangs in C code where
+        time_limit cannot stop it.
+        """
+        if workers <= 1 and not self.timeout:
+            for path in paths:
+                started = time.perf_counter()
+                try:
+                    data = self.extract(path)
+                except Exception as e:
+                    yield ExtractionResult(path, None, e)
+                else:
+                    elapsed = time.perf_counter() - started
+                    yield ExtractionResult(path, data, None, elapsed)
+            return
+
+        def submit(executor, path):
+            return executor.submit(_timed_extract_in_worker, path)
+
+        # A PDF that kills its worker fails alone (see run_isolating_crashes)
+        for path, outcome, error in run_isolating_crashes(
+            self.worker_pool, submit, paths, max(workers, 1), self.timeout
+        ):
+            if error is not None:
+                yield ExtractionResult(path, None, error)
             else:
-                continue  # No match found for this section
-        else:
-            match_start = match.start()
-            match_end = match.end()
-
-        # Find the next boundary after this match
-        end_index = len(markdown_text)
-
-        for boundary_start, _boundary_type, _ in extracted_boundaries:
-            if boundary_start > match_start + 10:  # Buffer to avoid self-match
-                end_index = boundary_start
-                break
-
-        # Extract and clean content
-        content = markdown_text[match_end if match else match_start : end_index].strip()
-
-        # Filter out very short content (likely false positives)
-        if len(content) > 50:
-            sections[key] = content
-
-    # =========================================================================
-    # CONTENT-BASED FALLBACK DETECTION
-    # =========================================================================
-    # If we didn't find a conclusion, check the last part of the document
-    if "conclusion" not in sections:
-        # Get the last ~2000 characters
-        last_portion = (
-            markdown_text[-2000:] if len(markdown_text) > 2000 else markdown_text
+                data, elapsed = outcome
+                yield ExtractionResult(path, data, None, elapsed)
+
+    def worker_pool(self, workers):
+        """Create a process pool whose workers each hold a copy of this extractor."""
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self,),
         )
-        if detect_section_by_content(last_portion, "conclusion"):
-            # Extract from the last major paragraph break
-            paragraphs = markdown_text.split("\n\n")
-            if len(paragraphs) >= 3:
-                sections["conclusion"] = "\n\n".join(paragraphs[-3:]).strip()
-                sections["_conclusion_note"] = (
-                    "Detected by content analysis (no explicit header found)"
-                )
 
-    return sections
+
+_default_extractor: Optional[PaperExtractor] = None
+_worker_extractor: Optional[PaperExtractor] = None
+
+
+def get_default_extractor():
+    """Return the shared PaperExtractor used by the module-level helpers."""
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = PaperExtractor()
+    return _default_extractor
+
+
+def _init_worker(extractor):
+    global _worker_extractor
+    _worker_extractor = extractor
 
 
-def export_to_markdown(results, output_file):
+def extract_in_worker(filepath):
     """
-    Export extracted sections to a markdown file for LLM consumption.
-    Creates a clean, structured markdown document with all papers and their sections.
+    Extract a PDF with the extractor installed in this worker process.
+    Errors are re-raised in a form that survives the trip back to the
+    parent process (see picklable_error).
     """
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("# Extracted Academic Paper Sections\n\n")
-        f.write(f"Total papers processed: {len(results)}\n\n")
-        f.write("---\n\n")
+    extractor = _worker_extractor or get_default_extractor()
+    try:
+        return extractor.extract(filepath)
+    except Exception as e:
+        raise picklable_error(e) from None
 
-        for i, paper in enumerate(results, 1):
-            filename = paper.get("filename", "Unknown")
-            # Clean up filename for display
-            display_name = filename.replace(".pdf", "").replace("-annotated", "")
-
-            f.write(f"# Paper {i}: {display_name}\n\n")
-
-            # Add DOI link if available
-            if "doi" in paper and paper["doi"]:
-                doi = paper["doi"]
-                f.write(f"**DOI:** [https://doi.org/{doi}](https://doi.org/{doi})\n\n")
-
-            # Write each section in a standardized order
-            section_order = [
-                "introduction",
-                "results",
-                "discussion",
-                "conclusion",
-                "future_outlook",
-            ]
-            section_titles = {
-                "introduction": "Introduction",
-                "results": "Results",
-                "discussion": "Discussion",
-                "conclusion": "Conclusion",
-                "future_outlook": "Future Outlook",
-            }
-
-            sections_found = []
-            for section_key in section_order:
-                if section_key in paper and not section_key.startswith("_"):
-                    sections_found.append(section_key)
-                    f.write(f"## {section_titles[section_key]}\n\n")
-                    f.write(paper[section_key])
-                    f.write("\n\n")
-
-                    # Add note if section was detected by content analysis
-                    note_key = f"_{section_key}_note"
-                    if note_key in paper:
-                        f.write(f"*Note: {paper[note_key]}*\n\n")
-
-            if not sections_found:
-                f.write("*No sections extracted from this paper.*\n\n")
-
-            f.write("---\n\n")
 
-    print(f"Markdown export saved to {output_file}")
+def convert_in_worker(source):
+    """
+    Convert a PDF to Markdown with the extractor installed in this worker
+    process (see PaperExtractor.convert_checked); errors are re-raised as in
+    extract_in_worker.
+    """
+    extractor = _worker_extractor or get_default_extractor()
+    try:
+        return extractor.convert_checked(source)
+    except Exception as e:
+        raise picklable_error(e) from None
+
+
+def _timed_extract_in_worker(filepath):
+    started = time.perf_counter()
+    data = extract_in_worker(filepath)
+    return data, time.perf_counter() - started
 
 
-def process_pdfs(pdf_dir, output_file):
+def extract_sections_from_markdown(markdown_text):
     """
-    Iterates through PDFs in pdf_dir, converts them to MD, extracts sections,
-    and saves results to both JSON and Markdown formats.
+    Parses markdown text to find specific sections like Introduction, Conclusion, etc.
+    Returns a dictionary of section names and their content.
+    See PaperExtractor.extract_sections.
     """
-    results = []
+    return get_default_extractor().extract_sections(markdown_text)
 
-    if not os.path.isdir(pdf_dir):
-        print(f"Error: Directory {pdf_dir} does not exist.")
-        return
 
-    print(f"Processing PDFs in {pdf_dir}...")
+def _write_markdown_header(f, total, notes=None):
+    f.write("# Extracted Academic Paper Sections\n\n")
+    f.write(f"Total papers processed: {total}\n\n")
+    for note in notes or []:
+        f.write(f"{note}\n\n")
+    f.write("---\n\n")
 
-    files = [f for f in os.listdir(pdf_dir) if f.lower().endswith(".pdf")]
 
-    if not files:
-        print("No PDF files found.")
-        return
+def _write_paper_markdown(f, index, paper):
+    filename = paper.get("filename", "Unknown")
+    # Clean up filename for display
+    display_name = filename.replace(".pdf", "").replace("-annotated", "")
 
-    for filename in files:
-        filepath = os.path.join(pdf_dir, filename)
-        print(f"Processing {filename}...")
+    f.write(f"# Paper {index}: {display_name}\n\n")
 
-        try:
-            # Convert PDF to Markdown using pymupdf4llm
-            md_text = pymupdf4llm.to_markdown(filepath)
+    # Add DOI link if available
+    if "doi" in paper and paper["doi"]:
+        doi = paper["doi"]
+        f.write(f"**DOI:** [https://doi.org/{doi}](https://doi.org/{doi})\n\n")
 
-            # Extract DOI from the full text (usually in first pages)
-            doi = extract_doi(md_text[:5000])  # Check first ~5000 chars
+    # Write each section in a standardized order
+    section_order = [
+        "introduction",
+        "results",
+        "discussion",
+        "conclusion",
+        "future_outlook",
+    ]
+    section_titles = {
+        "introduction": "Introduction",
+        "results": "Results",
+        "discussion": "Discussion",
+        "conclusion": "Conclusion",
+        "future_outlook": "Future Outlook",
+    }
+
+    sections_found = []
+    for section_key in section_order:
+        if section_key in paper and not section_key.startswith("_"):
+            sections_found.append(section_key)
+            f.write(f"## {section_titles[section_key]}\n\n")
+            f.write(paper[section_key])
+            f.write("\n\n")
 
-            # Extract specific sections
-            extracted_data = extract_sections_from_markdown(md_text)
+            # Add note if section was detected by content analysis
+            note_key = f"_{section_key}_note"
+            if note_key in paper:
+                f.write(f"*Note: {paper[note_key]}*\n\n")
 
-            # Clean content in all sections
-            for key in list(extracted_data.keys()):
-                if key not in ["filename", "doi"] and not key.startswith("_"):
-                    extracted_data[key] = clean_content(extracted_data[key])
+    if not sections_found:
+        f.write("*No sections extracted from this paper.*\n\n")
 
-            # Add metadata
-            extracted_data["filename"] = filename
-            if doi:
-                extracted_data["doi"] = doi
+    f.write("---\n\n")
 
-            results.append(extracted_data)
-            section_keys = [
-                k
-                for k in extracted_data.keys()
-                if not k.startswith("_") and k not in ["filename", "doi"]
-            ]
-            print(f"  Found sections: {section_keys}")
 
-        except Exception as e:
-            print(f"  Error processing {filename}: {e}")
+def export_to_markdown(results, output_file, notes=None):
+    """
+    Export extracted sections to a markdown file for LLM consumption.
+    Creates a clean, structured markdown document with all papers and their sections.
+    Optional notes (e.g. run statistics) are listed below the paper count.
+    """
+    with open(output_file, "w", encoding="utf-8") as f:
+        _write_markdown_header(f, len(results), notes)
+        for i, paper in enumerate(results, 1):
+            _write_paper_markdown(f, i, paper)
+
+    print(f"Markdown export saved to {output_file}")
 
-    # Determine output path: if output_file contains no directory, place it inside pdf_dir
+
+def process_pdf(filepath):
+    """
+    Convert a single PDF to Markdown and extract its sections.
+    Returns the extracted data dictionary including filename and DOI metadata.
+    """
+    return get_default_extractor().extract(filepath)
+
+
+def found_section_keys(extracted_data):
+    """Return the section keys present in an extracted result (no metadata)."""
+    return [
+        k
+        for k in extracted_data.keys()
+        if not k.startswith("_") and k not in METADATA_KEYS
+    ]
+
+
+def resolve_output_path(pdf_dir, output_file):
+    """
+    Determine the JSON output path: if output_file contains no directory,
+    place it inside pdf_dir. Creates the parent directory if needed.
+    """
     output_dir_part = os.path.dirname(output_file)
     if output_dir_part:
         output_path = output_file
@@ -539,24 +877,347 @@ def process_pdfs(pdf_dir, output_file):
     if parent_dir:
         os.makedirs(parent_dir, exist_ok=True)
 
-    # Save to JSON
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    return output_path
 
-    print(f"\nJSON extraction saved to {output_path}")
 
-    # Save to Markdown for LLM consumption (same folder as JSON)
+def write_results(results, output_path, notes=None, total=None):
+    """
+    Save results to JSON and to a Markdown file next to it.
+    Returns the path of the Markdown file.
+
+    results may be an iterator (e.g. streamed from the run journal) if the
+    number of results is passed as total. Both files are then written in
+    one pass, one result at a time, without holding all results in memory.
+    """
+    if total is None:
+        results = list(results)
+        total = len(results)
     markdown_file = output_path.replace(".json", ".md")
-    export_to_markdown(results, markdown_file)
+
+    with (
+        open(output_path, "w", encoding="utf-8") as json_f,
+        open(markdown_file, "w", encoding="utf-8") as md_f,
+    ):
+        _write_markdown_header(md_f, total, notes)
+        # Same layout as json.dump(results, indent=2), one item at a time
+        json_f.write("[")
+        written = 0
+        for written, paper in enumerate(results, 1):
+            item = json.dumps(paper, indent=2, ensure_ascii=False)
+            json_f.write(",\n  " if written > 1 else "\n  ")
+            json_f.write(item.replace("\n", "\n  "))
+            _write_paper_markdown(md_f, written, paper)
+        json_f.write("\n]" if written else "]")
+
+    print(f"\nJSON extraction saved to {output_path}")
+    print(f"Markdown export saved to {markdown_file}")
+    return markdown_file
+
+
+def discover_sources(pdf_dir, discovery=None):
+    """
+    Return (sources, output_base) for a directory of PDFs or a ZIP/TAR
+    archive: the PDF inputs, streamed as they are found, and the directory
+    outputs belong in (the archive's directory for archives). discovery
+    (a PdfDiscovery) controls recursion, globs and symlinks in directories.
+    Returns None, after printing an error, if pdf_dir does not exist.
+    """
+    if is_archive(pdf_dir):
+        print(f"Processing PDFs in archive {pdf_dir}...")
+        return iter_archive_pdfs(pdf_dir), os.path.dirname(pdf_dir)
+    if os.path.isdir(pdf_dir):
+        discovery = discovery or PdfDiscovery()
+        where = "under" if discovery.recursive else "in"
+        print(f"Processing PDFs {where} {pdf_dir}...")
+        return discovery.iter_paths(pdf_dir), pdf_dir
+    print(f"Error: Directory {pdf_dir} does not exist.")
+    return None
+
+
+def process_pdfs(
+    pdf_dir,
+    output_file,
+    workers=1,
+    extractor=None,
+    dedupe=None,
+    resume=False,
+    retry_failed=False,
+    triage=None,
+    discovery=None,
+    sqlite=None,
+):
+    """
+    Iterates through PDFs in pdf_dir, converts them to MD, extracts sections,
+    and saves results to both JSON and Markdown formats.
+
+    pdf_dir may also be a ZIP or TAR archive; its PDF members are converted
+    from memory without unpacking, and outputs are placed next to the archive.
+    discovery (a PdfDiscovery) enables recursive search with include/exclude
+    globs; PDFs are converted as they are found, before the walk finishes.
+
+    With sqlite set to a path (or "" for one next to the JSON output), the
+    results are also stored in an SQLite database with a full-text index
+    over the sections (see section_store).
+
+    With dedupe set to "bytes" or "text", PDFs are hashed as they are found
+    and each unique document is converted once, starting as soon as it is
+    hashed; its result is copied to every duplicate filename.
+
+    Each finished PDF is checkpointed to a journal next to the output file.
+    With resume=True, PDFs already in the journal are skipped and the final
+    JSON/Markdown are rebuilt from it; otherwise the journal starts empty.
+
+    PDFs that fail are recorded with an error class in a quarantine list next
+    to the output file and are left out of resumed runs. retry_failed=True
+    reprocesses only the quarantined PDFs, e.g. with an extractor using
+    another conversion profile or a longer timeout.
+
+    The extractor's conversion profile is recorded in every result and in
+    the journal; journaled results from another profile are converted again.
+
+    With triage set to "tag", "skip" or "queue", a few pages of each PDF are
+    sampled first and every result is tagged text, mixed or scanned. "skip"
+    and "queue" do not convert scanned PDFs at all; "queue" also lists them
+    in a .scanned.json file next to the output for a later OCR pass.
+    """
+    notes = []
+
+    discovered = discover_sources(pdf_dir, discovery)
+    if discovered is None:
+        return
+    sources, output_base = discovered
+
+    output_path = resolve_output_path(output_base, output_file)
+    extractor = extractor or get_default_extractor()
+    print(f"Conversion: {extractor.conversion_key}")
+    notes.append(f"Conversion: {extractor.conversion_key}")
+    journal = RunJournal.for_output(output_path, extractor.conversion_key)
+    quarantine = Quarantine.for_output(output_path)
+    if resume or retry_failed:
+        done = journal.load()
+        quarantine.load()
+        if done:
+            print(f"Resuming: {len(done)} PDF(s) already done in {journal.path}")
+    else:
+        journal.reset()
+        quarantine.reset()
+
+    if retry_failed:
+        if not quarantine:
+            print(f"No quarantined PDFs to retry in {quarantine.path}")
+            return
+        print(f"Retrying {quarantine.summary()}")
+        sources = quarantine.select(sources)
+    elif quarantine:
+        print(f"Leaving {quarantine.summary()} for --retry-failed")
+        sources = quarantine.exclude(sources)
+    sources = journal.pending(sources)
+
+    router = TriageRouter(triage) if triage else None
+    if router:
+        sources = router.route(sources)
+
+    # Unique PDFs go on to conversion as soon as they are hashed
+    dedup = DuplicateFilter(dedupe) if dedupe else None
+    if dedup:
+        sources = dedup.unique(sources)
+
+    failure_context = {
+        "conversion_profile": extractor.conversion_key,
+        "conversion_options": extractor.conversion_options,
+    }
+    processed = 0
+    saved_seconds = 0.0
+    reused = 0
+
+    def reuse(result, duplicates, seconds, record):
+        nonlocal reused, saved_seconds
+        copies = fan_out(result, duplicates)
+        for duplicate, copy in zip(duplicates, copies, strict=True):
+            record(duplicate, copy)
+            quarantine.remove(duplicate)
+        reused += len(duplicates)
+        saved_seconds += seconds * len(duplicates)
+        names = ", ".join(input_filename(d) for d in duplicates)
+        print(f"  Reused {result['filename']} for duplicate(s): {names}")
+
+    # Results are journaled on a writer thread while conversion continues
+    with JournalWriter(journal) as writer:
+        for outcome in extractor.iter_extract(sources, workers=workers):
+            processed += 1
+            filename = input_filename(outcome.path)
+            duplicates = (
+                dedup.finish(outcome.path, outcome.seconds, outcome.error)
+                if dedup
+                else []
+            )
+            if outcome.error is not None:
+                entry = quarantine.add(outcome.path, outcome.error, **failure_context)
+                for duplicate in duplicates:
+                    quarantine.add(duplicate, outcome.error, **failure_context)
+                print(
+                    f"  Error processing {filename} [{entry['error_class']}]: "
+                    f"{outcome.error}"
+                )
+                continue
+            if router and router.kind_of(outcome.path):
+                outcome.data["triage"] = router.kind_of(outcome.path)
+            writer.record(outcome.path, outcome.data)
+            quarantine.remove(outcome.path)
+            print(f"Processed {filename}")
+            print(f"  Found sections: {found_section_keys(outcome.data)}")
+
+            if duplicates:
+                reuse(outcome.data, duplicates, outcome.seconds, writer.record)
+    if writer.waited >= 1:
+        print(f"⚠ Conversion waited {writer.waited:.1f}s for results to be written")
+
+    if dedup:
+        # Copies found after their original was converted
+        for representative, duplicates, seconds, error in dedup.leftovers():
+            if error is not None:
+                for duplicate in duplicates:
+                    quarantine.add(duplicate, error, **failure_context)
+                continue
+            result = journal.result(representative)
+            if result is not None:
+                reuse(result, duplicates, seconds, journal.record)
+        print(
+            f"Hashed {dedup.hashed} PDF(s) in {dedup.seconds:.1f}s: "
+            f"{len(dedup.groups)} unique, {dedup.duplicate_count} duplicate(s)"
+        )
+
+    if journal.skipped:
+        print(f"Skipped {journal.skipped} PDF(s) already in the journal")
+    if router:
+        for entry in router.scanned:
+            print(f"  Not converted (scanned): {entry['filename']}")
+    if not processed and not journal.skipped and not (router and router.scanned):
+        print("No PDF files found.")
+        return
+
+    if router:
+        summary = router.summary()
+        if router.policy == "queue":
+            queue_path = scanned_queue_path_for(output_path)
+            router.write_queue(queue_path)
+            summary += f", scanned PDFs queued in {queue_path}"
+        print(f"\n{summary}")
+        notes.append(summary)
+
+    if dedupe:
+        summary = (
+            f"Deduplication ({dedupe}): {reused} duplicate PDF(s) reused an "
+            f"existing conversion, saving ~{saved_seconds:.1f}s of conversion time"
+        )
+        print(f"\n{summary}")
+        notes.append(summary)
+
+    if quarantine:
+        summary = f"{quarantine.summary()}, see {quarantine.path}"
+        print(f"\n⚠ {summary} (rerun with --retry-failed)")
+        notes.append(summary)
+
+    markdown_file = write_results(
+        journal.iter_results(), output_path, notes, total=len(journal)
+    )
+    if sqlite is not None:
+        from section_store import store_path_for, write_store
+
+        sqlite = sqlite or store_path_for(output_path)
+        write_store(journal.iter_items(), sqlite)
 
     print("\n✓ Extraction complete. Output files:")
     print(f"  - {output_path} (JSON, for programmatic access)")
     print(f"  - {markdown_file} (Markdown, for LLM analysis)")
+    if sqlite is not None:
+        print(f"  - {sqlite} (SQLite, search with 'pdf-analysis query')")
 
 
-if __name__ == "__main__":
-    # Configuration
-    PDF_DIRECTORY = "pdfs"
-    OUTPUT_JSON = "extracted_sections.json"
+def main(argv=None):
+    """Entry point for extracting sections from a folder of PDFs."""
+    parser = argparse.ArgumentParser(
+        description="Extract key sections from academic paper PDFs."
+    )
+    parser.add_argument(
+        "--pdf-dir",
+        default="pdfs",
+        help="Directory containing PDF files, or a ZIP/TAR archive of PDFs.",
+    )
+    parser.add_argument(
+        "--output",
+        default="extracted_sections.json",
+        help="JSON output file (placed inside --pdf-dir if no directory is given).",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of worker processes."
+    )
+    parser.add_argument(
+        "--dedupe",
+        choices=DEDUPE_MODES,
+        help="Convert duplicate PDFs once, matched by file bytes or by text layer "
+        "(text ignores annotations).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip PDFs already checkpointed by an interrupted run and continue.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default=DEFAULT_PROFILE,
+        help="Conversion profile: fast-text skips images, tables, OCR and layout "
+        "analysis (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=list(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help="Converter backend (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--triage",
+        choices=TRIAGE_POLICIES,
+        help="Sample each PDF's text layer first and tag it text, mixed or "
+        "scanned; skip/queue do not convert scanned PDFs (queue lists them).",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Reprocess only the PDFs quarantined by a previous run.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Give up on a PDF after this many seconds of conversion.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="Also store results in an SQLite database with a full-text index "
+        "(default path: the JSON output with a .sqlite extension).",
+    )
+    add_discovery_arguments(parser)
+    args = parser.parse_args(argv)
+
+    process_pdfs(
+        args.pdf_dir,
+        args.output,
+        workers=args.workers,
+        dedupe=args.dedupe,
+        resume=args.resume,
+        retry_failed=args.retry_failed,
+        triage=args.triage,
+        discovery=PdfDiscovery.from_args(args),
+        sqlite=args.sqlite,
+        extractor=PaperExtractor(
+            timeout=args.timeout, profile=args.profile, backend=args.backend
+        ),
+    )
 
-    process_pdfs(PDF_DIRECTORY, OUTPUT_JSON)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Offline library source: Mendeley (or any reference manager) exports.
+
+Machines without network access cannot reach the Mendeley API, but a
+library exported as BibTeX, RIS or CSL-JSON holds the same DOIs. The
+parsers here stream the export, one entry at a time, into document info
+of the same shape document_info returns (doi, title, year, authors, id),
+and export_index writes the same memory-mapped DoiIndex the API path uses,
+next to the export. The index is reused until the export file changes, so
+only the first check after a new export pays for parsing.
+
+- BibTeX: lines are grouped into entries by brace depth; fields are read
+  with a small scanner that follows nested braces, quotes and # joins.
+  @string, @preamble and @comment blocks are skipped (macros are not
+  expanded).
+- RIS: tagged lines ("DO  - 10.1/x"), one record per TY ... ER.
+- CSL-JSON: an array of items (or items one after another), decoded item
+  by item from a buffered read, so the whole file is never in memory.
+
+Usage:
+    python library_exports.py library.bib
+    python library_exports.py library.ris --check dois.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from doi_index import DoiIndex, index_path, write_index
+
+EXPORT_FORMATS = ("bibtex", "ris", "csl-json")
+
+EXTENSIONS = {
+    ".bib": "bibtex",
+    ".bibtex": "bibtex",
+    ".ris": "ris",
+    ".json": "csl-json",
+    ".csl": "csl-json",
+    ".csljson": "csl-json",
+}
+
+# Characters read at a time from CSL-JSON exports
+READ_SIZE = 1 << 20
+
+DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+YEAR = re.compile(r"\d{4}")
+
+
+def clean_doi(value: str) -> str:
+    """Strip URL or doi: prefixes and BibTeX escapes from an exported DOI"""
+    return DOI_PREFIX.sub("", value.strip()).replace("\\_", "_").strip()
+
+
+def parse_year(value: object) -> Optional[int]:
+    """First four-digit year in an exported date, or None"""
+    match = YEAR.search(str(value)) if value is not None else None
+    return int(match.group()) if match else None
+
+
+def split_name(name: str) -> Dict[str, str]:
+    """Split "Last, First" or "First Last" into Mendeley's name fields"""
+    name = name.strip()
+    if "," in name:
+        last, first = name.split(",", 1)
+    else:
+        first, _, last = name.rpartition(" ")
+    return {"first_name": first.strip(), "last_name": last.strip()}
+
+
+def detect_format(path: str) -> str:
+    """
+    Guess the export format from the file extension, or else from the first
+    non-blank character ('@' BibTeX, '[' or '{' CSL-JSON, otherwise RIS).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in EXTENSIONS:
+        return EXTENSIONS[extension]
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            stripped = line.lstrip()
+            if stripped:
+                if stripped.startswith("@"):
+                    return "bibtex"
+                if stripped[0] in "[{":
+                    return "csl-json"
+                return "ris"
+    return "ris"
+
+
+# BibTeX
+
+FIELD_NAME = re.compile(r"\s*,?\s*([A-Za-z][\w:.+-]*)\s*=\s*")
+# Escapes (\{, \}, \") match as a unit, so they never open or close a group
+BRACES = re.compile(r"\\.|[{}]")
+BRACES_OR_QUOTE = re.compile(r'\\.|[{}"]')
+ESCAPE = re.compile(r"\\.")
+BARE_VALUE = re.compile(r"[^,}#\s]+")
+LATEX_COMMAND = re.compile(r"\\[A-Za-z]+\s*|\\.")
+SKIPPED_ENTRIES = ("string", "preamble", "comment")
+
+
+def _braced_end(text: str, start: int, pattern: re.Pattern = BRACES) -> int:
+    """Index just past the group opened at text[start] ('{' or '"')."""
+    close = text.find("}" if text[start] == "{" else '"', start + 1)
+    if (
+        close != -1
+        and text.find("{", start + 1, close) == -1
+        and text.find("\\", start + 1, close) == -1
+    ):
+        return close + 1  # Nothing nested or escaped: most values
+    depth = 0
+    for match in pattern.finditer(text, start + 1):
+        char = match.group()
+        if len(char) > 1:  # Escaped character
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            if depth == 0:
+                if text[start] == "{":
+                    return match.end()
+                continue
+            depth -= 1
+        elif depth == 0:  # Closing quote outside braces
+            return match.end()
+    return len(text)
+
+
+def _bibtex_fields(body: str) -> Dict[str, str]:
+    """Fields of one entry, given the text after the citation key."""
+    fields: Dict[str, str] = {}
+    position = 0
+    while True:
+        match = FIELD_NAME.match(body, position)
+        if not match:
+            return fields
+        name = match.group(1).lower()
+        position = match.end()
+        parts = []
+        while position < len(body):
+            char = body[position]
+            if char == "{":
+                end = _braced_end(body, position)
+                parts.append(body[position + 1 : end - 1])
+            elif char == '"':
+                end = _braced_end(body, position, BRACES_OR_QUOTE)
+                parts.append(body[position + 1 : end - 1])
+            else:
+                bare = BARE_VALUE.match(body, position)
+                if not bare:
+                    break
+                end = bare.end()
+                parts.append(bare.group())
+            position = end
+            while position < len(body) and body[position].isspace():
+                position += 1
+            if position < len(body) and body[position] == "#":
+                position += 1
+                while position < len(body) and body[position].isspace():
+                    position += 1
+                continue
+            break
+        fields[name] = "".join(parts)
+
+
+def _bibtex_text(value: str) -> str:
+    """Drop braces and LaTeX commands and collapse whitespace"""
+    if "{" not in value and "\\" not in value:
+        return " ".join(value.split())
+    return " ".join(
+        LATEX_COMMAND.sub("", value).replace("{", "").replace("}", "").split()
+    )
+
+
+def _bibtex_entry(text: str) -> Optional[Dict]:
+    """Document info for one complete entry, or None for @string etc."""
+    kind, _, rest = text.partition("{")
+    if kind.strip().lstrip("@").strip().lower() in SKIPPED_ENTRIES:
+        return None
+    key, _, body = rest.partition(",")
+    fields = _bibtex_fields(body)
+    authors = fields.get("author", "")
+    return {
+        "doi": clean_doi(fields.get("doi", "")),
+        "title": _bibtex_text(fields.get("title", "")) or "Untitled",
+        "year": parse_year(fields.get("year")),
+        "authors": [
+            split_name(_bibtex_text(name))
+            for name in re.split(r"\s+and\s+", authors)
+            if name.strip()
+        ],
+        "id": key.strip() or None,
+    }
+
+
+def iter_bibtex(lines: Iterable[str]) -> Iterator[Dict]:
+    """Yield document info for each entry of a BibTeX export."""
+    entry: List[str] = []
+    depth = 0
+    opened = False
+    for line in lines:
+        if not entry:
+            if not line.lstrip().startswith("@"):
+                continue  # Text between entries is a comment
+            depth, opened = 0, False
+        entry.append(line)
+        # \{ and \} are literal braces, not groups
+        braces = ESCAPE.sub("", line) if "\\" in line else line
+        opens = braces.count("{")
+        depth += opens - braces.count("}")
+        opened = opened or opens > 0
+        if opened and depth <= 0:
+            info = _bibtex_entry("".join(entry))
+            entry = []
+            if info is not None:
+                yield info
+    if entry:
+        info = _bibtex_entry("".join(entry))
+        if info is not None:
+            yield info
+
+
+# RIS
+
+RIS_LINE = re.compile(r"^([A-Z][A-Z0-9])  -(?: (.*))?$")
+
+
+def _ris_record(fields: Dict[str, List[str]]) -> Dict:
+    doi = next(iter(fields.get("DO", [])), "")
+    if not doi:  # Some exports only link to doi.org
+        for url in fields.get("UR", []) + fields.get("L3", []):
+            if DOI_PREFIX.match(url.strip()):
+                doi = url
+                break
+    title = next(
+        (fields[tag][0] for tag in ("TI", "T1", "CT", "BT") if fields.get(tag)), ""
+    )
+    year = next(
+        (parse_year(fields[tag][0]) for tag in ("PY", "Y1", "DA") if fields.get(tag)),
+        None,
+    )
+    authors = fields.get("AU", []) + fields.get("A1", [])
+    return {
+        "doi": clean_doi(doi),
+        "title": title.strip() or "Untitled",
+        "year": year,
+        "authors": [split_name(name) for name in authors if name.strip()],
+        "id": next(iter(fields.get("ID", [])), None),
+    }
+
+
+def iter_ris(lines: Iterable[str]) -> Iterator[Dict]:
+    """Yield document info for each record of an RIS export."""
+    fields: Dict[str, List[str]] = {}
+    last_tag: Optional[str] = None
+    for line in lines:
+        line = line.rstrip("\r\n").lstrip("\ufeff")
+        match = RIS_LINE.match(line)
+        if not match:
+            # Continuation of a long value
+            if last_tag and line.strip() and fields.get(last_tag):
+                fields[last_tag][-1] += " " + line.strip()
+            continue
+        tag, value = match.group(1), (match.group(2) or "").strip()
+        if tag == "TY":
+            fields, last_tag = {}, None
+        elif tag == "ER":
+            yield _ris_record(fields)
+            fields, last_tag = {}, None
+        else:
+            fields.setdefault(tag, []).append(value)
+            last_tag = tag
+    if fields:  # File cut off before the last ER
+        yield _ris_record(fields)
+
+
+# CSL-JSON
+
+
+def _csl_item(item: Dict) -> Dict:
+    issued = item.get("issued") or {}
+    date_parts = issued.get("date-parts") or [[]]
+    first = date_parts[0][0] if date_parts[0] else None
+    year = parse_year(first if first is not None else issued.get("raw"))
+    return {
+        "doi": clean_doi(str(item.get("DOI") or "")),
+        "title": item.get("title") or "Untitled",
+        "year": year,
+        "authors": [
+            {"first_name": a.get("given", ""), "last_name": a.get("family", "")}
+            if "family" in a
+            else split_name(a.get("literal", ""))
+            for a in item.get("author") or []
+        ],
+        "id": item.get("id"),
+    }
+
+
+def iter_csl_json(f: TextIO, read_size: int = READ_SIZE) -> Iterator[Dict]:
+    """
+    Yield document info for each item of a CSL-JSON export, decoding one
+    item at a time from a buffer refilled read_size characters at a time.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    while True:
+        # Skip the array brackets, separators and whitespace between items
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]\ufeff":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = f.read(read_size), 0
+            eof = not buffer
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(read_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        position = end
+        if isinstance(item, dict):
+            yield _csl_item(item)
+
+
+def iter_export(path: str, export_format: Optional[str] = None) -> Iterator[Dict]:
+    """Yield document info for every entry of an export file."""
+    export_format = export_format or detect_format(path)
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}")
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        if export_format == "bibtex":
+            yield from iter_bibtex(f)
+        elif export_format == "ris":
+            yield from iter_ris(f)
+        else:
+            yield from iter_csl_json(f)
+
+
+def export_revision(path: str, export_format: str) -> int:
+    """Number identifying this version of the export, for the index header"""
+    stat = os.stat(path)
+    stamp = f"{stat.st_mtime_ns}:{stat.st_size}:{export_format}".encode()
+    return int.from_bytes(hashlib.blake2b(stamp, digest_size=8).digest(), "little")
+
+
+def export_index(
+    path: str, export_format: Optional[str] = None, index: Optional[str] = None
+) -> DoiIndex:
+    """
+    Open the DOI index of an export (by default next to it), parsing the
+    export and writing the index first if it is missing or out of date.
+    Reports what it did.
+    """
+    export_format = export_format or detect_format(path)
+    index = index or index_path(path)
+    revision = export_revision(path, export_format)
+    try:
+        existing = DoiIndex(index)
+    except (OSError, ValueError):
+        pass
+    else:
+        if existing.revision == revision:
+            print(f"✓ Using DOI index of {path} ({len(existing)} DOIs)")
+            return existing
+        existing.close()
+
+    print(f"Reading library export {path} ({export_format})...")
+    started = time.perf_counter()
+    entries = 0
+
+    def counted(docs: Iterator[Dict]) -> Iterator[Dict]:
+        nonlocal entries
+        for info in docs:
+            entries += 1
+            yield info
+
+    count = write_index(index, counted(iter_export(path, export_format)), revision)
+    print(
+        f"✓ Indexed {count} DOIs from {entries} entries "
+        f"in {time.perf_counter() - started:.1f}s\n"
+    )
+    return DoiIndex(index)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Build the DOI index of an export and optionally check DOIs against it."""
+    parser = argparse.ArgumentParser(
+        description="Index a BibTeX, RIS or CSL-JSON library export"
+    )
+    parser.add_argument("export", help="Library export file")
+    parser.add_argument(
+        "--format",
+        choices=EXPORT_FORMATS,
+        help="Export format (default: from the file extension or contents)",
+    )
+    parser.add_argument("--check", help="File of DOIs (one per line) to look up")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.export):
+        print(f"❌ Export not found: {args.export}")
+        return 1
+    try:
+        index = export_index(args.export, args.format)
+    except ValueError as e:
+        print(f"❌ Could not read {args.export}: {e}")
+        return 1
+    with index:
+        if args.check:
+            with open(args.check, "r", encoding="utf-8") as f:
+                dois = [line.strip() for line in f if line.strip()]
+            found = index.find(dois)
+            print(f"{len(found)} of {len(dois)} DOI(s) are in the export")
+            for info in found.values():
+                print(f"  • {info['doi']}  {info['title']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
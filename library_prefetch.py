@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Load the Mendeley library index on a background thread.
+
+LibraryPrefetch lets a run start the network wait for the library (a sync
+or full download) and carry on with other work, e.g. PDF conversion in the
+pipeline. This module, and LIBRARY_CACHE_FILE, need only the standard
+library, so the pipeline can import them at startup and load requests and
+the Mendeley modules only once a check actually runs.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional
+
+# Default library cache file (see mendeley_library_cache.py)
+LIBRARY_CACHE_FILE = "mendeley_library.sqlite"
+
+
+class LibraryPrefetch:
+    """
+    Loads the library index on a background thread, so the network wait
+    overlaps with other work (PDF conversion in the pipeline). load returns
+    the index (lowercase DOI -> document info), e.g. the library cache's
+    DoiIndex.
+    """
+
+    def __init__(self, load: Callable[[], Mapping[str, Dict]]):
+        self._load = load
+        self._done = threading.Event()
+        self._library: Optional[Mapping[str, Dict]] = None
+        self._error: Optional[BaseException] = None
+        self.seconds = 0.0
+        self._thread = threading.Thread(
+            target=self._run, name="mendeley-prefetch", daemon=True
+        )
+
+    def start(self) -> "LibraryPrefetch":
+        """Start loading; returns self."""
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        try:
+            self._library = self._load()
+        except BaseException as e:  # Re-raised by wait()
+            self._error = e
+        finally:
+            self.seconds = time.perf_counter() - started
+            self._done.set()
+
+    def ready(self) -> bool:
+        """Whether the library has loaded successfully."""
+        return self._done.is_set() and self._error is None
+
+    def wait(self) -> Mapping[str, Dict]:
+        """Block until loaded and return the index, or raise the load's error."""
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        assert self._library is not None
+        return self._library
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Mendeley API helpers shared by the DOI checker and the library modules.
+
+Logging in (get_access_token, with the saved token in mendeley_token.json)
+and paging through the documents API live here, below
+check_mendeley_dois_v2.py and the library cache, lookup and group modules
+that all use them, so none of those has to import the checker script.
+"""
+
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+from dotenv import load_dotenv
+
+from mendeley_client import MAX_PAGE_SIZE, MendeleyClient, get_client
+from mendeley_token import TokenStore, stamp_expiry, token_is_fresh
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+CLIENT_ID = os.getenv("MENDELEY_CLIENT_ID")
+CLIENT_SECRET = os.getenv("MENDELEY_CLIENT_SECRET")
+REDIRECT_URI = "http://localhost:8080"
+TOKEN_FILE = "mendeley_token.json"
+
+# API endpoints
+AUTH_URL = "https://api.mendeley.com/oauth/authorize"
+TOKEN_URL = "https://api.mendeley.com/oauth/token"
+DOCUMENTS_URL = "https://api.mendeley.com/documents"
+
+
+def refresh_saved_token(store: TokenStore, token_data: Optional[Dict]) -> Optional[str]:
+    """
+    Refresh the saved token and save the result; call with store.lock() held
+
+    Returns:
+        The new access token, or None (after deleting the saved token) if
+        it cannot be refreshed
+    """
+    if not token_data or "refresh_token" not in token_data:
+        print("⚠ Saved token expired, re-authenticating...")
+        store.delete()
+        return None
+
+    print("Attempting to refresh saved token...")
+    response = get_client().post(
+        TOKEN_URL,
+        data={
+            "grant_type": "refresh_token",
+            "refresh_token": token_data["refresh_token"],
+            "client_id": CLIENT_ID,
+            "client_secret": CLIENT_SECRET,
+            "redirect_uri": REDIRECT_URI,
+        },
+    )
+    if response.status_code != 200:
+        print("⚠ Token refresh failed, re-authenticating...")
+        store.delete()
+        return None
+
+    new_token_data = stamp_expiry(response.json())
+    # Preserve refresh_token if not returned by API
+    if "refresh_token" not in new_token_data:
+        new_token_data["refresh_token"] = token_data["refresh_token"]
+    store.save(new_token_data)
+    print("✓ Token refreshed successfully\n")
+    return new_token_data["access_token"]  # type: ignore[no-any-return]
+
+
+def get_access_token(interactive: bool = True) -> str:
+    """
+    Get access token using OAuth 2.0 Authorization Code Flow
+
+    The saved token is used until shortly before it expires, then refreshed
+    under a lock shared with other runs (see mendeley_token.py).
+
+    Args:
+        interactive: Prompt for a browser login if the saved token cannot
+            be used; if False, raise ValueError instead
+
+    Returns:
+        Access token string
+    """
+    if not CLIENT_ID or not CLIENT_SECRET:
+        raise ValueError(
+            "Mendeley credentials not found. "
+            "Please set MENDELEY_CLIENT_ID and MENDELEY_CLIENT_SECRET in .env file. "
+            "See mendeley_setup_guide.md for instructions."
+        )
+
+    store = TokenStore(TOKEN_FILE)
+    try:
+        token_data = store.load()
+        if token_is_fresh(token_data):
+            assert token_data is not None
+            print("✓ Using saved token")
+            return token_data["access_token"]  # type: ignore[no-any-return]
+
+        if token_data is not None:
+            # Only one run refreshes at a time; the refresh token is single use
+            with store.lock():
+                token_data = store.load()
+                if token_is_fresh(token_data):
+                    assert token_data is not None
+                    print("✓ Using token refreshed by another run")
+                    return token_data["access_token"]  # type: ignore[no-any-return]
+                access_token = refresh_saved_token(store, token_data)
+                if access_token:
+                    return access_token
+    except (TimeoutError, requests.exceptions.RequestException):
+        raise  # The saved token may be fine; try again later
+    except Exception as e:
+        print(f"⚠ Error with saved token: {e}, re-authenticating...")
+        store.delete()
+
+    if not interactive:
+        raise ValueError(
+            "No usable saved Mendeley token. Run "
+            "'python check_mendeley_dois_v2.py --interactive' once to log in."
+        )
+
+    # Perform new OAuth flow
+    print("\n=== Mendeley Authentication ===")
+
+    # Build authorization URL
+    auth_params = {
+        "client_id": CLIENT_ID,
+        "redirect_uri": REDIRECT_URI,
+        "response_type": "code",
+        "scope": "all",
+    }
+    login_url = f"{AUTH_URL}?{urlencode(auth_params)}"
+
+    print("\n1. Open this URL in your browser:")
+    print(f"\n   {login_url}\n")
+    print("2. Log in to Mendeley and authorize the app")
+    print("3. After authorization, you'll be redirected to a page that may not load")
+    print("4. Copy the ENTIRE URL from your browser's address bar")
+    print("   (it will look like: http://localhost:8080?code=XXXXX...)")
+    print("\nPaste the redirect URL here and press Enter:")
+
+    redirect_url = input("> ").strip()
+
+    # Extract auth code from URL
+    query = urlparse(redirect_url).query
+    params = parse_qs(query)
+
+    if "code" not in params:
+        raise ValueError(
+            "Could not find 'code' parameter in the URL. Please try again."
+        )
+
+    auth_code = params["code"][0]
+
+    # Exchange code for token
+    print("\nExchanging authorization code for access token...")
+    token_response = get_client().post(
+        TOKEN_URL,
+        data={
+            "grant_type": "authorization_code",
+            "code": auth_code,
+            "redirect_uri": REDIRECT_URI,
+            "client_id": CLIENT_ID,
+            "client_secret": CLIENT_SECRET,
+        },
+    )
+
+    if token_response.status_code != 200:
+        raise requests.exceptions.RequestException(
+            f"Token exchange failed: {token_response.text}"
+        )
+
+    token_data = stamp_expiry(token_response.json())
+
+    # Save token for future use with secure permissions
+    with store.lock():
+        store.save(token_data)
+
+    print("✓ Authentication successful! Token saved for future use.\n")
+
+    return token_data["access_token"]  # type: ignore[no-any-return]
+
+
+def document_info(doc: Dict) -> Dict:
+    """
+    Reduce a Mendeley document to the fields the checker reports
+
+    Args:
+        doc: Document as returned by the documents API
+
+    Returns:
+        Dictionary with doi, title, year, authors and id
+    """
+    return {
+        "doi": (doc.get("identifiers") or {}).get("doi", "").strip(),
+        "title": doc.get("title", "Untitled"),
+        "year": doc.get("year"),
+        "authors": doc.get("authors", []),
+        "id": doc.get("id"),
+    }
+
+
+def iter_document_page_links(
+    access_token: str,
+    params: Optional[Dict] = None,
+    client: Optional[MendeleyClient] = None,
+    url: str = DOCUMENTS_URL,
+    cursor: Optional[str] = None,
+) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+    """
+    Page through the documents API, following the Link header
+
+    Args:
+        access_token: OAuth access token
+        params: Extra query parameters, e.g. modified_since
+        client: Client to send requests with (default: the shared client)
+        url: Documents endpoint
+        cursor: Next link saved from an earlier run, to resume paging there
+
+    Yields:
+        (documents, next link) per page; the next link is None on the last
+    """
+    client = client or get_client()
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/vnd.mendeley-document.1+json",
+    }
+    # The next links already carry the query, so it is only sent once
+    query: Optional[Dict] = {"limit": MAX_PAGE_SIZE, **(params or {})}
+    next_url: Optional[str] = url
+    if cursor:
+        next_url, query = cursor, None
+
+    while next_url:
+        # The client retries rate limits and server errors on this same
+        # link, so a failure part-way through never restarts from page one
+        response = client.get(next_url, headers=headers, params=query)
+
+        if response.status_code != 200:
+            raise requests.exceptions.RequestException(
+                f"Failed to fetch documents: {response.text}"
+            )
+
+        # Check for next page using response.links for robustness
+        next_url = response.links.get("next", {}).get("url")
+        query = None
+        yield response.json(), next_url
+
+
+def iter_document_pages(
+    access_token: str,
+    params: Optional[Dict] = None,
+    client: Optional[MendeleyClient] = None,
+    url: str = DOCUMENTS_URL,
+) -> Iterator[List[Dict]]:
+    """
+    Page through the documents API, following the Link header
+
+    Yields:
+        One list of documents per page
+    """
+    for documents, _next_url in iter_document_page_links(
+        access_token, params, client, url
+    ):
+        yield documents
+
+
+def print_fetch_progress(count: int) -> None:
+    """Report how many documents have been fetched so far"""
+    print(f"  ... {count} documents fetched", flush=True)
+
+
+def fetch_library_dois(
+    access_token: str, progress: Optional[Callable[[int], None]] = None
+) -> Dict[str, Dict]:
+    """
+    Fetch all documents from Mendeley library and extract DOIs
+
+    Args:
+        access_token: OAuth access token
+        progress: Called after each page with the documents fetched so far
+
+    Returns:
+        Dictionary mapping DOI (lowercase) to document info
+    """
+    print("Fetching documents from your Mendeley library...")
+
+    library_docs = {}
+    total_docs = 0
+
+    # Paginate through all documents
+    for documents in iter_document_pages(access_token):
+        for doc in documents:
+            total_docs += 1
+            info = document_info(doc)
+
+            if info["doi"]:
+                # Store with lowercase DOI as key for case-insensitive matching
+                library_docs[info["doi"].lower()] = info
+        if progress:
+            progress(total_docs)
+
+    print(f"✓ Found {total_docs} total documents in library")
+    print(f"✓ {len(library_docs)} documents have DOIs")
+    print(f"✓ {get_client().stats.summary()}\n")
+
+    return library_docs
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the Mendeley API.
+
+Calling requests.get/requests.post directly opens a new connection (and
+does a new TLS handshake) for every call. MendeleyClient keeps one
+requests.Session with a connection pool, so token refreshes and every page
+of a library sync reuse the same keep-alive connection, asks for gzip
+responses, and applies separate connect and read timeouts.
+
+Most code uses the shared client from get_client(); a MendeleyClient can
+also be created (and closed) explicitly, e.g. to talk to a test server.
+
+Rate limits and transient failures are retried rather than failing the
+whole sync: a 429 or 5xx response (or a dropped connection) is retried
+after the server's Retry-After delay, or else after a jittered exponential
+backoff. Because each page is requested by its own next link, a retry
+resumes pagination at the page that failed. A semaphore caps how many
+requests are in flight when the client is shared between threads, and
+RequestStats counts requests, retries and time spent waiting.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://api.mendeley.com"
+
+# Largest page the documents API returns; fewer pages means fewer round trips
+MAX_PAGE_SIZE = 500
+
+# (connect, read) seconds: fail fast on an unreachable host, but give large
+# pages time to arrive
+TIMEOUT: Tuple[float, float] = (5.0, 60.0)
+
+# Connections kept open per host
+POOL_SIZE = 8
+
+USER_AGENT = "pdf-analysis"
+
+# Responses worth retrying; POST requests (token exchange) are only retried
+# on 429, since a failed exchange may already have used the code or token
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # Seconds before the first retry (before jitter)
+BACKOFF_MAX = 60.0  # Cap on any single wait, including Retry-After
+
+# Requests in flight at once when the client is shared between threads
+MAX_CONCURRENCY = 4
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or an HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_seconds(attempt: int, base: float = BACKOFF_BASE) -> float:
+    """Full-jitter exponential backoff for the given retry (0 = first)."""
+    return random.uniform(0, min(BACKOFF_MAX, base * 2**attempt))
+
+
+class RequestStats:
+    """Request, retry and wait counters, safe to update from several threads"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0  # 429 responses
+        self.wait_seconds = 0.0
+
+    def add(self, **counts: float) -> None:
+        """Add to one or more counters."""
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Counters as a dict, as reported in the check results."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 2),
+            }
+
+    def summary(self) -> str:
+        """One line for progress output."""
+        stats = self.as_dict()
+        return (
+            f"{stats['requests']} API request(s), {stats['retries']} retried, "
+            f"{stats['throttled']} rate-limited, {stats['wait_seconds']:.1f}s waiting"
+        )
+
+
+class MendeleyClient:
+    """
+    Connection-pooled session for Mendeley API calls.
+    Use as a context manager (or call close()) to release the connections.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        timeout=TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        max_concurrency: int = MAX_CONCURRENCY,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.stats = RequestStats()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max(pool_size, max_concurrency)
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "User-Agent": USER_AGENT}
+        )
+
+    def __enter__(self) -> "MendeleyClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+    @property
+    def requests_sent(self) -> int:
+        """Requests sent so far, retries included"""
+        return self.stats.requests
+
+    def _should_retry(self, method: str, status: int) -> bool:
+        if method == "POST":
+            return status == 429
+        return status in RETRY_STATUSES
+
+    def _wait(self, seconds: float) -> None:
+        self.stats.add(wait_seconds=seconds)
+        self.sleep(seconds)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a request on the pooled session with the default timeout,
+        retrying rate limits, server errors and dropped connections.
+        The last response is returned if every retry fails.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            last_try = attempt == self.max_retries
+            self.stats.add(requests=1)
+            try:
+                with self._slots:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_try or method == "POST":
+                    raise
+                self.stats.add(retries=1)
+                self._wait(backoff_seconds(attempt))
+                continue
+
+            if last_try or not self._should_retry(method, response.status_code):
+                return response
+            if response.status_code == 429:
+                self.stats.add(throttled=1)
+            delay = retry_after_seconds(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = backoff_seconds(attempt)
+            self.stats.add(retries=1)
+            response.close()
+            self._wait(min(delay, BACKOFF_MAX))
+        raise AssertionError("unreachable")
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """GET url; keyword arguments are passed to requests."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """POST to url; keyword arguments are passed to requests."""
+        return self.request("POST", url, **kwargs)
+
+
+_shared_client: Optional[MendeleyClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_client() -> MendeleyClient:
+    """Return the process-wide client, creating it on first use."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = MendeleyClient()
+        return _shared_client
+
+
+def close_client() -> None:
+    """Close the process-wide client; the next get_client() opens a new one."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+            _shared_client = None
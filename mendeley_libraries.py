@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Check DOIs against several Mendeley libraries at once.
+
+The documents API lists the user's own library by default and a group's
+library when given a group_id. Every library checked gets its own
+LibraryCache file next to the main cache (mendeley_library.sqlite,
+mendeley_library.group-<id>.sqlite, ...), so each is synced incrementally
+on its own schedule. sync_libraries syncs them concurrently, on one thread
+per library (the shared client still caps the requests in flight), and
+merges them into one DoiIndex in which every hit carries a "library" field
+naming the library the document was found in. A DOI held by several
+libraries is reported from the first one listed.
+
+The merged index is kept next to the main cache and rewritten only when
+one of the libraries changed, or a different set of libraries is checked.
+
+Usage:
+    python mendeley_libraries.py                    # List your groups
+    python mendeley_libraries.py --sync --all-groups
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import requests
+
+from doi_index import INDEX_SUFFIX, DoiIndex, write_index
+from mendeley_api import get_access_token
+from mendeley_client import MAX_CONCURRENCY, MAX_PAGE_SIZE, MendeleyClient, get_client
+from mendeley_library_cache import LIBRARY_CACHE_FILE, LibraryCache, sync_library
+
+GROUPS_URL = "https://api.mendeley.com/groups/v2"
+
+# Name of the user's own library in results
+PERSONAL = "personal"
+
+
+class Library(NamedTuple):
+    """One library to check: the user's own (group_id None) or a group's"""
+
+    name: str
+    group_id: Optional[str] = None
+
+
+def list_groups(
+    access_token: str, client: Optional[MendeleyClient] = None
+) -> List[Library]:
+    """Return the groups the user belongs to, following the Link header."""
+    client = client or get_client()
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/vnd.mendeley-group-list+json",
+    }
+    query: Optional[Dict] = {"limit": MAX_PAGE_SIZE}
+    next_url: Optional[str] = GROUPS_URL
+    groups: List[Library] = []
+    while next_url:
+        response = client.get(next_url, headers=headers, params=query)
+        if response.status_code != 200:
+            raise requests.exceptions.RequestException(
+                f"Failed to fetch groups: {response.text}"
+            )
+        groups.extend(
+            Library(group.get("name") or group["id"], group["id"])
+            for group in response.json()
+        )
+        next_url = response.links.get("next", {}).get("url")
+        query = None
+    return groups
+
+
+def resolve_libraries(
+    access_token: str,
+    groups: Sequence[str] = (),
+    all_groups: bool = False,
+    personal: bool = True,
+    client: Optional[MendeleyClient] = None,
+) -> List[Library]:
+    """
+    Turn group ids or names into the libraries to check.
+
+    Args:
+        access_token: OAuth access token
+        groups: Group ids or names
+        all_groups: Check every group the user belongs to
+        personal: Check the user's own library as well (first)
+
+    Returns:
+        Libraries in the order given, the user's own library first
+    """
+    libraries = [Library(PERSONAL)] if personal else []
+    if not groups and not all_groups:
+        return libraries
+
+    known = list_groups(access_token, client)
+    if all_groups:
+        return libraries + known
+    by_id = {group.group_id: group for group in known}
+    by_name = {group.name.lower(): group for group in known}
+    for wanted in groups:
+        group = by_id.get(wanted) or by_name.get(wanted.lower())
+        if group is None:
+            raise ValueError(f"You are not a member of a Mendeley group {wanted!r}")
+        if group not in libraries:
+            libraries.append(group)
+    return libraries
+
+
+def library_cache_path(library: Library, cache_path: str = LIBRARY_CACHE_FILE) -> str:
+    """Cache file of one library: the main cache, or one beside it per group"""
+    if not library.group_id:
+        return cache_path
+    root, extension = os.path.splitext(cache_path)
+    return f"{root}.group-{library.group_id}{extension}"
+
+
+def merged_index_path(cache_path: str = LIBRARY_CACHE_FILE) -> str:
+    """Merged index file, kept next to the main cache"""
+    return os.path.splitext(cache_path)[0] + ".merged" + INDEX_SUFFIX
+
+
+def merged_revision(revisions: Dict[Library, int]) -> int:
+    """Number identifying this set of libraries at these cache revisions"""
+    stamp = "\n".join(
+        f"{library.group_id or ''}:{library.name}:{revision}"
+        for library, revision in revisions.items()
+    ).encode()
+    return int.from_bytes(hashlib.blake2b(stamp, digest_size=8).digest(), "little")
+
+
+def sync_libraries(
+    access_token: str,
+    libraries: Sequence[Library],
+    cache_path: str = LIBRARY_CACHE_FILE,
+    full: bool = False,
+    max_age: Optional[float] = None,
+    workers: int = MAX_CONCURRENCY,
+) -> DoiIndex:
+    """
+    Sync every library's cache concurrently and open the merged DOI index.
+
+    A library that fails to sync fails the whole check, since its DOIs
+    could otherwise be reported as missing. full and max_age are as for
+    sync_library.
+
+    Returns:
+        The merged DoiIndex, whose hits carry a "library" field; the caller
+        closes it
+    """
+    if not libraries:
+        raise ValueError("No Mendeley libraries to check")
+
+    def sync(library: Library) -> int:
+        # Each thread opens its own cache: SQLite connections are per thread
+        def progress(count: int) -> None:
+            print(f"  ... {library.name}: {count} documents fetched", flush=True)
+
+        with sync_library(
+            access_token,
+            library_cache_path(library, cache_path),
+            full=full,
+            max_age=max_age,
+            progress=progress,
+            group_id=library.group_id,
+            name=library.name,
+        ) as cache:
+            return cache.revision
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(libraries)))) as pool:
+        revisions = dict(zip(libraries, pool.map(sync, libraries), strict=True))
+    print(f"✓ {get_client().stats.summary()}\n")
+    return merge_libraries(revisions, cache_path)
+
+
+def merge_libraries(
+    revisions: Dict[Library, int], cache_path: str = LIBRARY_CACHE_FILE
+) -> DoiIndex:
+    """
+    Open the merged index of the given libraries' caches, rewriting it if
+    it was written for other libraries or older cache revisions.
+    """
+    path = merged_index_path(cache_path)
+    revision = merged_revision(revisions)
+    try:
+        index = DoiIndex(path)
+    except (OSError, ValueError):
+        pass
+    else:
+        if index.revision == revision:
+            return index
+        index.close()
+
+    def documents() -> Iterator[Dict]:
+        # The index keeps the last document for a DOI, so the first
+        # library listed goes last
+        for library in reversed(list(revisions)):
+            with LibraryCache(
+                library_cache_path(library, cache_path), library.group_id
+            ) as cache:
+                for info in cache.documents():
+                    yield {**info, "library": library.name}
+
+    count = write_index(path, documents(), revision)
+    print(f"✓ Merged {len(revisions)} libraries: {count} DOIs")
+    return DoiIndex(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """List the user's Mendeley groups, or sync several libraries' caches"""
+    parser = argparse.ArgumentParser(
+        description="List your Mendeley groups or sync several library caches"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Sync your library and the chosen groups instead of listing groups.",
+    )
+    parser.add_argument(
+        "--group",
+        action="append",
+        default=[],
+        metavar="ID_OR_NAME",
+        help="Group library to sync (repeat for several).",
+    )
+    parser.add_argument(
+        "--all-groups", action="store_true", help="Sync every group you belong to."
+    )
+    parser.add_argument(
+        "--cache",
+        default=LIBRARY_CACHE_FILE,
+        help="Main library cache file; group caches sit next to it "
+        "(default: %(default)s).",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Download every library again."
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        access_token = get_access_token()
+    except Exception as e:
+        print(f"❌ Authentication failed: {e}")
+        return 1
+
+    try:
+        if not args.sync:
+            groups = list_groups(access_token)
+            if not groups:
+                print("You are not a member of any Mendeley groups")
+            for group in groups:
+                print(f"{group.group_id}  {group.name}")
+            return 0
+        libraries = resolve_libraries(access_token, args.group, args.all_groups)
+        sync_libraries(access_token, libraries, args.cache, full=args.full).close()
+    except Exception as e:
+        print(f"❌ Failed to sync libraries: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Local Mendeley library cache with incremental sync.
+
+fetch_library_dois pages through the whole library on every run, which
+takes minutes for a large library before a single DOI is checked. The
+LibraryCache keeps every document (id, DOI, title, year, authors, last
+modified time) in an SQLite file and syncs it incrementally: after the
+first full download, a sync only asks the documents API for documents
+modified since the last sync (modified_since) and for the ids of documents
+deleted since then (deleted_since). Checks are then indexed lookups.
+
+A full download commits page by page and records the next-page link, so a
+download interrupted by an error (after the client's own retries) resumes
+from that page on the next sync instead of starting over.
+
+A cache holds one library: the user's own, or a group's (group_id), whose
+documents the same API lists with a group_id parameter. Several libraries
+are checked together by mendeley_libraries.py, with a cache file each.
+
+Usage:
+    python mendeley_library_cache.py            # Sync (full on first run)
+    python mendeley_library_cache.py --full     # Download the whole library
+    python mendeley_library_cache.py --status   # Show what is cached
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from doi_index import DoiIndex, index_path, write_index
+from library_prefetch import LIBRARY_CACHE_FILE
+from mendeley_api import (
+    document_info,
+    get_access_token,
+    iter_document_page_links,
+    iter_document_pages,
+)
+from mendeley_client import get_client
+
+# Sync windows start this long before the previous sync began, so documents
+# changed while it ran (or under a slightly different clock) are not missed.
+# Re-fetching a document is harmless: rows are replaced by id.
+SYNC_OVERLAP = timedelta(minutes=5)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    doi TEXT,
+    doi_key TEXT,
+    title TEXT,
+    year INTEGER,
+    authors TEXT,
+    last_modified TEXT,
+    sync_mark TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_doi_key ON documents(doi_key);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SyncStats(NamedTuple):
+    """What one sync changed"""
+
+    full: bool
+    updated: int
+    deleted: int
+    seconds: float
+    resumed: bool = False
+
+
+def describe_library(group_id: Optional[str]) -> str:
+    """Name a library in messages"""
+    return f"Mendeley group {group_id}" if group_id else "your Mendeley library"
+
+
+def format_timestamp(moment: datetime) -> str:
+    """Format a time the way the Mendeley API expects (ISO 8601, UTC)"""
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class LibraryCache:
+    """
+    Mendeley documents in an SQLite file, keyed by document id with an
+    index on the lowercase DOI. Use as a context manager to close it.
+    """
+
+    def __init__(self, path: str = LIBRARY_CACHE_FILE, group_id: Optional[str] = None):
+        self.path = path
+        self.group_id = group_id
+        # Autocommit mode: sync opens and commits its own transaction
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(documents)")]
+        if "sync_mark" not in columns:  # Cache written before resumable syncs
+            self.conn.execute("ALTER TABLE documents ADD COLUMN sync_mark TEXT")
+        if os.name != "nt":  # The cache holds library contents
+            os.chmod(path, 0o600)
+        # A cache synced from one library must not be synced from another
+        cached_group = self._get_state("group_id")
+        if cached_group is None and not len(self):
+            self._set_state("group_id", group_id or "")
+        elif (cached_group or "") != (group_id or ""):
+            self.conn.close()
+            raise ValueError(
+                f"{path} caches {describe_library(cached_group)}, "
+                f"not {describe_library(group_id)}"
+            )
+
+    def __enter__(self) -> "LibraryCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def __len__(self) -> int:
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+        return int(count)
+
+    def _params(self) -> Dict[str, str]:
+        """Query parameters selecting this cache's library"""
+        return {"group_id": self.group_id} if self.group_id else {}
+
+    def _get_state(self, name: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT value FROM sync_state WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, name: str, value: Optional[str]) -> None:
+        if value is None:
+            self.conn.execute("DELETE FROM sync_state WHERE name = ?", (name,))
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)",
+            (name, value),
+        )
+
+    @property
+    def resume_pending(self) -> bool:
+        """Whether an interrupted full download is waiting to be resumed"""
+        return self._get_state("full_sync_mark") is not None
+
+    @property
+    def last_sync(self) -> Optional[datetime]:
+        """When the last successful sync started, or None if never synced"""
+        value = self._get_state("last_sync")
+        return datetime.fromisoformat(value) if value else None
+
+    @property
+    def revision(self) -> int:
+        """Changes with every sync that changed the cached documents"""
+        return int(self._get_state("revision") or 0)
+
+    def _new_revision(self) -> None:
+        # A timestamp rather than a counter, so a deleted and recreated
+        # cache never repeats the revision of an old index
+        self._set_state("revision", str(time.time_ns()))
+
+    def sync_age(self) -> Optional[float]:
+        """Seconds since the last successful sync started"""
+        last_sync = self.last_sync
+        if last_sync is None:
+            return None
+        return (datetime.now(timezone.utc) - last_sync).total_seconds()
+
+    def _store(self, documents: Iterable[Dict], mark: Optional[str] = None) -> int:
+        """Insert or replace documents (inside the caller's transaction)"""
+        rows = []
+        for doc in documents:
+            info = document_info(doc)
+            rows.append(
+                (
+                    info["id"],
+                    info["doi"] or None,
+                    info["doi"].lower() or None,
+                    info["title"],
+                    info["year"],
+                    json.dumps(info["authors"], ensure_ascii=False),
+                    doc.get("last_modified"),
+                    mark,
+                )
+            )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO documents "
+            "(id, doi, doi_key, title, year, authors, last_modified, sync_mark) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        return len(rows)
+
+    def sync(
+        self,
+        access_token: str,
+        full: bool = False,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> SyncStats:
+        """
+        Bring the cache up to date with the Mendeley library.
+
+        The first sync, or one with full=True, downloads every document and
+        replaces the cache (resuming an interrupted download if there is
+        one). Later syncs fetch only documents modified since the last sync
+        and drop documents deleted since then, in one transaction, so a
+        failed incremental sync leaves the cache as it was.
+
+        progress, if given, is called after each page with the number of
+        documents fetched so far.
+        """
+        if full or self.last_sync is None or self.resume_pending:
+            return self._full_sync(access_token, progress)
+        started = time.perf_counter()
+        sync_start = datetime.now(timezone.utc)
+        last_sync = self.last_sync
+        assert last_sync is not None
+        since = format_timestamp(last_sync - SYNC_OVERLAP)
+        updated = deleted = 0
+
+        self.conn.execute("BEGIN")
+        try:
+            for documents in iter_document_pages(
+                access_token, {"modified_since": since, **self._params()}
+            ):
+                updated += self._store(documents)
+                if progress:
+                    progress(updated)
+            for documents in iter_document_pages(
+                access_token, {"deleted_since": since, **self._params()}
+            ):
+                deleted += self.conn.executemany(
+                    "DELETE FROM documents WHERE id = ?",
+                    [(doc["id"],) for doc in documents if doc.get("id")],
+                ).rowcount
+            if updated or deleted:
+                self._new_revision()
+            self._set_state("last_sync", sync_start.isoformat())
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return SyncStats(False, updated, deleted, time.perf_counter() - started)
+
+    def _full_sync(
+        self,
+        access_token: str,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> SyncStats:
+        """
+        Download every document, committing after each page with the link to
+        the next one. Documents are tagged with the download's start time;
+        those not tagged when the last page arrives are no longer in the
+        library and are dropped.
+        """
+        started = time.perf_counter()
+        mark = self._get_state("full_sync_mark")
+        cursor = self._get_state("full_sync_cursor")
+        resumed = mark is not None and cursor is not None
+        if not resumed:
+            mark, cursor = datetime.now(timezone.utc).isoformat(), None
+            self._set_state("full_sync_mark", mark)
+            self._set_state("full_sync_cursor", None)
+        updated = deleted = 0
+
+        pages = iter_document_page_links(access_token, self._params(), cursor=cursor)
+        try:
+            for documents, next_url in pages:
+                self.conn.execute("BEGIN")
+                updated += self._store(documents, mark)
+                self._set_state("full_sync_cursor", next_url)
+                self.conn.execute("COMMIT")
+                if progress:
+                    progress(updated)
+
+            self.conn.execute("BEGIN")
+            deleted = self.conn.execute(
+                "DELETE FROM documents WHERE sync_mark IS NOT ?", (mark,)
+            ).rowcount
+            # Changes made while the download ran are picked up next time
+            self._new_revision()
+            self._set_state("last_sync", mark)
+            self._set_state("last_full_sync", mark)
+            self._set_state("full_sync_mark", None)
+            self._set_state("full_sync_cursor", None)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+
+        return SyncStats(True, updated, deleted, time.perf_counter() - started, resumed)
+
+    def _info(self, row: tuple) -> Dict:
+        doi, title, year, authors, doc_id = row
+        return {
+            "doi": doi,
+            "title": title,
+            "year": year,
+            "authors": json.loads(authors) if authors else [],
+            "id": doc_id,
+        }
+
+    def find(self, dois: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Look up DOIs in the cache.
+
+        Returns:
+            Dictionary mapping each found DOI (lowercase) to document info,
+            in the same form as fetch_library_dois, for use with check_dois
+        """
+        found = {}
+        for doi in dois:
+            key = doi.strip().lower()
+            if not key or key in found:
+                continue
+            row = self.conn.execute(
+                "SELECT doi, title, year, authors, id FROM documents "
+                "WHERE doi_key = ? LIMIT 1",
+                (key,),
+            ).fetchone()
+            if row:
+                found[key] = self._info(row)
+        return found
+
+    def documents(self) -> Iterator[Dict]:
+        """Yield every cached document with a DOI, in document_info form"""
+        rows = self.conn.execute(
+            "SELECT doi, title, year, authors, id FROM documents "
+            "WHERE doi_key IS NOT NULL ORDER BY rowid"
+        )
+        for row in rows:
+            yield self._info(row)
+
+    def library_docs(self) -> Dict[str, Dict]:
+        """Return every cached document with a DOI, like fetch_library_dois"""
+        return {info["doi"].lower(): info for info in self.documents()}
+
+    def doi_index(self, path: Optional[str] = None) -> DoiIndex:
+        """
+        Open the memory-mapped DOI index of the cached documents (by
+        default next to the cache file), rewriting it first if it is
+        missing or older than the cache.
+        """
+        path = path or index_path(self.path)
+        revision = self.revision
+        try:
+            index = DoiIndex(path)
+        except (OSError, ValueError):
+            pass
+        else:
+            if index.revision == revision:
+                return index
+            index.close()
+        write_index(path, self.documents(), revision)
+        return DoiIndex(path)
+
+    def doi_count(self) -> int:
+        """Number of cached documents with a DOI"""
+        (count,) = self.conn.execute(
+            "SELECT COUNT(*) FROM documents WHERE doi_key IS NOT NULL"
+        ).fetchone()
+        return int(count)
+
+
+def sync_library(
+    access_token: str,
+    path: str = LIBRARY_CACHE_FILE,
+    full: bool = False,
+    max_age: Optional[float] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    group_id: Optional[str] = None,
+    name: Optional[str] = None,
+) -> LibraryCache:
+    """
+    Open the library cache at path and sync it, reporting progress.
+
+    A cache synced less than max_age seconds ago is used as it is.
+    progress is passed on to LibraryCache.sync. group_id selects a group
+    library. name prefixes the messages, for syncs running side by side;
+    the API request summary is then left to the caller.
+    Returns the open cache; the caller closes it.
+    """
+    label = f"{name}: " if name else ""
+    library = describe_library(group_id)
+    cache = LibraryCache(path, group_id)
+    try:
+        age = cache.sync_age()
+        if (
+            not full
+            and not cache.resume_pending
+            and age is not None
+            and max_age is not None
+            and age < max_age
+        ):
+            print(
+                f"✓ {label}Using library cache synced {age:.0f}s ago "
+                f"({len(cache)} docs)"
+            )
+            return cache
+        if cache.resume_pending:
+            print(f"{label}Resuming the interrupted download of {library}...")
+        elif full or age is None:
+            print(f"{label}Downloading {library} into the local cache...")
+        else:
+            print(f"{label}Syncing changes from {library}...")
+        stats = cache.sync(access_token, full=full, progress=progress)
+    except BaseException:
+        cache.close()
+        raise
+    kind = "Full sync" if stats.full else "Incremental sync"
+    if stats.resumed:
+        kind += " (resumed)"
+    print(
+        f"✓ {label}{kind}: {stats.updated} updated, {stats.deleted} deleted "
+        f"in {stats.seconds:.1f}s ({len(cache)} docs, "
+        f"{cache.doi_count()} with DOIs)"
+    )
+    if not name:
+        print(f"✓ {get_client().stats.summary()}\n")
+    return cache
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Sync the local Mendeley library cache or show its status"""
+    parser = argparse.ArgumentParser(
+        description="Sync the local Mendeley library cache used by the DOI checker"
+    )
+    parser.add_argument(
+        "--cache",
+        default=LIBRARY_CACHE_FILE,
+        help="Library cache file (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Download the whole library again."
+    )
+    parser.add_argument(
+        "--status", action="store_true", help="Show the cache without syncing."
+    )
+    args = parser.parse_args(argv)
+
+    if args.status:
+        if not os.path.exists(args.cache):
+            print(f"No library cache at {args.cache}")
+            return 1
+        with LibraryCache(args.cache) as cache:
+            age = cache.sync_age()
+            synced = f"{age:.0f}s ago" if age is not None else "never"
+            print(
+                f"{args.cache}: {len(cache)} documents, {cache.doi_count()} "
+                f"with DOIs, last synced {synced}"
+            )
+        return 0
+    try:
+        access_token = get_access_token()
+    except Exception as e:
+        print(f"❌ Authentication failed: {e}")
+        return 1
+    try:
+        sync_library(access_token, args.cache, full=args.full).close()
+    except Exception as e:
+        print(f"❌ Failed to sync library: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Choose how to look DOIs up in a Mendeley library.
+
+Checking 3 DOIs should not cost the same full-library download as checking
+3,000. lookup_dois estimates the cost of each strategy from the batch
+size, the library size and the state of the local library cache, and
+picks the cheapest:
+
+- cache:  the local cache was synced recently enough; no API calls
+- sync:   sync the cache (incrementally if it exists), then look up locally
+- search: one /search/documents query per DOI, several at once, keeping
+          only results whose identifiers.doi matches exactly
+- scan:   page through the whole library without a cache (--no-cache)
+
+Searching costs one round of requests per MAX_CONCURRENCY DOIs; a full
+download costs one request per MAX_PAGE_SIZE documents. An existing cache
+is always synced rather than bypassed, since an incremental sync is only a
+couple of requests and keeps the cache useful for large batches.
+
+The library index can be loaded on a background thread with
+library_prefetch.LibraryPrefetch.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+
+from mendeley_api import DOCUMENTS_URL, document_info, fetch_library_dois
+from mendeley_client import MAX_CONCURRENCY, MAX_PAGE_SIZE, MendeleyClient, get_client
+from mendeley_library_cache import LIBRARY_CACHE_FILE, LibraryCache, sync_library
+
+SEARCH_URL = "https://api.mendeley.com/search/documents"
+STRATEGIES = ("cache", "sync", "search", "scan")
+
+# Results requested per DOI search; an exact DOI rarely matches more than a
+# handful of documents
+SEARCH_LIMIT = 20
+
+
+class LookupResult(NamedTuple):
+    """Documents found for a batch of DOIs and how they were found"""
+
+    library_docs: Dict[str, Dict]  # Lowercase DOI -> document info
+    strategy: str
+    reason: str
+    seconds: float
+
+
+def choose_strategy(
+    batch_size: int,
+    library_size: Optional[int],
+    cache_age: Optional[float],
+    max_age: float = 0,
+    use_cache: bool = True,
+) -> Tuple[str, str]:
+    """
+    Pick the cheapest lookup strategy.
+
+    Args:
+        batch_size: Number of DOIs to check
+        library_size: Documents in the library, if known
+        cache_age: Seconds since the cache was synced (None: no usable cache)
+        max_age: A cache younger than this is used without syncing
+        use_cache: Whether the local cache may be used and written
+
+    Returns:
+        (strategy, reason) with strategy one of STRATEGIES
+    """
+    download = "sync" if use_cache else "scan"
+    if use_cache and cache_age is not None:
+        if cache_age < max_age:
+            return "cache", f"cache synced {cache_age:.0f}s ago"
+        return "sync", "an incremental sync of the cache takes a few requests"
+    if library_size is None:
+        return download, "library size unknown"
+
+    search_rounds = math.ceil(batch_size / MAX_CONCURRENCY)
+    download_pages = max(1, math.ceil(library_size / MAX_PAGE_SIZE))
+    costs = (
+        f"{search_rounds} round(s) of searches vs {download_pages} page(s) "
+        f"for {library_size} documents"
+    )
+    if search_rounds < download_pages:
+        return "search", costs
+    return download, costs
+
+
+def library_size(
+    access_token: str, client: Optional[MendeleyClient] = None
+) -> Optional[int]:
+    """Return the number of documents in the library (one small request)."""
+    response = (client or get_client()).get(
+        DOCUMENTS_URL,
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.mendeley-document.1+json",
+        },
+        params={"limit": 1},
+    )
+    if response.status_code != 200:
+        return None
+    try:
+        return int(response.headers["Mendeley-Count"])
+    except (KeyError, ValueError):
+        return None
+
+
+def search_doi(
+    access_token: str, doi: str, client: Optional[MendeleyClient] = None
+) -> Optional[Dict]:
+    """
+    Search the library for one DOI and return the matching document info,
+    or None. Search results are matched on identifiers.doi, since the search
+    also matches the DOI's words in other fields.
+    """
+    response = (client or get_client()).get(
+        SEARCH_URL,
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.mendeley-document.1+json",
+        },
+        params={"query": doi, "limit": SEARCH_LIMIT},
+    )
+    if response.status_code != 200:
+        raise requests.exceptions.RequestException(
+            f"Failed to search for {doi}: {response.text}"
+        )
+    wanted = doi.strip().lower()
+    for doc in response.json():
+        info = document_info(doc)
+        if info["doi"].lower() == wanted:
+            return info
+    return None
+
+
+def search_dois(
+    access_token: str,
+    dois: List[str],
+    client: Optional[MendeleyClient] = None,
+    workers: int = MAX_CONCURRENCY,
+) -> Dict[str, Dict]:
+    """Search for each DOI concurrently; returns found DOIs (lowercase)."""
+    unique = list(dict.fromkeys(d.strip().lower() for d in dois if d.strip()))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        found = pool.map(lambda doi: search_doi(access_token, doi, client), unique)
+        return {doi: info for doi, info in zip(unique, found, strict=True) if info}
+
+
+def lookup_dois(
+    access_token: str,
+    dois: List[str],
+    strategy: str = "auto",
+    cache_path: str = LIBRARY_CACHE_FILE,
+    max_age: float = 0,
+    use_cache: bool = True,
+    full_sync: bool = False,
+    progress: Optional[Callable[[int], None]] = None,
+) -> LookupResult:
+    """
+    Find which DOIs are in the library, choosing a strategy unless one is
+    given, and report the choice and how long the lookup took. progress is
+    called with the number of documents fetched after each downloaded page.
+
+    Returns:
+        LookupResult whose library_docs can be passed to check_dois
+    """
+    started = time.perf_counter()
+    reason = "requested"
+    if full_sync and strategy == "auto":
+        strategy, reason = "sync", "full sync requested"
+    if strategy == "auto":
+        cache_age = None
+        if use_cache and os.path.exists(cache_path):
+            with LibraryCache(cache_path) as cache:
+                if not cache.resume_pending:
+                    cache_age = cache.sync_age()
+        size = None if cache_age is not None else library_size(access_token)
+        strategy, reason = choose_strategy(
+            len(dois), size, cache_age, max_age, use_cache
+        )
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown lookup strategy {strategy!r}")
+    print(f"Lookup strategy: {strategy} ({reason})")
+
+    if strategy == "search":
+        library_docs = search_dois(access_token, dois)
+    elif strategy == "scan":
+        library_docs = fetch_library_dois(access_token, progress)
+    else:
+        ages = {"cache": math.inf, "sync": max_age}
+        with sync_library(
+            access_token,
+            cache_path,
+            full=full_sync,
+            max_age=ages[strategy],
+            progress=progress,
+        ) as cache:
+            library_docs = cache.find(dois)
+
+    seconds = time.perf_counter() - started
+    print(f"✓ Looked up {len(dois)} DOI(s) by {strategy} in {seconds:.2f}s")
+    return LookupResult(library_docs, strategy, reason, seconds)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Saved Mendeley token with expiry tracking and a refresh lock.
+
+get_access_token used to refresh the saved token over the network on every
+run. Mendeley access tokens last an hour, so the token response's
+expires_in is now recorded as an absolute expires_at, and the saved token
+is reused until EXPIRY_MARGIN before it expires.
+
+Refresh tokens are single use: when several runs (e.g. pipeline workers)
+refreshed the same saved token at once, all but one got a token that the
+next refresh invalidated. TokenStore.lock() takes an exclusive lock on a
+file next to the token, and the refresh happens under it. A run that waited
+for the lock reads the token file again first and, if another run has just
+refreshed it, reuses that token instead of refreshing a second time.
+The token file is replaced atomically, so readers never see half of it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+# Refresh this many seconds before the access token expires, so a token
+# handed out is still good for the requests that follow
+EXPIRY_MARGIN = 300.0
+
+# Seconds to wait for another run to finish refreshing
+LOCK_TIMEOUT = 120.0
+LOCK_POLL = 0.05
+
+
+def stamp_expiry(token_data: Dict, now: Callable[[], float] = time.time) -> Dict:
+    """
+    Return token_data with expires_at (epoch seconds) computed from the
+    token response's expires_in. Data without expires_in is returned as is.
+    """
+    expires_in = token_data.get("expires_in")
+    if expires_in is None:
+        return token_data
+    return {**token_data, "expires_at": now() + float(expires_in)}
+
+
+def token_is_fresh(
+    token_data: Optional[Dict],
+    margin: float = EXPIRY_MARGIN,
+    now: Callable[[], float] = time.time,
+) -> bool:
+    """
+    Whether the saved access token can be used without a refresh: it has a
+    numeric expires_at more than margin seconds away. Tokens saved before
+    expiry was tracked have none, and are refreshed once.
+    """
+    if not token_data or "access_token" not in token_data:
+        return False
+    expires_at = token_data.get("expires_at")
+    if not isinstance(expires_at, (int, float)):
+        return False
+    return expires_at - now() > margin
+
+
+class TokenStore:
+    """
+    The saved token file and its lock file (path + ".lock").
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+
+    def load(self) -> Optional[Dict]:
+        """Return the saved token data, or None if there is none."""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.path} does not hold a token")
+        return data
+
+    def save(self, token_data: Dict) -> None:
+        """Write token data atomically, readable only by the user."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=".mendeley_token.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(token_data, f)
+            if os.name != "nt":  # Not Windows
+                os.chmod(temp_path, 0o600)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def delete(self) -> None:
+        """Remove the saved token, if any."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @contextmanager
+    def lock(self, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+        """
+        Hold an exclusive lock shared by every process using this token.
+        Raises TimeoutError if it is not free within timeout seconds. The
+        operating system releases the lock if the holder dies.
+        """
+        with open(self.lock_path, "a+") as f:
+            f.seek(0)  # msvcrt locks bytes from the current position
+            deadline = time.monotonic() + timeout
+            while not _try_lock(f.fileno()):
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(
+                        f"Timed out waiting for {self.lock_path}; another run "
+                        "may be stuck refreshing the Mendeley token"
+                    )
+                time.sleep(LOCK_POLL)
+            try:
+                yield
+            finally:
+                _unlock(f.fileno())
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if sys.platform == "win32":
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int) -> None:
+    if sys.platform == "win32":
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
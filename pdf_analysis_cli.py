@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Unified command line entry point for the PDF analysis tools.
+
+Each subcommand lives in its own module, which is imported only when that
+subcommand runs. Heavy dependencies (pymupdf4llm, rapidfuzz, requests) are
+therefore loaded only by the commands that need them.
+
+Usage:
+    pdf-analysis convert --pdf-dir pdfs --out-dir markdown
+    pdf-analysis clean markdown/
+    pdf-analysis extract --pdf-dir pdfs --workers 4
+    pdf-analysis pipeline --pdf-dir pdfs
+    pdf-analysis watch --pdf-dir pdfs
+    pdf-analysis dois pdfs/extracted_sections.md
+    pdf-analysis check --file dois.txt
+    pdf-analysis sync --full
+    pdf-analysis query "climate model" --section conclusion
+    pdf-analysis report pdfs/extracted_sections.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Subcommand name -> (module, entry point taking argv, help text)
+COMMANDS: Dict[str, Tuple[str, str, str]] = {
+    "convert": (
+        "convert_pdfs_pymupdf4llm",
+        "main",
+        "Convert PDFs to cleaned Markdown with pymupdf4llm",
+    ),
+    "clean": ("clean_marker_output", "main", "Clean Markdown files in place"),
+    "extract": (
+        "extract_sections",
+        "main",
+        "Extract paper sections to JSON and Markdown",
+    ),
+    "pipeline": (
+        "pipeline",
+        "main",
+        "Convert, clean, extract and check DOIs in one process",
+    ),
+    "watch": ("watch_pdfs", "main", "Watch a folder and extract PDFs as they arrive"),
+    "dois": (
+        "extract_and_check_dois",
+        "main",
+        "Collect DOIs from Markdown and build the Mendeley HTML report",
+    ),
+    "check": (
+        "check_mendeley_dois_v2",
+        "main",
+        "Check DOIs against your Mendeley library",
+    ),
+    "sync": (
+        "mendeley_library_cache",
+        "main",
+        "Sync the local Mendeley library cache",
+    ),
+    "query": (
+        "section_store",
+        "main",
+        "Search sections stored with extract --sqlite",
+    ),
+    "report": (
+        "pdf_analysis_cli",
+        "report_main",
+        "Re-export Markdown/HTML reports from existing JSON",
+    ),
+}
+
+
+def report_main(argv: Optional[List[str]] = None) -> int:
+    """
+    Rebuild a report from an existing JSON file without converting anything.
+
+    Extraction results (a list of papers) are re-exported to Markdown;
+    Mendeley check results (a dict with a summary) are rendered as HTML.
+    """
+    parser = argparse.ArgumentParser(
+        prog="pdf-analysis report",
+        description="Re-export Markdown or HTML reports from existing JSON results.",
+    )
+    parser.add_argument("json_file", help="extracted_sections.json or check results")
+    parser.add_argument(
+        "--output",
+        help="Output file (defaults to the JSON path with .md or .html extension).",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.json_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error reading {args.json_file}: {e}")
+        return 1
+
+    base = os.path.splitext(args.json_file)[0]
+    if isinstance(data, list):
+        from extract_sections import export_to_markdown
+
+        export_to_markdown(data, args.output or f"{base}.md")
+    elif isinstance(data, dict) and "summary" in data:
+        from extract_and_check_dois import generate_html_table
+
+        generate_html_table(data, args.output or f"{base}.html")
+    else:
+        print(f"Unrecognised JSON layout in {args.json_file}")
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the top-level parser used for help output and validation."""
+    parser = argparse.ArgumentParser(
+        prog="pdf-analysis",
+        description="Academic paper PDF analysis tools.",
+        epilog="Run 'pdf-analysis <command> --help' for command options.",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="<command>")
+    for name, (_module, _entry, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Dispatch to the module implementing the requested subcommand."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if not argv or argv[0] not in COMMANDS:
+        parser = build_parser()
+        if not argv:
+            parser.print_help()
+            return 1
+        parser.parse_args(argv[:1])  # Prints usage and exits for unknown commands
+        return 1
+
+    module_name, entry, _help = COMMANDS[argv[0]]
+    result = getattr(importlib.import_module(module_name), entry)(argv[1:])
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+"""
+Find duplicate PDFs by content hash so each unique document is converted once.
+
+Two hashing modes are supported:
+
+- "bytes": SHA-256 of the file contents. Cheap and exact; catches copies
+  saved under different names.
+- "text": SHA-256 of the text layer, page by page. Catches copies that only
+  differ in annotations or metadata (e.g. x.pdf and x-annotated.pdf). PDFs
+  without a text layer fall back to the byte hash, so unrelated scans never
+  collide on an empty string.
+
+DuplicateFilter hashes inputs as they stream in and passes each unique one
+on at once, so conversion starts with the first PDF instead of after the
+whole input has been hashed. Later copies are held back, without their
+archive bytes, and handed out once their original has been converted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from pdf_sources import ArchiveMember, PdfInput, input_label, open_pdf_document
+
+DEDUPE_MODES = ("bytes", "text")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class DuplicateGroup(NamedTuple):
+    """A unique document and the other inputs with identical content."""
+
+    digest: str
+    representative: PdfInput
+    duplicates: List[PdfInput]
+
+
+def file_digest(source: PdfInput) -> str:
+    """Return the SHA-256 hex digest of a PDF's bytes."""
+    sha = hashlib.sha256()
+    if isinstance(source, ArchiveMember):
+        sha.update(source.read())
+        return sha.hexdigest()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def text_layer_digest(source: PdfInput) -> str:
+    """
+    Return a SHA-256 digest of the PDF's text layer with whitespace
+    normalized. Annotations are not part of the page text, so annotated
+    copies hash the same as the original. Falls back to file_digest when
+    the document has no extractable text.
+    """
+    sha = hashlib.sha256()
+    has_text = False
+    doc = open_pdf_document(source)
+    try:
+        for page in doc:
+            text = re.sub(r"\s+", " ", page.get_text("text")).strip()
+            if text:
+                has_text = True
+            sha.update(text.encode("utf-8"))
+            sha.update(b"\f")  # Page separator keeps page splits significant
+    finally:
+        doc.close()
+    if not has_text:
+        return "bytes:" + file_digest(source)
+    return "text:" + sha.hexdigest()
+
+
+def content_digest(source: PdfInput, mode: str = "bytes") -> str:
+    """Hash a PDF with the given dedupe mode ("bytes" or "text")."""
+    if mode == "text":
+        return text_layer_digest(source)
+    if mode == "bytes":
+        return "bytes:" + file_digest(source)
+    raise ValueError(f"Unknown dedupe mode: {mode!r} (expected {DEDUPE_MODES})")
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in DEDUPE_MODES:
+        raise ValueError(f"Unknown dedupe mode: {mode!r} (expected {DEDUPE_MODES})")
+
+
+def _without_data(source: PdfInput) -> PdfInput:
+    """Drop an archive member's in-memory bytes (it is read again if needed)."""
+    if isinstance(source, ArchiveMember):
+        return source._replace(data=None)
+    return source
+
+
+def group_duplicates(
+    sources: Iterable[PdfInput], mode: str = "bytes"
+) -> List[DuplicateGroup]:
+    """
+    Group every input by content digest, keeping first-seen order; nothing
+    is returned until all inputs are hashed (see DuplicateFilter for a
+    streaming version). The first input
+    of each group is its representative; duplicate archive members drop their
+    in-memory bytes since they will never be converted. Inputs that cannot be
+    read are kept as their own group so the conversion step reports the error.
+    """
+    _check_mode(mode)
+
+    groups: Dict[str, DuplicateGroup] = {}
+    for index, source in enumerate(sources):
+        try:
+            digest = content_digest(source, mode)
+        except Exception:
+            digest = f"unreadable:{index}"
+        group = groups.get(digest)
+        if group is None:
+            groups[digest] = DuplicateGroup(digest, source, [])
+        else:
+            group.duplicates.append(_without_data(source))
+    return list(groups.values())
+
+
+class DuplicateFilter:
+    """
+    Streams the first input with each content digest and holds back copies.
+
+    unique(sources) yields each input as soon as it is hashed, unless an
+    input with the same content came before. Once a yielded input has been
+    converted, finish() returns the copies of it seen so far; copies that
+    turn up after that are returned by leftovers() at the end. Groups keep
+    their inputs without archive bytes, so only the input being converted
+    holds them.
+    """
+
+    def __init__(self, mode: str = "bytes"):
+        _check_mode(mode)
+        self.mode = mode
+        self.groups: Dict[str, DuplicateGroup] = {}
+        self.hashed = 0
+        self.seconds = 0.0  # Time spent hashing
+        self._digests: Dict[str, str] = {}  # Representative's label -> digest
+        # Digest -> (conversion seconds, error) of finished representatives
+        self._finished: Dict[str, Tuple[float, Optional[BaseException]]] = {}
+
+    def unique(self, sources: Iterable[PdfInput]) -> Iterator[PdfInput]:
+        """Yield each input whose content has not been seen before."""
+        for source in sources:
+            started = time.perf_counter()
+            try:
+                digest = content_digest(source, self.mode)
+            except Exception:
+                digest = f"unreadable:{self.hashed}"
+            self.seconds += time.perf_counter() - started
+            self.hashed += 1
+            group = self.groups.get(digest)
+            if group is not None:
+                group.duplicates.append(_without_data(source))
+                continue
+            self.groups[digest] = DuplicateGroup(digest, _without_data(source), [])
+            self._digests[input_label(source)] = digest
+            yield source
+
+    @property
+    def duplicate_count(self) -> int:
+        """Number of inputs held back as copies."""
+        return self.hashed - len(self.groups)
+
+    def finish(
+        self,
+        source: PdfInput,
+        seconds: float = 0.0,
+        error: Optional[BaseException] = None,
+    ) -> List[PdfInput]:
+        """
+        Record that a yielded input was converted (or failed with error) and
+        return the copies of it held back so far.
+        """
+        digest = self._digests[input_label(source)]
+        self._finished[digest] = (seconds, error)
+        return self._take(digest)
+
+    def leftovers(
+        self,
+    ) -> Iterator[Tuple[PdfInput, List[PdfInput], float, Optional[BaseException]]]:
+        """
+        Yield (representative, copies, seconds, error) for finished inputs
+        whose copies turned up after they were converted.
+        """
+        for digest, (seconds, error) in self._finished.items():
+            copies = self._take(digest)
+            if copies:
+                yield self.groups[digest].representative, copies, seconds, error
+
+    def _take(self, digest: str) -> List[PdfInput]:
+        duplicates = self.groups[digest].duplicates
+        copies = list(duplicates)
+        duplicates.clear()
+        return copies
+
+
+def fan_out(result: dict, duplicates: Iterable[PdfInput]) -> List[dict]:
+    """Copy a representative's result to each duplicate input."""
+    copies = []
+    for duplicate in duplicates:
+        copy = dict(result)
+        if isinstance(duplicate, ArchiveMember):
+            copy["filename"] = duplicate.filename
+            copy["source"] = duplicate.source
+        else:
+            copy["filename"] = os.path.basename(os.fspath(duplicate))
+            copy.pop("source", None)
+        copy["duplicate_of"] = result["filename"]
+        copies.append(copy)
+    return copies
@@ -0,0 +1,429 @@
+"""
+Classify PDF conversion failures and keep a quarantine list of them.
+
+A failed PDF is recorded with an error class so a large batch never has to
+be rerun to recover a handful of files; `--retry-failed` reprocesses only
+the quarantined inputs. Error classes:
+
+- "encrypted": the PDF needs a password
+- "corrupt_xref": the PDF cannot be opened, has no pages or had its
+  cross-reference table repaired
+- "timeout": conversion exceeded the per-PDF time limit
+- "oom": conversion ran out of memory or the worker process died
+- "empty_text_layer": conversion produced no text (usually a scan)
+- "other": anything else
+
+run_isolating_crashes runs conversions in a process pool so that a PDF
+that kills its worker process fails on its own instead of taking every
+other PDF in flight (and the rest of the run) down with it. Given a
+timeout, it also kills a worker whose PDF is still converting
+TIMEOUT_GRACE seconds after the timeout: time_limit's SIGALRM cannot
+interrupt a PDF that hangs inside MuPDF's C code.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import pickle
+import re
+import signal
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from pdf_sources import (
+    PdfInput,
+    input_filename,
+    input_key,
+    input_label,
+    open_pdf_document,
+)
+
+ERROR_CLASSES = (
+    "encrypted",
+    "corrupt_xref",
+    "timeout",
+    "oom",
+    "empty_text_layer",
+    "other",
+)
+QUARANTINE_SUFFIX = ".quarantine.json"
+
+# Seconds past the timeout before the parent kills a worker, giving the
+# worker's own time_limit the first chance to stop the conversion cleanly
+TIMEOUT_GRACE = 5.0
+
+SourceT = TypeVar("SourceT")
+
+# pymupdf4llm placeholder for images it did not extract
+PICTURE_PLACEHOLDER = re.compile(
+    r"\*\*==> picture \[.*?\] intentionally omitted <==\*\*"
+)
+
+
+class EmptyTextLayerError(ValueError):
+    """Raised when a PDF converts to Markdown without any text."""
+
+
+def has_text_layer(md_text: str) -> bool:
+    """Return True if converted Markdown contains any word characters."""
+    return re.search(r"\w", PICTURE_PLACEHOLDER.sub("", md_text)) is not None
+
+
+def check_text_layer(md_text: str, source: PdfInput) -> None:
+    """Raise EmptyTextLayerError if converted Markdown has no text."""
+    if not has_text_layer(md_text):
+        raise EmptyTextLayerError(f"No text layer in {input_label(source)}")
+
+
+def picklable_error(error: BaseException) -> BaseException:
+    """
+    Return error, or a RuntimeError carrying its message if it cannot be
+    pickled. pymupdf raises SWIG-wrapped exceptions that cannot cross a
+    process boundary and would otherwise surface as a pickling error.
+    """
+    try:
+        pickle.dumps(error)
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+    return error
+
+
+@contextmanager
+def time_limit(seconds: Optional[float]):
+    """
+    Raise TimeoutError in the block after the given number of seconds.
+
+    Uses SIGALRM, so the limit only applies in the main thread on platforms
+    that support it (each worker process runs its tasks in its main thread).
+    Elsewhere, or when seconds is falsy, the block runs without a limit.
+    Python only runs the handler between bytecodes, so this is a best-effort
+    guard: a conversion stuck in C code is only stopped by the parent
+    killing its worker (see run_isolating_crashes).
+    """
+    if (
+        not seconds
+        or not hasattr(signal, "SIGALRM")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise TimeoutError(f"Conversion exceeded {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _deadline_error(timeout: float) -> TimeoutError:
+    return TimeoutError(
+        f"Conversion exceeded {timeout:g}s; its worker process was killed"
+    )
+
+
+def kill_workers(pool: Executor) -> None:
+    """
+    Kill the worker processes of a process pool, which breaks it: every
+    task still in flight fails with BrokenProcessPool.
+    """
+    terminate = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate is not None:
+        terminate()
+        return
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.kill()
+
+
+def run_alone(
+    make_pool: Callable[[int], Executor],
+    submit: Callable[[Executor, SourceT], Future],
+    items: List[SourceT],
+    timeout: Optional[float] = None,
+) -> Iterator[Tuple[SourceT, Any, Optional[BaseException]]]:
+    """
+    Run items one at a time in a single-worker pool, yielding (item, result,
+    error) for each. An item that kills the worker is yielded with the
+    BrokenProcessPool error and the pool is replaced for the next item; one
+    still running TIMEOUT_GRACE seconds after timeout has its worker killed
+    and is yielded with a TimeoutError.
+    """
+    limit = timeout + TIMEOUT_GRACE if timeout else None
+    pool = make_pool(1)
+    try:
+        for item in items:
+            future = submit(pool, item)
+            if limit is not None and not wait([future], limit).done:
+                kill_workers(pool)
+                pool.shutdown(wait=True)
+                yield item, None, _deadline_error(limit)
+                pool = make_pool(1)
+                continue
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                # The item killed a worker on its own: it is the culprit
+                yield item, None, error
+                pool.shutdown(wait=True)
+                pool = make_pool(1)
+            elif error is not None:
+                yield item, None, error
+            else:
+                yield item, future.result(), None
+    finally:
+        pool.shutdown(wait=True)
+
+
+def run_isolating_crashes(
+    make_pool: Callable[[int], Executor],
+    submit: Callable[[Executor, SourceT], Future],
+    items: Iterable[SourceT],
+    workers: int,
+    timeout: Optional[float] = None,
+) -> Iterator[Tuple[SourceT, Any, Optional[BaseException]]]:
+    """
+    Run a task per item in a process pool, yielding (item, result, error)
+    as each task completes.
+
+    make_pool(n) creates a pool of n workers and submit(pool, item) submits
+    an item's task. Items are consumed lazily, with at most two per worker
+    in flight. When a worker process dies, every task still in flight fails
+    with BrokenProcessPool and the pool cannot take new work, so the pool
+    is replaced and the tasks that were in flight are run again one at a
+    time in a pool of their own. Only an item that kills a worker when it
+    runs alone is yielded with the BrokenProcessPool error; the others
+    complete normally.
+
+    With a timeout, at most one task per worker is in flight, so a task
+    starts when it is submitted, and a task still running TIMEOUT_GRACE
+    seconds after timeout is yielded with a TimeoutError: the pool's
+    workers are killed and the other tasks in flight are submitted again
+    to a new pool.
+    """
+    limit = timeout + TIMEOUT_GRACE if timeout else None
+    max_in_flight = workers if limit is not None else workers * 2
+    item_iter = iter(items)
+    pool = make_pool(workers)
+    try:
+        in_flight: Dict[Future, SourceT] = {}
+        submitted: Dict[Future, float] = {}
+        while True:
+            suspects: List[SourceT] = []
+            for item in item_iter:
+                try:
+                    future = submit(pool, item)
+                except BrokenProcessPool:
+                    suspects.append(item)
+                    break
+                in_flight[future] = item
+                submitted[future] = time.monotonic()
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight and not suspects:
+                return
+            if in_flight and limit is not None:
+                now = time.monotonic()
+                overdue = [f for f in in_flight if now - submitted[f] >= limit]
+                if overdue:
+                    kill_workers(pool)
+                    pool.shutdown(wait=True)
+                    for future in overdue:
+                        submitted.pop(future)
+                        yield in_flight.pop(future), None, _deadline_error(limit)
+                    lost = []  # Tasks killed along with the overdue ones
+                    for future, item in in_flight.items():
+                        error = future.exception()
+                        if isinstance(error, BrokenProcessPool):
+                            lost.append(item)
+                        elif error is not None:
+                            yield item, None, error
+                        else:
+                            yield item, future.result(), None
+                    in_flight.clear()
+                    submitted.clear()
+                    item_iter = itertools.chain(lost, item_iter)
+                    pool = make_pool(workers)
+                    continue
+            if in_flight:
+                wait_for = None
+                if limit is not None:
+                    # Until the first task in flight is due
+                    oldest = min(submitted.values())
+                    wait_for = max(0.0, oldest + limit - time.monotonic())
+                done, _ = wait(in_flight, wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    submitted.pop(future, None)
+                    item = in_flight.pop(future)
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        suspects.append(item)
+                    elif error is not None:
+                        yield item, None, error
+                    else:
+                        yield item, future.result(), None
+            if not suspects:
+                continue
+
+            # Shutting down a broken pool settles every future it still holds
+            pool.shutdown(wait=True)
+            for future, item in in_flight.items():
+                error = future.exception()
+                if isinstance(error, BrokenProcessPool):
+                    suspects.append(item)
+                elif error is not None:
+                    yield item, None, error
+                else:
+                    yield item, future.result(), None
+            in_flight.clear()
+            submitted.clear()
+            print(
+                f"⚠ A worker process died; retrying {len(suspects)} PDF(s) "
+                "one at a time to find the cause"
+            )
+            yield from run_alone(make_pool, submit, suspects, timeout)
+            pool = make_pool(workers)
+    finally:
+        pool.shutdown(wait=True)
+
+
+def classify_failure(source: PdfInput, error: BaseException) -> str:
+    """
+    Return the error class for a failed conversion. Errors that do not
+    identify themselves are classified by reopening the PDF with pymupdf,
+    since pymupdf4llm reports encrypted and damaged files with generic errors.
+    """
+    if isinstance(error, (MemoryError, BrokenProcessPool)):
+        return "oom"
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    if isinstance(error, EmptyTextLayerError):
+        return "empty_text_layer"
+
+    try:
+        doc = open_pdf_document(source)
+    except Exception:
+        return "corrupt_xref"
+    try:
+        if doc.needs_pass:
+            return "encrypted"
+        if doc.is_repaired or doc.page_count == 0:
+            return "corrupt_xref"
+    finally:
+        doc.close()
+    return "other"
+
+
+def quarantine_path_for(output_path: str) -> str:
+    """Return the quarantine path used for a JSON output path."""
+    return os.path.splitext(output_path)[0] + QUARANTINE_SUFFIX
+
+
+class Quarantine:
+    """Failed inputs with their error class, saved as JSON after every change."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+
+    @classmethod
+    def for_output(cls, output_path: str) -> "Quarantine":
+        """Create the quarantine that belongs to a JSON output path."""
+        return cls(quarantine_path_for(output_path))
+
+    def load(self) -> Dict[str, dict]:
+        """Read the quarantine list, if one exists."""
+        self.entries = {}
+        if not os.path.exists(self.path):
+            return self.entries
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠ Could not read quarantine {self.path}: {e}")
+            return self.entries
+        self.entries = {entry["key"]: entry for entry in entries}
+        return self.entries
+
+    def save(self) -> None:
+        """Write the quarantine list atomically (or remove it when empty)."""
+        if not self.entries:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self.entries.values()), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def reset(self) -> None:
+        """Forget all previous failures."""
+        self.entries = {}
+        self.save()
+
+    def __contains__(self, source) -> bool:
+        return input_key(source) in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, source: PdfInput, error: BaseException, **context) -> dict:
+        """Classify and record a failure, returning the quarantine entry."""
+        key = input_key(source)
+        previous = self.entries.get(key, {})
+        entry = {
+            "key": key,
+            "filename": input_filename(source),
+            "error_class": classify_failure(source, error),
+            "error": str(error) or type(error).__name__,
+            "attempts": previous.get("attempts", 0) + 1,
+            "failed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **context,
+        }
+        self.entries[key] = entry
+        self.save()
+        return entry
+
+    def remove(self, source: PdfInput) -> None:
+        """Drop an input that has now been processed successfully."""
+        if self.entries.pop(input_key(source), None) is not None:
+            self.save()
+
+    def select(self, sources: Iterable[SourceT]) -> Iterator[SourceT]:
+        """Yield only the inputs that are quarantined."""
+        for source in sources:
+            if source in self:
+                yield source
+
+    def exclude(self, sources: Iterable[SourceT]) -> Iterator[SourceT]:
+        """Yield only the inputs that are not quarantined."""
+        for source in sources:
+            if source not in self:
+                yield source
+
+    def summary(self) -> str:
+        """Return e.g. '3 PDF(s) quarantined (encrypted: 1, timeout: 2)'."""
+        counts = Counter(entry["error_class"] for entry in self.entries.values())
+        classes = ", ".join(
+            f"{name}: {counts[name]}" for name in ERROR_CLASSES if counts[name]
+        )
+        return f"{len(self.entries)} PDF(s) quarantined ({classes})"
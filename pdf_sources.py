@@ -0,0 +1,249 @@
+"""
+Enumerate PDF inputs from directories, single files and ZIP/TAR archives.
+
+Directories are walked with os.scandir (see PdfDiscovery). Entries are
+listed and sorted one directory at a time and yielded as they are found,
+so on a tree of 100k+ files conversion starts after the first directory
+has been read instead of after the whole tree has been listed and sorted.
+
+Archive members are never unpacked to disk. ZIP members are yielded as lazy
+references that a worker process opens and reads on its own; TAR members
+(which may be compressed streams) are read sequentially into memory and
+passed along as bytes. Either way the PDF is opened with pymupdf straight
+from memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import os
+import tarfile
+import zipfile
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+ARCHIVE_SUFFIXES = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+
+class ArchiveMember(NamedTuple):
+    """A PDF stored inside a ZIP or TAR archive."""
+
+    archive: str
+    member: str
+    data: Optional[bytes] = None
+
+    @property
+    def filename(self) -> str:
+        """Base name of the member, used as the paper's filename."""
+        return os.path.basename(self.member)
+
+    @property
+    def source(self) -> str:
+        """Human-readable location, e.g. 'bundle.zip:2024/paper.pdf'."""
+        return f"{self.archive}:{self.member}"
+
+    def read(self) -> bytes:
+        """Return the member's bytes, reading them from a ZIP if needed."""
+        if self.data is not None:
+            return self.data
+        with zipfile.ZipFile(self.archive) as zf:
+            return zf.read(self.member)
+
+
+PdfInput = Union[str, "os.PathLike[str]", ArchiveMember]
+
+
+def is_pdf_name(name: str) -> bool:
+    """Return True for names with a .pdf extension."""
+    return name.lower().endswith(".pdf")
+
+
+def matches_any(rel_path: str, patterns: Sequence[str]) -> bool:
+    """
+    Return True if a '/'-separated relative path matches one of the glob
+    patterns, ignoring case. Patterns containing '/' are matched against
+    the whole path, others against its last component only.
+    """
+    path = rel_path.lower()
+    name = path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        pattern = pattern.lower()
+        if fnmatch.fnmatchcase(path if "/" in pattern else name, pattern):
+            return True
+    return False
+
+
+class PdfDiscovery(NamedTuple):
+    """
+    How PDFs are found in a directory.
+
+    Without recursive only the directory itself is listed. include and
+    exclude are globs (see matches_any); excluded directories are not
+    entered at all, nor are hidden ones such as .git. Symlinked files are
+    always included; symlinked directories are entered only with
+    follow_symlinks, and each real directory at most once.
+    """
+
+    recursive: bool = False
+    include: Tuple[str, ...] = ("*.pdf",)
+    exclude: Tuple[str, ...] = ()
+    follow_symlinks: bool = False
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "PdfDiscovery":
+        """Build the options added to a parser by add_discovery_arguments."""
+        return cls(
+            recursive=args.recursive,
+            include=tuple(args.include or cls._field_defaults["include"]),
+            exclude=tuple(args.exclude or ()),
+            follow_symlinks=args.follow_symlinks,
+        )
+
+    def iter_paths(self, root: str) -> Iterator[str]:
+        """
+        Yield matching file paths under root, depth first. Each directory's
+        entries are sorted by name and its files come before its
+        subdirectories. Unreadable directories are reported and skipped.
+        """
+        seen: Set[Tuple[int, int]] = set()
+        if self.follow_symlinks:
+            st = os.stat(root)
+            seen.add((st.st_dev, st.st_ino))
+        stack: List[Tuple[str, str]] = [(root, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                if directory == root:
+                    raise
+                print(f"⚠ Skipping unreadable directory {directory}: {e}")
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel_path = prefix + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                        if self._enter(entry, rel_path, seen):
+                            subdirs.append((entry.path, rel_path + "/"))
+                        continue
+                    if not entry.is_file():  # Unfollowed or broken links, devices
+                        continue
+                except OSError:
+                    continue
+                if matches_any(rel_path, self.include) and not matches_any(
+                    rel_path, self.exclude
+                ):
+                    yield entry.path
+            stack.extend(reversed(subdirs))
+
+    def _enter(self, entry: os.DirEntry, rel_path: str, seen: Set) -> bool:
+        if not self.recursive or entry.name.startswith("."):
+            return False
+        if matches_any(rel_path, self.exclude):
+            return False
+        if self.follow_symlinks:
+            st = entry.stat()
+            if (st.st_dev, st.st_ino) in seen:  # Symlink loop or second link
+                return False
+            seen.add((st.st_dev, st.st_ino))
+        return True
+
+
+def add_discovery_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add --recursive, --include, --exclude and --follow-symlinks."""
+    parser.add_argument(
+        "--recursive",
+        "-r",
+        action="store_true",
+        help="Also find PDFs in subdirectories (hidden ones are skipped).",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help="Only process files matching this glob; repeatable. Globs with "
+        "a '/' match the path below --pdf-dir (default: *.pdf).",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="GLOB",
+        help="Skip files and directories matching this glob; repeatable.",
+    )
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Descend into symlinked directories when --recursive is given.",
+    )
+
+
+def is_archive(path: str) -> bool:
+    """Return True if path is an existing file with a supported archive suffix."""
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def input_filename(source: PdfInput) -> str:
+    """Return the display filename for a path or archive member."""
+    if isinstance(source, ArchiveMember):
+        return source.filename
+    return os.path.basename(os.fspath(source))
+
+
+def input_label(source: PdfInput) -> str:
+    """Return a full location string for messages and error reports."""
+    if isinstance(source, ArchiveMember):
+        return source.source
+    return os.fspath(source)
+
+
+def input_key(source: PdfInput) -> str:
+    """
+    Return the key that identifies an input across runs: its real path, or
+    the archive's real path and the member name for archive members. Unlike
+    input_label, 'pdfs/a.pdf', './pdfs/a.pdf' and the absolute path all give
+    the same key.
+    """
+    if isinstance(source, ArchiveMember):
+        return f"{os.path.realpath(source.archive)}:{source.member}"
+    return os.path.realpath(source)
+
+
+def iter_archive_pdfs(archive_path: str) -> Iterator[ArchiveMember]:
+    """Yield every PDF member of a ZIP or TAR archive without extracting it."""
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for zip_info in zf.infolist():
+                if not zip_info.is_dir() and is_pdf_name(zip_info.filename):
+                    yield ArchiveMember(archive_path, zip_info.filename)
+        return
+
+    # Streaming mode reads compressed tarballs front to back without seeking
+    with tarfile.open(archive_path, mode="r|*") as tf:
+        for info in tf:
+            if not info.isfile() or not is_pdf_name(info.name):
+                continue
+            fileobj = tf.extractfile(info)
+            if fileobj is None:
+                continue
+            yield ArchiveMember(archive_path, info.name, fileobj.read())
+
+
+def open_pdf_document(source: PdfInput):
+    """Open a path or archive member as a pymupdf Document."""
+    import pymupdf
+
+    if isinstance(source, ArchiveMember):
+        return pymupdf.open(stream=source.read(), filetype="pdf")
+    return pymupdf.open(source)
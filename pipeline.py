@@ -0,0 +1,764 @@
+#!/usr/bin/env python3
+"""
+Run convert → clean → extract sections → collect DOIs → Mendeley check in
+one process.
+
+convert_pdfs.sh and the separate commands hand work from one stage to the
+next through files: Markdown on disk, extracted_sections.md, a temporary
+DOI list and a subprocess for the Mendeley check. The pipeline keeps every
+intermediate result in memory and writes only the final outputs
+(extracted_sections.json/.md and, after a check, the HTML report).
+Converted or cleaned Markdown, the DOI list and the raw check results are
+written only when asked for.
+
+Every stage has its own cache. An entry is keyed on a hash of the stage's
+input and settings (the PDF bytes and conversion key for convert, the text
+handed over by the previous stage for the others), so an unchanged PDF is
+not converted, cleaned or extracted again, and changing one stage's
+settings reruns only that stage and those after it. Mendeley check results
+also expire after check_max_age seconds, because the library changes
+independently of the PDFs. The wall time spent in each stage, cache
+lookups included, is reported at the end of a run.
+
+With workers > 1 (or a timeout), the PDFs whose conversion is not cached
+are converted in a process pool, as by extract_sections --workers; the
+later stages stay in this process, handling each paper as its conversion
+completes.
+
+The Mendeley library is loaded on a background thread as soon as a run
+starts, so the sync overlaps with PDF conversion. Once it has arrived, each
+paper's DOIs are checked against it as the paper finishes, and the final
+check looks up only the DOIs that were not checked yet.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import Executor, Future
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from clean_marker_output import clean_markdown
+from conversion import BACKENDS, DEFAULT_BACKEND, DEFAULT_PROFILE, PROFILES
+from extract_and_check_dois import extract_dois_from_text
+from extract_sections import (
+    PaperExtractor,
+    convert_in_worker,
+    discover_sources,
+    extract_doi,
+    found_section_keys,
+    resolve_output_path,
+    write_results,
+)
+from library_prefetch import LIBRARY_CACHE_FILE, LibraryPrefetch
+from pdf_dedup import file_digest
+from pdf_failures import classify_failure, run_isolating_crashes
+from pdf_sources import (
+    ArchiveMember,
+    PdfDiscovery,
+    PdfInput,
+    add_discovery_arguments,
+    input_filename,
+)
+
+STAGES = ("convert", "clean", "extract", "dois", "check")
+# Bump a stage's version when its output changes, to invalidate its cache
+STAGE_VERSIONS = {"convert": 1, "clean": 1, "extract": 2, "dois": 1, "check": 1}
+# Intermediate results that can be written to disk
+WRITE_CHOICES = ("markdown", "cleaned", "dois", "check")
+
+CACHE_DIRNAME = ".pipeline-cache"
+INTERMEDIATE_DIRNAME = "pipeline"
+DEFAULT_CHECK_MAX_AGE = 3600.0
+REPORT_FILENAME = "mendeley_dois_table.html"
+
+
+def paper_dois(paper: dict) -> Set[str]:
+    """Return a paper's DOI and any DOI links in its sections."""
+    dois = {paper["doi"]} if paper.get("doi") else set()
+    for key in found_section_keys(paper):
+        dois.update(extract_dois_from_text(paper[key]))
+    return dois
+
+
+def text_digest(text: str) -> str:
+    """Return the SHA-256 hex digest of a string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """
+    Outputs of one stage, one file per key under root/<stage>.
+    A cache without a root stores nothing.
+    """
+
+    def __init__(self, root: Optional[str], stage: str):
+        self.stage = stage
+        self.dir = os.path.join(root, stage) if root else None
+
+    def key(self, *parts: str) -> str:
+        """Hash the stage name, its version and the given input parts."""
+        sha = hashlib.sha256(f"{self.stage}:{STAGE_VERSIONS[self.stage]}".encode())
+        for part in parts:
+            sha.update(b"\0")
+            sha.update(part.encode("utf-8"))
+        return sha.hexdigest()
+
+    def _path(self, key: str) -> str:
+        assert self.dir is not None
+        return os.path.join(self.dir, key)
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Return the cached output, or None if missing or older than max_age."""
+        if self.dir is None:
+            return None
+        path = self._path(key)
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, output: str) -> None:
+        """Store an output atomically, so readers never see a partial entry."""
+        if self.dir is None:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(output)
+        os.replace(tmp_path, path)
+
+
+class StageStats:
+    """Wall time and cache hits of one stage over a run."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.computed = 0
+        self.cached = 0
+
+
+class PipelineResult(NamedTuple):
+    """Everything a pipeline run produced."""
+
+    results: List[dict]
+    failed: Dict[str, str]  # filename -> error class
+    dois: List[str]
+    check: Optional[dict]
+
+
+class Pipeline:
+    """
+    Chains the conversion, cleaning, extraction, DOI and Mendeley stages
+    in memory, with a cache per stage.
+
+    cache_dir=None disables caching. write names the intermediate results
+    (see WRITE_CHOICES) to save under intermediate_dir. check=False stops
+    after collecting DOIs. With library_cache set, the Mendeley library is
+    synced into that library cache (reused for check_max_age seconds)
+    instead of being downloaded in full. library_groups names group
+    libraries (ids or names) to check as well, each synced into its own
+    cache next to library_cache.
+
+    The library a check loads stays open for later runs; close() (or using
+    the pipeline as a context manager) releases it.
+
+    workers > 1 converts PDFs in that many worker processes (see
+    convert_many).
+    """
+
+    def __init__(
+        self,
+        extractor: Optional[PaperExtractor] = None,
+        cache_dir: Optional[str] = None,
+        write: Iterable[str] = (),
+        intermediate_dir: Optional[str] = None,
+        check: bool = True,
+        check_max_age: float = DEFAULT_CHECK_MAX_AGE,
+        library_cache: Optional[str] = None,
+        library_groups: Sequence[str] = (),
+        workers: int = 1,
+    ) -> None:
+        self.extractor = extractor or PaperExtractor()
+        self.caches = {stage: StageCache(cache_dir, stage) for stage in STAGES}
+        self.stats = {stage: StageStats() for stage in STAGES}
+        self.write = set(write)
+        unknown = self.write - set(WRITE_CHOICES)
+        if unknown:
+            raise ValueError(
+                f"Unknown intermediate results: {sorted(unknown)} "
+                f"(expected {WRITE_CHOICES})"
+            )
+        if self.write and not intermediate_dir:
+            raise ValueError("intermediate_dir is required to write intermediates")
+        self.intermediate_dir = intermediate_dir
+        self.check_enabled = check
+        self.check_max_age = check_max_age
+        self.library_cache = library_cache
+        self.library_groups = list(library_groups)
+        if self.library_groups and not library_cache:
+            raise ValueError("library_groups needs a library_cache")
+        self.library: Optional[LibraryPrefetch] = None
+        # Library document (None if missing) of every DOI checked this run
+        self.checked: Dict[str, Optional[Dict]] = {}
+        self.workers = workers
+
+    def _run_stage(
+        self,
+        stage: str,
+        key_parts: List[str],
+        compute: Callable[[], str],
+        max_age: Optional[float] = None,
+    ) -> str:
+        """Return a stage's cached output for key_parts, computing it on a miss."""
+        cache = self.caches[stage]
+        stats = self.stats[stage]
+        started = time.perf_counter()
+        try:
+            key = cache.key(*key_parts)
+            output = cache.get(key, max_age)
+            if output is not None:
+                stats.cached += 1
+                return output
+            output = compute()
+            cache.put(key, output)
+            stats.computed += 1
+            return output
+        finally:
+            stats.seconds += time.perf_counter() - started
+
+    def _write_intermediate(self, kind: str, name: str, text: str) -> None:
+        if kind not in self.write:
+            return
+        assert self.intermediate_dir is not None
+        path = Path(self.intermediate_dir) / kind / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    def convert(self, source: PdfInput) -> str:
+        """Convert a PDF to Markdown (convert stage)."""
+        extractor = self.extractor
+        return self._run_stage(
+            "convert",
+            [file_digest(source), extractor.conversion_key],
+            lambda: extractor.convert_checked(source),
+        )
+
+    def convert_many(
+        self, sources: Iterable[PdfInput]
+    ) -> Iterator[Tuple[PdfInput, Optional[str], Optional[BaseException]]]:
+        """
+        Convert PDFs to Markdown (convert stage), yielding (source, md_text,
+        error) per PDF. With workers > 1 or a timeout, cache misses are
+        converted in a process pool and arrive in completion order; a PDF
+        that kills its worker or overruns the timeout fails on its own (see
+        run_isolating_crashes).
+        """
+        extractor = self.extractor
+        if self.workers <= 1 and not extractor.timeout:
+            for source in sources:
+                try:
+                    yield source, self.convert(source), None
+                except Exception as e:
+                    yield source, None, e
+            return
+
+        cache = self.caches["convert"]
+        stats = self.stats["convert"]
+        cached: Set[str] = set()
+
+        def submit(pool: Executor, item: Tuple[PdfInput, str]) -> Future:
+            source, key = item
+            md_text = cache.get(key)
+            if md_text is None:
+                return pool.submit(convert_in_worker, source)
+            # A cached conversion never reaches the pool
+            cached.add(key)
+            stats.cached += 1
+            future: Future = Future()
+            future.set_result(md_text)
+            return future
+
+        def keyed() -> Iterator[Tuple[PdfInput, str]]:
+            for source in sources:
+                yield source, cache.key(file_digest(source), extractor.conversion_key)
+
+        # The parent's wall time in this stage: cache lookups and waiting on
+        # the pool, not the sum of the workers' conversion times
+        started = time.perf_counter()
+        for (source, key), md_text, error in run_isolating_crashes(
+            extractor.worker_pool,
+            submit,
+            keyed(),
+            max(self.workers, 1),
+            extractor.timeout,
+        ):
+            if key in cached:
+                cached.discard(key)
+            elif error is None:
+                cache.put(key, md_text)
+                stats.computed += 1
+            stats.seconds += time.perf_counter() - started
+            yield source, md_text, error
+            started = time.perf_counter()
+        stats.seconds += time.perf_counter() - started
+
+    def clean(self, md_text: str) -> str:
+        """Strip footers, figures and references (clean stage)."""
+        return self._run_stage(
+            "clean", [text_digest(md_text)], lambda: clean_markdown(md_text)
+        )
+
+    def extract(self, cleaned: str, filename: str) -> dict:
+        """Extract the sections of a paper's cleaned Markdown (extract stage)."""
+        extractor = self.extractor
+        output = self._run_stage(
+            "extract",
+            [text_digest(cleaned), filename, str(extractor.fuzzy_threshold)],
+            lambda: json.dumps(extractor.extract_markdown(cleaned, filename)),
+        )
+        data: dict = json.loads(output)
+        return data
+
+    def process(self, source: PdfInput) -> dict:
+        """Run one PDF through convert, clean and extract."""
+        return self.process_markdown(source, self.convert(source))
+
+    def process_markdown(self, source: PdfInput, md_text: str) -> dict:
+        """Run a converted PDF through clean and extract."""
+        filename = input_filename(source)
+        stem = Path(filename).stem
+        self._write_intermediate("markdown", f"{stem}.md", md_text)
+        cleaned = self.clean(md_text)
+        self._write_intermediate("cleaned", f"{stem}.md", cleaned)
+        data = self.extract(cleaned, filename)
+
+        started = time.perf_counter()
+        if "doi" not in data:
+            # Cleaning drops publisher footers, which sometimes hold the only DOI
+            doi = extract_doi(md_text[:5000])
+            if doi:
+                data["doi"] = doi
+        data["conversion_profile"] = self.extractor.conversion_key
+        if isinstance(source, ArchiveMember):
+            data["source"] = source.source
+        self.stats["extract"].seconds += time.perf_counter() - started
+        return data
+
+    def collect_dois(self, results: List[dict]) -> List[str]:
+        """
+        Collect the DOIs of the papers and any DOI links in their sections
+        (dois stage), as `pdf-analysis dois` finds them in the exported
+        Markdown.
+        """
+
+        def compute() -> str:
+            dois: Set[str] = set()
+            for paper in results:
+                dois.update(paper_dois(paper))
+            return "\n".join(sorted(dois))
+
+        output = self._run_stage("dois", [json.dumps(results, sort_keys=True)], compute)
+        dois = output.split("\n") if output else []
+        self._write_intermediate("dois", "dois.txt", output)
+        return dois
+
+    def _load_library(self) -> Mapping[str, Dict]:
+        """Fetch the Mendeley library index (runs on the prefetch thread)."""
+        # Imported here: they load requests, which most runs never need
+        import check_mendeley_dois_v2 as mendeley
+        from mendeley_libraries import resolve_libraries, sync_libraries
+        from mendeley_library_cache import sync_library
+
+        # No one can answer a login prompt on the prefetch thread
+        token = mendeley.get_access_token(interactive=False)
+        if not self.library_cache:
+            return mendeley.fetch_library_dois(token)
+        if self.library_groups:
+            return sync_libraries(
+                token,
+                resolve_libraries(token, self.library_groups),
+                self.library_cache,
+                max_age=self.check_max_age,
+            )
+        with sync_library(
+            token, self.library_cache, max_age=self.check_max_age
+        ) as cache:
+            # Mapped from disk rather than held in memory as a dict
+            return cache.doi_index()
+
+    def start_library_prefetch(self) -> Optional[LibraryPrefetch]:
+        """
+        Start loading the Mendeley library in the background. Returns None,
+        after printing a warning, if there is no saved Mendeley token.
+        """
+        import check_mendeley_dois_v2 as mendeley
+
+        if not os.path.exists(mendeley.TOKEN_FILE):
+            print(
+                "⚠ Mendeley check skipped: no saved token. Run "
+                "'python check_mendeley_dois_v2.py --interactive' once to log in."
+            )
+            return None
+        print("Loading the Mendeley library in the background...")
+        self.library = LibraryPrefetch(self._load_library).start()
+        return self.library
+
+    def _check_new(self, dois: List[str], library: Mapping[str, Dict]) -> None:
+        """Check the DOIs not checked yet this run and remember the outcome."""
+        from check_mendeley_dois_v2 import check_dois
+
+        new = [doi for doi in dois if doi not in self.checked]
+        found, missing = check_dois(new, library)
+        # check_dois keeps the order of its input, so found lines up with
+        # the DOIs that are not missing
+        missing_set = set(missing)
+        found_docs = iter(found)
+        for doi in new:
+            self.checked[doi] = None if doi.strip() in missing_set else next(found_docs)
+
+    def check_paper(self, paper: dict) -> Optional[List[str]]:
+        """
+        Check one paper's DOIs against the library if it has loaded, and
+        print the outcome. Returns the DOIs not in the library, or None if
+        the library is not available yet. The outcome is kept for check(),
+        so no DOI is looked up twice in a run.
+        """
+        if self.library is None or not self.library.ready():
+            return None
+        dois = sorted(paper_dois(paper))
+        if not dois:
+            return []
+        self._check_new(dois, self.library.wait())
+        missing = [doi for doi in dois if self.checked[doi] is None]
+        print(
+            f"  Mendeley: {paper['filename']}: {len(dois) - len(missing)} of "
+            f"{len(dois)} DOI(s) already in library"
+        )
+        return missing
+
+    def check(self, dois: List[str]) -> Optional[dict]:
+        """
+        Check DOIs against the Mendeley library in this process (check
+        stage), using the library loaded in the background. DOIs that
+        check_paper already looked up are not checked again. Returns None,
+        after printing a warning, if there is no saved Mendeley token or the
+        check fails.
+        """
+        import check_mendeley_dois_v2 as mendeley
+
+        library = self.library or self.start_library_prefetch()
+        if library is None:
+            return None
+
+        def compute() -> str:
+            assert library is not None
+            self._check_new(dois, library.wait())
+            found: List[Dict] = []
+            missing: List[str] = []
+            for doi in dois:
+                doc = self.checked[doi]
+                if doc is None:
+                    missing.append(doi)
+                else:
+                    found.append(doc)
+            api = mendeley.get_client().stats.as_dict()
+            return json.dumps(mendeley.build_results(dois, found, missing, api))
+
+        try:
+            output = self._run_stage(
+                "check",
+                [
+                    "\n".join(dois),
+                    self.library_cache or "",
+                    "\n".join(self.library_groups),
+                ],
+                compute,
+                self.check_max_age,
+            )
+        except Exception as e:
+            print(f"⚠ Mendeley check failed: {e}")
+            return None
+        self._write_intermediate("check", "mendeley_results.json", output)
+        results: dict = json.loads(output)
+        return results
+
+    def run(self, sources: Iterable[PdfInput]) -> PipelineResult:
+        """Run every stage over the inputs; a failing PDF does not stop the run."""
+        self.checked = {}
+        if self.check_enabled:
+            self.start_library_prefetch()
+        results = []
+        failed = {}
+        unchecked: List[dict] = []
+        for source, md_text, error in self.convert_many(sources):
+            filename = input_filename(source)
+            try:
+                if error is not None:
+                    raise error
+                assert md_text is not None
+                data = self.process_markdown(source, md_text)
+            except Exception as e:
+                failed[filename] = classify_failure(source, e)
+                print(f"  Error processing {filename} [{failed[filename]}]: {e}")
+                continue
+            results.append(data)
+            print(f"Processed {filename}")
+            print(f"  Found sections: {found_section_keys(data)}")
+            # Check every paper finished so far once the library is in
+            unchecked.append(data)
+            while unchecked and self.check_paper(unchecked[0]) is not None:
+                unchecked.pop(0)
+
+        dois = self.collect_dois(results)
+        print(f"\n✓ Found {len(dois)} DOIs")
+        check = None
+        if self.check_enabled and dois and self.library is not None:
+            print("Checking DOIs against Mendeley library...\n")
+            check = self.check(dois)
+        if self.library is not None:
+            try:
+                self.library.wait()
+                print(
+                    f"✓ Mendeley library loaded in {self.library.seconds:.1f}s, "
+                    "alongside conversion"
+                )
+            except Exception:
+                pass  # Reported by check()
+        return PipelineResult(results, failed, dois, check)
+
+    def close(self) -> None:
+        """
+        Release the loaded Mendeley library, e.g. unmap the library cache's
+        DoiIndex. Waits for a library that is still loading.
+        """
+        library, self.library = self.library, None
+        if library is None:
+            return
+        try:
+            index = library.wait()
+        except Exception:
+            return  # Nothing was loaded
+        close = getattr(index, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def timing_lines(self) -> List[str]:
+        """Return one line per stage with its wall time and cache hits."""
+        lines = []
+        for stage in STAGES:
+            stats = self.stats[stage]
+            lines.append(
+                f"{stage:<8} {stats.seconds:>8.2f}s  "
+                f"{stats.computed} computed, {stats.cached} cached"
+            )
+        return lines
+
+    def timing_summary(self) -> str:
+        """Return e.g. 'Stage times: convert 12.3s, clean 0.0s, ...'."""
+        parts = ", ".join(
+            f"{stage} {self.stats[stage].seconds:.1f}s" for stage in STAGES
+        )
+        return f"Stage times: {parts}"
+
+
+def run_pipeline(
+    pdf_dir: str,
+    output_file: str,
+    pipeline: Pipeline,
+    discovery: Optional[PdfDiscovery] = None,
+) -> int:
+    """
+    Run the pipeline over a directory or archive of PDFs and write
+    extracted_sections.json/.md and, if DOIs were checked, the HTML report
+    next to it. Returns a process exit code.
+    """
+    discovered = discover_sources(pdf_dir, discovery)
+    if discovered is None:
+        return 1
+    sources, output_base = discovered
+    output_path = resolve_output_path(output_base, output_file)
+    print(f"Conversion: {pipeline.extractor.conversion_key}")
+
+    started = time.perf_counter()
+    outcome = pipeline.run(sources)
+    if not outcome.results and not outcome.failed:
+        print("No PDF files found.")
+        return 1
+
+    notes = [f"Conversion: {pipeline.extractor.conversion_key}"]
+    if outcome.failed:
+        notes.append(f"Failed: {len(outcome.failed)} PDF(s)")
+    notes.append(pipeline.timing_summary())
+    markdown_file = write_results(outcome.results, output_path, notes)
+    outputs = [
+        f"{output_path} (JSON, for programmatic access)",
+        f"{markdown_file} (Markdown, for LLM analysis)",
+    ]
+    if outcome.check is not None:
+        from extract_and_check_dois import generate_html_table
+
+        report = os.path.join(os.path.dirname(output_path), REPORT_FILENAME)
+        generate_html_table(outcome.check, report)
+        outputs.append(f"{report} (Mendeley check)")
+
+    print("\nStage timings (wall time):")
+    for line in pipeline.timing_lines():
+        print(f"  {line}")
+    print(f"  {'total':<8} {time.perf_counter() - started:>8.2f}s")
+    if outcome.failed:
+        print(f"\n⚠ {len(outcome.failed)} PDF(s) failed")
+
+    print("\n✓ Pipeline complete. Output files:")
+    for line in outputs:
+        print(f"  - {line}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for running the whole pipeline over a folder of PDFs."""
+    parser = argparse.ArgumentParser(
+        description="Convert, clean and extract PDFs, then check their DOIs "
+        "against Mendeley, in one process."
+    )
+    parser.add_argument(
+        "--pdf-dir",
+        default="pdfs",
+        help="Directory containing PDF files, or a ZIP/TAR archive of PDFs.",
+    )
+    parser.add_argument(
+        "--output",
+        default="extracted_sections.json",
+        help="JSON output file (placed inside --pdf-dir if no directory is given).",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default=DEFAULT_PROFILE,
+        help="Conversion profile (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=list(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help="Converter backend (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Give up on a PDF after this many seconds of conversion.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Convert PDFs in this many worker processes (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"Stage cache directory (default: {CACHE_DIRNAME} next to the output).",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Run every stage without caching."
+    )
+    parser.add_argument(
+        "--write",
+        nargs="+",
+        choices=WRITE_CHOICES,
+        default=[],
+        help="Also save these intermediate results to --intermediate-dir.",
+    )
+    parser.add_argument(
+        "--intermediate-dir",
+        help=f"Where --write saves files (default: {INTERMEDIATE_DIRNAME}/ next "
+        "to the output).",
+    )
+    parser.add_argument(
+        "--no-check",
+        action="store_true",
+        help="Collect DOIs but do not check them against Mendeley.",
+    )
+    parser.add_argument(
+        "--check-max-age",
+        type=float,
+        default=DEFAULT_CHECK_MAX_AGE,
+        help="Reuse cached Mendeley results for this many seconds "
+        "(default: %(default)s).",
+    )
+    parser.add_argument(
+        "--library-cache",
+        default=LIBRARY_CACHE_FILE,
+        help="Mendeley library cache to sync and check against "
+        "(default: %(default)s; '' downloads the whole library every run).",
+    )
+    parser.add_argument(
+        "--library-group",
+        action="append",
+        default=[],
+        metavar="ID_OR_NAME",
+        help="Also check this Mendeley group library, cached next to "
+        "--library-cache (repeat for several).",
+    )
+    add_discovery_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.library_group and not args.library_cache:
+        parser.error("--library-group needs a --library-cache")
+
+    # Stage caches and intermediates live next to the output by default
+    output_dir = os.path.dirname(args.output)
+    if not output_dir:
+        output_dir = (
+            os.path.dirname(args.pdf_dir)
+            if os.path.isfile(args.pdf_dir)
+            else args.pdf_dir
+        )
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or os.path.join(output_dir, CACHE_DIRNAME)
+    with Pipeline(
+        PaperExtractor(
+            timeout=args.timeout, profile=args.profile, backend=args.backend
+        ),
+        cache_dir=cache_dir,
+        write=args.write,
+        intermediate_dir=args.intermediate_dir
+        or os.path.join(output_dir, INTERMEDIATE_DIRNAME),
+        check=not args.no_check,
+        check_max_age=args.check_max_age,
+        library_cache=args.library_cache or None,
+        library_groups=args.library_group,
+        workers=args.workers,
+    ) as pipeline:
+        return run_pipeline(
+            args.pdf_dir, args.output, pipeline, PdfDiscovery.from_args(args)
+        )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,241 @@
+"""
+Checkpoint journal for long extraction runs.
+
+Every finished PDF is appended to a JSONL journal next to the output file as
+soon as it completes. Each record is written with a single append and
+fsync'd, so an interrupted run leaves at most one torn trailing line, which
+is dropped on the next load. A resumed run skips inputs already in the
+journal and the final JSON/Markdown are rebuilt from it without converting
+anything again.
+
+A record is keyed by the input's real location (see input_key), so a run
+resumed with the folder spelled differently still finds it. A record
+stores the file's size and modification time and the conversion profile
+key; an input that changed, or was converted with another profile, is
+processed again. Only these small fields and each record's offset in the
+file are kept in memory; results are read back from the journal when the
+final outputs are written, so memory does not grow with the corpus.
+
+JournalWriter moves serializing and fsync'ing records onto a background
+thread fed through a bounded queue, so conversion continues while results
+are written and a slow disk holds conversion back instead of piling up
+results in memory.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pdf_sources import ArchiveMember, PdfInput, input_key
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+WRITE_QUEUE_SIZE = 64  # Finished results waiting for the writer thread
+
+
+def journal_path_for(output_path: str) -> str:
+    """Return the journal path used for a JSON output path."""
+    return os.path.splitext(output_path)[0] + JOURNAL_SUFFIX
+
+
+def source_fingerprint(source: PdfInput) -> Optional[List[int]]:
+    """
+    Return [size, mtime_ns] of the file backing an input (the archive for
+    archive members), or None if it cannot be stat'ed.
+    """
+    path = source.archive if isinstance(source, ArchiveMember) else source
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class RunJournal:
+    """Append-only record of the PDFs a run has finished."""
+
+    def __init__(self, path: str, conversion: Optional[str] = None):
+        self.path = path
+        self.conversion = conversion
+        self.entries: Dict[str, dict] = {}
+        self.skipped = 0
+
+    @classmethod
+    def for_output(
+        cls, output_path: str, conversion: Optional[str] = None
+    ) -> "RunJournal":
+        """Create the journal that belongs to a JSON output path."""
+        return cls(journal_path_for(output_path), conversion)
+
+    def load(self) -> Dict[str, dict]:
+        """
+        Read existing records, dropping a torn trailing line left by an
+        interrupted write. Later records for the same key replace earlier ones.
+        """
+        self.entries = {}
+        if not os.path.exists(self.path):
+            return self.entries
+
+        good_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self.entries[record["key"]] = _entry(record, good_end)
+                good_end += len(line)
+            size = f.seek(0, os.SEEK_END)
+
+        if good_end < size:
+            print(f"⚠ Dropping incomplete record at the end of {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+        return self.entries
+
+    def reset(self) -> None:
+        """Start an empty journal, discarding any previous run."""
+        self.entries = {}
+        self.skipped = 0
+        with open(self.path, "wb"):
+            pass
+
+    def is_complete(self, source: PdfInput) -> bool:
+        """
+        Return True if the input is journaled with the same conversion
+        profile and has not changed since.
+        """
+        record = self.entries.get(input_key(source))
+        return (
+            record is not None
+            and record.get("conversion") == self.conversion
+            and record.get("fingerprint") == source_fingerprint(source)
+        )
+
+    def pending(self, sources: Iterable[PdfInput]) -> Iterator[PdfInput]:
+        """Yield the inputs that still need processing, counting the rest."""
+        for source in sources:
+            if self.is_complete(source):
+                self.skipped += 1
+            else:
+                yield source
+
+    def record(self, source: PdfInput, result: dict) -> None:
+        """Durably append a finished result for an input."""
+        key = input_key(source)
+        record = {
+            "key": key,
+            "fingerprint": source_fingerprint(source),
+            "conversion": self.conversion,
+            "result": result,
+        }
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            offset = os.lseek(fd, 0, os.SEEK_END)
+            view = memoryview(line)
+            while view:
+                view = view[os.write(fd, view) :]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self.entries.pop(key, None)  # Keep completion order
+        self.entries[key] = _entry(record, offset)
+
+    def result(self, source: PdfInput) -> Optional[dict]:
+        """Return the journaled result of an input, read from disk, or None."""
+        entry = self.entries.get(input_key(source))
+        if entry is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(entry["offset"])
+            result: dict = json.loads(f.readline())["result"]
+        return result
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def iter_items(self) -> Iterator[Tuple[str, dict]]:
+        """Yield (key, result) for every journaled input, read from disk."""
+        if not self.entries:
+            return
+        with open(self.path, "rb") as f:
+            for key, entry in list(self.entries.items()):
+                f.seek(entry["offset"])
+                yield key, json.loads(f.readline())["result"]
+
+    def iter_results(self) -> Iterator[dict]:
+        """Yield all journaled results in completion order, read from disk."""
+        for _key, result in self.iter_items():
+            yield result
+
+    def results(self) -> List[dict]:
+        """Return all journaled results in completion order."""
+        return list(self.iter_results())
+
+
+def _entry(record: dict, offset: int) -> dict:
+    """Return the in-memory part of a journal record (no result)."""
+    return {
+        "fingerprint": record.get("fingerprint"),
+        "conversion": record.get("conversion"),
+        "offset": offset,
+    }
+
+
+class JournalWriter:
+    """
+    Records results in a RunJournal from a background thread.
+
+    record() hands a result to the writer through a queue of at most
+    maxsize entries and blocks while it is full. Use as a context manager:
+    leaving the block waits until every queued result is on disk, and an
+    error raised while writing is re-raised, at the latest on exit.
+    """
+
+    def __init__(self, journal: RunJournal, maxsize: int = WRITE_QUEUE_SIZE):
+        self.journal = journal
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.error: Optional[BaseException] = None
+        self.waited = 0.0  # Seconds record() spent blocked on a full queue
+        self._thread = threading.Thread(
+            target=self._run, name="journal-writer", daemon=True
+        )
+
+    def __enter__(self) -> "JournalWriter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.queue.put(None)
+        self._thread.join()
+        if exc_type is None and self.error is not None:
+            raise self.error
+
+    def record(self, source: PdfInput, result: dict) -> None:
+        """Queue a finished result, waiting while the writer is behind."""
+        if self.error is not None:
+            raise self.error
+        try:
+            self.queue.put_nowait((source, result))
+        except queue.Full:
+            started = time.perf_counter()
+            self.queue.put((source, result))
+            self.waited += time.perf_counter() - started
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is None:  # After a failure, drain so producers never hang
+                try:
+                    self.journal.record(*item)
+                except BaseException as e:
+                    self.error = e
@@ -3,13 +3,17 @@ Tests for check_mendeley_dois_v2.py
 """
 
 import json
+import threading
+import time
 from unittest.mock import Mock, patch
 
 import pytest
+import requests
 
 from check_mendeley_dois_v2 import (
     check_dois,
     fetch_library_dois,
+    get_access_token,
     print_results,
     save_results,
 )
@@ -129,7 +133,7 @@ class TestCheckDois:
 class TestFetchLibraryDois:
     """Tests for fetch_library_dois function"""
 
-    @patch("check_mendeley_dois_v2.requests.get")
+    @patch("mendeley_client.MendeleyClient.get")
     def test_fetch_library_dois_single_page(self, mock_get):
         """Test fetching library DOIs with single page of results"""
         mock_response = Mock()
@@ -161,7 +165,7 @@ class TestFetchLibraryDois:
         assert result["10.1038/nature12345"]["title"] == "Test Paper 1"
         assert result["10.1126/science.abc123"]["title"] == "Test Paper 2"
 
-    @patch("check_mendeley_dois_v2.requests.get")
+    @patch("mendeley_client.MendeleyClient.get")
     def test_fetch_library_dois_skip_documents_without_doi(self, mock_get):
         """Test that documents without DOIs are skipped"""
         mock_response = Mock()
@@ -195,7 +199,7 @@ class TestFetchLibraryDois:
         assert len(result) == 1
         assert "10.1038/nature12345" in result
 
-    @patch("check_mendeley_dois_v2.requests.get")
+    @patch("mendeley_client.MendeleyClient.get")
     def test_fetch_library_dois_case_insensitive_storage(self, mock_get):
         """Test that DOIs are stored in lowercase for case-insensitive matching"""
         mock_response = Mock()
@@ -217,7 +221,7 @@ class TestFetchLibraryDois:
         # But original case preserved in value
         assert result["10.1038/nature12345"]["doi"] == "10.1038/NATURE12345"
 
-    @patch("check_mendeley_dois_v2.requests.get")
+    @patch("mendeley_client.MendeleyClient.get")
     def test_fetch_library_dois_handles_api_error(self, mock_get):
         """Test that API errors are handled properly"""
         mock_response = Mock()
@@ -230,7 +234,7 @@ class TestFetchLibraryDois:
 
         assert "Failed to fetch documents" in str(excinfo.value)
 
-    @patch("check_mendeley_dois_v2.requests.get")
+    @patch("mendeley_client.MendeleyClient.get")
     def test_fetch_library_dois_pagination(self, mock_get):
         """Test that pagination works correctly with multiple pages"""
         # First page response
@@ -284,10 +288,10 @@ class TestFetchLibraryDois:
         assert result["10.1038/nature11111"]["title"] == "Paper 1"
         assert result["10.1038/nature33333"]["title"] == "Paper 3"
 
-        # Verify requests.get was called twice (once per page)
+        # Verify the client was called twice (once per page)
         assert mock_get.call_count == 2
 
-    @patch("check_mendeley_dois_v2.requests.get")
+    @patch("mendeley_client.MendeleyClient.get")
     def test_fetch_library_dois_pagination_multiple_links(self, mock_get):
         """Test pagination with multiple links in Link header"""
         # Response with multiple links in Link header
@@ -324,6 +328,124 @@ class TestFetchLibraryDois:
         second_call_url = mock_get.call_args_list[1][0][0]
         assert "next_marker" in second_call_url
 
+    @patch("mendeley_client.MendeleyClient.get")
+    def test_fetch_library_dois_requests_largest_pages(self, mock_get):
+        """Test that the first request asks for the largest page size only once"""
+        first = Mock(status_code=200, links={"next": {"url": "https://next?limit=500"}})
+        first.json.return_value = []
+        last = Mock(status_code=200, links={})
+        last.json.return_value = []
+        mock_get.side_effect = [first, last]
+
+        fetch_library_dois("fake_token")
+
+        first_call, second_call = mock_get.call_args_list
+        assert first_call.kwargs["params"] == {"limit": 500}
+        assert second_call.kwargs["params"] is None
+
+    @patch("mendeley_client.MendeleyClient.get")
+    def test_fetch_library_dois_reports_progress(self, mock_get):
+        """Test that progress is called with the running document count"""
+        first = Mock(status_code=200, links={"next": {"url": "https://next"}})
+        first.json.return_value = [{"id": "1"}, {"id": "2"}]
+        last = Mock(status_code=200, links={})
+        last.json.return_value = [{"id": "3"}]
+        mock_get.side_effect = [first, last]
+        counts = []
+
+        fetch_library_dois("fake_token", progress=counts.append)
+
+        assert counts == [2, 3]
+
+
+class TestGetAccessToken:
+    """Tests for get_access_token"""
+
+    @pytest.fixture
+    def token_file(self, tmp_path, monkeypatch):
+        """Credentials set and the token file in a temporary directory"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr("mendeley_api.CLIENT_ID", "id")
+        monkeypatch.setattr("mendeley_api.CLIENT_SECRET", "secret")
+        return tmp_path / "mendeley_token.json"
+
+    def save_token(self, token_file, expires_in):
+        """Save a token expiring expires_in seconds from now"""
+        token_file.write_text(
+            json.dumps(
+                {
+                    "access_token": "old",
+                    "refresh_token": "r1",
+                    "expires_at": time.time() + expires_in,
+                }
+            )
+        )
+
+    def test_fresh_token_is_reused(self, token_file):
+        """Test that a token well before expiry is used without a request"""
+        self.save_token(token_file, 3600)
+        with patch("mendeley_client.MendeleyClient.post") as post:
+            assert get_access_token() == "old"
+        post.assert_not_called()
+
+    def test_expiring_token_is_refreshed(self, token_file):
+        """Test that a token about to expire is refreshed and saved"""
+        self.save_token(token_file, 60)
+        refreshed = Mock(status_code=200)
+        refreshed.json.return_value = {"access_token": "new", "expires_in": 3600}
+        with patch("mendeley_client.MendeleyClient.post", return_value=refreshed):
+            assert get_access_token() == "new"
+
+        saved = json.loads(token_file.read_text())
+        assert saved["refresh_token"] == "r1"
+        assert saved["expires_at"] > time.time() + 3000
+
+    def test_concurrent_runs_refresh_once(self, token_file):
+        """Test that runs starting together share one refresh"""
+        self.save_token(token_file, 0)
+        calls = []
+
+        def post(url, data=None):
+            calls.append(data["refresh_token"])
+            time.sleep(0.2)  # Others reach the lock meanwhile
+            response = Mock(status_code=200)
+            response.json.return_value = {
+                "access_token": f"new{len(calls)}",
+                "refresh_token": f"r{len(calls) + 1}",
+                "expires_in": 3600,
+            }
+            return response
+
+        tokens = []
+        with patch("mendeley_client.MendeleyClient.post", side_effect=post):
+            threads = [
+                threading.Thread(target=lambda: tokens.append(get_access_token()))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert calls == ["r1"]
+        assert tokens == ["new1"] * 4
+
+    def test_network_error_keeps_token(self, token_file):
+        """Test that a failed refresh request leaves the saved token alone"""
+        self.save_token(token_file, 0)
+        error = requests.exceptions.ConnectionError("offline")
+        with patch("mendeley_client.MendeleyClient.post", side_effect=error):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                get_access_token(interactive=False)
+        assert token_file.exists()
+
+    def test_non_interactive_never_prompts(self, token_file):
+        """Test that without a saved token interactive=False raises"""
+        with patch("builtins.input") as prompt:
+            with pytest.raises(ValueError, match="--interactive"):
+                get_access_token(interactive=False)
+        prompt.assert_not_called()
+
 
 class TestSaveResults:
     """Tests for save_results function"""
@@ -357,6 +479,16 @@ class TestSaveResults:
         assert result["in_library"][0]["doi"] == "10.1038/nature12345"
         assert "10.1126/science.abc123" in result["not_in_library"]
 
+    def test_save_results_includes_api_stats(self, tmp_path):
+        """Test that API retry statistics are saved when given"""
+        output_file = tmp_path / "results.json"
+        api = {"requests": 5, "retries": 2, "throttled": 1, "wait_seconds": 3.5}
+
+        save_results(["10.1/a"], [], ["10.1/a"], str(output_file), api=api)
+
+        result = json.loads(output_file.read_text())
+        assert result["api"] == api
+
     def test_save_results_all_found(self, tmp_path):
         """Test save_results when all DOIs are found"""
         output_file = tmp_path / "results.json"
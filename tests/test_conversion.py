@@ -0,0 +1,199 @@
+"""
+Tests for conversion.py
+"""
+
+import importlib
+import os
+
+import pytest
+
+from conversion import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    DEFAULT_PROFILE,
+    PROFILES,
+    ConverterBackend,
+    get_backend,
+    get_profile,
+    to_markdown,
+)
+
+pymupdf4llm = pytest.importorskip("pymupdf4llm")
+
+
+class TestGetProfile:
+    """Tests for get_profile function"""
+
+    def test_known_profiles(self):
+        """Test that the three named profiles exist"""
+        assert set(PROFILES) == {"fast-text", "balanced", "full"}
+        assert get_profile(DEFAULT_PROFILE).name == "full"
+
+    def test_unknown_profile_raises(self):
+        """Test that an unknown name lists the valid choices"""
+        with pytest.raises(ValueError, match="fast-text"):
+            get_profile("turbo")
+
+
+class TestProfileKey:
+    """Tests for ConversionProfile.key"""
+
+    def test_key_is_name_without_overrides(self):
+        """Test that a plain profile is keyed by its name"""
+        assert get_profile("fast-text").key() == "fast-text"
+
+    def test_key_changes_with_overrides(self):
+        """Test that overridden options produce a distinct, stable key"""
+        profile = get_profile("balanced")
+        key = profile.key({"dpi": 300})
+        assert key.startswith("balanced+")
+        assert key == profile.key({"dpi": 300})
+        assert key != profile.key({"dpi": 72})
+
+
+class TestToMarkdown:
+    """Tests for to_markdown function"""
+
+    def test_full_profile_uses_defaults(self, mocker):
+        """Test that the full profile calls pymupdf4llm with no options"""
+        convert = mocker.patch("pymupdf4llm.to_markdown", return_value="# Text")
+        assert to_markdown("paper.pdf", get_profile("full")) == "# Text"
+        convert.assert_called_once_with("paper.pdf")
+
+    def test_fast_text_uses_classic_path(self, mocker):
+        """Test that fast-text skips layout analysis and image/table work"""
+        mocker.patch.object(pymupdf4llm, "_use_layout", True, create=True)
+        layout = mocker.patch("pymupdf4llm.to_markdown")
+        classic = mocker.patch(
+            "pymupdf4llm.helpers.pymupdf_rag.to_markdown", return_value="text"
+        )
+
+        assert to_markdown("paper.pdf", get_profile("fast-text")) == "text"
+
+        layout.assert_not_called()
+        options = classic.call_args.kwargs
+        assert options["ignore_images"] is True
+        assert options["table_strategy"] is None
+
+    def test_layout_options_only_with_layout(self, mocker):
+        """Test that layout-only options are dropped on the classic path"""
+        convert = mocker.patch("pymupdf4llm.to_markdown", return_value="")
+        mocker.patch.object(pymupdf4llm, "_use_layout", False, create=True)
+        to_markdown("paper.pdf", get_profile("balanced"))
+        assert "use_ocr" not in convert.call_args.kwargs
+
+        mocker.patch.object(pymupdf4llm, "_use_layout", True, create=True)
+        to_markdown("paper.pdf", get_profile("balanced"))
+        assert convert.call_args.kwargs["use_ocr"] is False
+
+    def test_private_pymupdf4llm_hooks_exist(self):
+        """Test that the installed pymupdf4llm still has the private hooks
+        profiles rely on; to_markdown falls back silently without them"""
+        assert isinstance(pymupdf4llm._use_layout, bool)
+        classic = importlib.import_module("pymupdf4llm.helpers.pymupdf_rag")
+        assert callable(classic.to_markdown)
+        assert pymupdf4llm.helpers.pymupdf_rag is classic
+
+    def test_extra_options_override_profile(self, mocker):
+        """Test that extra options win over the profile's options"""
+        convert = mocker.patch("pymupdf4llm.to_markdown", return_value="")
+        mocker.patch.object(pymupdf4llm, "_use_layout", False, create=True)
+        to_markdown("paper.pdf", get_profile("balanced"), {"table_strategy": None})
+        assert convert.call_args.kwargs["table_strategy"] is None
+
+
+class TestBackends:
+    """Tests for the converter backend registry"""
+
+    def test_registry(self):
+        """Test that the built-in backends are registered"""
+        assert set(BACKENDS) == {"pymupdf4llm", "pymupdf-text", "marker"}
+        assert isinstance(get_backend(DEFAULT_BACKEND), ConverterBackend)
+
+    def test_unknown_backend_raises(self):
+        """Test that an unknown name lists the valid choices"""
+        with pytest.raises(ValueError, match="pymupdf-text"):
+            get_backend("pdftotext")
+
+    def test_conversion_keys(self):
+        """Test that keys stay compatible and ignore unused profiles"""
+        fast = get_profile("fast-text")
+        assert get_backend("pymupdf4llm").key(fast) == "fast-text"
+        assert get_backend("pymupdf-text").key(fast) == "pymupdf-text"
+        assert get_backend("marker").key(fast) == "marker"
+
+    def test_pymupdf_text_backend(self, tmp_path):
+        """Test that the raw text backend returns each page's text"""
+        pymupdf = pytest.importorskip("pymupdf")
+        doc = pymupdf.open()
+        doc.new_page().insert_text((72, 72), "First page")
+        doc.new_page().insert_text((72, 72), "Second page")
+        doc.save(str(tmp_path / "a.pdf"))
+
+        text = get_backend("pymupdf-text").convert(
+            str(tmp_path / "a.pdf"), get_profile("full")
+        )
+        assert "First page" in text
+        assert text.index("First page") < text.index("Second page")
+
+    def test_marker_backend_runs_cli(self, tmp_path, monkeypatch):
+        """Test that the marker backend reads the Markdown marker_single writes"""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "marker_single"
+        fake.write_text(
+            "#!/bin/sh\n"
+            'mkdir -p "$3/paper"\n'
+            'echo "# Introduction" > "$3/paper/paper.md"\n',
+            encoding="utf-8",
+        )
+        fake.chmod(0o755)
+        monkeypatch.setenv("PATH", str(bin_dir), prepend=os.pathsep)
+        (tmp_path / "paper.pdf").write_bytes(b"%PDF")
+
+        backend = get_backend("marker")
+        assert backend.available()
+        md = backend.convert(str(tmp_path / "paper.pdf"), get_profile("full"))
+        assert md.strip() == "# Introduction"
+
+    def test_marker_batch_runs_cli_once(self, tmp_path, monkeypatch):
+        """Test that convert_batch converts every PDF in one marker run"""
+        log = tmp_path / "runs.log"
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "marker"
+        fake.write_text(
+            "#!/bin/sh\n"
+            f'echo run >> "{log}"\n'
+            'for pdf in "$1"/*.pdf; do\n'
+            '  stem=$(basename "$pdf" .pdf)\n'
+            '  case "$stem" in *broken*) continue;; esac\n'
+            '  mkdir -p "$3/$stem"\n'
+            '  echo "# $stem" > "$3/$stem/$stem.md"\n'
+            "done\n",
+            encoding="utf-8",
+        )
+        fake.chmod(0o755)
+        monkeypatch.setenv("PATH", str(bin_dir), prepend=os.pathsep)
+        sources = []
+        for name in ["a/paper.pdf", "b/paper.pdf", "broken.pdf"]:
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_bytes(b"%PDF")
+            sources.append(tmp_path / name)
+
+        results = list(
+            get_backend("marker").convert_batch(sources, get_profile("full"))
+        )
+        assert log.read_text().splitlines() == ["run"]
+        assert [source for source, _md, _error in results] == sources
+        assert [md for _source, md, _error in results][:2] == [
+            "# 000000-paper\n",
+            "# 000001-paper\n",
+        ]
+        assert "no Markdown for broken.pdf" in str(results[2][2])
+
+    def test_marker_backend_missing(self, tmp_path, monkeypatch):
+        """Test that a missing marker_single raises a clear error"""
+        monkeypatch.setenv("PATH", str(tmp_path))
+        with pytest.raises(RuntimeError, match="marker_single"):
+            get_backend("marker").convert("paper.pdf", get_profile("full"))
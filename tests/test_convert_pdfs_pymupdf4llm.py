@@ -0,0 +1,101 @@
+"""
+Tests for convert_pdfs_pymupdf4llm.py
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from convert_pdfs_pymupdf4llm import (
+    convert_all,
+    convert_pdf,
+    existing_profile,
+    profile_path,
+)
+
+MARKDOWN = "# Introduction\n\nSome text about graphene composites.\n"
+
+
+@pytest.fixture
+def converter(mocker):
+    """Stub the pymupdf4llm backend so no PDF is opened"""
+    return mocker.patch("conversion.Pymupdf4llmBackend.convert", return_value=MARKDOWN)
+
+
+class TestConvertPdf:
+    """Tests for convert_pdf and the recorded conversion profile"""
+
+    def test_output_is_only_markdown(self, tmp_path, converter):
+        """Test that the profile is kept beside the output, not inside it"""
+        convert_pdf(Path("paper.pdf"), tmp_path, overwrite=False)
+        out_path = tmp_path / "paper.md"
+        assert not out_path.read_text(encoding="utf-8").startswith("<!--")
+        assert profile_path(out_path).parent.name == ".conversion-profiles"
+        assert existing_profile(out_path) == profile_path(out_path).read_text().strip()
+
+    def test_same_profile_is_skipped(self, tmp_path, converter):
+        """Test that an output converted the same way is not converted again"""
+        convert_pdf(Path("paper.pdf"), tmp_path, overwrite=False)
+        convert_pdf(Path("paper.pdf"), tmp_path, overwrite=False)
+        assert converter.call_count == 1
+
+    def test_other_profile_is_replaced(self, tmp_path, converter):
+        """Test that an output converted another way is converted again"""
+        convert_pdf(Path("paper.pdf"), tmp_path, overwrite=False)
+        convert_pdf(Path("paper.pdf"), tmp_path, overwrite=False, profile="fast-text")
+        assert converter.call_count == 2
+        assert "fast-text" in existing_profile(tmp_path / "paper.md")
+
+    def test_legacy_marker_is_read(self, tmp_path):
+        """Test that outputs with the old first-line marker are still recognised"""
+        out_path = tmp_path / "old.md"
+        out_path.write_text("<!-- conversion-profile: fast-text -->\n# Text\n")
+        assert existing_profile(out_path) == "fast-text"
+        (tmp_path / "plain.md").write_text("# Text\n")
+        assert existing_profile(tmp_path / "plain.md") == "full"
+
+
+@pytest.fixture
+def marker(tmp_path, monkeypatch):
+    """Fake marker CLI that logs each run and writes one Markdown file per PDF"""
+    log = tmp_path / "runs.log"
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "marker"
+    fake.write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> "{log}"\n'
+        'for pdf in "$1"/*.pdf; do\n'
+        '  stem=$(basename "$pdf" .pdf)\n'
+        '  mkdir -p "$3/$stem"\n'
+        '  printf "# Introduction\\n\\nText of %s about graphene.\\n" "$stem"'
+        ' > "$3/$stem/$stem.md"\n'
+        "done\n",
+        encoding="utf-8",
+    )
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir), prepend=os.pathsep)
+    return log
+
+
+class TestConvertAllBatch:
+    """Tests for convert_all with a backend that converts in batches"""
+
+    def test_marker_runs_once(self, tmp_path, marker):
+        """Test that every PDF is converted in one marker run, then skipped"""
+        pdfs = []
+        for name in ["one.pdf", "two.pdf", "three.pdf"]:
+            (tmp_path / name).write_bytes(b"%PDF")
+            pdfs.append(tmp_path / name)
+        out_dir = tmp_path / "md"
+
+        assert convert_all(pdfs, out_dir, False, 2, backend="marker") == (3, False)
+        runs = marker.read_text().splitlines()
+        assert len(runs) == 1
+        assert runs[0].endswith("--output_format markdown --workers 2")
+        assert "Text of 000001-two" in (out_dir / "two.md").read_text()
+        assert existing_profile(out_dir / "two.md") == "marker"
+
+        assert convert_all(pdfs, out_dir, False, 2, backend="marker") == (3, False)
+        assert len(marker.read_text().splitlines()) == 1
@@ -0,0 +1,113 @@
+"""
+Tests for doi_index.py
+"""
+
+import pytest
+
+from check_mendeley_dois_v2 import check_dois
+from doi_index import DoiIndex, display_info, index_path, write_index
+
+
+def info(doi, doc_id, authors=("Smith",)):
+    """Document info as fetch_library_dois builds it"""
+    return {
+        "doi": doi,
+        "title": f"Paper {doc_id}",
+        "year": 2024,
+        "authors": [{"first_name": "A", "last_name": name} for name in authors],
+        "id": doc_id,
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Index of three documents, one without a DOI"""
+    path = str(tmp_path / "library.doidx")
+    write_index(
+        path,
+        [
+            info("10.1038/Nature12345", "d1"),
+            info("10.1126/science.abc123", "d2"),
+            info("", "d3"),
+            info("10.5555/ünïcode", "d4"),
+        ],
+        revision=7,
+    )
+    with DoiIndex(path) as index:
+        yield index
+
+
+class TestDoiIndex:
+    """Tests for write_index and DoiIndex"""
+
+    def test_membership_is_normalised(self, index):
+        """Test that lookups ignore case and surrounding whitespace"""
+        assert " 10.1038/NATURE12345 " in index
+        assert "10.1038/nature1234" not in index
+        assert "10.9999/missing" not in index
+        assert 12345 not in index
+
+    def test_hit_returns_display_info(self, index):
+        """Test that a hit decodes the stored display fields"""
+        assert index["10.1038/nature12345"] == {
+            "doi": "10.1038/Nature12345",
+            "title": "Paper d1",
+            "year": 2024,
+            "authors": [{"last_name": "Smith"}],
+            "id": "d1",
+        }
+        with pytest.raises(KeyError):
+            index["10.9999/missing"]
+
+    def test_keys_sorted_and_counted(self, index):
+        """Test that documents without a DOI are left out"""
+        assert len(index) == 3
+        assert list(index) == sorted(index, key=lambda key: key.encode())
+        assert "10.5555/ünïcode" in index
+        assert index.revision == 7
+
+    def test_works_with_check_dois(self, index):
+        """Test that the index can stand in for the library_docs dict"""
+        found, missing = check_dois(["10.1126/SCIENCE.abc123", "10.1/x"], index)
+        assert [doc["id"] for doc in found] == ["d2"]
+        assert missing == ["10.1/x"]
+
+    def test_find(self, index):
+        """Test that find returns each found DOI once"""
+        found = index.find(["10.1038/nature12345", "10.1038/NATURE12345", "x"])
+        assert list(found) == ["10.1038/nature12345"]
+
+    def test_empty_index(self, tmp_path):
+        """Test that an index with no DOIs opens and finds nothing"""
+        path = str(tmp_path / "empty.doidx")
+        assert write_index(path, []) == 0
+        with DoiIndex(path) as index:
+            assert len(index) == 0 and "10.1/x" not in index
+
+    def test_duplicate_doi_keeps_last(self, tmp_path):
+        """Test that the last document with a DOI wins, as in a dict"""
+        path = str(tmp_path / "dup.doidx")
+        write_index(path, [info("10.1/x", "first"), info("10.1/X", "second")])
+        with DoiIndex(path) as index:
+            assert len(index) == 1 and index["10.1/x"]["id"] == "second"
+
+    def test_not_an_index(self, tmp_path):
+        """Test that other files are rejected with ValueError"""
+        for content in (b"", b"not an index at all, just some text here..."):
+            path = tmp_path / "other.doidx"
+            path.write_bytes(content)
+            with pytest.raises(ValueError):
+                DoiIndex(str(path))
+
+    def test_display_info_trims_authors(self):
+        """Test that only the first three authors' last names are kept"""
+        trimmed = display_info(info("10.1/x", "d", authors=("A", "B", "C", "D")))
+        assert trimmed["authors"] == [
+            {"last_name": "A"},
+            {"last_name": "B"},
+            {"last_name": "C"},
+        ]
+
+    def test_index_path(self):
+        """Test that the index sits next to its source file"""
+        assert index_path("dir/mendeley_library.sqlite") == "dir/mendeley_library.doidx"
@@ -12,6 +12,8 @@ from extract_and_check_dois import (
     extract_dois_from_markdown,
     generate_html_table,
     load_firebase_config,
+    main,
+    run_mendeley_check,
 )
 
 
@@ -304,3 +306,78 @@ class TestDoiKeySanitization:
         html_content = output_file.read_text()
         # Dots and slashes replaced with underscores, other special chars URL-encoded
         assert 'id="check_10_1000_xyz%23abc"' in html_content
+
+
+class TestRunMendeleyCheck:
+    """Tests for run_mendeley_check and the --subprocess option"""
+
+    @pytest.fixture
+    def token(self, tmp_path, monkeypatch):
+        """Saved token in the working directory"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "mendeley_token.json").write_text('{"access_token": "t"}')
+
+    def test_checks_in_process(self, token, mocker):
+        """Test that the check is called directly, without a subprocess"""
+        results = {"summary": {"total_checked": 1}}
+        check = mocker.patch(
+            "check_mendeley_dois_v2.check_library", return_value=results
+        )
+        run = mocker.patch("subprocess.run")
+
+        assert run_mendeley_check(["10.1/x"], strategy="search") == results
+        check.assert_called_once_with(["10.1/x"], strategy="search")
+        run.assert_not_called()
+
+    def test_missing_token(self, tmp_path, monkeypatch, mocker, capsys):
+        """Test that a missing token returns None without checking"""
+        monkeypatch.chdir(tmp_path)
+        check = mocker.patch("check_mendeley_dois_v2.check_library")
+        assert run_mendeley_check(["10.1/x"]) is None
+        check.assert_not_called()
+        assert "token missing" in capsys.readouterr().out
+
+    def test_export_needs_no_token(self, tmp_path, monkeypatch, mocker):
+        """Test that an offline check against an export skips the token check"""
+        monkeypatch.chdir(tmp_path)
+        check = mocker.patch("check_mendeley_dois_v2.check_library", return_value={})
+        assert run_mendeley_check(["10.1/x"], export="library.bib") == {}
+        check.assert_called_once_with(["10.1/x"], export="library.bib")
+
+    def test_failed_check_returns_none(self, token, mocker, capsys):
+        """Test that an error from the check is reported, not raised"""
+        mocker.patch(
+            "check_mendeley_dois_v2.check_library", side_effect=ValueError("offline")
+        )
+        assert run_mendeley_check(["10.1/x"]) is None
+        assert "offline" in capsys.readouterr().err
+
+    def test_checks_whole_library_in_process(self, token, mocker):
+        """Test that check_library looks DOIs up and builds the results"""
+        mocker.patch("check_mendeley_dois_v2.get_access_token", return_value="t")
+        lookup = mocker.patch("check_mendeley_dois_v2.lookup_dois")
+        lookup.return_value.library_docs = {
+            "10.1/x": {"doi": "10.1/X", "title": "Paper", "id": "d1"}
+        }
+
+        results = run_mendeley_check(["10.1/x", "10.1/y"])
+
+        assert results is not None
+        assert results["summary"]["found_in_library"] == 1
+        assert results["not_in_library"] == ["10.1/y"]
+        assert "api" in results
+
+    def test_subprocess_option(self, tmp_path, mocker):
+        """Test that --subprocess runs the script with the given timeout"""
+        md_file = tmp_path / "refs.md"
+        md_file.write_text("https://doi.org/10.1038/x")
+        in_process = mocker.patch("extract_and_check_dois.run_mendeley_check")
+        subprocess_check = mocker.patch(
+            "extract_and_check_dois.run_mendeley_check_subprocess", return_value=None
+        )
+        mocker.patch("extract_and_check_dois.generate_html_table")
+
+        main([str(md_file), "--subprocess", "--timeout", "600"])
+
+        subprocess_check.assert_called_once_with(["10.1038/x"], timeout=600)
+        in_process.assert_not_called()
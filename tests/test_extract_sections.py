@@ -2,13 +2,29 @@
 Tests for extract_sections.py
 """
 
+import json
+import os
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import pdf_dedup
 from extract_sections import (
+    PaperExtractor,
+    PaperRecord,
+    SectionSpan,
     clean_content,
     detect_section_by_content,
     extract_doi,
     extract_sections_from_markdown,
+    found_section_keys,
     fuzzy_match_section,
+    process_pdfs,
+    strip_span,
+    write_results,
 )
+from pdf_sources import PdfDiscovery
 
 
 class TestFuzzyMatchSection:
@@ -340,3 +356,428 @@ Much longer content that should be included because it exceeds the minimum lengt
 
         assert "future_outlook" in result1
         assert "future_outlook" in result2
+
+
+SAMPLE_MARKDOWN = """
+DOI: 10.1038/nature12345
+
+# Introduction
+
+Introduction content with enough text to pass the length filter for meaningful content.
+
+# Conclusion
+
+Conclusion content that is long enough to meet the minimum requirements for extraction.
+
+# References
+"""
+
+
+class StubExtractor(PaperExtractor):
+    """PaperExtractor that returns canned Markdown instead of converting PDFs"""
+
+    def convert(self, filepath):
+        if "broken" in filepath:
+            raise ValueError("cannot open broken document")
+        return SAMPLE_MARKDOWN
+
+
+class CrashingExtractor(StubExtractor):
+    """StubExtractor whose worker process exits on PDFs named crash*"""
+
+    def convert(self, filepath):
+        if os.path.basename(filepath).startswith("crash"):
+            os._exit(9)
+        return super().convert(filepath)
+
+
+class TestSectionSpans:
+    """Tests for span-based section records"""
+
+    def test_strip_span_matches_str_strip(self):
+        """Test that strip_span gives the range of the stripped slice"""
+        text = "ab \n  text here \n\n cd"
+        span = strip_span(text, 2, 19)
+        assert text[span.start : span.end] == text[2:19].strip()
+
+    def test_offsets_point_at_section_text(self):
+        """Test that exported offsets locate each section in the Markdown"""
+        data = PaperExtractor().extract_markdown(SAMPLE_MARKDOWN, "a.pdf")
+        start, end = data["offsets"]["introduction"]
+        assert SAMPLE_MARKDOWN[start:end] == data["introduction"]
+        assert set(data["offsets"]) == set(found_section_keys(data))
+
+    def test_record_slices_and_cleans_text(self):
+        """Test that a record's text is its cleaned span of the Markdown"""
+        markdown = "# Introduction\n\nCorresponding author: x@y.z\n" + "Body. " * 20
+        record = PaperRecord(markdown, "a.pdf", {"introduction": SectionSpan(16, 200)})
+        assert record.text("introduction") == clean_content(markdown[16:200])
+        assert "Corresponding author" not in record.to_dict()["introduction"]
+
+    def test_records_use_slots(self):
+        """Test that records carry no per-instance dictionary"""
+        record = PaperRecord("", "a.pdf", {})
+        assert not hasattr(record, "__dict__")
+        assert not hasattr(SectionSpan(0, 0), "__dict__")
+
+    def test_content_detected_conclusion_keeps_note(self):
+        """Test that a conclusion found by content carries its note and span"""
+        markdown = (
+            "Intro paragraph.\n\nMiddle paragraph.\n\n"
+            "In conclusion, we demonstrated the method. Future work will extend "
+            "it; in summary, our findings suggest broad use."
+        )
+        data = PaperExtractor().extract_markdown(markdown, "a.pdf")
+        assert data["conclusion"].startswith("Intro paragraph.")
+        assert "_conclusion_note" in data
+        start, end = data["offsets"]["conclusion"]
+        assert markdown[start:end] == data["conclusion"]
+
+
+class TestPaperExtractor:
+    """Tests for the PaperExtractor class"""
+
+    def test_extract_sections_matches_module_function(self):
+        """Test that the class and the module-level function agree"""
+        extractor = PaperExtractor()
+        assert extractor.extract_sections(
+            SAMPLE_MARKDOWN
+        ) == extract_sections_from_markdown(SAMPLE_MARKDOWN)
+
+    def test_match_section_is_cached(self):
+        """Test that fuzzy header matches are cached per header"""
+        extractor = PaperExtractor()
+        assert extractor.match_section("## Concluding Remarks") == "conclusion"
+        assert extractor._fuzzy_cache == {"## Concluding Remarks": "conclusion"}
+
+    def test_extract_adds_metadata(self):
+        """Test that extract adds filename and DOI and cleans sections"""
+        result = StubExtractor().extract("/papers/paper.pdf")
+        assert result["filename"] == "paper.pdf"
+        assert result["doi"] == "10.1038/nature12345"
+        assert "introduction" in result
+        assert "conclusion" in result
+
+    def test_conversion_options_are_passed(self, mocker):
+        """Test that conversion options reach pymupdf4llm"""
+        to_markdown = mocker.patch("pymupdf4llm.to_markdown", return_value="")
+        PaperExtractor(conversion_options={"ignore_images": True}).convert("a.pdf")
+        to_markdown.assert_called_once_with("a.pdf", ignore_images=True)
+
+    def test_iter_extract_reports_errors(self):
+        """Test that failures are yielded instead of raised"""
+        outcomes = list(StubExtractor().iter_extract(["a.pdf", "broken.pdf"]))
+        assert [o.path for o in outcomes] == ["a.pdf", "broken.pdf"]
+        assert outcomes[0].data["filename"] == "a.pdf"
+        assert outcomes[0].error is None
+        assert outcomes[1].data is None
+        assert "broken" in str(outcomes[1].error)
+
+    def test_iter_extract_with_workers(self):
+        """Test that a worker pool yields every result"""
+        paths = [f"paper{i}.pdf" for i in range(5)]
+        outcomes = list(StubExtractor().iter_extract(iter(paths), workers=2))
+        assert sorted(o.path for o in outcomes) == paths
+        assert all(o.error is None for o in outcomes)
+
+    def test_worker_crash_fails_only_its_pdf(self):
+        """Test that a PDF that kills its worker does not fail the others"""
+        paths = ["a1.pdf", "a2.pdf", "a3.pdf", "crash.pdf", "a4.pdf", "a5.pdf"]
+        outcomes = {
+            o.path: o for o in CrashingExtractor().iter_extract(paths, workers=2)
+        }
+        assert sorted(outcomes) == sorted(paths)
+        assert isinstance(outcomes["crash.pdf"].error, BrokenProcessPool)
+        assert all(outcomes[p].data for p in paths if p != "crash.pdf")
+
+
+class TestProcessPdfsArchive:
+    """Tests for process_pdfs with archive input"""
+
+    def test_archive_members_are_extracted(self, tmp_path):
+        """Test that PDFs inside a ZIP are processed and outputs go beside it"""
+        archive = tmp_path / "bundle.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("2024/a.pdf", b"%PDF")
+            zf.writestr("2024/b.pdf", b"%PDF")
+
+        process_pdfs(str(archive), "out.json", extractor=StubExtractor())
+
+        results = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert [paper["filename"] for paper in results] == ["a.pdf", "b.pdf"]
+        assert results[0]["source"] == f"{archive}:2024/a.pdf"
+        assert "source" not in found_section_keys(results[0])
+
+
+class TestConversionProfiles:
+    """Tests for conversion profiles in PaperExtractor and process_pdfs"""
+
+    def test_profile_is_recorded_in_results(self, tmp_path):
+        """Test that each result and the Markdown header name the profile"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF")
+
+        process_pdfs(
+            str(tmp_path), "out.json", extractor=StubExtractor(profile="fast-text")
+        )
+
+        results = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert results[0]["conversion_profile"] == "fast-text"
+        assert "conversion_profile" not in found_section_keys(results[0])
+        markdown = (tmp_path / "out.md").read_text(encoding="utf-8")
+        assert "Conversion: fast-text" in markdown
+
+    def test_resume_with_other_profile_converts_again(self, tmp_path, mocker):
+        """Test that journaled results from another profile are not reused"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF")
+        process_pdfs(str(tmp_path), "out.json", extractor=StubExtractor())
+        extractor = StubExtractor(profile="fast-text")
+        convert = mocker.spy(extractor, "convert")
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor, resume=True)
+
+        assert convert.call_count == 1
+
+    def test_unknown_profile_raises(self):
+        """Test that PaperExtractor rejects unknown profile names"""
+        with pytest.raises(ValueError):
+            PaperExtractor(profile="turbo")
+
+    def test_backend_is_recorded_in_results(self, tmp_path, mocker):
+        """Test that PaperExtractor converts with the chosen backend"""
+        extractor = PaperExtractor(backend="pymupdf-text")
+        convert = mocker.patch.object(
+            extractor.backend, "convert", return_value=SAMPLE_MARKDOWN
+        )
+
+        data = extractor.extract(str(tmp_path / "a.pdf"))
+
+        convert.assert_called_once()
+        assert data["conversion_profile"] == "pymupdf-text"
+
+
+class TestProcessPdfsDedupe:
+    """Tests for process_pdfs with duplicate detection"""
+
+    def test_duplicates_are_converted_once(self, tmp_path, mocker):
+        """Test that identical PDFs are converted once and fanned out"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF same")
+        (tmp_path / "a-copy.pdf").write_bytes(b"%PDF same")
+        (tmp_path / "b.pdf").write_bytes(b"%PDF other")
+        extractor = StubExtractor()
+        convert = mocker.spy(extractor, "convert")
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor, dedupe="bytes")
+
+        assert convert.call_count == 2
+        results = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert sorted(paper["filename"] for paper in results) == [
+            "a-copy.pdf",
+            "a.pdf",
+            "b.pdf",
+        ]
+        markdown = (tmp_path / "out.md").read_text(encoding="utf-8")
+        assert "Deduplication (bytes): 1 duplicate PDF(s)" in markdown
+
+    def test_conversion_starts_before_hashing_ends(self, tmp_path, mocker):
+        """Test that PDFs are converted as they are hashed and late copies reused"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF same")
+        (tmp_path / "m.pdf").write_bytes(b"%PDF other")
+        (tmp_path / "z-copy.pdf").write_bytes(b"%PDF same")
+        digest = mocker.spy(pdf_dedup, "content_digest")
+        hashed_at_convert = []
+
+        class RecordingExtractor(StubExtractor):
+            def convert(self, filepath):
+                hashed_at_convert.append(digest.call_count)
+                return super().convert(filepath)
+
+        extractor = RecordingExtractor()
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor, dedupe="bytes")
+
+        assert hashed_at_convert == [1, 2]
+        results = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        copy = next(p for p in results if p["filename"] == "z-copy.pdf")
+        assert copy["duplicate_of"] == "a.pdf"
+
+
+class TestWriteResults:
+    """Tests for write_results"""
+
+    @pytest.mark.parametrize(
+        "results",
+        [[], [{"filename": "a.pdf", "doi": "10.1/x", "introduction": "Ä\nb"}]],
+    )
+    def test_streamed_json_matches_json_dump(self, tmp_path, results):
+        """Test that results streamed one at a time give the usual JSON layout"""
+        output = tmp_path / "out.json"
+        write_results(iter(results), str(output), total=len(results))
+        assert output.read_text(encoding="utf-8") == json.dumps(
+            results, indent=2, ensure_ascii=False
+        )
+
+    def test_streamed_markdown_matches_list(self, tmp_path):
+        """Test that an iterator and a list produce the same Markdown"""
+        results = [{"filename": "a.pdf", "introduction": "Intro"}, {"filename": "b"}]
+        write_results(results, str(tmp_path / "list.json"), ["note"])
+        write_results(iter(results), str(tmp_path / "iter.json"), ["note"], total=2)
+        assert (tmp_path / "iter.md").read_text() == (tmp_path / "list.md").read_text()
+
+
+class TestProcessPdfsDiscovery:
+    """Tests for recursive discovery in process_pdfs"""
+
+    def test_recursive_with_exclude(self, tmp_path):
+        """Test that nested PDFs are found and excluded folders skipped"""
+        for rel_path in ("top.pdf", "2023/a.pdf", "2023/old/b.pdf", "2024/c.pdf"):
+            path = tmp_path / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"%PDF")
+
+        process_pdfs(
+            str(tmp_path),
+            "out.json",
+            extractor=StubExtractor(),
+            discovery=PdfDiscovery(recursive=True, exclude=("old",)),
+        )
+
+        results = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert [paper["filename"] for paper in results] == ["top.pdf", "a.pdf", "c.pdf"]
+
+
+class TestProcessPdfsSqlite:
+    """Tests for writing the SQLite section store from process_pdfs"""
+
+    def test_store_written_next_to_json(self, tmp_path):
+        """Test that sqlite="" writes a searchable store beside the JSON"""
+        from section_store import SectionStore
+
+        (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+        (tmp_path / "b.pdf").write_bytes(b"%PDF b")
+        process_pdfs(str(tmp_path), "out.json", extractor=StubExtractor(), sqlite="")
+
+        with SectionStore(str(tmp_path / "out.sqlite")) as store:
+            assert len(store) == 2
+            assert {m.filename for m in store.query("introduction")} == {
+                "a.pdf",
+                "b.pdf",
+            }
+
+
+class TestProcessPdfsResume:
+    """Tests for checkpointed, resumable process_pdfs runs"""
+
+    def test_resume_skips_journaled_pdfs(self, tmp_path, mocker):
+        """Test that a resumed run converts only the PDFs it had not finished"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+        (tmp_path / "b.pdf").write_bytes(b"%PDF b")
+        process_pdfs(str(tmp_path), "out.json", extractor=StubExtractor())
+        (tmp_path / "c.pdf").write_bytes(b"%PDF c")
+        extractor = StubExtractor()
+        convert = mocker.spy(extractor, "convert")
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor, resume=True)
+
+        assert convert.call_count == 1
+        results = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert [paper["filename"] for paper in results] == ["a.pdf", "b.pdf", "c.pdf"]
+
+    def test_resume_rebuilds_outputs_without_converting(self, tmp_path, mocker):
+        """Test that a finished run can be re-exported from its journal alone"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+        process_pdfs(str(tmp_path), "out.json", extractor=StubExtractor())
+        (tmp_path / "out.md").unlink()
+        extractor = StubExtractor()
+        convert = mocker.spy(extractor, "convert")
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor, resume=True)
+
+        assert convert.call_count == 0
+        assert (tmp_path / "out.md").exists()
+
+    def test_without_resume_starts_over(self, tmp_path, mocker):
+        """Test that a normal run ignores an existing journal"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+        process_pdfs(str(tmp_path), "out.json", extractor=StubExtractor())
+        extractor = StubExtractor()
+        convert = mocker.spy(extractor, "convert")
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor)
+
+        assert convert.call_count == 1
+
+
+class TestProcessPdfsQuarantine:
+    """Tests for the failure quarantine in process_pdfs"""
+
+    def test_failures_are_quarantined_and_retried(self, tmp_path, mocker):
+        """Test that --retry-failed reprocesses only the quarantined PDFs"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+        (tmp_path / "broken.pdf").write_bytes(b"%PDF b")
+        process_pdfs(str(tmp_path), "out.json", extractor=StubExtractor())
+
+        quarantine = json.loads(
+            (tmp_path / "out.quarantine.json").read_text(encoding="utf-8")
+        )
+        assert [entry["filename"] for entry in quarantine] == ["broken.pdf"]
+
+        (tmp_path / "fixed.pdf").write_bytes(b"%PDF c")
+        extractor = StubExtractor()
+        mocker.patch.object(extractor, "convert", return_value=SAMPLE_MARKDOWN)
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor, retry_failed=True)
+
+        assert extractor.convert.call_count == 1
+        results = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert [paper["filename"] for paper in results] == ["a.pdf", "broken.pdf"]
+        assert not (tmp_path / "out.quarantine.json").exists()
+
+    def test_resume_leaves_quarantined_pdfs(self, tmp_path, mocker):
+        """Test that a resumed run does not retry quarantined PDFs"""
+        (tmp_path / "broken.pdf").write_bytes(b"%PDF b")
+        process_pdfs(str(tmp_path), "out.json", extractor=StubExtractor())
+        extractor = StubExtractor()
+        convert = mocker.spy(extractor, "convert")
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor, resume=True)
+
+        assert convert.call_count == 0
+
+    def test_empty_text_layer_is_a_failure(self, tmp_path, mocker):
+        """Test that a PDF converting to no text is quarantined"""
+        (tmp_path / "scan.pdf").write_bytes(b"%PDF")
+        extractor = StubExtractor()
+        mocker.patch.object(extractor, "convert", return_value="\n\n")
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor)
+
+        quarantine = json.loads(
+            (tmp_path / "out.quarantine.json").read_text(encoding="utf-8")
+        )
+        assert quarantine[0]["error_class"] == "empty_text_layer"
+
+
+class TestProcessPdfsTriage:
+    """Tests for scanned-PDF triage in process_pdfs"""
+
+    def test_scanned_pdfs_are_not_converted(self, tmp_path, mocker):
+        """Test that queue triage converts text PDFs only and lists scans"""
+        pymupdf = pytest.importorskip("pymupdf")
+        doc = pymupdf.open()
+        doc.new_page().insert_textbox(
+            pymupdf.Rect(72, 72, 500, 700), "Energy storage matters. " * 10
+        )
+        doc.save(str(tmp_path / "text.pdf"))
+        doc = pymupdf.open()
+        doc.new_page()
+        doc.save(str(tmp_path / "scan.pdf"))
+        extractor = StubExtractor()
+        convert = mocker.spy(extractor, "convert")
+
+        process_pdfs(str(tmp_path), "out.json", extractor=extractor, triage="queue")
+
+        assert convert.call_count == 1
+        results = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert [paper["filename"] for paper in results] == ["text.pdf"]
+        assert results[0]["triage"] == "text"
+        queue = json.loads((tmp_path / "out.scanned.json").read_text("utf-8"))
+        assert [entry["filename"] for entry in queue] == ["scan.pdf"]
@@ -0,0 +1,254 @@
+"""
+Tests for library_exports.py
+"""
+
+import io
+import json
+
+import pytest
+
+from library_exports import (
+    clean_doi,
+    detect_format,
+    export_index,
+    iter_bibtex,
+    iter_csl_json,
+    iter_export,
+    iter_ris,
+    main,
+)
+
+BIBTEX = r"""
+% Exported from Mendeley
+@string{nat = "Nature"}
+
+@article{Smith2020,
+  author = {Smith, John and van der Berg, Anna and Li Wei},
+  title = {{Graphene} composites: a {\"u}ber review},
+  journal = nat,
+  year = 2020,
+  doi = {10.1038/Nature\_12345},
+  abstract = {Text with {nested {braces}}, commas, and doi = {10.9/fake}}
+}
+@inproceedings{Doe2019, title = "Quoted {"}title{"} " # "joined",
+  year = "2019", DOI = "https://doi.org/10.1126/science.abc123"}
+@book{NoDoi, title={No DOI here}}
+@comment{jabref-meta: databaseType:bibtex;}
+"""
+
+RIS = """TY  - JOUR
+AU  - Smith, John
+AU  - Doe, Jane
+TI  - Graphene composites
+  continued on the next line
+PY  - 2020///
+DO  - 10.1038/nature12345
+ID  - ref1
+ER  -
+
+TY  - BOOK
+T1  - Linked only
+Y1  - 2018/05/01
+UR  - https://doi.org/10.5555/linked
+ER  -
+
+TY  - GEN
+TI  - No DOI
+ER  -
+"""
+
+CSL = [
+    {
+        "id": "item1",
+        "DOI": "10.1038/nature12345",
+        "title": "Graphene composites",
+        "issued": {"date-parts": [[2020, 5]]},
+        "author": [{"family": "Smith", "given": "John"}, {"literal": "The Team"}],
+    },
+    {"id": "item2", "title": "No DOI"},
+    {"id": "item3", "DOI": "doi:10.1126/science.abc123", "issued": {"raw": "2019"}},
+]
+
+
+class TestBibtex:
+    """Tests for iter_bibtex"""
+
+    def test_fields_and_nesting(self):
+        """Test that nested braces, escapes and macros are handled"""
+        entries = list(iter_bibtex(io.StringIO(BIBTEX)))
+        assert [entry["id"] for entry in entries] == ["Smith2020", "Doe2019", "NoDoi"]
+        first = entries[0]
+        assert first["doi"] == "10.1038/Nature_12345"
+        assert first["title"] == "Graphene composites: a uber review"
+        assert first["year"] == 2020
+        assert [a["last_name"] for a in first["authors"]] == [
+            "Smith",
+            "van der Berg",
+            "Wei",
+        ]
+
+    def test_quotes_and_concatenation(self):
+        """Test quoted values, # joins and URL-form DOIs"""
+        second = list(iter_bibtex(io.StringIO(BIBTEX)))[1]
+        assert second["title"] == 'Quoted "title" joined'
+        assert second["doi"] == "10.1126/science.abc123"
+        assert second["year"] == 2019
+
+    def test_escaped_braces(self):
+        """Test that \\{ and \\} in a field do not end the entry early"""
+        text = (
+            "@article{Escaped,\n"
+            "  title = {Sets \\} closed \\{ early},\n"
+            "  doi = {10.1000/escaped}\n"
+            "}\n"
+            "@article{Next, doi = {10.1000/next}}\n"
+        )
+        entries = list(iter_bibtex(io.StringIO(text)))
+        assert [(entry["id"], entry["doi"]) for entry in entries] == [
+            ("Escaped", "10.1000/escaped"),
+            ("Next", "10.1000/next"),
+        ]
+
+    def test_entry_without_doi(self):
+        """Test that entries without a DOI are still yielded"""
+        third = list(iter_bibtex(io.StringIO(BIBTEX)))[2]
+        assert third["doi"] == "" and third["title"] == "No DOI here"
+
+
+class TestRis:
+    """Tests for iter_ris"""
+
+    def test_records(self):
+        """Test tags, continuation lines and DOI links"""
+        records = list(iter_ris(io.StringIO(RIS)))
+        assert len(records) == 3
+        first, second, third = records
+        assert first["doi"] == "10.1038/nature12345"
+        assert first["title"] == "Graphene composites continued on the next line"
+        assert first["year"] == 2020 and first["id"] == "ref1"
+        assert [a["last_name"] for a in first["authors"]] == ["Smith", "Doe"]
+        assert second["doi"] == "10.5555/linked" and second["year"] == 2018
+        assert third["doi"] == ""
+
+
+class TestCslJson:
+    """Tests for iter_csl_json"""
+
+    def test_items(self):
+        """Test DOIs, dates and both kinds of author names"""
+        items = list(iter_csl_json(io.StringIO(json.dumps(CSL))))
+        assert [item["id"] for item in items] == ["item1", "item2", "item3"]
+        assert items[0]["year"] == 2020
+        assert [a["last_name"] for a in items[0]["authors"]] == ["Smith", "Team"]
+        assert items[2]["doi"] == "10.1126/science.abc123"
+        assert items[2]["year"] == 2019
+
+    def test_small_reads(self):
+        """Test that items split across reads are decoded whole"""
+        text = json.dumps(CSL, indent=2)
+        items = list(iter_csl_json(io.StringIO(text), read_size=7))
+        assert [item["id"] for item in items] == ["item1", "item2", "item3"]
+
+    def test_truncated_file_raises(self):
+        """Test that a cut-off export is an error, not a silent miss"""
+        text = json.dumps(CSL)[:-30]
+        with pytest.raises(ValueError):
+            list(iter_csl_json(io.StringIO(text), read_size=16))
+
+
+class TestExportIndex:
+    """Tests for detect_format, iter_export and export_index"""
+
+    def test_detect_format(self, tmp_path):
+        """Test detection by extension and by content"""
+        assert detect_format("library.bib") == "bibtex"
+        assert detect_format("library.ris") == "ris"
+        assert detect_format("library.json") == "csl-json"
+        for content, expected in (("\n@article{x,}", "bibtex"), ("[]", "csl-json")):
+            path = tmp_path / "export.txt"
+            path.write_text(content)
+            assert detect_format(str(path)) == expected
+
+    def test_unknown_format(self, tmp_path):
+        """Test that an unknown format name raises ValueError"""
+        path = tmp_path / "x.bib"
+        path.write_text("")
+        with pytest.raises(ValueError, match="endnote"):
+            list(iter_export(str(path), "endnote"))
+
+    def test_index_built_once(self, tmp_path, capsys):
+        """Test that the index is reused until the export changes"""
+        path = tmp_path / "library.bib"
+        path.write_text(BIBTEX)
+        with export_index(str(path)) as index:
+            assert set(index) == {"10.1038/nature_12345", "10.1126/science.abc123"}
+        assert "Indexed 2 DOIs from 3 entries" in capsys.readouterr().out
+
+        export_index(str(path)).close()
+        assert "Using DOI index" in capsys.readouterr().out
+
+        path.write_text(RIS)  # A different export under the same name
+        with export_index(str(path), "ris") as index:
+            assert "10.5555/linked" in index
+
+    def test_clean_doi(self):
+        """Test that prefixes and escapes are removed"""
+        assert clean_doi(" https://dx.doi.org/10.1/a\\_b ") == "10.1/a_b"
+        assert clean_doi("DOI: 10.1/x") == "10.1/x"
+
+
+class TestMain:
+    """Tests for the command line"""
+
+    def test_check(self, tmp_path, capsys):
+        """Test that --check reports which DOIs the export holds"""
+        export = tmp_path / "library.json"
+        export.write_text(json.dumps(CSL))
+        dois = tmp_path / "dois.txt"
+        dois.write_text("10.1038/NATURE12345\n10.9/missing\n")
+        assert main([str(export), "--check", str(dois)]) == 0
+        assert "1 of 2 DOI(s) are in the export" in capsys.readouterr().out
+
+    def test_missing_export(self, tmp_path, capsys):
+        """Test that a missing file is reported"""
+        assert main([str(tmp_path / "none.bib")]) == 1
+        assert "not found" in capsys.readouterr().out
+
+    def test_checker_works_offline(self, tmp_path, mocker, capsys):
+        """Test that check_mendeley_dois_v2 --export needs no token or API"""
+        from check_mendeley_dois_v2 import main as check_main
+
+        token = mocker.patch("check_mendeley_dois_v2.get_access_token")
+        api = mocker.patch("mendeley_client.MendeleyClient.request")
+        export = tmp_path / "library.ris"
+        export.write_text(RIS)
+        output = tmp_path / "results.json"
+
+        check_main(
+            [
+                "--dois",
+                "10.1038/nature12345,10.9/missing",
+                "--export",
+                str(export),
+                "--output",
+                str(output),
+            ]
+        )
+
+        token.assert_not_called()
+        api.assert_not_called()
+        assert "ALREADY IN LIBRARY (1)" in capsys.readouterr().out
+        results = json.loads(output.read_text())
+        assert results["not_in_library"] == ["10.9/missing"]
+        assert "api" not in results
+
+    def test_checker_closes_export_index(self, tmp_path, mocker):
+        """Test that check_mendeley_dois_v2 --export closes the index it opens"""
+        from check_mendeley_dois_v2 import main as check_main
+        from doi_index import DoiIndex
+
+        close = mocker.spy(DoiIndex, "close")
+        export = tmp_path / "library.ris"
+        export.write_text(RIS)
+        check_main(["--dois", "10.1038/nature12345", "--export", str(export)])
+        close.assert_called_once()
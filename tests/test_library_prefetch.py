@@ -0,0 +1,57 @@
+"""
+Tests for library_prefetch.py
+"""
+
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from library_prefetch import LibraryPrefetch
+
+
+class TestLibraryPrefetch:
+    """Tests for LibraryPrefetch"""
+
+    def test_returns_loaded_library(self):
+        """Test that wait returns what the background load produced"""
+        prefetch = LibraryPrefetch(lambda: {"10.1/x": {"id": "x"}}).start()
+        assert prefetch.wait() == {"10.1/x": {"id": "x"}}
+        assert prefetch.ready()
+
+    def test_not_ready_while_loading(self):
+        """Test that ready is False until the load has finished"""
+        release = threading.Event()
+        prefetch = LibraryPrefetch(lambda: release.wait(5) and {}).start()
+        assert not prefetch.ready()
+        release.set()
+        assert prefetch.wait() == {}
+
+    def test_load_error_is_raised_by_wait(self):
+        """Test that a failed load is reported to the waiting caller"""
+
+        def load():
+            raise RuntimeError("offline")
+
+        prefetch = LibraryPrefetch(load).start()
+        with pytest.raises(RuntimeError, match="offline"):
+            prefetch.wait()
+        assert not prefetch.ready()
+
+
+class TestImports:
+    """Tests that the pipeline starts without the Mendeley modules"""
+
+    def test_pipeline_does_not_import_requests(self):
+        """Test that importing pipeline leaves requests unloaded"""
+        code = "import sys, pipeline; print('requests' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).resolve().parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.strip() == "False"
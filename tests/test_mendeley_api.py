@@ -0,0 +1,34 @@
+"""
+Tests for mendeley_api.py
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import check_mendeley_dois_v2
+import mendeley_api
+
+
+class TestLayering:
+    """Tests that the API helpers sit below the checker script"""
+
+    def test_library_modules_do_not_import_the_checker(self):
+        """Test that the library modules load without check_mendeley_dois_v2"""
+        code = (
+            "import sys, mendeley_libraries, mendeley_library_cache, mendeley_lookup;"
+            "print('check_mendeley_dois_v2' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).resolve().parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.strip() == "False"
+
+    def test_checker_re_exports_helpers(self):
+        """Test that the helpers can still be imported from the checker"""
+        assert check_mendeley_dois_v2.get_access_token is mendeley_api.get_access_token
+        assert check_mendeley_dois_v2.DOCUMENTS_URL == mendeley_api.DOCUMENTS_URL
@@ -0,0 +1,186 @@
+"""
+Tests for mendeley_client.py
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+import mendeley_client
+from mendeley_client import (
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    TIMEOUT,
+    MendeleyClient,
+    close_client,
+    get_client,
+    retry_after_seconds,
+)
+
+
+class TestMendeleyClient:
+    """Tests for MendeleyClient"""
+
+    def test_session_is_pooled_and_asks_for_gzip(self):
+        """Test that one pooled adapter serves both schemes"""
+        with MendeleyClient(pool_size=4) as client:
+            adapter = client.session.get_adapter("https://api.mendeley.com/documents")
+            assert adapter is client.session.get_adapter("http://localhost/")
+            assert adapter._pool_maxsize == 4
+            assert "gzip" in client.session.headers["Accept-Encoding"]
+
+    def test_requests_use_default_timeout(self, mocker):
+        """Test that calls get the (connect, read) timeout unless overridden"""
+        client = MendeleyClient()
+        send = mocker.patch.object(client.session, "request", return_value=Mock())
+
+        client.get("https://example.org/a", params={"limit": 1})
+        client.post("https://example.org/b", data={}, timeout=3)
+
+        assert send.call_args_list[0].kwargs["timeout"] == TIMEOUT
+        assert send.call_args_list[1].kwargs["timeout"] == 3
+        assert send.call_args_list[0].args == ("GET", "https://example.org/a")
+        assert client.requests_sent == 2
+
+
+class TestSharedClient:
+    """Tests for get_client and close_client"""
+
+    def test_shared_client_is_reused_until_closed(self):
+        """Test that get_client returns one client until close_client"""
+        close_client()
+        first = get_client()
+        assert get_client() is first
+        close_client()
+        assert mendeley_client._shared_client is None
+        assert get_client() is not first
+        close_client()
+
+
+def response(status, headers=None):
+    """Stand-in response with a status code and headers"""
+    return Mock(status_code=status, headers=headers or {})
+
+
+@pytest.fixture
+def client(mocker):
+    """Client whose waits are recorded instead of slept"""
+    waits = []
+    client = MendeleyClient(max_retries=3, sleep=waits.append)
+    client.waits = waits
+    client.send = mocker.patch.object(client.session, "request")
+    return client
+
+
+class TestRetries:
+    """Tests for retrying rate limits and server errors"""
+
+    def test_retry_after_is_honoured(self, client):
+        """Test that a 429 waits for Retry-After and then succeeds"""
+        client.send.side_effect = [response(429, {"Retry-After": "7"}), response(200)]
+
+        assert client.get("https://example.org").status_code == 200
+        assert client.waits == [7.0]
+        assert client.stats.as_dict() == {
+            "requests": 2,
+            "retries": 1,
+            "throttled": 1,
+            "wait_seconds": 7.0,
+        }
+
+    def test_server_errors_back_off_with_jitter(self, client, mocker):
+        """Test that 5xx responses wait a jittered, growing backoff"""
+        uniform = mocker.patch("mendeley_client.random.uniform", return_value=0.5)
+        client.send.side_effect = [response(503), response(502), response(200)]
+
+        assert client.get("https://example.org").status_code == 200
+        assert [call.args for call in uniform.call_args_list] == [
+            (0, BACKOFF_BASE),
+            (0, BACKOFF_BASE * 2),
+        ]
+        assert client.waits == [0.5, 0.5]
+
+    def test_gives_up_after_max_retries(self, client):
+        """Test that the last failing response is returned to the caller"""
+        client.send.return_value = response(500)
+        assert client.get("https://example.org").status_code == 500
+        assert client.send.call_count == 4
+        assert client.stats.retries == 3
+
+    def test_client_errors_are_not_retried(self, client):
+        """Test that a 401 comes straight back"""
+        client.send.return_value = response(401)
+        assert client.get("https://example.org").status_code == 401
+        assert client.send.call_count == 1
+
+    def test_post_only_retries_rate_limits(self, client):
+        """Test that a token POST is retried on 429 but not on 500"""
+        client.send.side_effect = [response(429), response(500)]
+        assert client.post("https://example.org/token").status_code == 500
+        assert client.send.call_count == 2
+
+    def test_dropped_connection_is_retried(self, client):
+        """Test that a connection error on a GET is retried"""
+        client.send.side_effect = [requests.ConnectionError("reset"), response(200)]
+        assert client.get("https://example.org").status_code == 200
+        assert client.stats.retries == 1
+
+    def test_long_waits_are_capped(self, client):
+        """Test that an excessive Retry-After is capped"""
+        client.send.side_effect = [
+            response(503, {"Retry-After": "3600"}),
+            response(200),
+        ]
+        client.get("https://example.org")
+        assert client.waits == [BACKOFF_MAX]
+
+    def test_concurrency_is_capped(self, mocker):
+        """Test that no more than max_concurrency requests are in flight"""
+        client = MendeleyClient(max_concurrency=2)
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def send(*args, **kwargs):
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.pop()
+            return response(200)
+
+        mocker.patch.object(client.session, "request", side_effect=send)
+        threads = [
+            threading.Thread(target=client.get, args=("https://example.org",))
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert max(peak) == 2
+
+
+class TestRetryAfterSeconds:
+    """Tests for retry_after_seconds"""
+
+    def test_seconds(self):
+        """Test that a number of seconds is parsed"""
+        assert retry_after_seconds("12") == 12.0
+
+    def test_http_date(self):
+        """Test that an HTTP date becomes the seconds until then"""
+        moment = datetime.now(timezone.utc) + timedelta(seconds=30)
+        seconds = retry_after_seconds(format_datetime(moment, usegmt=True))
+        assert seconds is not None and 25 <= seconds <= 30
+
+    def test_missing_or_invalid(self):
+        """Test that a missing or unparseable header gives None"""
+        assert retry_after_seconds(None) is None
+        assert retry_after_seconds("soon") is None
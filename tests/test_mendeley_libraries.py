@@ -0,0 +1,212 @@
+"""
+Tests for mendeley_libraries.py
+"""
+
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from check_mendeley_dois_v2 import check_dois, check_library
+from mendeley_libraries import (
+    GROUPS_URL,
+    PERSONAL,
+    Library,
+    library_cache_path,
+    main,
+    merged_index_path,
+    resolve_libraries,
+    sync_libraries,
+)
+from mendeley_library_cache import LibraryCache
+
+
+def document(doc_id, doi, title="Paper"):
+    """Build a documents API entry"""
+    return {
+        "id": doc_id,
+        "title": title,
+        "year": 2024,
+        "authors": [{"last_name": "Smith"}],
+        "identifiers": {"doi": doi} if doi else {},
+        "last_modified": "2024-01-01T00:00:00.000Z",
+    }
+
+
+class FakeLibraries:
+    """Stand-in for MendeleyClient.get serving a personal and two group libraries"""
+
+    def __init__(self):
+        self.documents = {
+            None: [document("p1", "10.1038/shared", "Mine")],
+            "g1": [
+                document("a1", "10.1038/shared", "Lab copy"),
+                document("a2", "10.1126/lab.only", "Lab paper"),
+            ],
+            "g2": [document("b1", "10.5555/Team.Paper", "Team paper")],
+        }
+        self.groups = [{"id": "g1", "name": "Lab"}, {"id": "g2", "name": "Team"}]
+        self.calls = []
+        self.threads = set()
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        params = params or {}
+        self.calls.append((url, dict(params)))
+        self.threads.add(threading.current_thread().name)
+        if url == GROUPS_URL:
+            body = self.groups
+        elif "deleted_since" in params:
+            body = []
+        elif "modified_since" in params:
+            body = []
+        else:
+            body = self.documents[params.get("group_id")]
+        response = Mock()
+        response.status_code = 200
+        response.json.return_value = body
+        response.links = {}
+        return response
+
+
+@pytest.fixture
+def libraries(mocker):
+    """Fake personal library plus groups Lab (g1) and Team (g2)"""
+    fake = FakeLibraries()
+    mocker.patch("mendeley_client.MendeleyClient.get", side_effect=fake.get)
+    return fake
+
+
+ALL = [Library(PERSONAL), Library("Lab", "g1"), Library("Team", "g2")]
+
+
+class TestResolveLibraries:
+    """Tests for resolve_libraries"""
+
+    def test_personal_only_needs_no_request(self, libraries):
+        """Test that no groups means just the user's own library"""
+        assert resolve_libraries("token") == [Library(PERSONAL)]
+        assert libraries.calls == []
+
+    def test_groups_by_id_or_name(self, libraries):
+        """Test that groups are found by id or case-insensitive name"""
+        assert resolve_libraries("token", ["team", "g1"]) == [
+            Library(PERSONAL),
+            Library("Team", "g2"),
+            Library("Lab", "g1"),
+        ]
+        assert resolve_libraries("token", all_groups=True) == ALL
+
+    def test_unknown_group(self, libraries):
+        """Test that a group the user is not in raises ValueError"""
+        with pytest.raises(ValueError, match="Nope"):
+            resolve_libraries("token", ["Nope"])
+
+
+class TestSyncLibraries:
+    """Tests for sync_libraries"""
+
+    def test_hits_are_tagged_with_their_library(self, tmp_path, libraries):
+        """Test that the merged index tags hits and prefers the first library"""
+        cache_path = str(tmp_path / "library.sqlite")
+        with sync_libraries("token", ALL, cache_path) as index:
+            found, missing = check_dois(
+                ["10.1038/SHARED", "10.1126/lab.only", "10.5555/team.paper", "x"],
+                index,
+            )
+        assert [(doc["id"], doc["library"]) for doc in found] == [
+            ("p1", PERSONAL),
+            ("a2", "Lab"),
+            ("b1", "Team"),
+        ]
+        assert missing == ["x"]
+
+    def test_each_library_has_its_own_cache(self, tmp_path, libraries):
+        """Test that every library is downloaded into a cache of its own"""
+        cache_path = str(tmp_path / "library.sqlite")
+        sync_libraries("token", ALL, cache_path).close()
+
+        groups = [params.get("group_id") for _url, params in libraries.calls]
+        assert sorted(groups, key=str) == [None, "g1", "g2"]
+        assert library_cache_path(ALL[1], cache_path).endswith(
+            "library.group-g1.sqlite"
+        )
+        with LibraryCache(library_cache_path(ALL[1], cache_path), "g1") as cache:
+            assert sorted(cache.library_docs()) == [
+                "10.1038/shared",
+                "10.1126/lab.only",
+            ]
+        with pytest.raises(ValueError, match="Mendeley group g1"):
+            LibraryCache(library_cache_path(ALL[1], cache_path))
+
+    def test_syncs_run_concurrently(self, tmp_path, libraries):
+        """Test that libraries are fetched on worker threads"""
+        sync_libraries("token", ALL, str(tmp_path / "library.sqlite")).close()
+        assert threading.current_thread().name not in libraries.threads
+
+    def test_later_syncs_are_incremental(self, tmp_path, libraries, capsys):
+        """Test that each library syncs changes only and the index is reused"""
+        cache_path = str(tmp_path / "library.sqlite")
+        sync_libraries("token", ALL, cache_path).close()
+        assert "Merged 3 libraries: 3 DOIs" in capsys.readouterr().out
+
+        libraries.calls.clear()
+        sync_libraries("token", ALL, cache_path).close()
+        assert all(
+            "modified_since" in p or "deleted_since" in p for _u, p in libraries.calls
+        )
+        assert {p.get("group_id") for _u, p in libraries.calls} == {None, "g1", "g2"}
+        assert "Merged" not in capsys.readouterr().out
+
+    def test_index_follows_library_set(self, tmp_path, libraries):
+        """Test that checking fewer libraries rewrites the merged index"""
+        cache_path = str(tmp_path / "library.sqlite")
+        sync_libraries("token", ALL, cache_path).close()
+        with sync_libraries("token", ALL[:1], cache_path, max_age=3600) as index:
+            assert "10.5555/team.paper" not in index
+            assert index.path == merged_index_path(cache_path)
+
+    def test_failing_library_fails_the_check(self, tmp_path, libraries):
+        """Test that an error in one library's sync is raised"""
+        del libraries.documents["g2"]
+        with pytest.raises(KeyError):
+            sync_libraries("token", ALL, str(tmp_path / "library.sqlite"))
+
+
+class TestCheckLibrary:
+    """Tests for checking groups through check_mendeley_dois_v2"""
+
+    def test_results_name_the_library(self, tmp_path, libraries, mocker):
+        """Test that check_library(groups=...) reports where each hit is"""
+        mocker.patch("check_mendeley_dois_v2.get_access_token", return_value="token")
+        results = check_library(
+            ["10.5555/team.paper", "10.9/missing"],
+            cache_path=str(tmp_path / "library.sqlite"),
+            groups=["Team"],
+        )
+        assert results["in_library"] == [
+            {
+                "doi": "10.5555/Team.Paper",
+                "title": "Team paper",
+                "year": 2024,
+                "mendeley_id": "b1",
+                "library": "Team",
+            }
+        ]
+        assert results["not_in_library"] == ["10.9/missing"]
+
+
+class TestMain:
+    """Tests for the command line"""
+
+    def test_lists_groups(self, libraries, mocker, capsys):
+        """Test that groups are listed with their ids"""
+        mocker.patch("mendeley_libraries.get_access_token", return_value="token")
+        assert main([]) == 0
+        assert "g1  Lab" in capsys.readouterr().out
+
+    def test_sync(self, tmp_path, libraries, mocker, capsys):
+        """Test that --sync --group syncs the chosen group and your library"""
+        mocker.patch("mendeley_libraries.get_access_token", return_value="token")
+        cache_path = str(tmp_path / "library.sqlite")
+        assert main(["--sync", "--group", "Lab", "--cache", cache_path]) == 0
+        assert "Merged 2 libraries: 2 DOIs" in capsys.readouterr().out
@@ -0,0 +1,265 @@
+"""
+Tests for mendeley_library_cache.py
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+import pytest
+
+from check_mendeley_dois_v2 import check_dois
+from mendeley_library_cache import LibraryCache, format_timestamp, main, sync_library
+
+
+def document(doc_id, doi, title="Paper", modified="2024-01-01T00:00:00.000Z"):
+    """Build a documents API entry"""
+    return {
+        "id": doc_id,
+        "title": title,
+        "year": 2024,
+        "authors": [{"last_name": "Smith"}],
+        "identifiers": {"doi": doi} if doi else {},
+        "last_modified": modified,
+    }
+
+
+class FakeLibrary:
+    """Stand-in for MendeleyClient.get serving a library from memory"""
+
+    def __init__(self, documents):
+        self.documents = {doc["id"]: doc for doc in documents}
+        self.changed = set()
+        self.deleted = set()
+        self.calls = []
+
+    def update(self, doc):
+        self.documents[doc["id"]] = doc
+        self.changed.add(doc["id"])
+
+    def delete(self, doc_id):
+        del self.documents[doc_id]
+        self.deleted.add(doc_id)
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        params = params or {}
+        self.calls.append(dict(params))
+        if "deleted_since" in params:
+            body = [{"id": doc_id} for doc_id in sorted(self.deleted)]
+        elif "modified_since" in params:
+            body = [self.documents[doc_id] for doc_id in sorted(self.changed)]
+        else:
+            body = list(self.documents.values())
+        response = Mock()
+        response.status_code = 200
+        response.json.return_value = body
+        response.links = {}
+        response.headers = {"Mendeley-Count": str(len(self.documents))}
+        return response
+
+
+@pytest.fixture
+def library(mocker):
+    """Fake library with two DOIs and one document without a DOI"""
+    fake = FakeLibrary(
+        [
+            document("d1", "10.1038/Nature12345", "First"),
+            document("d2", "10.1126/science.abc123", "Second"),
+            document("d3", None, "No DOI"),
+        ]
+    )
+    mocker.patch("mendeley_client.MendeleyClient.get", side_effect=fake.get)
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Empty library cache"""
+    with LibraryCache(str(tmp_path / "library.sqlite")) as cache:
+        yield cache
+
+
+class TestLibraryCache:
+    """Tests for LibraryCache"""
+
+    def test_first_sync_downloads_everything(self, cache, library):
+        """Test that an empty cache does a full sync"""
+        stats = cache.sync("token")
+        assert stats.full and stats.updated == 3
+        assert len(cache) == 3
+        assert cache.doi_count() == 2
+        assert library.calls == [{"limit": 500}]
+
+    def test_find_matches_case_insensitively(self, cache, library):
+        """Test that lookups return fetch_library_dois-style info"""
+        cache.sync("token")
+        found = cache.find(["10.1038/NATURE12345 ", "10.9999/missing"])
+        assert list(found) == ["10.1038/nature12345"]
+        info = found["10.1038/nature12345"]
+        assert info == {
+            "doi": "10.1038/Nature12345",
+            "title": "First",
+            "year": 2024,
+            "authors": [{"last_name": "Smith"}],
+            "id": "d1",
+        }
+
+        docs, missing = check_dois(["10.1038/nature12345", "10.9999/missing"], found)
+        assert [doc["id"] for doc in docs] == ["d1"]
+        assert missing == ["10.9999/missing"]
+
+    def test_incremental_sync_uses_since_filters(self, cache, library):
+        """Test that later syncs fetch only changes and deletions"""
+        cache.sync("token")
+        library.update(document("d2", "10.1126/science.changed", "Second v2"))
+        library.update(document("d4", "10.1000/new", "Fourth"))
+        library.delete("d1")
+
+        stats = cache.sync("token")
+
+        assert not stats.full
+        assert (stats.updated, stats.deleted) == (2, 1)
+        assert set(cache.library_docs()) == {"10.1126/science.changed", "10.1000/new"}
+        modified, deleted = library.calls[1:]
+        assert "modified_since" in modified and "deleted_since" in deleted
+        assert modified["modified_since"] == deleted["deleted_since"]
+
+    def test_since_overlaps_previous_sync(self, cache, library):
+        """Test that the since filter starts before the previous sync"""
+        cache.sync("token")
+        cache.sync("token")
+        since = library.calls[1]["modified_since"]
+        last_sync = cache.last_sync
+        assert last_sync is not None
+        assert since < format_timestamp(last_sync)
+
+    def test_full_sync_drops_documents_missing_remotely(self, cache, library):
+        """Test that a full resync removes documents deleted without a trace"""
+        cache.sync("token")
+        del library.documents["d2"]  # Not reported by deleted_since
+        stats = cache.sync("token", full=True)
+        assert stats.full and stats.deleted == 1
+        assert set(cache.library_docs()) == {"10.1038/nature12345"}
+
+    def test_failed_sync_leaves_cache_unchanged(self, cache, library, mocker):
+        """Test that an API error rolls the sync back"""
+        cache.sync("token")
+        last_sync = cache.last_sync
+        error = Mock(status_code=500, text="Server error")
+        mocker.patch("mendeley_client.MendeleyClient.get", return_value=error)
+
+        with pytest.raises(Exception, match="Server error"):
+            cache.sync("token", full=True)
+        assert len(cache) == 3
+        assert cache.last_sync == last_sync
+
+    def test_interrupted_full_sync_resumes(self, cache, mocker):
+        """Test that a failed download continues from the last stored page"""
+        pages = {
+            "start": ([document("d1", "10.1/a")], "https://api/p2"),
+            "https://api/p2": ([document("d2", "10.1/b")], "https://api/p3"),
+            "https://api/p3": ([document("d3", "10.1/c")], None),
+        }
+        calls = []
+        failures = ["https://api/p3"]
+
+        def get(url, headers=None, params=None):
+            url = "start" if params else url
+            calls.append(url)
+            if url in failures:
+                failures.remove(url)
+                return Mock(status_code=503, text="Service unavailable")
+            documents, next_url = pages[url]
+            links = {"next": {"url": next_url}} if next_url else {}
+            return Mock(status_code=200, json=Mock(return_value=documents), links=links)
+
+        mocker.patch("mendeley_client.MendeleyClient.get", side_effect=get)
+        cache._store([document("old", "10.1/old")], mark="earlier")
+
+        with pytest.raises(Exception, match="Service unavailable"):
+            cache.sync("token")
+        assert cache.resume_pending
+        assert len(cache) == 3  # Two pages stored, old document still there
+
+        stats = cache.sync("token")
+        assert stats.resumed and (stats.updated, stats.deleted) == (1, 1)
+        assert calls == ["start", "https://api/p2", "https://api/p3", "https://api/p3"]
+        assert set(cache.library_docs()) == {"10.1/a", "10.1/b", "10.1/c"}
+        assert not cache.resume_pending and cache.last_sync is not None
+
+    def test_doi_index_follows_syncs(self, cache, library, tmp_path):
+        """Test that the DOI index is rewritten only after a change"""
+        cache.sync("token")
+        path = tmp_path / "library.doidx"
+        with cache.doi_index() as index:
+            assert set(index) == {"10.1038/nature12345", "10.1126/science.abc123"}
+        written = path.stat().st_mtime_ns
+
+        cache.sync("token")  # Nothing changed
+        cache.doi_index().close()
+        assert path.stat().st_mtime_ns == written
+
+        library.update(document("d4", "10.1000/new", "Fourth"))
+        cache.sync("token")
+        with cache.doi_index() as index:
+            assert index["10.1000/new"]["title"] == "Fourth"
+
+    def test_sync_age(self, cache, library):
+        """Test that the age is unknown before the first sync"""
+        assert cache.sync_age() is None
+        cache.sync("token")
+        age = cache.sync_age()
+        assert age is not None and 0 <= age < 60
+
+
+class TestSyncLibrary:
+    """Tests for sync_library"""
+
+    def test_fresh_cache_is_not_synced(self, tmp_path, library, capsys):
+        """Test that a cache younger than max_age is used as it is"""
+        path = str(tmp_path / "library.sqlite")
+        sync_library("token", path).close()
+        sync_library("token", path, max_age=3600).close()
+        assert len(library.calls) == 1
+        assert "Using library cache" in capsys.readouterr().out
+
+    def test_stale_cache_is_synced(self, tmp_path, library):
+        """Test that an old cache gets an incremental sync"""
+        path = str(tmp_path / "library.sqlite")
+        with sync_library("token", path) as cache:
+            old = datetime.now(timezone.utc) - timedelta(hours=2)
+            cache._set_state("last_sync", old.isoformat())
+        sync_library("token", path, max_age=3600).close()
+        assert "modified_since" in library.calls[1]
+
+
+class TestMain:
+    """Tests for the command line"""
+
+    def test_status_without_cache(self, tmp_path, capsys):
+        """Test that --status reports a missing cache"""
+        assert main(["--status", "--cache", str(tmp_path / "none.sqlite")]) == 1
+        assert "No library cache" in capsys.readouterr().out
+
+    def test_sync_then_status(self, tmp_path, library, mocker, capsys):
+        """Test that the CLI syncs and then reports what it cached"""
+        mocker.patch("mendeley_library_cache.get_access_token", return_value="t")
+        path = str(tmp_path / "library.sqlite")
+        assert main(["--cache", path]) == 0
+        assert "Full sync: 3 updated" in capsys.readouterr().out
+        assert main(["--status", "--cache", path]) == 0
+        assert "3 documents, 2 with DOIs" in capsys.readouterr().out
+
+    def test_checker_uses_cache(self, tmp_path, library, mocker, capsys):
+        """Test that check_mendeley_dois_v2 checks DOIs against the cache"""
+        from check_mendeley_dois_v2 import main as check_main
+
+        mocker.patch("check_mendeley_dois_v2.get_access_token", return_value="t")
+        path = str(tmp_path / "library.sqlite")
+        check_main(["--dois", "10.1038/nature12345,10.9/x", "--cache", path])
+        check_main(["--dois", "10.1038/nature12345", "--cache", path])
+
+        out = capsys.readouterr().out
+        assert "ALREADY IN LIBRARY (1)" in out
+        assert "Incremental sync" in out
+        assert library.calls[:2] == [{"limit": 1}, {"limit": 500}]
+        assert len(library.calls) == 4
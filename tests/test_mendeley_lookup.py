@@ -0,0 +1,173 @@
+"""
+Tests for mendeley_lookup.py
+"""
+
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from mendeley_lookup import (
+    SEARCH_URL,
+    choose_strategy,
+    lookup_dois,
+    search_doi,
+    search_dois,
+)
+
+
+def document(doc_id, doi, title="Paper"):
+    """Build a documents API entry"""
+    return {"id": doc_id, "title": title, "identifiers": {"doi": doi}}
+
+
+class FakeApi:
+    """Stand-in for MendeleyClient.get with a library of a given size"""
+
+    def __init__(self, documents, count=None):
+        self.documents = documents
+        self.count = len(documents) if count is None else count
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None):
+        params = params or {}
+        with self.lock:
+            self.urls.append(url)
+        response = Mock(status_code=200, links={})
+        response.headers = {"Mendeley-Count": str(self.count)}
+        if url == SEARCH_URL:
+            words = params["query"].lower()
+            # Search also matches documents that merely mention the DOI
+            body = [
+                doc
+                for doc in self.documents
+                if words in doc["identifiers"]["doi"].lower()
+            ]
+        else:
+            body = self.documents[: params.get("limit", 500)]
+        response.json.return_value = body
+        return response
+
+
+@pytest.fixture
+def api(mocker):
+    """Fake API serving a 20,000-document library (three documents shown)"""
+    fake = FakeApi(
+        [
+            document("d1", "10.1038/Nature12345"),
+            document("d2", "10.1038/nature12345.suppl"),
+            document("d3", "10.1126/science.abc123"),
+        ],
+        count=20000,
+    )
+    mocker.patch("mendeley_client.MendeleyClient.get", side_effect=fake.get)
+    return fake
+
+
+class TestChooseStrategy:
+    """Tests for choose_strategy"""
+
+    def test_small_batch_in_large_library_searches(self):
+        """Test that 3 DOIs against 20k documents are searched one by one"""
+        strategy, reason = choose_strategy(3, 20000, None)
+        assert strategy == "search"
+        assert "40 page(s)" in reason
+
+    def test_large_batch_downloads(self):
+        """Test that a batch costing more rounds than pages downloads"""
+        assert choose_strategy(3000, 20000, None)[0] == "sync"
+        assert choose_strategy(3000, 20000, None, use_cache=False)[0] == "scan"
+
+    def test_small_library_downloads(self):
+        """Test that a one-page library is downloaded even for one DOI"""
+        assert choose_strategy(1, 300, None)[0] == "sync"
+
+    def test_fresh_cache_is_used(self):
+        """Test that a cache younger than max_age needs no API calls"""
+        assert choose_strategy(3, 20000, 10, max_age=60)[0] == "cache"
+
+    def test_stale_cache_is_synced(self):
+        """Test that an existing cache is synced rather than bypassed"""
+        assert choose_strategy(3, None, 120, max_age=60)[0] == "sync"
+
+    def test_cache_ignored_without_use_cache(self):
+        """Test that use_cache=False never picks the cache"""
+        assert choose_strategy(3, 20000, 10, 60, use_cache=False)[0] == "search"
+
+    def test_unknown_size_downloads(self):
+        """Test that an unknown library size falls back to downloading"""
+        assert choose_strategy(3, None, None)[0] == "sync"
+
+
+class TestSearch:
+    """Tests for search_doi and search_dois"""
+
+    def test_only_exact_identifier_matches(self, api):
+        """Test that a document merely containing the DOI is not a hit"""
+        info = search_doi("token", "10.1038/NATURE12345")
+        assert info is not None and info["id"] == "d1"
+        assert search_doi("token", "10.1038/nature1") is None
+
+    def test_search_error_raises(self, mocker):
+        """Test that a failed search raises instead of reporting a miss"""
+        mocker.patch(
+            "mendeley_client.MendeleyClient.get",
+            return_value=Mock(status_code=500, text="boom"),
+        )
+        with pytest.raises(Exception, match="boom"):
+            search_doi("token", "10.1/x")
+
+    def test_search_dois_deduplicates(self, api):
+        """Test that repeated DOIs are searched once"""
+        found = search_dois(
+            "token", ["10.1126/science.abc123", "10.1126/SCIENCE.ABC123 ", "10.9/x"]
+        )
+        assert list(found) == ["10.1126/science.abc123"]
+        assert api.urls.count(SEARCH_URL) == 2
+
+
+class TestLookupDois:
+    """Tests for lookup_dois"""
+
+    def test_small_batch_uses_search(self, api, tmp_path, capsys):
+        """Test that a small batch is searched and no cache is written"""
+        cache = tmp_path / "library.sqlite"
+        result = lookup_dois("token", ["10.1038/nature12345"], cache_path=str(cache))
+        assert result.strategy == "search"
+        assert list(result.library_docs) == ["10.1038/nature12345"]
+        assert not cache.exists()
+        out = capsys.readouterr().out
+        assert "Lookup strategy: search" in out
+        assert "Looked up 1 DOI(s) by search" in out
+
+    def test_large_batch_syncs_then_uses_cache(self, api, tmp_path):
+        """Test that a large batch fills the cache, which later runs reuse"""
+        cache = str(tmp_path / "library.sqlite")
+        dois = [f"10.1/{n}" for n in range(200)] + ["10.1126/science.abc123"]
+
+        first = lookup_dois("token", dois, cache_path=cache)
+        assert first.strategy == "sync"
+        assert list(first.library_docs) == ["10.1126/science.abc123"]
+
+        api.urls.clear()
+        second = lookup_dois("token", ["10.1/x"], cache_path=cache, max_age=3600)
+        assert second.strategy == "cache"
+        assert api.urls == []
+
+    def test_requested_strategy_is_used(self, api, tmp_path):
+        """Test that an explicit strategy skips the size request"""
+        result = lookup_dois(
+            "token",
+            ["10.1038/nature12345"],
+            strategy="scan",
+            cache_path=str(tmp_path / "c.sqlite"),
+        )
+        assert result.strategy == "scan"
+        assert result.reason == "requested"
+        assert "10.1126/science.abc123" in result.library_docs
+
+    def test_unknown_strategy_is_rejected(self, api):
+        """Test that a misspelt strategy raises ValueError"""
+        with pytest.raises(ValueError, match="fast"):
+            lookup_dois("token", ["10.1/x"], strategy="fast")
@@ -0,0 +1,94 @@
+"""
+Tests for mendeley_token.py
+"""
+
+import os
+import threading
+
+import pytest
+
+from mendeley_token import TokenStore, stamp_expiry, token_is_fresh
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Token store in a temporary directory"""
+    return TokenStore(str(tmp_path / "mendeley_token.json"))
+
+
+class TestExpiry:
+    """Tests for stamp_expiry and token_is_fresh"""
+
+    def test_stamp_expiry_from_expires_in(self):
+        """Test that expires_in becomes an absolute expires_at"""
+        data = stamp_expiry({"access_token": "a", "expires_in": 3600}, now=lambda: 100)
+        assert data["expires_at"] == 3700
+
+    def test_stamp_expiry_without_expires_in(self):
+        """Test that data without expires_in is left alone"""
+        assert stamp_expiry({"access_token": "a"}) == {"access_token": "a"}
+
+    def test_fresh_until_margin(self):
+        """Test that a token stops being fresh margin seconds before expiry"""
+        data = {"access_token": "a", "expires_at": 1000}
+        assert token_is_fresh(data, margin=300, now=lambda: 600)
+        assert not token_is_fresh(data, margin=300, now=lambda: 700)
+
+    def test_untracked_expiry_is_not_fresh(self):
+        """Test that tokens saved without expires_at get refreshed"""
+        assert not token_is_fresh({"access_token": "a"})
+        assert not token_is_fresh({"access_token": "a", "expires_at": "soon"})
+        assert not token_is_fresh(None)
+
+
+class TestTokenStore:
+    """Tests for TokenStore"""
+
+    def test_save_and_load(self, store):
+        """Test that saved data loads back and is private to the user"""
+        assert store.load() is None
+        store.save({"access_token": "a"})
+        assert store.load() == {"access_token": "a"}
+        if os.name != "nt":
+            assert os.stat(store.path).st_mode & 0o777 == 0o600
+
+    def test_save_leaves_no_temp_files(self, store, tmp_path):
+        """Test that the atomic write cleans up after itself"""
+        store.save({"access_token": "a"})
+        store.save({"access_token": "b"})
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["mendeley_token.json"]
+
+    def test_corrupt_file_raises(self, store):
+        """Test that a file not holding a token object raises ValueError"""
+        with open(store.path, "w") as f:
+            f.write("[]")
+        with pytest.raises(ValueError):
+            store.load()
+
+    def test_lock_is_exclusive(self, store):
+        """Test that a second holder waits and then times out"""
+        with store.lock():
+            with pytest.raises(TimeoutError):
+                with store.lock(timeout=0.1):
+                    pass
+        with store.lock(timeout=0.1):
+            pass
+
+    def test_lock_waits_for_holder(self, store):
+        """Test that a waiting holder gets the lock once it is released"""
+        order = []
+        held = threading.Event()
+
+        def first():
+            with store.lock():
+                held.set()
+                threading.Event().wait(0.2)
+                order.append("first")
+
+        thread = threading.Thread(target=first)
+        thread.start()
+        held.wait(5)
+        with store.lock(timeout=5):
+            order.append("second")
+        thread.join()
+        assert order == ["first", "second"]
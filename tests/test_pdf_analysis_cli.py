@@ -0,0 +1,91 @@
+"""
+Tests for pdf_analysis_cli.py
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pdf_analysis_cli import COMMANDS, main
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestDispatch:
+    """Tests for subcommand dispatch"""
+
+    def test_forwards_arguments_to_module_main(self, mocker):
+        """Test that remaining arguments are passed to the subcommand"""
+        clean_main = mocker.patch("clean_marker_output.main", return_value=0)
+
+        assert main(["clean", "a.md", "b.md"]) == 0
+        clean_main.assert_called_once_with(["a.md", "b.md"])
+
+    def test_none_return_maps_to_zero(self, mocker):
+        """Test that entry points returning None exit successfully"""
+        mocker.patch("check_mendeley_dois_v2.main", return_value=None)
+        assert main(["check", "--dois", "10.1/x"]) == 0
+
+    def test_no_arguments_prints_help(self, capsys):
+        """Test that running without a command prints help"""
+        assert main([]) == 1
+        assert "report" in capsys.readouterr().out
+
+    def test_unknown_command_exits(self):
+        """Test that an unknown command is rejected"""
+        with pytest.raises(SystemExit):
+            main(["bogus"])
+
+    def test_every_command_module_exists(self):
+        """Test that every registered module file is present"""
+        for module_name, _entry, _help in COMMANDS.values():
+            assert (REPO_ROOT / f"{module_name}.py").exists()
+
+
+class TestReport:
+    """Tests for the report subcommand"""
+
+    def test_reexports_markdown_from_json(self, tmp_path):
+        """Test that extraction JSON is re-exported to Markdown"""
+        json_file = tmp_path / "extracted_sections.json"
+        json_file.write_text(
+            json.dumps([{"filename": "a.pdf", "introduction": "Intro text"}]),
+            encoding="utf-8",
+        )
+
+        assert main(["report", str(json_file)]) == 0
+
+        markdown = (tmp_path / "extracted_sections.md").read_text(encoding="utf-8")
+        assert "# Paper 1: a" in markdown
+        assert "Intro text" in markdown
+
+    def test_unrecognised_json_fails(self, tmp_path):
+        """Test that unrelated JSON is rejected"""
+        json_file = tmp_path / "other.json"
+        json_file.write_text(json.dumps({"foo": 1}), encoding="utf-8")
+
+        assert main(["report", str(json_file)]) == 1
+
+    def test_report_does_not_import_heavy_modules(self, tmp_path):
+        """Test that report runs without loading conversion or HTTP libraries"""
+        json_file = tmp_path / "extracted_sections.json"
+        json_file.write_text(json.dumps([]), encoding="utf-8")
+        probe = (
+            "import sys, pdf_analysis_cli;"
+            f"pdf_analysis_cli.main(['report', {str(json_file)!r}]);"
+            "print([m for m in ('pymupdf4llm', 'rapidfuzz', 'requests') "
+            "if m in sys.modules])"
+        )
+
+        proc = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert proc.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,169 @@
+"""
+Tests for pdf_dedup.py
+"""
+
+import zipfile
+
+import pytest
+
+from pdf_dedup import DuplicateFilter, content_digest, fan_out, group_duplicates
+from pdf_sources import ArchiveMember, iter_archive_pdfs
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def write_pdf(path, text=None, annotate=False):
+    """Write a one-page PDF, optionally with text and a highlight annotation"""
+    doc = pymupdf.open()
+    page = doc.new_page()
+    if text:
+        page.insert_text((72, 72), text)
+    if annotate:
+        page.add_highlight_annot(pymupdf.Rect(60, 60, 300, 80))
+    doc.save(str(path))
+    doc.close()
+
+
+class TestContentDigest:
+    """Tests for content_digest function"""
+
+    def test_text_digest_ignores_annotations(self, tmp_path):
+        """Test that an annotated copy has the same text-layer digest"""
+        write_pdf(tmp_path / "x.pdf", "Same paper text")
+        write_pdf(tmp_path / "x-annotated.pdf", "Same paper text", annotate=True)
+
+        original = str(tmp_path / "x.pdf")
+        annotated = str(tmp_path / "x-annotated.pdf")
+        assert content_digest(original, "bytes") != content_digest(annotated, "bytes")
+        assert content_digest(original, "text") == content_digest(annotated, "text")
+
+    def test_pdfs_without_text_do_not_collide(self, tmp_path):
+        """Test that scans with no text layer fall back to byte hashes"""
+        write_pdf(tmp_path / "scan1.pdf")
+        doc = pymupdf.open()
+        doc.new_page(width=300, height=300)
+        doc.save(str(tmp_path / "scan2.pdf"))
+        doc.close()
+
+        assert content_digest(str(tmp_path / "scan1.pdf"), "text") != content_digest(
+            str(tmp_path / "scan2.pdf"), "text"
+        )
+
+    def test_unknown_mode_raises(self, tmp_path):
+        """Test that an invalid mode is rejected"""
+        with pytest.raises(ValueError):
+            group_duplicates([], mode="fuzzy")
+
+
+class TestGroupDuplicates:
+    """Tests for group_duplicates function"""
+
+    def test_groups_identical_files(self, tmp_path):
+        """Test that byte-identical files share a group"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF same")
+        (tmp_path / "b.pdf").write_bytes(b"%PDF same")
+        (tmp_path / "c.pdf").write_bytes(b"%PDF other")
+        paths = [str(tmp_path / name) for name in ["a.pdf", "b.pdf", "c.pdf"]]
+
+        groups = group_duplicates(paths)
+
+        assert [g.representative for g in groups] == [paths[0], paths[2]]
+        assert groups[0].duplicates == [paths[1]]
+        assert groups[1].duplicates == []
+
+    def test_unreadable_files_stay_separate(self, tmp_path):
+        """Test that missing files are not merged with each other"""
+        paths = [str(tmp_path / "gone1.pdf"), str(tmp_path / "gone2.pdf")]
+        groups = group_duplicates(paths)
+        assert len(groups) == 2
+
+    def test_duplicate_archive_members_drop_data(self, tmp_path):
+        """Test that duplicate archive members do not keep their bytes"""
+        groups = group_duplicates(
+            [
+                ArchiveMember("a.tar", "x.pdf", b"%PDF same"),
+                ArchiveMember("a.tar", "y.pdf", b"%PDF same"),
+            ]
+        )
+        assert groups[0].representative.data == b"%PDF same"
+        assert groups[0].duplicates[0].data is None
+
+    def test_zip_members(self, tmp_path):
+        """Test that duplicates inside a ZIP are detected"""
+        archive = tmp_path / "bundle.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("a/x.pdf", b"%PDF same")
+            zf.writestr("b/x.pdf", b"%PDF same")
+
+        groups = group_duplicates(iter_archive_pdfs(str(archive)))
+        assert len(groups) == 1
+        assert groups[0].duplicates[0].member == "b/x.pdf"
+
+
+class TestDuplicateFilter:
+    """Tests for DuplicateFilter"""
+
+    def test_unique_inputs_stream_through(self):
+        """Test that each unique input is yielded before the next is hashed"""
+        seen = []
+
+        def members():
+            for name, data in [("x.pdf", b"%PDF same"), ("y.pdf", b"%PDF same")]:
+                seen.append(name)
+                yield ArchiveMember("a.tar", name, data)
+            seen.append("z.pdf")
+            yield ArchiveMember("a.tar", "z.pdf", b"%PDF other")
+
+        dedup = DuplicateFilter()
+        unique = dedup.unique(members())
+        first = next(unique)
+        assert seen == ["x.pdf"]
+        assert first.data == b"%PDF same"
+        assert [m.member for m in unique] == ["z.pdf"]
+        assert dedup.duplicate_count == 1
+
+    def test_groups_keep_no_archive_bytes(self):
+        """Test that held inputs, originals included, drop their bytes"""
+        dedup = DuplicateFilter()
+        list(
+            dedup.unique(
+                [
+                    ArchiveMember("a.tar", "x.pdf", b"%PDF same"),
+                    ArchiveMember("a.tar", "y.pdf", b"%PDF same"),
+                ]
+            )
+        )
+        (group,) = dedup.groups.values()
+        assert group.representative.data is None
+        assert group.duplicates[0].data is None
+
+    def test_late_copies_are_left_over(self, tmp_path):
+        """Test that copies found after finish() come back from leftovers()"""
+        for name in ["a.pdf", "b.pdf"]:
+            (tmp_path / name).write_bytes(b"%PDF same")
+        a, b = str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")
+        dedup = DuplicateFilter()
+        unique = dedup.unique([a, b])
+        assert next(unique) == a
+        assert dedup.finish(a, seconds=2.0) == []
+        assert list(unique) == []
+        assert list(dedup.leftovers()) == [(a, [b], 2.0, None)]
+        assert list(dedup.leftovers()) == []
+
+
+class TestFanOut:
+    """Tests for fan_out function"""
+
+    def test_copies_result_to_duplicates(self):
+        """Test that each duplicate gets its own filename and a back reference"""
+        result = {"filename": "x.pdf", "doi": "10.1/x", "introduction": "Intro"}
+        copies = fan_out(
+            result, ["pdfs/x-annotated.pdf", ArchiveMember("b.zip", "y/x.pdf")]
+        )
+
+        assert copies[0]["filename"] == "x-annotated.pdf"
+        assert copies[0]["duplicate_of"] == "x.pdf"
+        assert copies[0]["introduction"] == "Intro"
+        assert copies[1]["filename"] == "x.pdf"
+        assert copies[1]["source"] == "b.zip:y/x.pdf"
+        assert "duplicate_of" not in result
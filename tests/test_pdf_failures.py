@@ -0,0 +1,296 @@
+"""
+Tests for pdf_failures.py
+"""
+
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pdf_failures import (
+    EmptyTextLayerError,
+    Quarantine,
+    check_text_layer,
+    classify_failure,
+    has_text_layer,
+    picklable_error,
+    run_alone,
+    run_isolating_crashes,
+    time_limit,
+)
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def write_pdf(path, **save_options):
+    """Write a one-page PDF with some text"""
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), "Some text")
+    doc.save(str(path), **save_options)
+    doc.close()
+    return str(path)
+
+
+class TestClassifyFailure:
+    """Tests for classify_failure function"""
+
+    def test_memory_error_is_oom(self, tmp_path):
+        """Test that MemoryError and a dead worker pool are classed as oom"""
+        pdf = write_pdf(tmp_path / "a.pdf")
+        assert classify_failure(pdf, MemoryError()) == "oom"
+        assert classify_failure(pdf, BrokenProcessPool()) == "oom"
+
+    def test_timeout(self, tmp_path):
+        """Test that TimeoutError is classed as timeout"""
+        pdf = write_pdf(tmp_path / "a.pdf")
+        assert classify_failure(pdf, TimeoutError()) == "timeout"
+
+    def test_empty_text_layer(self, tmp_path):
+        """Test that EmptyTextLayerError is classed as empty_text_layer"""
+        pdf = write_pdf(tmp_path / "a.pdf")
+        error = EmptyTextLayerError("no text")
+        assert classify_failure(pdf, error) == "empty_text_layer"
+
+    def test_encrypted_pdf(self, tmp_path):
+        """Test that a password-protected PDF is classed as encrypted"""
+        pdf = write_pdf(
+            tmp_path / "enc.pdf",
+            encryption=pymupdf.PDF_ENCRYPT_AES_256,
+            user_pw="user",
+            owner_pw="owner",
+        )
+        assert classify_failure(pdf, TypeError("generic")) == "encrypted"
+
+    def test_corrupt_pdf(self, tmp_path):
+        """Test that a damaged or missing PDF is classed as corrupt_xref"""
+        corrupt = tmp_path / "corrupt.pdf"
+        corrupt.write_bytes(b"%PDF-1.4\n1 0 obj garbage xref 0 trailer")
+        assert classify_failure(str(corrupt), ValueError()) == "corrupt_xref"
+        missing = str(tmp_path / "missing.pdf")
+        assert classify_failure(missing, ValueError()) == "corrupt_xref"
+
+    def test_other(self, tmp_path):
+        """Test that an unexplained error on a healthy PDF is classed as other"""
+        pdf = write_pdf(tmp_path / "a.pdf")
+        assert classify_failure(pdf, ValueError("bug")) == "other"
+
+
+class TestTextLayer:
+    """Tests for has_text_layer and check_text_layer"""
+
+    def test_picture_placeholders_are_not_text(self):
+        """Test that pymupdf4llm image placeholders do not count as text"""
+        md = "\n**==> picture [595 x 842] intentionally omitted <==**\n\n"
+        assert not has_text_layer(md)
+        assert has_text_layer(md + "Abstract")
+
+    def test_check_text_layer_raises(self):
+        """Test that an empty conversion raises EmptyTextLayerError"""
+        with pytest.raises(EmptyTextLayerError, match="scan.pdf"):
+            check_text_layer("  \n-----\n", "pdfs/scan.pdf")
+
+
+class TestTimeLimit:
+    """Tests for time_limit context manager"""
+
+    def test_raises_timeout(self):
+        """Test that a slow block is interrupted"""
+        with pytest.raises(TimeoutError):
+            with time_limit(0.05):
+                time.sleep(1)
+
+    def test_no_limit(self):
+        """Test that no limit lets the block finish"""
+        with time_limit(None):
+            time.sleep(0.01)
+
+
+class TestPicklableError:
+    """Tests for picklable_error function"""
+
+    def test_unpicklable_error_is_wrapped(self):
+        """Test that errors that cannot be pickled become RuntimeErrors"""
+
+        class LocalError(Exception):
+            pass
+
+        wrapped = picklable_error(LocalError("bad xref"))
+        assert isinstance(wrapped, RuntimeError)
+        assert "LocalError: bad xref" in str(wrapped)
+        pickle.dumps(wrapped)
+
+    def test_picklable_error_is_kept(self):
+        """Test that ordinary errors pass through unchanged"""
+        error = ValueError("x")
+        assert picklable_error(error) is error
+
+
+def exit_on_bad(name):
+    """Worker task that kills its process for names starting with bad"""
+    if name.startswith("bad"):
+        time.sleep(0.05)  # Let the other tasks get under way first
+        os._exit(9)
+    time.sleep(0.1)
+    if name == "error":
+        raise ValueError("ordinary failure")
+    return name.upper()
+
+
+def submit_exit_on_bad(pool, name):
+    """Submit exit_on_bad for run_isolating_crashes"""
+    return pool.submit(exit_on_bad, name)
+
+
+def hang_on_slow(name):
+    """Worker task that never returns for names starting with slow"""
+    if name.startswith("slow"):
+        time.sleep(60)  # Stands in for a hang the signal cannot interrupt
+    time.sleep(0.05)
+    return name.upper()
+
+
+def submit_hang_on_slow(pool, name):
+    """Submit hang_on_slow for run_isolating_crashes"""
+    return pool.submit(hang_on_slow, name)
+
+
+def make_pool(workers):
+    """Process pool for run_isolating_crashes"""
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+class TestRunIsolatingCrashes:
+    """Tests for run_isolating_crashes function"""
+
+    def test_only_the_crashing_item_fails(self, capsys):
+        """Test that a worker that exits fails its own item, not its neighbours"""
+        names = ["a1", "a2", "a3", "bad", "a4", "a5", "error", "a6"]
+        outcomes = {
+            name: (result, error)
+            for name, result, error in run_isolating_crashes(
+                make_pool, submit_exit_on_bad, names, workers=2
+            )
+        }
+        assert sorted(outcomes) == sorted(names)
+        assert isinstance(outcomes["bad"][1], BrokenProcessPool)
+        assert isinstance(outcomes["error"][1], ValueError)
+        for name in names:
+            if name not in ("bad", "error"):
+                assert outcomes[name] == (name.upper(), None)
+        assert "A worker process died" in capsys.readouterr().out
+
+    def test_several_crashes(self):
+        """Test that the run continues after more than one worker dies"""
+        names = ["bad1", "a1", "bad2", "a2", "a3", "bad3"]
+        failed = [
+            name
+            for name, _result, error in run_isolating_crashes(
+                make_pool, submit_exit_on_bad, names, workers=3
+            )
+            if error is not None
+        ]
+        assert sorted(failed) == ["bad1", "bad2", "bad3"]
+
+    def test_overdue_item_is_killed(self, monkeypatch):
+        """Test that a hung worker is killed and only its item times out"""
+        monkeypatch.setattr("pdf_failures.TIMEOUT_GRACE", 0.0)
+        names = ["a1", "slow", "a2", "a3", "a4"]
+        started = time.monotonic()
+        outcomes = {
+            name: (result, error)
+            for name, result, error in run_isolating_crashes(
+                make_pool, submit_hang_on_slow, names, workers=2, timeout=1
+            )
+        }
+        assert time.monotonic() - started < 30
+        assert sorted(outcomes) == sorted(names)
+        assert isinstance(outcomes["slow"][1], TimeoutError)
+        assert classify_failure("slow.pdf", outcomes["slow"][1]) == "timeout"
+        for name in names:
+            if name != "slow":
+                assert outcomes[name] == (name.upper(), None)
+
+    def test_run_alone_kills_overdue_item(self, monkeypatch):
+        """Test that run_alone replaces the pool after a hung item"""
+        monkeypatch.setattr("pdf_failures.TIMEOUT_GRACE", 0.0)
+        outcomes = list(
+            run_alone(make_pool, submit_hang_on_slow, ["slow", "a1"], timeout=0.5)
+        )
+        assert [name for name, _result, _error in outcomes] == ["slow", "a1"]
+        assert isinstance(outcomes[0][2], TimeoutError)
+        assert outcomes[1][1:] == ("A1", None)
+
+
+class TestQuarantine:
+    """Tests for the Quarantine class"""
+
+    def test_add_save_and_load(self, tmp_path):
+        """Test that failures are persisted with their class and attempts"""
+        pdf = write_pdf(tmp_path / "a.pdf")
+        quarantine = Quarantine(str(tmp_path / "out.quarantine.json"))
+        quarantine.add(pdf, TimeoutError("slow"), conversion_options={"x": 1})
+        quarantine.add(pdf, TimeoutError("slow"))
+
+        reloaded = Quarantine(quarantine.path)
+        reloaded.load()
+        entry = reloaded.entries[pdf]
+        assert entry["error_class"] == "timeout"
+        assert entry["attempts"] == 2
+        assert pdf in reloaded
+
+    def test_path_spellings_share_an_entry(self, tmp_path, monkeypatch):
+        """Test that a relative and an absolute path find the same entry"""
+        monkeypatch.chdir(tmp_path)
+        pdf = write_pdf(tmp_path / "a.pdf")
+        quarantine = Quarantine(str(tmp_path / "out.quarantine.json"))
+        quarantine.add("./a.pdf", TimeoutError("slow"))
+
+        assert pdf in quarantine
+        assert list(quarantine.select(["a.pdf", "b.pdf"])) == ["a.pdf"]
+        quarantine.remove(pdf)
+        assert len(quarantine) == 0
+
+    def test_remove_deletes_empty_file(self, tmp_path):
+        """Test that the file disappears once every failure is recovered"""
+        pdf = write_pdf(tmp_path / "a.pdf")
+        quarantine = Quarantine(str(tmp_path / "out.quarantine.json"))
+        quarantine.add(pdf, TimeoutError())
+        quarantine.remove(pdf)
+        assert not (tmp_path / "out.quarantine.json").exists()
+
+    def test_select_and_exclude(self, tmp_path):
+        """Test filtering inputs by quarantine membership"""
+        a = write_pdf(tmp_path / "a.pdf")
+        b = write_pdf(tmp_path / "b.pdf")
+        quarantine = Quarantine(str(tmp_path / "out.quarantine.json"))
+        quarantine.add(b, MemoryError())
+        assert list(quarantine.select([a, b])) == [b]
+        assert list(quarantine.exclude([a, b])) == [a]
+
+    def test_summary(self, tmp_path):
+        """Test the per-class summary line"""
+        a = write_pdf(tmp_path / "a.pdf")
+        b = write_pdf(tmp_path / "b.pdf")
+        quarantine = Quarantine(str(tmp_path / "out.quarantine.json"))
+        quarantine.add(a, MemoryError())
+        quarantine.add(b, TimeoutError())
+        assert quarantine.summary() == "2 PDF(s) quarantined (timeout: 1, oom: 1)"
+
+    def test_unreadable_file(self, tmp_path, capsys):
+        """Test that a corrupt quarantine file is reported and ignored"""
+        path = tmp_path / "out.quarantine.json"
+        path.write_text("{not json", encoding="utf-8")
+        assert Quarantine(str(path)).load() == {}
+        assert "Could not read quarantine" in capsys.readouterr().out
+
+    def test_file_is_json_list(self, tmp_path):
+        """Test that the quarantine is written as a readable JSON list"""
+        pdf = write_pdf(tmp_path / "a.pdf")
+        quarantine = Quarantine(str(tmp_path / "out.quarantine.json"))
+        quarantine.add(pdf, TimeoutError("slow"))
+        data = json.loads((tmp_path / "out.quarantine.json").read_text("utf-8"))
+        assert [entry["filename"] for entry in data] == ["a.pdf"]
@@ -0,0 +1,225 @@
+"""
+Tests for pdf_sources.py
+"""
+
+import argparse
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from pdf_sources import (
+    ArchiveMember,
+    PdfDiscovery,
+    add_discovery_arguments,
+    input_filename,
+    input_label,
+    is_archive,
+    iter_archive_pdfs,
+    matches_any,
+    open_pdf_document,
+)
+
+
+def make_pdf_bytes(text="Hello archive"):
+    """Build a one-page PDF in memory"""
+    pymupdf = pytest.importorskip("pymupdf")
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def add_tar_member(tf, name, data):
+    """Add bytes to a tarfile under the given name"""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tf.addfile(info, io.BytesIO(data))
+
+
+class TestIsArchive:
+    """Tests for is_archive function"""
+
+    def test_recognises_archive_suffixes(self, tmp_path):
+        """Test that supported archive extensions are detected"""
+        for name in ["a.zip", "b.tar", "c.tar.gz", "d.tgz", "e.TAR.XZ"]:
+            path = tmp_path / name
+            path.write_bytes(b"")
+            assert is_archive(str(path))
+
+    def test_rejects_directories_and_pdfs(self, tmp_path):
+        """Test that folders and plain PDFs are not archives"""
+        (tmp_path / "paper.pdf").write_bytes(b"%PDF")
+        assert not is_archive(str(tmp_path))
+        assert not is_archive(str(tmp_path / "paper.pdf"))
+        assert not is_archive(str(tmp_path / "missing.zip"))
+
+
+class TestIterArchivePdfs:
+    """Tests for iter_archive_pdfs function"""
+
+    def test_zip_members_are_lazy(self, tmp_path):
+        """Test that ZIP members are listed without reading their data"""
+        archive = tmp_path / "bundle.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("2024/paper.pdf", b"%PDF-zip")
+            zf.writestr("2024/notes.txt", b"ignored")
+            zf.writestr("empty/", b"")
+
+        members = list(iter_archive_pdfs(str(archive)))
+
+        assert [m.member for m in members] == ["2024/paper.pdf"]
+        assert members[0].data is None
+        assert members[0].read() == b"%PDF-zip"
+
+    def test_tar_members_carry_data(self, tmp_path):
+        """Test that compressed TAR members are streamed into memory"""
+        archive = tmp_path / "bundle.tar.gz"
+        with tarfile.open(archive, "w:gz") as tf:
+            add_tar_member(tf, "journal/paper.PDF", b"%PDF-tar")
+            add_tar_member(tf, "journal/readme.md", b"ignored")
+
+        members = list(iter_archive_pdfs(str(archive)))
+
+        assert len(members) == 1
+        assert members[0].member == "journal/paper.PDF"
+        assert members[0].read() == b"%PDF-tar"
+
+
+class TestInputNames:
+    """Tests for input_filename and input_label functions"""
+
+    def test_archive_member_names(self):
+        """Test display names for archive members"""
+        member = ArchiveMember("bundle.zip", "2024/paper.pdf")
+        assert input_filename(member) == "paper.pdf"
+        assert input_label(member) == "bundle.zip:2024/paper.pdf"
+
+    def test_path_names(self):
+        """Test display names for plain paths"""
+        assert input_filename("pdfs/paper.pdf") == "paper.pdf"
+        assert input_label("pdfs/paper.pdf") == "pdfs/paper.pdf"
+
+
+class TestOpenPdfDocument:
+    """Tests for open_pdf_document function"""
+
+    def test_opens_zip_member_from_memory(self, tmp_path):
+        """Test that a PDF inside a ZIP opens without extraction"""
+        archive = tmp_path / "bundle.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("paper.pdf", make_pdf_bytes("Archived text"))
+
+        member = next(iter_archive_pdfs(str(archive)))
+        doc = open_pdf_document(member)
+        try:
+            assert "Archived text" in doc[0].get_text()
+        finally:
+            doc.close()
+        assert list(tmp_path.iterdir()) == [archive]
+
+
+def make_tree(root, *paths):
+    """Create empty files at the given relative paths"""
+    for rel_path in paths:
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"%PDF")
+
+
+def relative(paths, root):
+    """Return paths relative to root with '/' separators"""
+    return [os.path.relpath(p, root).replace(os.sep, "/") for p in paths]
+
+
+class TestMatchesAny:
+    """Tests for matches_any"""
+
+    def test_pattern_without_slash_matches_name(self):
+        """Test that a bare glob matches the last path component"""
+        assert matches_any("2023/nature/Paper.PDF", ["*.pdf"])
+        assert not matches_any("2023/nature/notes.txt", ["*.pdf"])
+
+    def test_pattern_with_slash_matches_path(self):
+        """Test that a glob with '/' is matched against the whole path"""
+        assert matches_any("2023/nature/a.pdf", ["2023/*"])
+        assert not matches_any("2024/nature/a.pdf", ["2023/*"])
+
+
+class TestPdfDiscovery:
+    """Tests for PdfDiscovery"""
+
+    def test_flat_by_default(self, tmp_path):
+        """Test that only the top directory is listed, sorted by name"""
+        make_tree(tmp_path, "b.pdf", "a.PDF", "c.txt", "sub/d.pdf")
+        paths = list(PdfDiscovery().iter_paths(str(tmp_path)))
+        assert relative(paths, tmp_path) == ["a.PDF", "b.pdf"]
+
+    def test_recursive_depth_first(self, tmp_path):
+        """Test that files come before subdirectories, each sorted"""
+        make_tree(tmp_path, "z.pdf", "2023/b.pdf", "2023/a/x.pdf", "2024/c.pdf")
+        paths = PdfDiscovery(recursive=True).iter_paths(str(tmp_path))
+        assert relative(paths, tmp_path) == [
+            "z.pdf",
+            "2023/b.pdf",
+            "2023/a/x.pdf",
+            "2024/c.pdf",
+        ]
+
+    def test_streams_before_walk_finishes(self, tmp_path, mocker):
+        """Test that the first PDF is yielded before later folders are listed"""
+        make_tree(tmp_path, "a/1.pdf", "b/2.pdf")
+        scandir = mocker.spy(os, "scandir")
+        paths = PdfDiscovery(recursive=True).iter_paths(str(tmp_path))
+        next(paths)
+        assert scandir.call_count == 2  # Root and a/, not b/ yet
+
+    def test_include_and_exclude(self, tmp_path):
+        """Test that include globs select files and exclude globs prune"""
+        make_tree(
+            tmp_path, "2023/a.pdf", "2023/drafts/b.pdf", "2023/c.pdf", "2024/d.pdf"
+        )
+        discovery = PdfDiscovery(
+            recursive=True, include=("2023/*",), exclude=("drafts", "c.pdf")
+        )
+        paths = discovery.iter_paths(str(tmp_path))
+        assert relative(paths, tmp_path) == ["2023/a.pdf"]
+
+    def test_hidden_directories_skipped(self, tmp_path):
+        """Test that dot-directories such as caches are not entered"""
+        make_tree(tmp_path, "a.pdf", ".cache/b.pdf")
+        paths = PdfDiscovery(recursive=True).iter_paths(str(tmp_path))
+        assert relative(paths, tmp_path) == ["a.pdf"]
+
+    def test_symlinked_directories_need_follow(self, tmp_path):
+        """Test that linked folders are entered once, and only on request"""
+        make_tree(tmp_path, "real/a.pdf")
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+        (tmp_path / "real" / "loop").symlink_to(tmp_path)
+
+        plain = PdfDiscovery(recursive=True).iter_paths(str(tmp_path))
+        assert relative(plain, tmp_path) == ["real/a.pdf"]
+        followed = PdfDiscovery(recursive=True, follow_symlinks=True).iter_paths(
+            str(tmp_path)
+        )
+        assert relative(followed, tmp_path) == ["link/a.pdf"]
+
+    def test_symlinked_files_included(self, tmp_path):
+        """Test that a symlink to a PDF is listed like the file itself"""
+        make_tree(tmp_path, "store/a.pdf")
+        (tmp_path / "b.pdf").symlink_to(tmp_path / "store" / "a.pdf")
+        paths = PdfDiscovery().iter_paths(str(tmp_path))
+        assert relative(paths, tmp_path) == ["b.pdf"]
+
+    def test_from_args(self):
+        """Test that the command line options map onto PdfDiscovery"""
+        parser = argparse.ArgumentParser()
+        add_discovery_arguments(parser)
+        assert PdfDiscovery.from_args(parser.parse_args([])) == PdfDiscovery()
+        args = parser.parse_args(["-r", "--exclude", "old", "--include", "*.PDF"])
+        assert PdfDiscovery.from_args(args) == PdfDiscovery(
+            recursive=True, include=("*.PDF",), exclude=("old",)
+        )
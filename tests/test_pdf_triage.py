@@ -0,0 +1,116 @@
+"""
+Tests for pdf_triage.py
+"""
+
+import json
+
+import pytest
+
+from pdf_triage import TriageRouter, sample_page_numbers, triage_pdf
+
+pymupdf = pytest.importorskip("pymupdf")
+
+BODY_TEXT = "Energy storage is receiving increased attention in this field. " * 4
+
+
+def write_pdf(path, pages):
+    """Write a PDF whose pages are 'text' or 'image' (a full-page picture)"""
+    doc = pymupdf.open()
+    for kind in pages:
+        page = doc.new_page()
+        if kind == "text":
+            page.insert_textbox(page.rect + (72, 72, -72, -72), BODY_TEXT)
+        else:
+            pix = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 50, 50), 0)
+            pix.clear_with(200)
+            page.insert_image(page.rect, pixmap=pix)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+class TestSamplePageNumbers:
+    """Tests for sample_page_numbers function"""
+
+    def test_short_document_samples_every_page(self):
+        """Test that documents shorter than the sample size are fully sampled"""
+        assert sample_page_numbers(3, samples=5) == [0, 1, 2]
+
+    def test_long_document_spreads_samples(self):
+        """Test that samples include the first and last page"""
+        assert sample_page_numbers(101, samples=5) == [0, 25, 50, 75, 100]
+
+
+class TestTriagePdf:
+    """Tests for triage_pdf function"""
+
+    def test_text_pdf(self, tmp_path):
+        """Test that a PDF with a text layer on every page is tagged text"""
+        result = triage_pdf(write_pdf(tmp_path / "a.pdf", ["text", "text"]))
+        assert result.kind == "text"
+        assert result.text_chars_per_page > 100
+
+    def test_scanned_pdf(self, tmp_path):
+        """Test that image-only pages are tagged scanned"""
+        result = triage_pdf(write_pdf(tmp_path / "a.pdf", ["image", "image"]))
+        assert result.kind == "scanned"
+        assert result.image_coverage == pytest.approx(1.0)
+
+    def test_mixed_pdf(self, tmp_path):
+        """Test that text pages with scanned inserts are tagged mixed"""
+        result = triage_pdf(write_pdf(tmp_path / "a.pdf", ["text", "image"]))
+        assert result.kind == "mixed"
+
+    def test_document_without_pages_raises(self, tmp_path):
+        """Test that a PDF pymupdf opens with no pages is not called scanned"""
+        corrupt = tmp_path / "corrupt.pdf"
+        corrupt.write_bytes(b"%PDF-1.4\n1 0 obj garbage xref 0 trailer")
+        with pytest.raises(ValueError, match="No pages"):
+            triage_pdf(str(corrupt))
+
+
+class TestTriageRouter:
+    """Tests for the TriageRouter class"""
+
+    def test_tag_policy_passes_everything(self, tmp_path):
+        """Test that tagging converts scanned PDFs too"""
+        text = write_pdf(tmp_path / "text.pdf", ["text"])
+        scan = write_pdf(tmp_path / "scan.pdf", ["image"])
+        router = TriageRouter("tag")
+
+        assert list(router.route([text, scan])) == [text, scan]
+        assert router.kind_of(scan) == "scanned"
+        assert router.scanned == []
+
+    def test_skip_policy_withholds_scanned(self, tmp_path):
+        """Test that scanned PDFs are withheld and remembered"""
+        text = write_pdf(tmp_path / "text.pdf", ["text"])
+        scan = write_pdf(tmp_path / "scan.pdf", ["image"])
+        router = TriageRouter("skip")
+
+        assert list(router.route([text, scan])) == [text]
+        assert [entry["filename"] for entry in router.scanned] == ["scan.pdf"]
+        assert "1 text, 0 mixed, 1 scanned (not converted)" in router.summary()
+
+    def test_unreadable_pdf_is_passed_on(self, tmp_path):
+        """Test that PDFs triage cannot open still reach conversion"""
+        missing = str(tmp_path / "missing.pdf")
+        router = TriageRouter("skip")
+        assert list(router.route([missing])) == [missing]
+        assert router.kind_of(missing) is None
+
+    def test_write_queue(self, tmp_path):
+        """Test that the scanned queue is written as JSON"""
+        scan = write_pdf(tmp_path / "scan.pdf", ["image"])
+        router = TriageRouter("queue")
+        list(router.route([scan]))
+        router.write_queue(str(tmp_path / "queue.json"))
+
+        queue = json.loads((tmp_path / "queue.json").read_text(encoding="utf-8"))
+        assert queue[0]["key"] == scan
+        assert queue[0]["kind"] == "scanned"
+
+    def test_unknown_policy_raises(self):
+        """Test that an invalid policy is rejected"""
+        with pytest.raises(ValueError):
+            TriageRouter("ocr")
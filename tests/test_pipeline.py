@@ -0,0 +1,441 @@
+"""
+Tests for pipeline.py
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from extract_sections import PaperExtractor
+from pipeline import Pipeline, StageCache, main
+
+SAMPLE_MARKDOWN = """
+DOI: 10.1038/nature12345
+
+# Introduction
+
+Introduction content with enough text to pass the length filter for meaningful content.
+
+# Conclusion
+
+Conclusion content that is long enough to meet the minimum requirements for extraction.
+See also [10.1126/science.abc123](https://doi.org/10.1126/science.abc123).
+
+# References
+
+- [1] Cited paper
+"""
+
+
+class CountingExtractor(PaperExtractor):
+    """PaperExtractor that counts conversions and returns canned Markdown"""
+
+    def __init__(self, markdown=SAMPLE_MARKDOWN, **kwargs):
+        super().__init__(**kwargs)
+        self.markdown = markdown
+        self.conversions = 0
+
+    def convert(self, source):
+        self.conversions += 1
+        if "broken" in os.fspath(source):
+            raise ValueError("cannot open broken document")
+        return self.markdown
+
+
+class CrashingExtractor(CountingExtractor):
+    """CountingExtractor whose worker process dies on PDFs named crash*"""
+
+    def convert(self, source):
+        if os.path.basename(os.fspath(source)).startswith("crash"):
+            os._exit(9)
+        return super().convert(source)
+
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    """Directory with two (fake) PDFs"""
+    pdfs = tmp_path / "pdfs"
+    pdfs.mkdir()
+    (pdfs / "a.pdf").write_bytes(b"%PDF-a")
+    (pdfs / "b.pdf").write_bytes(b"%PDF-b")
+    return pdfs
+
+
+class TestStageCache:
+    """Tests for StageCache"""
+
+    def test_round_trip(self, tmp_path):
+        """Test that a stored output is returned for the same key"""
+        cache = StageCache(str(tmp_path), "clean")
+        key = cache.key("input")
+        cache.put(key, "output")
+        assert cache.get(key) == "output"
+        assert cache.get(cache.key("other")) is None
+
+    def test_keys_differ_per_stage(self, tmp_path):
+        """Test that the same input hashes differently in another stage"""
+        assert StageCache(None, "clean").key("x") != StageCache(None, "extract").key(
+            "x"
+        )
+
+    def test_max_age_expires_entries(self, tmp_path):
+        """Test that entries older than max_age are ignored"""
+        cache = StageCache(str(tmp_path), "check")
+        key = cache.key("dois")
+        cache.put(key, "{}")
+        old = os.path.getmtime(tmp_path / "check" / key) - 100
+        os.utime(tmp_path / "check" / key, (old, old))
+        assert cache.get(key, max_age=10) is None
+        assert cache.get(key, max_age=1000) == "{}"
+
+    def test_without_root_stores_nothing(self):
+        """Test that a cache without a directory never hits"""
+        cache = StageCache(None, "clean")
+        cache.put("k", "output")
+        assert cache.get("k") is None
+
+
+class TestPipeline:
+    """Tests for Pipeline"""
+
+    def test_runs_every_stage_in_memory(self, pdf_dir):
+        """Test that sections and DOIs come out without intermediate files"""
+        pipeline = Pipeline(CountingExtractor(), check=False)
+        outcome = pipeline.run([str(pdf_dir / "a.pdf")])
+
+        paper = outcome.results[0]
+        assert paper["filename"] == "a.pdf"
+        assert paper["doi"] == "10.1038/nature12345"
+        assert paper["conversion_profile"] == "full"
+        assert "introduction" in paper and "conclusion" in paper
+        assert outcome.dois == ["10.1038/nature12345", "10.1126/science.abc123"]
+        assert outcome.check is None
+        assert sorted(os.listdir(pdf_dir)) == ["a.pdf", "b.pdf"]
+
+    def test_cleaning_runs_before_extraction(self, pdf_dir):
+        """Test that the reference list is cleaned away before extraction"""
+        pipeline = Pipeline(CountingExtractor(), check=False)
+        paper = pipeline.run([str(pdf_dir / "a.pdf")]).results[0]
+        assert all("Cited paper" not in value for value in paper.values())
+
+    def test_unchanged_pdfs_hit_every_cache(self, pdf_dir, tmp_path):
+        """Test that a second run converts nothing and reports cache hits"""
+        cache_dir = str(tmp_path / "cache")
+        sources = [str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")]
+        first = Pipeline(CountingExtractor(), cache_dir=cache_dir, check=False)
+        expected = first.run(sources)
+
+        extractor = CountingExtractor()
+        second = Pipeline(extractor, cache_dir=cache_dir, check=False)
+        assert second.run(sources) == expected
+        assert extractor.conversions == 0
+        for stage in ("convert", "clean", "extract", "dois"):
+            assert second.stats[stage].computed == 0
+            assert second.stats[stage].cached > 0
+
+    def test_changed_pdf_is_converted_again(self, pdf_dir, tmp_path):
+        """Test that only the PDF whose bytes changed is reconverted"""
+        cache_dir = str(tmp_path / "cache")
+        sources = [str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")]
+        Pipeline(CountingExtractor(), cache_dir=cache_dir, check=False).run(sources)
+
+        (pdf_dir / "b.pdf").write_bytes(b"%PDF-b changed")
+        extractor = CountingExtractor()
+        Pipeline(extractor, cache_dir=cache_dir, check=False).run(sources)
+        assert extractor.conversions == 1
+
+    def test_profile_change_reconverts(self, pdf_dir, tmp_path):
+        """Test that another conversion profile misses the convert cache"""
+        cache_dir = str(tmp_path / "cache")
+        sources = [str(pdf_dir / "a.pdf")]
+        Pipeline(CountingExtractor(), cache_dir=cache_dir, check=False).run(sources)
+
+        extractor = CountingExtractor(profile="fast-text")
+        pipeline = Pipeline(extractor, cache_dir=cache_dir, check=False)
+        paper = pipeline.run(sources).results[0]
+        assert extractor.conversions == 1
+        assert paper["conversion_profile"] == "fast-text"
+        assert pipeline.stats["clean"].cached == 1  # Same Markdown, same cleaning
+
+    def test_failed_pdf_does_not_stop_the_run(self, pdf_dir, tmp_path):
+        """Test that a failing PDF is reported and the others finish"""
+        broken = tmp_path / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+        pipeline = Pipeline(CountingExtractor(), check=False)
+        outcome = pipeline.run([str(broken), str(pdf_dir / "a.pdf")])
+        assert [paper["filename"] for paper in outcome.results] == ["a.pdf"]
+        assert list(outcome.failed) == ["broken.pdf"]
+
+    def test_converts_in_worker_processes(self, pdf_dir, tmp_path):
+        """Test that workers convert cache misses and keep the convert cache"""
+        cache_dir = str(tmp_path / "cache")
+        sources = [str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")]
+        first = Pipeline(
+            CountingExtractor(), cache_dir=cache_dir, check=False, workers=2
+        )
+        outcome = first.run(sources)
+        assert sorted(paper["filename"] for paper in outcome.results) == [
+            "a.pdf",
+            "b.pdf",
+        ]
+        assert first.stats["convert"].computed == 2
+
+        second = Pipeline(
+            CountingExtractor(), cache_dir=cache_dir, check=False, workers=2
+        )
+        second.run(sources)
+        assert second.stats["convert"].computed == 0
+        assert second.stats["convert"].cached == 2
+
+    def test_crashing_worker_fails_only_its_pdf(self, pdf_dir, tmp_path):
+        """Test that a PDF that kills its worker is reported as failed alone"""
+        crash = tmp_path / "crash.pdf"
+        crash.write_bytes(b"%PDF-crash")
+        pipeline = Pipeline(CrashingExtractor(), check=False, workers=2)
+        outcome = pipeline.run(
+            [str(pdf_dir / "a.pdf"), str(crash), str(pdf_dir / "b.pdf")]
+        )
+        assert sorted(paper["filename"] for paper in outcome.results) == [
+            "a.pdf",
+            "b.pdf",
+        ]
+        assert outcome.failed == {"crash.pdf": "oom"}
+
+    def test_writes_only_requested_intermediates(self, pdf_dir, tmp_path):
+        """Test that intermediate files are written only on request"""
+        out = tmp_path / "intermediate"
+        pipeline = Pipeline(
+            CountingExtractor(),
+            write=["cleaned", "dois"],
+            intermediate_dir=str(out),
+            check=False,
+        )
+        pipeline.run([str(pdf_dir / "a.pdf")])
+        assert sorted(os.listdir(out)) == ["cleaned", "dois"]
+        assert "Cited paper" not in (out / "cleaned" / "a.md").read_text()
+        assert (out / "dois" / "dois.txt").read_text().splitlines() == [
+            "10.1038/nature12345",
+            "10.1126/science.abc123",
+        ]
+
+    def test_unknown_intermediate_is_rejected(self):
+        """Test that write only accepts known intermediate results"""
+        with pytest.raises(ValueError, match="html"):
+            Pipeline(CountingExtractor(), write=["html"], intermediate_dir="x")
+
+    def test_check_runs_in_process(self, pdf_dir, tmp_path, mocker, monkeypatch):
+        """Test that the check syncs the library cache in this process"""
+        import check_mendeley_dois_v2 as mendeley
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / mendeley.TOKEN_FILE).write_text("{}")
+        mocker.patch.object(mendeley, "get_access_token", return_value="token")
+        page = mocker.Mock(status_code=200, links={})
+        page.json.return_value = [
+            {
+                "id": "abc",
+                "title": "Paper",
+                "year": 2020,
+                "identifiers": {"doi": "10.1038/nature12345"},
+            }
+        ]
+        get = mocker.patch("mendeley_client.MendeleyClient.get", return_value=page)
+        options = {
+            "cache_dir": str(tmp_path / "cache"),
+            "library_cache": str(tmp_path / "library.sqlite"),
+        }
+        outcome = Pipeline(CountingExtractor(), **options).run([str(pdf_dir / "a.pdf")])
+        assert outcome.check["summary"]["found_in_library"] == 1
+        assert outcome.check["not_in_library"] == ["10.1126/science.abc123"]
+
+        Pipeline(CountingExtractor(), **options).run([str(pdf_dir / "a.pdf")])
+        get.assert_called_once()  # Second run reused the fresh library cache
+
+    def test_check_covers_group_libraries(self, pdf_dir, tmp_path, mocker, monkeypatch):
+        """Test that library_groups are checked too, with hits tagged"""
+        import check_mendeley_dois_v2 as mendeley
+        from mendeley_libraries import GROUPS_URL
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / mendeley.TOKEN_FILE).write_text("{}")
+        mocker.patch.object(mendeley, "get_access_token", return_value="token")
+
+        def get(url, headers=None, params=None, timeout=None):
+            page = mocker.Mock(status_code=200, links={})
+            if url == GROUPS_URL:
+                page.json.return_value = [{"id": "g1", "name": "Lab"}]
+            elif (params or {}).get("group_id") == "g1":
+                page.json.return_value = [
+                    {"id": "abc", "identifiers": {"doi": "10.1126/science.abc123"}}
+                ]
+            else:
+                page.json.return_value = []
+            return page
+
+        mocker.patch("mendeley_client.MendeleyClient.get", side_effect=get)
+        outcome = Pipeline(
+            CountingExtractor(),
+            library_cache=str(tmp_path / "library.sqlite"),
+            library_groups=["Lab"],
+        ).run([str(pdf_dir / "a.pdf")])
+        assert outcome.check["in_library"][0]["library"] == "Lab"
+        assert outcome.check["not_in_library"] == ["10.1038/nature12345"]
+        with pytest.raises(ValueError, match="library_cache"):
+            Pipeline(CountingExtractor(), library_groups=["Lab"])
+
+    def test_library_loads_while_converting(self, pdf_dir, tmp_path, monkeypatch):
+        """Test that the library is fetched during conversion, not after it"""
+        import check_mendeley_dois_v2 as mendeley
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / mendeley.TOKEN_FILE).write_text("{}")
+        loading = threading.Event()
+
+        def load_library():
+            loading.set()
+            doc = {"doi": "10.1038/nature12345", "title": "Paper", "id": "x"}
+            return {"10.1038/nature12345": doc}
+
+        class WaitingExtractor(CountingExtractor):
+            def convert(self, source):
+                assert loading.wait(5), "library load did not start before convert"
+                return super().convert(source)
+
+        pipeline = Pipeline(WaitingExtractor())
+        monkeypatch.setattr(pipeline, "_load_library", load_library)
+        outcome = pipeline.run([str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")])
+        assert outcome.check["summary"]["found_in_library"] == 1
+
+    def test_close_releases_library(self, pdf_dir, tmp_path, monkeypatch):
+        """Test that leaving the pipeline closes the library it loaded"""
+        import check_mendeley_dois_v2 as mendeley
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / mendeley.TOKEN_FILE).write_text("{}")
+
+        class Index(dict):
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        index = Index()
+        with Pipeline(CountingExtractor()) as pipeline:
+            monkeypatch.setattr(pipeline, "_load_library", lambda: index)
+            pipeline.run([str(pdf_dir / "a.pdf")])
+            assert not index.closed
+        assert index.closed
+        assert pipeline.library is None
+
+    def test_papers_checked_as_they_finish(
+        self, pdf_dir, tmp_path, monkeypatch, capsys
+    ):
+        """Test that each paper's DOIs are checked once the library is in"""
+        import check_mendeley_dois_v2 as mendeley
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / mendeley.TOKEN_FILE).write_text("{}")
+        release = threading.Event()
+
+        def load_library():
+            release.wait(5)
+            return {}
+
+        class ReleasingExtractor(CountingExtractor):
+            def convert(self, source):
+                if source.endswith("b.pdf"):
+                    release.set()
+                    time.sleep(0.05)  # Let the load finish
+                return super().convert(source)
+
+        pipeline = Pipeline(ReleasingExtractor())
+        monkeypatch.setattr(pipeline, "_load_library", load_library)
+        pipeline.run([str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")])
+
+        out = capsys.readouterr().out
+        before_total = out[: out.index("Found 2 DOIs")]
+        assert "Mendeley: a.pdf: 0 of 2" in before_total
+        assert "Mendeley: b.pdf: 0 of 2" in before_total
+
+    def test_each_doi_looked_up_once(self, pdf_dir, tmp_path, monkeypatch):
+        """Test that the final check reuses the per-paper results"""
+        import check_mendeley_dois_v2 as mendeley
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / mendeley.TOKEN_FILE).write_text("{}")
+        lookups = []
+
+        class Index(dict):
+            def __contains__(self, doi):
+                lookups.append(doi)
+                return super().__contains__(doi)
+
+        class LoadedExtractor(CountingExtractor):
+            def convert(self, source):
+                pipeline.library.wait()  # Every paper gets checked as it finishes
+                return super().convert(source)
+
+        doc = {"doi": "10.1038/nature12345", "title": "Paper", "id": "x"}
+        pipeline = Pipeline(LoadedExtractor())
+        monkeypatch.setattr(
+            pipeline, "_load_library", lambda: Index({"10.1038/nature12345": doc})
+        )
+        outcome = pipeline.run([str(pdf_dir / "a.pdf"), str(pdf_dir / "b.pdf")])
+        assert sorted(lookups) == ["10.1038/nature12345", "10.1126/science.abc123"]
+        assert outcome.check["in_library"][0]["mendeley_id"] == "x"
+        assert outcome.check["not_in_library"] == ["10.1126/science.abc123"]
+
+    def test_check_cache_keyed_on_library(self, pdf_dir, tmp_path, monkeypatch):
+        """Test that another library cache or group misses the check cache"""
+        import check_mendeley_dois_v2 as mendeley
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / mendeley.TOKEN_FILE).write_text("{}")
+        cache_dir = str(tmp_path / "cache")
+        settings = [
+            {"library_cache": "a.sqlite"},
+            {"library_cache": "a.sqlite"},
+            {"library_cache": "b.sqlite"},
+            {"library_cache": "b.sqlite", "library_groups": ["Lab"]},
+        ]
+        computed = []
+        for options in settings:
+            pipeline = Pipeline(CountingExtractor(), cache_dir=cache_dir, **options)
+            monkeypatch.setattr(pipeline, "_load_library", dict)
+            pipeline.run([str(pdf_dir / "a.pdf")])
+            computed.append(pipeline.stats["check"].computed)
+        assert computed == [1, 0, 1, 1]
+
+    def test_check_skipped_without_token(self, pdf_dir, tmp_path, monkeypatch, capsys):
+        """Test that a missing token skips the check instead of prompting"""
+        monkeypatch.chdir(tmp_path)
+        outcome = Pipeline(CountingExtractor()).run([str(pdf_dir / "a.pdf")])
+        assert outcome.check is None
+        assert "no saved token" in capsys.readouterr().out
+
+
+class TestMain:
+    """Tests for the pipeline command line"""
+
+    def test_writes_outputs_and_stage_times(self, pdf_dir, mocker, capsys):
+        """Test that the CLI writes JSON/Markdown and reports stage times"""
+        mocker.patch(
+            "pipeline.PaperExtractor", side_effect=lambda **kw: CountingExtractor(**kw)
+        )
+        assert main(["--pdf-dir", str(pdf_dir), "--no-check"]) == 0
+
+        results = json.loads((pdf_dir / "extracted_sections.json").read_text())
+        assert [paper["filename"] for paper in results] == ["a.pdf", "b.pdf"]
+        assert "Stage times: convert" in (pdf_dir / "extracted_sections.md").read_text()
+        assert (pdf_dir / ".pipeline-cache" / "convert").is_dir()
+        assert not (pdf_dir / "pipeline").exists()
+        out = capsys.readouterr().out
+        for stage in ("convert", "clean", "extract", "dois", "check", "total"):
+            assert f"  {stage}" in out
+
+    def test_missing_directory_fails(self, tmp_path):
+        """Test that a missing PDF directory returns an error code"""
+        assert main(["--pdf-dir", str(tmp_path / "missing"), "--no-check"]) == 1
@@ -0,0 +1,204 @@
+"""
+Tests for run_journal.py
+"""
+
+import json
+import threading
+
+import pytest
+
+from pdf_sources import ArchiveMember
+from run_journal import JournalWriter, RunJournal, journal_path_for
+
+
+def make_pdf(tmp_path, name, content=b"%PDF"):
+    """Create a placeholder PDF file and return its path"""
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestRunJournal:
+    """Tests for the RunJournal class"""
+
+    def test_journal_path_for(self):
+        """Test that the journal sits next to the JSON output"""
+        assert journal_path_for("out/results.json") == "out/results.journal.jsonl"
+
+    def test_record_and_reload(self, tmp_path):
+        """Test that recorded results survive a reload in completion order"""
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        b = make_pdf(tmp_path, "b.pdf")
+        a = make_pdf(tmp_path, "a.pdf")
+        journal.record(b, {"filename": "b.pdf"})
+        journal.record(a, {"filename": "a.pdf"})
+
+        reloaded = RunJournal(journal.path)
+        reloaded.load()
+        assert reloaded.results() == [{"filename": "b.pdf"}, {"filename": "a.pdf"}]
+        assert reloaded.is_complete(a)
+
+    def test_pending_skips_completed_inputs(self, tmp_path):
+        """Test that journaled inputs are skipped and counted"""
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        a = make_pdf(tmp_path, "a.pdf")
+        b = make_pdf(tmp_path, "b.pdf")
+        journal.record(a, {"filename": "a.pdf"})
+
+        assert list(journal.pending([a, b])) == [b]
+        assert journal.skipped == 1
+
+    def test_changed_file_is_processed_again(self, tmp_path):
+        """Test that a file modified after journaling is not skipped"""
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        a = make_pdf(tmp_path, "a.pdf")
+        journal.record(a, {"filename": "a.pdf"})
+        make_pdf(tmp_path, "a.pdf", b"%PDF with new content")
+
+        assert not journal.is_complete(a)
+
+    def test_archive_members_keyed_by_location(self, tmp_path):
+        """Test that archive members use 'archive:member' as their key"""
+        archive = make_pdf(tmp_path, "bundle.zip")
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        journal.record(ArchiveMember(archive, "x/a.pdf"), {"filename": "a.pdf"})
+
+        assert f"{archive}:x/a.pdf" in journal.entries
+        assert journal.is_complete(ArchiveMember(archive, "x/a.pdf", b"%PDF"))
+        assert not journal.is_complete(ArchiveMember(archive, "x/b.pdf"))
+
+    def test_path_spellings_share_a_record(self, tmp_path, monkeypatch):
+        """Test that ./pdfs, pdfs and the absolute path resume the same input"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "pdfs").mkdir()
+        make_pdf(tmp_path, "pdfs/a.pdf")
+        archive = make_pdf(tmp_path, "bundle.zip")
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        journal.record("./pdfs/a.pdf", {"filename": "a.pdf"})
+        journal.record(ArchiveMember("./bundle.zip", "x/a.pdf"), {"filename": "a.pdf"})
+
+        reloaded = RunJournal(journal.path)
+        reloaded.load()
+        for spelling in ("pdfs/a.pdf", str(tmp_path / "pdfs" / "a.pdf")):
+            assert reloaded.is_complete(spelling)
+            assert reloaded.result(spelling) == {"filename": "a.pdf"}
+        assert reloaded.is_complete(ArchiveMember(archive, "x/a.pdf"))
+        assert list(reloaded.pending(["pdfs/./a.pdf"])) == []
+
+    def test_torn_trailing_line_is_dropped(self, tmp_path, capsys):
+        """Test that a partial last record is discarded and truncated"""
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        journal.record(make_pdf(tmp_path, "a.pdf"), {"filename": "a.pdf"})
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"key": "b.pdf", "resu')
+
+        reloaded = RunJournal(journal.path)
+        reloaded.load()
+
+        assert reloaded.results() == [{"filename": "a.pdf"}]
+        assert "Dropping incomplete record" in capsys.readouterr().out
+        with open(journal.path, encoding="utf-8") as f:
+            assert [json.loads(line)["key"] for line in f] == [str(tmp_path / "a.pdf")]
+
+    def test_load_missing_journal(self, tmp_path):
+        """Test that loading a journal that does not exist returns nothing"""
+        journal = RunJournal(str(tmp_path / "missing.journal.jsonl"))
+        assert journal.load() == {}
+
+    def test_other_conversion_profile_is_processed_again(self, tmp_path):
+        """Test that results from another conversion profile are not reused"""
+        path = str(tmp_path / "run.journal.jsonl")
+        journal = RunJournal(path, conversion="full")
+        journal.reset()
+        a = make_pdf(tmp_path, "a.pdf")
+        journal.record(a, {"filename": "a.pdf"})
+
+        same = RunJournal(path, conversion="full")
+        same.load()
+        other = RunJournal(path, conversion="fast-text")
+        other.load()
+        assert same.is_complete(a)
+        assert not other.is_complete(a)
+
+    def test_results_are_not_kept_in_memory(self, tmp_path):
+        """Test that only offsets are held and results are read back from disk"""
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        a = make_pdf(tmp_path, "a.pdf")
+        b = make_pdf(tmp_path, "b.pdf")
+        journal.record(a, {"filename": "a.pdf", "introduction": "x" * 1000})
+        journal.record(b, {"filename": "b.pdf"})
+        journal.record(a, {"filename": "a.pdf", "introduction": "again"})
+
+        assert all("result" not in entry for entry in journal.entries.values())
+        assert len(journal) == 2
+        assert list(journal.iter_results()) == [
+            {"filename": "b.pdf"},
+            {"filename": "a.pdf", "introduction": "again"},
+        ]
+
+    def test_iter_items_pairs_keys_with_results(self, tmp_path):
+        """Test that iter_items yields each source key with its latest result"""
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        a = make_pdf(tmp_path, "a.pdf")
+        journal.record(a, {"filename": "a.pdf"})
+        journal.record(a, {"filename": "a.pdf", "doi": "10.1/x"})
+
+        assert [
+            (key.endswith("a.pdf"), result) for key, result in journal.iter_items()
+        ] == [(True, {"filename": "a.pdf", "doi": "10.1/x"})]
+
+
+class TestJournalWriter:
+    """Tests for the JournalWriter class"""
+
+    def test_records_every_result_in_order(self, tmp_path):
+        """Test that results queued by the producer all reach the journal"""
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        journal.reset()
+        paths = [make_pdf(tmp_path, f"{i}.pdf") for i in range(20)]
+        with JournalWriter(journal, maxsize=2) as writer:
+            for i, path in enumerate(paths):
+                writer.record(path, {"filename": f"{i}.pdf"})
+
+        reloaded = RunJournal(journal.path)
+        reloaded.load()
+        assert reloaded.results() == [{"filename": f"{i}.pdf"} for i in range(20)]
+
+    def test_full_queue_blocks_the_producer(self, tmp_path, mocker):
+        """Test that record() waits while the writer is behind"""
+        journal = RunJournal(str(tmp_path / "run.journal.jsonl"))
+        release = threading.Event()
+        original = journal.record
+
+        def slow_record(source, result):
+            release.wait()
+            original(source, result)
+
+        mocker.patch.object(journal, "record", side_effect=slow_record)
+        a = make_pdf(tmp_path, "a.pdf")
+        with JournalWriter(journal, maxsize=1) as writer:
+            writer.record(a, {"n": 1})  # Taken by the writer, which then stalls
+            writer.record(a, {"n": 2})  # Fills the queue
+            producer = threading.Thread(target=writer.record, args=(a, {"n": 3}))
+            producer.start()
+            producer.join(timeout=0.2)
+            assert producer.is_alive()
+            release.set()
+            producer.join()
+        assert writer.waited > 0
+
+    def test_write_error_is_raised(self, tmp_path):
+        """Test that a failure on the writer thread surfaces in the producer"""
+        journal = RunJournal(str(tmp_path / "missing" / "run.journal.jsonl"))
+        a = make_pdf(tmp_path, "a.pdf")
+        with pytest.raises(FileNotFoundError):
+            with JournalWriter(journal) as writer:
+                writer.record(a, {"filename": "a.pdf"})
@@ -0,0 +1,164 @@
+"""
+Tests for section_store.py
+"""
+
+import json
+
+import pytest
+
+from section_store import SectionStore, main, quote_terms, store_path_for
+
+
+def paper(filename, doi=None, **sections):
+    """Build an extract_sections-style result with long enough sections"""
+    result = {"filename": filename}
+    if doi:
+        result["doi"] = doi
+    result.update(sections)
+    return result
+
+
+PAPERS = [
+    (
+        "/pdfs/a.pdf",
+        paper(
+            "a.pdf",
+            "10.1000/a",
+            introduction="Catalysts are studied widely in surface chemistry.",
+            conclusion="The catalyst improved the reaction rate considerably.",
+            offsets={"introduction": [10, 60], "conclusion": [80, 133]},
+        ),
+    ),
+    (
+        "/pdfs/b.pdf",
+        paper(
+            "b.pdf",
+            introduction="Climate models predict warming over the next century.",
+            conclusion="Climate model ensembles agree on the sign of change.",
+            triage="ok",
+        ),
+    ),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Store holding the two sample papers"""
+    with SectionStore(str(tmp_path / "sections.sqlite")) as store:
+        store.add_many(PAPERS)
+        yield store
+
+
+class TestSectionStore:
+    """Tests for SectionStore"""
+
+    def test_stores_papers_and_sections(self, store):
+        """Test that papers, sections, offsets and extra fields are stored"""
+        assert len(store) == 2
+        rows = store.conn.execute(
+            "SELECT s.name, s.start_offset, s.end_offset FROM sections s "
+            "JOIN papers p ON p.id = s.paper_id WHERE p.key = '/pdfs/a.pdf' "
+            "ORDER BY s.name"
+        ).fetchall()
+        assert rows == [("conclusion", 80, 133), ("introduction", 10, 60)]
+        (triage,) = store.conn.execute(
+            "SELECT triage FROM papers WHERE filename = 'b.pdf'"
+        ).fetchone()
+        assert triage == "ok"
+
+    def test_re_adding_replaces_a_paper(self, store):
+        """Test that a paper stored again replaces its old sections"""
+        store.add_many(
+            [("/pdfs/a.pdf", paper("a.pdf", conclusion="Graphene was the answer."))]
+        )
+        assert len(store) == 2
+        assert store.query("catalyst") == []
+        assert [m.filename for m in store.query("graphene")] == ["a.pdf"]
+
+    def test_commits_in_batches(self, tmp_path):
+        """Test that every paper is stored when batches are smaller than input"""
+        items = [
+            (f"/pdfs/{n}.pdf", paper(f"{n}.pdf", conclusion=f"Paper number {n}."))
+            for n in range(7)
+        ]
+        with SectionStore(str(tmp_path / "s.sqlite")) as store:
+            assert store.add_many(items, batch_size=3) == 7
+            assert len(store) == 7
+            assert not store.conn.in_transaction
+
+    def test_failed_batch_is_rolled_back(self, tmp_path):
+        """Test that an error rolls back the unfinished batch only"""
+
+        def items():
+            yield "/pdfs/a.pdf", paper("a.pdf", conclusion="First paper.")
+            yield "/pdfs/b.pdf", paper("b.pdf", conclusion="Second paper.")
+            raise RuntimeError("interrupted")
+
+        with SectionStore(str(tmp_path / "s.sqlite")) as store:
+            with pytest.raises(RuntimeError):
+                store.add_many(items(), batch_size=1)
+            assert len(store) == 2
+            assert not store.conn.in_transaction
+
+    def test_query_ranks_and_highlights(self, store):
+        """Test that matches are ranked and the snippet marks the match"""
+        matches = store.query("climate")
+        assert {m.filename for m in matches} == {"b.pdf"}
+        assert matches[0].rank <= matches[-1].rank
+        assert "**Climate**" in matches[0].snippet
+
+    def test_query_uses_stemming(self, store):
+        """Test that word forms match through the porter stemmer"""
+        assert {m.section for m in store.query("catalysts")} == {
+            "introduction",
+            "conclusion",
+        }
+
+    def test_section_filter(self, store):
+        """Test that a section filter limits matches to that section"""
+        matches = store.query("catalyst", section="conclusion")
+        assert [(m.filename, m.section, m.doi) for m in matches] == [
+            ("a.pdf", "conclusion", "10.1000/a")
+        ]
+
+    def test_invalid_query_falls_back_to_words(self, store):
+        """Test that text that is not valid FTS5 syntax is searched as words"""
+        assert [m.filename for m in store.query('climate "model')] == ["b.pdf"] * 2
+        assert store.query("((") == []
+
+
+class TestHelpers:
+    """Tests for module helpers"""
+
+    def test_store_path_for(self):
+        """Test that the store sits next to the JSON output"""
+        assert store_path_for("pdfs/extracted_sections.json") == (
+            "pdfs/extracted_sections.sqlite"
+        )
+
+    def test_quote_terms(self):
+        """Test that free text becomes quoted words"""
+        assert quote_terms('climate "model (x') == '"climate" "model" "x"'
+
+
+class TestMain:
+    """Tests for the query command line"""
+
+    def test_prints_matches(self, store, capsys):
+        """Test that matches are listed with their DOI and timing"""
+        assert main(["catalyst", "--db", store.path, "--section", "conclusion"]) == 0
+        out = capsys.readouterr().out
+        assert "1. a.pdf [conclusion] — https://doi.org/10.1000/a" in out
+        assert "1 match(es) in" in out
+
+    def test_json_output(self, store, capsys):
+        """Test that --json prints the matches as JSON"""
+        assert main(["climate", "--db", store.path, "--json", "--limit", "1"]) == 0
+        matches = json.loads(capsys.readouterr().out)
+        assert len(matches) == 1
+        assert matches[0]["filename"] == "b.pdf"
+
+    def test_missing_store_fails(self, tmp_path, capsys):
+        """Test that a missing database returns an error code"""
+        assert main(["x", "--db", str(tmp_path / "missing.sqlite")]) == 1
+        assert "No SQLite store" in capsys.readouterr().out
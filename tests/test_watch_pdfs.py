@@ -0,0 +1,287 @@
+"""
+Tests for watch_pdfs.py
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from watch_pdfs import (
+    Debouncer,
+    InotifyWatcher,
+    PollingWatcher,
+    WatchSession,
+    append_jsonl,
+    load_existing_results,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_process(filepath):
+    """Stand-in for process_pdf that avoids PDF conversion"""
+    return {
+        "filename": os.path.basename(filepath),
+        "introduction": "Introduction text",
+    }
+
+
+def crash_on_bad(filepath):
+    """Like fake_process, but the worker process dies on bad.pdf"""
+    if os.path.basename(filepath) == "bad.pdf":
+        os._exit(9)
+    return fake_process(filepath)
+
+
+def make_pool(workers):
+    """Process pool factory for WatchSession"""
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+class TestDebouncer:
+    """Tests for Debouncer"""
+
+    def test_ready_after_quiet_period(self, tmp_path):
+        """Test that a stable file is released after the quiet period"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4 data")
+        clock = FakeClock()
+        debouncer = Debouncer(str(tmp_path), quiet_period=2.0, clock=clock)
+
+        debouncer.touch(["a.pdf"])
+        assert debouncer.ready() == []
+
+        clock.now = 2.5
+        assert debouncer.ready() == ["a.pdf"]
+        assert len(debouncer) == 0
+
+    def test_growing_file_is_held_back(self, tmp_path):
+        """Test that a file still being written restarts the quiet period"""
+        pdf = tmp_path / "a.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        clock = FakeClock()
+        debouncer = Debouncer(str(tmp_path), quiet_period=2.0, clock=clock)
+        debouncer.touch(["a.pdf"])
+
+        clock.now = 1.5
+        pdf.write_bytes(b"%PDF-1.4 more data written")
+        assert debouncer.ready() == []
+
+        clock.now = 3.0
+        assert debouncer.ready() == []
+
+        clock.now = 4.0
+        assert debouncer.ready() == ["a.pdf"]
+
+    def test_empty_file_is_held_back(self, tmp_path):
+        """Test that zero-byte files are not released"""
+        (tmp_path / "a.pdf").write_bytes(b"")
+        clock = FakeClock()
+        debouncer = Debouncer(str(tmp_path), quiet_period=1.0, clock=clock)
+        debouncer.touch(["a.pdf"])
+
+        clock.now = 10.0
+        assert debouncer.ready() == []
+
+    def test_deleted_file_is_dropped(self, tmp_path):
+        """Test that files removed before settling are forgotten"""
+        pdf = tmp_path / "a.pdf"
+        pdf.write_bytes(b"%PDF")
+        debouncer = Debouncer(str(tmp_path), quiet_period=1.0, clock=FakeClock())
+        debouncer.touch(["a.pdf"])
+        pdf.unlink()
+
+        assert debouncer.ready() == []
+        assert len(debouncer) == 0
+
+
+class TestPollingWatcher:
+    """Tests for PollingWatcher"""
+
+    def test_detects_new_and_modified_pdfs(self, tmp_path):
+        """Test that new and modified PDFs are reported, other files ignored"""
+        existing = tmp_path / "old.pdf"
+        existing.write_bytes(b"old")
+        watcher = PollingWatcher(str(tmp_path))
+
+        (tmp_path / "new.pdf").write_bytes(b"new")
+        (tmp_path / "notes.txt").write_text("ignored")
+        existing.write_bytes(b"old but longer")
+
+        assert watcher.poll(0) == {"new.pdf", "old.pdf"}
+        assert watcher.poll(0) == set()
+
+
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify not available")
+class TestInotifyWatcher:
+    """Tests for InotifyWatcher"""
+
+    def test_detects_written_pdf(self, tmp_path):
+        """Test that writing a PDF produces an event"""
+        watcher = InotifyWatcher(str(tmp_path))
+        try:
+            (tmp_path / "paper.pdf").write_bytes(b"%PDF-1.4")
+            (tmp_path / "notes.txt").write_text("ignored")
+            assert watcher.poll(1.0) == {"paper.pdf"}
+        finally:
+            watcher.close()
+
+
+class TestIncrementalOutput:
+    """Tests for JSONL appends and loading previous results"""
+
+    def test_append_jsonl(self, tmp_path):
+        """Test that each result becomes one JSON line"""
+        jsonl = tmp_path / "out.jsonl"
+        append_jsonl({"filename": "a.pdf"}, str(jsonl))
+        append_jsonl({"filename": "b.pdf"}, str(jsonl))
+
+        lines = jsonl.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["filename"] for line in lines] == ["a.pdf", "b.pdf"]
+
+    def test_load_existing_results(self, tmp_path):
+        """Test that previous results are keyed by filename"""
+        output = tmp_path / "out.json"
+        output.write_text(json.dumps([{"filename": "a.pdf"}]), encoding="utf-8")
+
+        assert load_existing_results(str(output)) == {"a.pdf": {"filename": "a.pdf"}}
+
+    def test_load_existing_results_reads_jsonl(self, tmp_path):
+        """Test that results appended after the last JSON write are loaded"""
+        output = tmp_path / "out.json"
+        output.write_text(json.dumps([{"filename": "a.pdf", "v": 1}]))
+        append_jsonl({"filename": "a.pdf", "v": 2}, str(tmp_path / "out.jsonl"))
+        append_jsonl({"filename": "b.pdf"}, str(tmp_path / "out.jsonl"))
+        with open(tmp_path / "out.jsonl", "a") as f:
+            f.write('{"filename": "c.p')  # Cut short by a killed watcher
+
+        results = load_existing_results(str(output))
+        assert results == {
+            "a.pdf": {"filename": "a.pdf", "v": 2},
+            "b.pdf": {"filename": "b.pdf"},
+        }
+
+    def test_load_existing_results_missing_file(self, tmp_path):
+        """Test that a missing output file yields no results"""
+        assert load_existing_results(str(tmp_path / "missing.json")) == {}
+
+
+class TestWatchSession:
+    """Tests for WatchSession"""
+
+    def test_new_pdf_is_extracted_and_written(self, tmp_path):
+        """Test end-to-end handling of a PDF dropped into the folder"""
+        output = tmp_path / "extracted_sections.json"
+        watcher = PollingWatcher(str(tmp_path))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            session = WatchSession(
+                str(tmp_path),
+                str(output),
+                executor,
+                watcher,
+                quiet_period=0,
+                process_fn=fake_process,
+            )
+            (tmp_path / "paper.pdf").write_bytes(b"%PDF-1.4")
+            session.step(0)
+            session.drain()
+
+        results = json.loads(output.read_text(encoding="utf-8"))
+        assert [paper["filename"] for paper in results] == ["paper.pdf"]
+        jsonl = (tmp_path / "extracted_sections.jsonl").read_text(encoding="utf-8")
+        assert json.loads(jsonl.splitlines()[0])["filename"] == "paper.pdf"
+        assert (tmp_path / "extracted_sections.md").exists()
+
+    def test_queue_unprocessed_skips_known_files(self, tmp_path):
+        """Test that PDFs already in the output are not requeued on startup"""
+        (tmp_path / "done.pdf").write_bytes(b"%PDF-1.4")
+        (tmp_path / "todo.pdf").write_bytes(b"%PDF-1.4")
+        output = tmp_path / "extracted_sections.json"
+        output.write_text(json.dumps([{"filename": "done.pdf"}]), encoding="utf-8")
+        os.utime(tmp_path / "done.pdf", (0, 0))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            session = WatchSession(
+                str(tmp_path),
+                str(output),
+                executor,
+                PollingWatcher(str(tmp_path)),
+                quiet_period=0,
+                process_fn=fake_process,
+            )
+            assert session.queue_unprocessed() == 1
+            session.drain()
+
+        results = json.loads(output.read_text(encoding="utf-8"))
+        assert sorted(paper["filename"] for paper in results) == [
+            "done.pdf",
+            "todo.pdf",
+        ]
+
+    def test_outputs_rebuilt_on_drain_only(self, tmp_path):
+        """Test that results go to the JSONL at once and the JSON on drain"""
+        output = tmp_path / "extracted_sections.json"
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            session = WatchSession(
+                str(tmp_path),
+                str(output),
+                executor,
+                PollingWatcher(str(tmp_path)),
+                quiet_period=0,
+                process_fn=fake_process,
+            )
+            (tmp_path / "paper.pdf").write_bytes(b"%PDF-1.4")
+            session.step(0)
+            while session._in_flight:
+                session.step(0.01)
+            assert (tmp_path / "extracted_sections.jsonl").exists()
+            assert not output.exists()
+            session.drain()
+        assert output.exists()
+
+    def test_worker_crash_quarantines_only_culprit(self, tmp_path):
+        """Test that a PDF killing its worker is quarantined and the watch goes on"""
+        output = tmp_path / "extracted_sections.json"
+        for name in ["a.pdf", "bad.pdf", "c.pdf"]:
+            (tmp_path / name).write_bytes(b"%PDF-1.4")
+        session = WatchSession(
+            str(tmp_path),
+            str(output),
+            make_pool(2),
+            PollingWatcher(str(tmp_path)),
+            quiet_period=0,
+            process_fn=crash_on_bad,
+            make_pool=make_pool,
+            workers=2,
+        )
+        try:
+            assert session.queue_unprocessed() == 3
+            session.drain()
+            (tmp_path / "d.pdf").write_bytes(b"%PDF-1.4")
+            session.step(0)
+            session.drain()
+        finally:
+            session.executor.shutdown(wait=True)
+
+        results = json.loads(output.read_text(encoding="utf-8"))
+        assert sorted(paper["filename"] for paper in results) == [
+            "a.pdf",
+            "c.pdf",
+            "d.pdf",
+        ]
+        quarantine = json.loads(
+            (tmp_path / "extracted_sections.quarantine.json").read_text()
+        )
+        assert [(e["filename"], e["error_class"]) for e in quarantine] == [
+            ("bad.pdf", "oom")
+        ]
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Watch a PDF folder and extract sections from papers as they arrive.
+
+New or modified PDFs are detected with inotify (Linux) or by polling the
+directory, debounced until the file has stopped changing, and queued into a
+worker pool. Each finished paper is appended to a JSONL file immediately, so
+a new paper shows up in seconds without reprocessing the rest of the folder;
+the JSON/Markdown outputs are rebuilt from all results when the watcher
+stops. A PDF that crashes a worker process is quarantined on its own and
+the watcher carries on.
+
+Usage:
+    python watch_pdfs.py --pdf-dir pdfs
+    python watch_pdfs.py --pdf-dir pdfs --workers 4 --polling
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from extract_sections import (
+    PaperExtractor,
+    extract_in_worker,
+    found_section_keys,
+    resolve_output_path,
+    write_results,
+)
+from pdf_failures import Quarantine, run_alone
+
+# inotify event flags (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+DEFAULT_QUIET_PERIOD = 2.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+FileState = Tuple[int, int]  # (size, mtime_ns)
+
+
+def is_pdf(name: str) -> bool:
+    """Return True for file names with a .pdf extension."""
+    return name.lower().endswith(".pdf")
+
+
+def snapshot_pdfs(pdf_dir: str) -> Dict[str, FileState]:
+    """Return a mapping of PDF file name to (size, mtime_ns) for a directory."""
+    states: Dict[str, FileState] = {}
+    with os.scandir(pdf_dir) as entries:
+        for entry in entries:
+            if not is_pdf(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            states[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return states
+
+
+class PollingWatcher:
+    """Detect new or modified PDFs by comparing directory snapshots."""
+
+    def __init__(self, pdf_dir: str):
+        self.pdf_dir = pdf_dir
+        self._states = snapshot_pdfs(pdf_dir)
+
+    def poll(self, timeout: float) -> Set[str]:
+        """Wait up to timeout seconds and return names of changed PDFs."""
+        time.sleep(timeout)
+        current = snapshot_pdfs(self.pdf_dir)
+        changed = {
+            name for name, state in current.items() if self._states.get(name) != state
+        }
+        self._states = current
+        return changed
+
+    def close(self) -> None:
+        """Release watcher resources (nothing to do for polling)."""
+
+
+class InotifyWatcher:
+    """Detect new or modified PDFs with Linux inotify via ctypes."""
+
+    def __init__(self, pdf_dir: str):
+        self.pdf_dir = pdf_dir
+        libc = self._load_libc()
+        if libc is None:
+            raise OSError("inotify is not available on this platform")
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(pdf_dir), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {pdf_dir}")
+        self._buffer = b""
+
+    @staticmethod
+    def _load_libc():
+        if not sys.platform.startswith("linux"):
+            return None
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+        except OSError:
+            return None
+        if not hasattr(libc, "inotify_init1"):
+            return None
+        return libc
+
+    @classmethod
+    def available(cls) -> bool:
+        """Return True if inotify can be used on this system."""
+        return cls._load_libc() is not None
+
+    def poll(self, timeout: float) -> Set[str]:
+        """Wait up to timeout seconds and return names of changed PDFs."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed: Set[str] = set()
+        while True:
+            try:
+                chunk = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            self._buffer += chunk
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(self._buffer):
+            _wd, mask, _cookie, length = EVENT_HEADER.unpack_from(self._buffer, offset)
+            end = offset + EVENT_HEADER.size + length
+            if end > len(self._buffer):
+                break
+            raw_name = self._buffer[offset + EVENT_HEADER.size : end]
+            offset = end
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; fall back to a full rescan
+                changed.update(snapshot_pdfs(self.pdf_dir))
+                continue
+            name = os.fsdecode(raw_name.rstrip(b"\0"))
+            if name and is_pdf(name):
+                changed.add(name)
+        self._buffer = self._buffer[offset:]
+        return changed
+
+    def close(self) -> None:
+        """Close the inotify file descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class Debouncer:
+    """
+    Hold back files until their size and mtime have been stable for a quiet
+    period, so PDFs that are still being copied are not processed half-written.
+    """
+
+    def __init__(
+        self,
+        pdf_dir: str,
+        quiet_period: float = DEFAULT_QUIET_PERIOD,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.pdf_dir = pdf_dir
+        self.quiet_period = quiet_period
+        self._clock = clock
+        self._pending: Dict[str, Tuple[Optional[FileState], float]] = {}
+
+    def touch(self, names: Iterable[str]) -> None:
+        """Register files that have just been reported as changed."""
+        now = self._clock()
+        for name in names:
+            self._pending[name] = (self._stat(name), now)
+
+    def ready(self) -> List[str]:
+        """Return files whose state has not changed for the quiet period."""
+        now = self._clock()
+        ready: List[str] = []
+        for name, (last_state, last_change) in list(self._pending.items()):
+            state = self._stat(name)
+            if state is None:
+                # File vanished (renamed or deleted) before it settled
+                del self._pending[name]
+                continue
+            if state != last_state:
+                self._pending[name] = (state, now)
+                continue
+            if state[0] > 0 and now - last_change >= self.quiet_period:
+                ready.append(name)
+                del self._pending[name]
+        return sorted(ready)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def settling(self) -> int:
+        """Return how many pending files have data and are waiting to settle."""
+        return sum(
+            1 for state, _ in self._pending.values() if state is not None and state[0]
+        )
+
+    def _stat(self, name: str) -> Optional[FileState]:
+        try:
+            stat = os.stat(os.path.join(self.pdf_dir, name))
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+
+def append_jsonl(result: dict, jsonl_path: str) -> None:
+    """Append one extraction result as a line to a JSONL file."""
+    with open(jsonl_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        f.flush()
+
+
+def jsonl_path_for(output_path: str) -> str:
+    """Return the JSONL file that results are appended to as they finish."""
+    return os.path.splitext(output_path)[0] + ".jsonl"
+
+
+def load_existing_results(output_path: str) -> Dict[str, dict]:
+    """
+    Load previously written results keyed by filename, if any: the JSON
+    output, updated by the results appended to the JSONL file after it was
+    last written (a later line wins).
+    """
+    results: Dict[str, dict] = {}
+    if os.path.exists(output_path):
+        try:
+            with open(output_path, "r", encoding="utf-8") as f:
+                papers = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠ Could not read existing results {output_path}: {e}")
+        else:
+            results = {p["filename"]: p for p in papers if "filename" in p}
+
+    jsonl_path = jsonl_path_for(output_path)
+    if os.path.exists(jsonl_path):
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    paper = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Cut short when a previous watcher was killed
+                if "filename" in paper:
+                    results[paper["filename"]] = paper
+    return results
+
+
+def default_pool(workers: int) -> Executor:
+    """Create a plain process pool of the given size."""
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+class WatchSession:
+    """
+    Queue settled PDFs into a worker pool and record results as they finish.
+
+    Each result is appended to the JSONL file at once; the JSON/Markdown
+    outputs are rebuilt from all results by write_outputs(), which drain()
+    calls, rather than after every file. A PDF that kills a worker process
+    breaks the pool: the pool is replaced with make_pool(workers), the PDFs
+    that were in flight are retried one at a time, and only the one that
+    kills a worker on its own is quarantined. Failed PDFs are recorded in
+    the quarantine next to the output and are not requeued on startup
+    unless they have changed since.
+    """
+
+    def __init__(
+        self,
+        pdf_dir: str,
+        output_path: str,
+        executor: Executor,
+        watcher,
+        quiet_period: float = DEFAULT_QUIET_PERIOD,
+        process_fn: Callable[[str], dict] = extract_in_worker,
+        make_pool: Callable[[int], Executor] = default_pool,
+        workers: int = 1,
+    ):
+        self.pdf_dir = pdf_dir
+        self.output_path = output_path
+        self.jsonl_path = jsonl_path_for(output_path)
+        self.executor = executor
+        self.make_pool = make_pool
+        self.workers = workers
+        self.watcher = watcher
+        self.debouncer = Debouncer(pdf_dir, quiet_period)
+        self.process_fn = process_fn
+        self.results = load_existing_results(output_path)
+        self.quarantine = Quarantine.for_output(output_path)
+        self.quarantine.load()
+        self._in_flight: Dict[Future, Tuple[str, float]] = {}
+        self._unwritten = False
+
+    def queue_unprocessed(self) -> int:
+        """
+        Queue PDFs that are missing from, or newer than, the existing output,
+        except quarantined PDFs that have not changed since they failed.
+        """
+        output_mtime = max(_mtime_ns(self.output_path), _mtime_ns(self.jsonl_path))
+        failed_mtime = _mtime_ns(self.quarantine.path)
+        pending = []
+        for name, (_size, mtime) in snapshot_pdfs(self.pdf_dir).items():
+            if self._path(name) in self.quarantine and mtime <= failed_mtime:
+                continue
+            if name not in self.results or mtime > output_mtime:
+                pending.append(name)
+        self.debouncer.touch(pending)
+        return len(pending)
+
+    def step(self, timeout: float) -> int:
+        """Run one watch iteration. Returns the number of results written."""
+        self.debouncer.touch(self.watcher.poll(timeout))
+        for name in self.debouncer.ready():
+            self._submit(name)
+        return self._collect()
+
+    def drain(self) -> int:
+        """
+        Wait for all queued and in-flight files to finish, then rebuild the
+        JSON/Markdown outputs.
+        """
+        written = 0
+        while self._in_flight or self.debouncer.settling():
+            written += self.step(DEFAULT_POLL_INTERVAL / 10)
+        self.write_outputs()
+        return written
+
+    def write_outputs(self) -> None:
+        """Rewrite the JSON/Markdown outputs if results arrived since the last write."""
+        if self._unwritten:
+            write_results(list(self.results.values()), self.output_path)
+            self._unwritten = False
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.pdf_dir, name)
+
+    def _submit(self, name: str) -> None:
+        print(f"Queued {name}")
+        started = time.monotonic()
+        try:
+            future = self.executor.submit(self.process_fn, self._path(name))
+        except BrokenProcessPool:
+            self._recover([(name, started)])
+            return
+        self._in_flight[future] = (name, started)
+
+    def _collect(self) -> int:
+        written = 0
+        suspects = []
+        for future in [f for f in self._in_flight if f.done()]:
+            name, started = self._in_flight.pop(future)
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                suspects.append((name, started))
+                continue
+            written += self._finish(name, started, future.result(), error)
+        if suspects:
+            written += self._recover(suspects)
+        return written
+
+    def _finish(
+        self, name: str, started: float, result: Any, error: Optional[BaseException]
+    ) -> int:
+        """Record one PDF's outcome; returns 1 if a result was written."""
+        if error is not None:
+            entry = self.quarantine.add(self._path(name), error)
+            print(f"  Error processing {name} [{entry['error_class']}]: {error}")
+            return 0
+        self.results[name] = result
+        append_jsonl(result, self.jsonl_path)
+        self.quarantine.remove(self._path(name))
+        self._unwritten = True
+        print(
+            f"  Extracted {name} in {time.monotonic() - started:.1f}s, "
+            f"sections: {found_section_keys(result)}"
+        )
+        return 1
+
+    def _recover(self, suspects: List[Tuple[str, float]]) -> int:
+        """
+        Replace a pool broken by a dead worker, retrying every PDF it lost
+        one at a time so that only the one that kills a worker fails.
+        """
+        # Shutting down a broken pool settles every future it still holds
+        self.executor.shutdown(wait=True)
+        for future, (name, started) in list(self._in_flight.items()):
+            if isinstance(future.exception(), BrokenProcessPool):
+                del self._in_flight[future]
+                suspects.append((name, started))
+        print(
+            f"⚠ A worker process died; retrying {len(suspects)} PDF(s) "
+            "one at a time to find the cause"
+        )
+        started_at = dict(suspects)
+
+        def submit(pool: Executor, name: str) -> Future:
+            return pool.submit(self.process_fn, self._path(name))
+
+        written = 0
+        for name, result, error in run_alone(self.make_pool, submit, list(started_at)):
+            written += self._finish(name, started_at[name], result, error)
+        self.executor = self.make_pool(self.workers)
+        return written
+
+
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return -1
+
+
+def watch(
+    pdf_dir: str,
+    output_file: str,
+    workers: int = 2,
+    quiet_period: float = DEFAULT_QUIET_PERIOD,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    use_polling: bool = False,
+    extractor: Optional[PaperExtractor] = None,
+) -> None:
+    """Watch pdf_dir until interrupted, extracting PDFs as they settle."""
+    output_path = resolve_output_path(pdf_dir, output_file)
+
+    watcher: Union[InotifyWatcher, PollingWatcher]
+    if not use_polling and InotifyWatcher.available():
+        watcher = InotifyWatcher(pdf_dir)
+        mode = "inotify"
+    else:
+        watcher = PollingWatcher(pdf_dir)
+        mode = f"polling every {poll_interval:g}s"
+
+    extractor = extractor or PaperExtractor()
+    session = WatchSession(
+        pdf_dir,
+        output_path,
+        extractor.worker_pool(workers),
+        watcher,
+        quiet_period,
+        make_pool=extractor.worker_pool,
+        workers=workers,
+    )
+    queued = session.queue_unprocessed()
+    print(f"Watching {pdf_dir} ({mode}, {workers} worker(s))")
+    print(f"Results are appended to {session.jsonl_path} as they finish")
+    if queued:
+        print(f"Queued {queued} unprocessed PDF(s) from a previous run")
+    try:
+        while True:
+            session.step(poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopping watcher, finishing in-flight files...")
+        session.drain()
+    finally:
+        session.write_outputs()
+        session.executor.shutdown(wait=True)
+        watcher.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for watch mode."""
+    parser = argparse.ArgumentParser(
+        description="Watch a folder and extract sections from PDFs as they arrive."
+    )
+    parser.add_argument(
+        "--pdf-dir", default="pdfs", help="Directory to watch for PDF files."
+    )
+    parser.add_argument(
+        "--output",
+        default="extracted_sections.json",
+        help="JSON output file (placed inside --pdf-dir if no directory is given).",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=2, help="Number of worker processes."
+    )
+    parser.add_argument(
+        "--quiet-period",
+        type=float,
+        default=DEFAULT_QUIET_PERIOD,
+        help="Seconds a file must stay unchanged before it is processed.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="Seconds between directory scans in polling mode.",
+    )
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="Force polling even when inotify is available.",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.pdf_dir):
+        print(f"Error: Directory {args.pdf_dir} does not exist.")
+        return 1
+
+    watch(
+        args.pdf_dir,
+        args.output,
+        workers=args.workers,
+        quiet_period=args.quiet_period,
+        poll_interval=args.poll_interval,
+        use_polling=args.polling,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())